@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ausführung von Buchstabenänderungen im Hintergrund
+==================================================
+
+Führt die Schritte eines ``letter_planner.LetterPlan`` ohne Dialoge aus und
+sammelt für jeden Schritt ein typisiertes Ergebnis (``StepOutcome``).
+
+Schlägt ein Schritt fehl, weil das Laufwerk gerade belegt ist ("Zugriff
+verweigert", "wird verwendet"), ist das meist nach wenigen Sekunden vorbei.
+Solche Schritte kommen in eine Wiederholungsschlange: Nach einer mit jedem
+Versuch wachsenden Wartezeit werden sie erneut ausgeführt, zusammen mit den
+späteren fehlgeschlagenen Schritten, die von ihnen abhängen können (z.B. die
+übrigen Glieder einer Rotation). Nach Ablauf der Frist gelten sie als
+STATUS_BUSY. Am Ende steht ein einziger ``ApplyReport``.
+
+``ApplyExecutor`` führt das in einem Worker-Thread aus; die Oberfläche fragt
+Fortschritt und Ergebnis per ``root.after`` ab.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Set
+
+import diskpart
+from letter_planner import PlanStep
+
+
+# Status eines Schritts im Bericht
+STATUS_APPLIED = "applied"
+STATUS_UNCLEAR = "unclear"
+STATUS_FAILED = "failed"
+STATUS_BUSY = "busy"  # Laufwerk war bis zur Frist belegt
+
+# Fehlerklassen, die sich meist von selbst erledigen und einen neuen Versuch lohnen
+RETRYABLE_ERRORS = {diskpart.ERROR_ACCESS_DENIED, diskpart.ERROR_IN_USE}
+
+ApplyFunc = Callable[[List[diskpart.DiskpartOperation]], List[diskpart.DiskpartResult]]
+
+
+@dataclass
+class StepOutcome:
+    """Endergebnis eines Schritts."""
+
+    step: PlanStep
+    status: str
+    result: diskpart.DiskpartResult
+    attempts: int = 1
+
+
+@dataclass
+class ApplyProgress:
+    """Zwischenstand während des Wartens auf den nächsten Versuch."""
+
+    sessions: int  # Bisherige diskpart-Sitzungen
+    waiting: List[str]  # Buchstaben der belegten Laufwerke
+    retry_at: float  # Zeitpunkt (time.monotonic) des nächsten Versuchs
+
+    @property
+    def retry_in(self) -> float:
+        """Sekunden bis zum nächsten Versuch."""
+        return max(0.0, self.retry_at - time.monotonic())
+
+
+@dataclass
+class ApplyReport:
+    """Zusammenfassung eines Ausführungslaufs."""
+
+    outcomes: List[StepOutcome] = field(default_factory=list)
+    sessions: int = 0
+    duration: float = 0.0
+    cancelled: bool = False
+    # Unerwarteter Fehler, der die Ausführung abgebrochen hat
+    error: Optional[Exception] = None
+
+    def by_status(self, status: str) -> List[StepOutcome]:
+        return [outcome for outcome in self.outcomes if outcome.status == status]
+
+    def failed_sources(self) -> Set[str]:
+        """Ursprüngliche Buchstaben der Laufwerke, bei denen mindestens ein Schritt nicht gewirkt hat."""
+        return {outcome.step.source for outcome in self.outcomes
+                if outcome.status in (STATUS_FAILED, STATUS_BUSY)}
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and all(outcome.status == STATUS_APPLIED for outcome in self.outcomes)
+
+
+def outcome_status(result: diskpart.DiskpartResult) -> str:
+    """Ordnet ein diskpart-Ergebnis einem Status zu."""
+    if result.success:
+        return STATUS_UNCLEAR if result.unclear else STATUS_APPLIED
+    if result.error_kind in RETRYABLE_ERRORS:
+        return STATUS_BUSY
+    return STATUS_FAILED
+
+
+def retry_positions(results: List[diskpart.DiskpartResult]) -> List[int]:
+    """
+    Liefert die Positionen der Schritte, die wiederholt werden sollen.
+
+    Das sind der erste Schritt mit belegtem Laufwerk und alle danach
+    fehlgeschlagenen Schritte, denn diese können an ihm gescheitert sein (z.B.
+    "Buchstabe bereits vergeben", weil das belegte Laufwerk ihn noch trägt).
+    Fehler davor sind endgültig.
+    """
+    first = next((position for position, result in enumerate(results)
+                  if outcome_status(result) == STATUS_BUSY), None)
+    if first is None:
+        return []
+    return [position for position in range(first, len(results))
+            if not results[position].success]
+
+
+def execute(steps: List[PlanStep], operations: List[diskpart.DiskpartOperation],
+            apply_func: ApplyFunc = diskpart.apply_operations, retry_delay: float = 2.0,
+            backoff: float = 2.0, max_delay: float = 15.0, deadline: float = 60.0,
+            cancelled: Optional[threading.Event] = None,
+            progress: Optional[Callable[[ApplyProgress], None]] = None) -> ApplyReport:
+    """
+    Führt die Schritte aus und wiederholt Schritte mit belegtem Laufwerk bis zur Frist.
+
+    Args:
+        steps (List[PlanStep]): Schritte in Ausführungsreihenfolge
+        operations (List[diskpart.DiskpartOperation]): Zugehörige diskpart-Operationen (gleiche Reihenfolge)
+        apply_func (ApplyFunc): Führt Operationen in einer Sitzung aus
+        retry_delay (float): Wartezeit vor dem ersten neuen Versuch in Sekunden
+        backoff (float): Faktor, um den die Wartezeit nach jedem Versuch wächst
+        max_delay (float): Höchste Wartezeit zwischen zwei Versuchen
+        deadline (float): Nach so vielen Sekunden ab Beginn wird nicht mehr wiederholt
+        cancelled (Optional[threading.Event]): Gesetzt = keine weiteren Versuche
+        progress (Optional[Callable]): Wird vor jedem Warten mit dem Zwischenstand aufgerufen
+
+    Returns:
+        ApplyReport: Ein Ergebnis pro Schritt, in Plan-Reihenfolge
+    """
+    cancelled = cancelled or threading.Event()
+    started = time.monotonic()
+    report = ApplyReport()
+    outcomes: List[Optional[StepOutcome]] = [None] * len(steps)
+    pending = list(range(len(steps)))
+    delay = retry_delay
+
+    while pending:
+        results = apply_func([operations[index] for index in pending])
+        report.sessions += 1
+        for index, result in zip(pending, results):
+            attempts = outcomes[index].attempts + 1 if outcomes[index] is not None else 1
+            outcomes[index] = StepOutcome(steps[index], outcome_status(result), result, attempts)
+
+        retry = [pending[position] for position in retry_positions(results)]
+        if not retry or time.monotonic() + delay - started > deadline:
+            break
+        if progress is not None:
+            busy = [steps[index].old_letter for index in retry if outcomes[index].status == STATUS_BUSY]
+            progress(ApplyProgress(report.sessions, busy, time.monotonic() + delay))
+        if cancelled.wait(delay):
+            report.cancelled = True
+            break
+        delay = min(delay * backoff, max_delay)
+        pending = retry
+
+    report.outcomes = [outcome for outcome in outcomes if outcome is not None]
+    report.duration = time.monotonic() - started
+    return report
+
+
+class ApplyExecutor:
+    """Führt einen Plan in einem Worker-Thread aus; Fortschritt und Bericht werden abgefragt."""
+
+    def __init__(self, apply_func: Optional[ApplyFunc] = None, retry_delay: float = 2.0,
+                 backoff: float = 2.0, max_delay: float = 15.0, deadline: float = 60.0):
+        """
+        Args:
+            apply_func (Optional[ApplyFunc]): Führt Operationen aus; Standard ist diskpart.apply_operations
+            retry_delay, backoff, max_delay, deadline: Siehe execute()
+        """
+        self.apply_func = apply_func or diskpart.apply_operations
+        self.retry_delay = retry_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self._reports: queue.Queue = queue.Queue()
+        self._progress: Optional[ApplyProgress] = None
+        self._cancelled = threading.Event()
+        self._running = False
+
+    @property
+    def busy(self) -> bool:
+        """True, solange ein Lauf aussteht, dessen Bericht noch nicht abgeholt wurde."""
+        return self._running
+
+    @property
+    def progress(self) -> Optional[ApplyProgress]:
+        """Letzter Zwischenstand; None, solange noch nicht gewartet wurde."""
+        return self._progress
+
+    def start(self, steps: List[PlanStep], operations: List[diskpart.DiskpartOperation]):
+        """
+        Startet die Ausführung im Hintergrund.
+
+        Raises:
+            RuntimeError: Wenn bereits ein Lauf aussteht
+        """
+        if self._running:
+            raise RuntimeError("Es werden bereits Änderungen ausgeführt.")
+        self._running = True
+        self._progress = None
+        self._cancelled.clear()
+        thread = threading.Thread(target=self._run, args=(list(steps), list(operations)),
+                                  name="apply-executor", daemon=True)
+        thread.start()
+
+    def cancel(self):
+        """Verzichtet auf weitere Versuche; eine laufende diskpart-Sitzung wird noch abgeschlossen."""
+        self._cancelled.set()
+
+    def poll(self) -> Optional[ApplyReport]:
+        """Liefert den Bericht, sobald der Lauf fertig ist (aus dem Tk-Thread aufrufen)."""
+        try:
+            report = self._reports.get_nowait()
+        except queue.Empty:
+            return None
+        self._running = False
+        return report
+
+    def _run(self, steps: List[PlanStep], operations: List[diskpart.DiskpartOperation]):
+        started = time.monotonic()
+        try:
+            report = execute(steps, operations, self.apply_func, self.retry_delay, self.backoff,
+                             self.max_delay, self.deadline, self._cancelled, self._set_progress)
+        except Exception as e:
+            report = ApplyReport(error=e, duration=time.monotonic() - started)
+        self._reports.put(report)
+
+    def _set_progress(self, progress: ApplyProgress):
+        self._progress = progress
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Aktualisierung und Änderung Ende-zu-Ende mit abgespielten Befehlen
+=============================================================================
+
+Spielt PowerShell-, wmic- und diskpart-Aufrufe über command_runner.ReplayRunner
+ab und misst damit die vollständigen Pfade ohne Windows: die gestaffelte
+Ermittlung über default_backends (HedgedEnumerator) und das Ändern über
+apply_executor.execute einschließlich Auswertung der diskpart-Ausgabe.
+
+Ohne --fixture wird ein synthetisches Fixture mit typischen Laufzeiten erzeugt
+(PowerShell 0.8 s plus 0.3 s für Bereitstellungsordner, wmic 0.4 s, diskpart
+1.5 s). Mit --fixture lässt sich eine echte Aufzeichnung (drive_cli.py --record
+DATEI list) abspielen, etwa um einen Bericht "Aktualisieren dauert 20 s"
+nachzustellen; dann entfallen die Änderungsszenarien, sofern das Fixture keine
+passenden diskpart-Aufrufe enthält.
+
+Aufruf:
+    python benchmarks/bench_pipeline.py [--runs 3] [--scale 1.0] [--jitter 0.05] [--seed 1]
+    python benchmarks/bench_pipeline.py --fixture aufzeichnung.json [--hang powershell]
+    python benchmarks/bench_pipeline.py --write-fixture synthetisch.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import apply_executor  # noqa: E402
+import command_runner  # noqa: E402
+import diskpart  # noqa: E402
+import drive_backends  # noqa: E402
+import letter_planner  # noqa: E402
+
+
+VOLUMES = {"C:": "System", "D:": "Daten", "E:": "Backup", "F:": "Medien"}
+ROTATION = {"D:": "E:", "E:": "F:", "F:": "D:"}
+
+SUCCESS_SELECT = "Volume {number} is the selected volume."
+SUCCESS_ASSIGN = "DiskPart successfully assigned the drive letter or mount point."
+IN_USE = "Virtual Disk Service error:\nThe volume is in use."
+
+
+def volume_table(letters):
+    """Erzeugt die Ausgabe von "list volume" für {Volume-Nummer: Buchstabe}."""
+    lines = ["  Volume ###  Ltr  Label        Fs     Type        Size     Status     Info",
+             "  ----------  ---  -----------  -----  ----------  -------  ---------  --------"]
+    labels = list(VOLUMES.values())
+    for number, letter in sorted(letters.items()):
+        lines.append(f"  Volume {number:<3}  {letter[:1]:<3}  {labels[number]:<11}  NTFS   Partition"
+                     f"    931 GB  Healthy")
+    return "\n".join(lines)
+
+
+def initial_rows():
+    """Volume-Tabelle vor den Änderungen, wie diskpart.apply_operations sie liest."""
+    return diskpart.parse_volume_table(volume_table(dict(enumerate(VOLUMES))))
+
+
+def diskpart_output(operations, busy=()):
+    """
+    Erzeugt die Ausgabe einer diskpart-Sitzung für build_script(operations, initial_rows()).
+
+    Operationen, deren Ausgangsbuchstabe in busy steht, scheitern mit "volume is in use";
+    nachfolgende Operationen scheitern, wenn ihr Ziel dadurch noch belegt ist.
+    """
+    current = {number: letter for number, letter in enumerate(VOLUMES)}
+    responses = [volume_table(current)]
+    for operation in operations:
+        number = next((n for n, letter in current.items() if letter == operation.old_letter), None)
+        responses.append(SUCCESS_SELECT.format(number=number))
+        if operation.old_letter in busy:
+            responses.append(IN_USE)
+        elif operation.new_letter in current.values():
+            responses.append("The specified drive letter is already assigned.")
+        else:
+            current[number] = operation.new_letter
+            responses.append(SUCCESS_ASSIGN)
+    responses.append(volume_table(current))
+    responses.append("Leaving DiskPart...")
+    return "Microsoft DiskPart version 10.0.19041.964\n" + "".join(
+        f"{diskpart.DISKPART_PROMPT} {response}\n\n" for response in responses)
+
+
+def rotation_plan():
+    return letter_planner.plan_changes(ROTATION, VOLUMES)
+
+
+def plan_operations(plan):
+    return [diskpart.DiskpartOperation(step.old_letter, step.new_letter, VOLUMES.get(step.source, ""))
+            for step in plan.steps]
+
+
+def synthetic_fixture():
+    """Fixture mit PowerShell-, wmic- und diskpart-Aufzeichnungen (inkl. einer belegten Sitzung)."""
+    records = [{"DeviceID": letter, "VolumeName": label, "VolumeSerialNumber": f"{index + 1:08X}",
+                "FileSystem": "NTFS", "DriveType": 3, "Size": "1000204886016", "FreeSpace": "500000000000"}
+               for index, (letter, label) in enumerate(VOLUMES.items())]
+    # Ein zusätzliches Laufwerk, das nur in einem Ordner bereitgestellt ist
+    mounts = [{"Path": "C:\\Mounts\\Archiv\\", "DeviceID": "\\\\?\\Volume{0005}\\", "DriveLetter": None,
+               "Label": "Archiv", "SerialNumber": 5, "FileSystem": "NTFS", "DriveType": 3,
+               "Size": "4000787030016", "FreeSpace": "1000000000000"}]
+    wmic = "Caption  FreeSpace     Size           VolumeName\r\n" + "".join(
+        f"{letter:<8} 500000000000  1000204886016  {label}\r\n" for letter, label in VOLUMES.items())
+    commands = [
+        {"argv": command_runner.POWERSHELL_ARGV + ["volumes"], "input": None, "returncode": 0,
+         "stdout": json.dumps(records), "stderr": "", "duration": 0.8, "timeout": False},
+        {"argv": command_runner.POWERSHELL_ARGV + ["mounts"], "input": None, "returncode": 0,
+         "stdout": json.dumps(mounts), "stderr": "", "duration": 0.3, "timeout": False},
+        {"argv": ["wmic", "logicaldisk", "get", "size,freespace,caption,volumename"], "input": None,
+         "returncode": 0, "stdout": wmic, "stderr": "", "duration": 0.4, "timeout": False},
+    ]
+
+    operations = plan_operations(rotation_plan())
+    commands.append({"argv": ["diskpart"], "input": diskpart.build_script(operations, initial_rows()), "returncode": 0,
+                     "stdout": diskpart_output(operations), "stderr": "", "duration": 1.5, "timeout": False})
+    # Einzeländerung E: → G:, deren Volume zweimal belegt ist und beim dritten Versuch frei wird
+    busy_operations = [diskpart.DiskpartOperation("E:", "G:", "Backup")]
+    for busy in (("E:",), ("E:",), ()):
+        commands.append({"argv": ["diskpart"], "input": diskpart.build_script(busy_operations, initial_rows()), "returncode": 0,
+                         "stdout": diskpart_output(busy_operations, busy), "stderr": "", "duration": 1.5,
+                         "timeout": False})
+    return {"version": command_runner.FIXTURE_VERSION, "admin": True, "commands": commands}
+
+
+def scenario_refresh(runner):
+    backends = drive_backends.default_backends(runner)
+    try:
+        volumes, backend_name = drive_backends.HedgedEnumerator()(backends)
+    finally:
+        for backend in backends:
+            backend.close()
+    return f"{len(volumes)} Laufwerke über {backend_name}"
+
+
+def scenario_apply_rotation(runner):
+    plan = rotation_plan()
+    report = apply_executor.execute(plan.steps, plan_operations(plan),
+                                    lambda operations: diskpart.apply_operations(operations, runner))
+    return f"{len(report.by_status(apply_executor.STATUS_APPLIED))}/{len(plan.steps)} Schritte angewendet"
+
+
+def scenario_apply_busy(runner):
+    steps = [letter_planner.PlanStep("E:", "G:", "E:")]
+    operations = [diskpart.DiskpartOperation("E:", "G:", "Backup")]
+    report = apply_executor.execute(steps, operations,
+                                    lambda operations: diskpart.apply_operations(operations, runner),
+                                    retry_delay=0.5)
+    outcome = report.outcomes[0]
+    return f"{outcome.status} nach {outcome.attempts} Versuchen"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fixture", metavar="DATEI", help="Aufgezeichnetes Fixture statt des synthetischen")
+    parser.add_argument("--write-fixture", metavar="DATEI", help="Synthetisches Fixture speichern und beenden")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0, help="Faktor für die aufgezeichneten Laufzeiten")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Zufällige Zusatzlatenz bis zu n Sekunden")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hang", action="append", default=[], metavar="BEFEHL",
+                        help="Zusätzlich: Befehle, die BEFEHL enthalten, hängen in allen Szenarien")
+    args = parser.parse_args(argv)
+
+    if args.write_fixture:
+        with open(args.write_fixture, "w", encoding="utf-8") as handle:
+            json.dump(synthetic_fixture(), handle, ensure_ascii=False, indent=2)
+        print(f"Fixture gespeichert: {args.write_fixture}")
+        return 0
+
+    if args.fixture:
+        with open(args.fixture, encoding="utf-8") as handle:
+            fixture = json.load(handle)
+    else:
+        fixture = synthetic_fixture()
+    extra = [command_runner.Fault(match, hang=True) for match in args.hang]
+
+    scenarios = [("refresh", scenario_refresh, []),
+                 ("refresh[powershell hängt]", scenario_refresh, [command_runner.Fault("powershell", hang=True)]),
+                 ("refresh[wmic hängt]", scenario_refresh, [command_runner.Fault("wmic", hang=True)])]
+    if not args.fixture:
+        scenarios += [("apply[rotation 3]", scenario_apply_rotation, []),
+                      ("apply[belegt, 2 Wiederholungen]", scenario_apply_busy, [])]
+
+    for name, scenario, faults in scenarios:
+        durations = []
+        for run in range(args.runs):
+            runner = command_runner.ReplayRunner(fixture["commands"], admin=True, scale=args.scale,
+                                                 jitter=args.jitter, faults=extra + faults, seed=args.seed + run)
+            started = time.perf_counter()
+            try:
+                detail = scenario(runner)
+            except Exception as e:
+                detail = f"Fehler: {e}"
+            durations.append(time.perf_counter() - started)
+        print(f"{name:<34} median {statistics.median(durations):7.3f} s  "
+              f"max {max(durations):7.3f} s   {detail}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Aufbau der Laufwerkstabelle
+======================================
+
+Vergleicht den früheren Komplett-Neuaufbau (je zwei Labels und eine Combobox
+pro Laufwerk, bei jedem Refresh zerstört und neu angelegt) mit der
+virtualisierten Treeview-Tabelle, die nur geänderte Zeilen abgleicht.
+Standardmäßig werden 26 und 1.000 Zeilen gemessen. Ohne Display wird
+benchmarks/fake_tk verwendet; gemessen werden dann die Python-Seite, die
+Anzahl der Tcl-Aufrufe und die neu erzeugten Tk-Objekte.
+
+Aufruf:
+    python benchmarks/bench_refresh_table.py [--drives 26 1000] [--repeat 50] [--real-tk]
+"""
+
+import argparse
+import os
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import drive_letter_manager  # noqa: E402
+import volume_metadata  # noqa: E402
+from benchmarks import fake_tk  # noqa: E402
+
+# Sofort antwortender Leser; nach dem ersten Durchlauf kommen die Details aus dem Cache
+METADATA_LOADER = volume_metadata.MetadataLoader(
+    lambda letter: volume_metadata.VolumeMetadata(1000204886016, 500000000000, "NTFS",
+                                                  drive_letter_manager.drive_backends.DRIVE_FIXED, 0, 1))
+
+
+def make_drives(count, suffix=""):
+    """Volumes mit Seriennummer (stabile Schlüssel im Volume-Index), wahlweise mit geänderter Bezeichnung."""
+    VolumeInfo = drive_letter_manager.drive_backends.VolumeInfo
+    letters = [f"{letter}:" for letter in string.ascii_uppercase]
+    if count <= len(letters):
+        return [VolumeInfo(letter, f"Volume {letter[0]}{suffix}", index)
+                for index, letter in enumerate(letters[:count])]
+    # Mehr Volumes als Buchstaben (z.B. Bereitstellungspunkte): synthetische Schlüssel
+    return [VolumeInfo(f"V{index:04d}:", f"Volume {index}{suffix}", index) for index in range(count)]
+
+
+def make_app(tk_module, ttk_module):
+    """Erzeugt eine Instanz ohne __init__ (keine Ermittlung, kein mainloop)."""
+    app = drive_letter_manager.DriveLetterManager.__new__(drive_letter_manager.DriveLetterManager)
+    app.root = tk_module.Tk()
+    app.current_language = "de"
+    app.setup_translations()
+    app.drives_data = {}
+    app.volume_index = drive_letter_manager.volume_index.VolumeIndex()
+    app.metadata_loader = METADATA_LOADER
+    app.volume_metadata = {}
+    app.metadata_cell_cache = {}
+    app.metadata_poll_job = None
+    app.text_bindings = []
+    app.pending_letters = {}
+    app.letter_values = ()
+    app.letter_values_for = None
+    app.last_backend = "fake"
+    app.drive_cache = drive_letter_manager.DriveCache([])
+    app.startup_started = time.perf_counter()
+    app.startup_times = {}
+    app.create_drives_table(ttk_module.Frame(app.root))
+    app.drives_frame = ttk_module.Frame(app.root)  # Nur für das frühere Verfahren
+    return app
+
+
+def legacy_rebuild(app, legacy_rows):
+    """Früheres Verfahren: alle Zeilen zerstören und mit neuen StringVars neu anlegen."""
+    tk, ttk = drive_letter_manager.tk, drive_letter_manager.ttk
+    for widget_row in legacy_rows:
+        for widget in widget_row:
+            if hasattr(widget, 'destroy'):
+                widget.destroy()
+    legacy_rows.clear()
+
+    available_letters = app.get_available_letters()
+    for i, (drive, label) in enumerate(sorted(app.drives_data.items())):
+        drive_label = ttk.Label(app.drives_frame, text=drive, width=8)
+        drive_label.grid(row=i, column=0, padx=(5, 10), pady=2, sticky=tk.W)
+        display_label = label if len(label) <= 40 else label[:37] + "..."
+        desc_label = ttk.Label(app.drives_frame, text=display_label, width=40)
+        desc_label.grid(row=i, column=1, padx=(5, 10), pady=2, sticky=tk.W)
+        new_drive_var = tk.StringVar()
+        dropdown_values = sorted(set(available_letters + list(app.drives_data.keys())))
+        short_dropdown_values = [letter.split(':')[0] + ':' for letter in dropdown_values]
+        new_drive_combo = ttk.Combobox(app.drives_frame, textvariable=new_drive_var,
+                                       values=short_dropdown_values, state="readonly", width=8)
+        new_drive_combo.set(drive.split(':')[0] + ':')
+        new_drive_combo.grid(row=i, column=2, padx=(5, 10), pady=2, sticky=tk.W + tk.E)
+        legacy_rows.append([drive_label, desc_label, new_drive_combo, new_drive_var, drive])
+
+
+def measure(name, app, refresh, datasets, repeat):
+    """Führt refresh für wechselnde Datensätze aus und gibt Zeit und Tcl-Aufrufe aus."""
+    fake_tk.FakeTk.reset()
+    started = time.perf_counter()
+    for index in range(repeat):
+        app.update_volumes(datasets[index % len(datasets)])
+        refresh()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{name:<34} {elapsed * 1e6:10.1f} µs/refresh  {fake_tk.FakeTk.calls / repeat:8.1f} Tcl-Aufrufe"
+          f"  {fake_tk.FakeTk.created / repeat:6.1f} neue Objekte")
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--drives", type=int, nargs="+", default=[26, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--real-tk", action="store_true", help="Echtes Tk verwenden (benötigt Display)")
+    args = parser.parse_args(argv)
+
+    if not args.real_tk:
+        fake_tk.install(drive_letter_manager)
+    tk, ttk = drive_letter_manager.tk, drive_letter_manager.ttk
+    # Ohne Fenster keine verzögerte Größenanpassung und keine Log-Ausgabe pro Lauf
+    drive_letter_manager.print = lambda *a, **k: None
+
+    for count in args.drives:
+        unchanged = [make_drives(count)]
+        relabeled = [make_drives(count), make_drives(count, " (neu)")]
+
+        print(f"\nTabelle mit {count} Laufwerken, {args.repeat} Wiederholungen "
+              f"({'echtes Tk' if args.real_tk else 'fake_tk'})")
+        for title, datasets in (("unverändert", unchanged), ("Bezeichnungen wechseln", relabeled)):
+            app = make_app(tk, ttk)
+            legacy_rows = []
+            before = measure(f"vorher  ({title})", app, lambda: legacy_rebuild(app, legacy_rows),
+                             datasets, args.repeat)
+            app = make_app(tk, ttk)
+            after = measure(f"nachher ({title})", app, app.populate_drives_table, datasets, args.repeat)
+            print(f"{'Faktor':<34} {before / after:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
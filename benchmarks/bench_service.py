@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Kalte Ermittlung pro Aufruf gegen den warmen Dienst
+==============================================================
+
+Spielt das synthetische Fixture aus bench_pipeline über command_runner.ReplayRunner
+ab und vergleicht:
+
+* kalt: jeder Aufruf ermittelt selbst (neue Backends, HedgedEnumerator), wie ein
+  Skript, das drive_cli.py bei jedem Schritt neu startet;
+* warm: Anfragen an drive_service.DriveService über einen Unix-Socket, mit
+  einem und mit mehreren gleichzeitigen Clients;
+* apply: gleichzeitige Änderungen mehrerer Clients, die der Dienst über seine
+  Sperre hintereinander ausführt (simulierte diskpart-Sitzung von --apply-time s).
+
+Aufruf:
+    python benchmarks/bench_service.py [--requests 20] [--clients 8] [--scale 1.0] [--apply-time 0.2]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import command_runner  # noqa: E402
+import diskpart  # noqa: E402
+import drive_backends  # noqa: E402
+import drive_service  # noqa: E402
+from benchmarks.bench_pipeline import scenario_refresh, synthetic_fixture  # noqa: E402
+
+
+def replay_runner(fixture, scale):
+    return command_runner.ReplayRunner(fixture["commands"], admin=True, scale=scale)
+
+
+def timed(func, count):
+    """Führt func count-mal aus und liefert die Einzeldauern."""
+    durations = []
+    for _ in range(count):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def concurrent(func, clients, count):
+    """Führt func in clients Threads je count-mal aus; liefert Gesamtdauer und alle Einzeldauern."""
+    durations = []
+    lock = threading.Lock()
+
+    def work():
+        own = timed(func, count)
+        with lock:
+            durations.extend(own)
+
+    threads = [threading.Thread(target=work) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, durations
+
+
+def report(name, durations, total=None):
+    line = (f"{name:<34} median {statistics.median(durations) * 1000:9.2f} ms  "
+            f"max {max(durations) * 1000:9.2f} ms")
+    if total is not None:
+        line += f"  gesamt {total:6.2f} s"
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20, help="Anfragen pro Client")
+    parser.add_argument("--clients", type=int, default=8, help="Gleichzeitige Clients")
+    parser.add_argument("--scale", type=float, default=1.0, help="Faktor für die aufgezeichneten Laufzeiten")
+    parser.add_argument("--apply-time", type=float, default=0.2, help="Dauer einer simulierten diskpart-Sitzung")
+    args = parser.parse_args(argv)
+
+    fixture = synthetic_fixture()
+    cold = timed(lambda: scenario_refresh(replay_runner(fixture, args.scale)), max(1, args.requests // 5))
+    report("kalt (Ermittlung pro Aufruf)", cold)
+
+    def apply(operations):
+        time.sleep(args.apply_time)
+        return [diskpart.DiskpartResult(operation, True, verified=True) for operation in operations]
+
+    address = os.path.join(tempfile.mkdtemp(), "bench.sock")
+    runner = replay_runner(fixture, args.scale)
+    service = drive_service.DriveService(drive_backends.default_backends(runner), address=address,
+                                         runner=runner, apply_func=apply)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # Erste Anfrage wartet ggf. noch auf die Vorab-Ermittlung beim Start
+        started = time.perf_counter()
+        client = drive_service.ServiceClient(address)
+        client.list()
+        report("warm (erste Anfrage nach Start)", [time.perf_counter() - started])
+
+        report("warm (1 Client)", timed(client.list, args.requests))
+        total, durations = concurrent(client.list, args.clients, args.requests)
+        report(f"warm ({args.clients} Clients gleichzeitig)", durations, total)
+
+        operations = [diskpart.DiskpartOperation("E:", "G:", "Backup")]
+        count = max(1, args.clients // 2)
+        total, durations = concurrent(lambda: client.apply_operations(operations), count, 1)
+        report(f"apply ({count} Clients, serialisiert)", durations, total)
+        print(f"{'':<34} erwartet gesamt ≈ {count * args.apply_time:.2f} s "
+              f"({count} × {args.apply_time} s hintereinander)")
+        client.close()
+    finally:
+        service.stop()
+        thread.join(5)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
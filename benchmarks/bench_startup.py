@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Startzeit bis zum ersten Zeichnen und bis zur gefüllten Tabelle
+==========================================================================
+
+Startet DriveLetterManager mehrfach mit einem FakeBackend (künstliche
+Ermittlungsdauer über --delay) und liest die Messpunkte aus
+``startup_times``. Überschreitet der langsamste Lauf eines der Budgets,
+endet das Skript mit Rückgabewert 1 und eignet sich so als
+Regressionsprüfung. Ohne Display wird benchmarks/fake_tk verwendet; das
+erste Zeichnen entspricht dort dem Eintritt in die Ereignisschleife.
+
+Aufruf:
+    python benchmarks/bench_startup.py [--runs 5] [--drives 26] [--delay 0.2]
+                                       [--budget-first-paint 0.3] [--budget-populated 1.0] [--real-tk]
+"""
+
+import argparse
+import os
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import drive_backends  # noqa: E402
+import drive_letter_manager  # noqa: E402
+from benchmarks import fake_tk  # noqa: E402
+
+
+def start_once(volumes, delay, real_tk, timeout=10.0):
+    """Startet eine Instanz, pumpt die Ereignisschleife bis zur gefüllten Tabelle und liefert die Messpunkte."""
+    backend = drive_backends.FakeBackend(volumes, delay=delay)
+    started = time.perf_counter()
+    app = drive_letter_manager.DriveLetterManager(backends=[backend], started=started)
+    try:
+        if not real_tk:
+            # Ohne Fenster gibt es kein <Map>; gezeichnet würde beim Eintritt in die Ereignisschleife
+            app.mark_startup("first_paint")
+
+        deadline = started + timeout
+        while "table_populated" not in app.startup_times and time.perf_counter() < deadline:
+            if real_tk:
+                app.root.update()
+            else:
+                # fake_tk führt root.after nicht aus: Abfrage selbst im 50-ms-Takt anstoßen
+                time.sleep(0.05)
+                app.poll_enumeration()
+            time.sleep(0.001)
+        return dict(app.startup_times)
+    finally:
+        app.enumeration_worker.cancel()
+        app.shutdown()
+        app.root.destroy()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--drives", type=int, default=26)
+    parser.add_argument("--delay", type=float, default=0.2, help="Dauer der Fake-Ermittlung in Sekunden")
+    parser.add_argument("--budget-first-paint", type=float, default=0.3, help="Budget in Sekunden")
+    parser.add_argument("--budget-populated", type=float, default=1.0, help="Budget in Sekunden")
+    parser.add_argument("--real-tk", action="store_true", help="Echtes Tk verwenden (benötigt Display)")
+    args = parser.parse_args(argv)
+
+    if not args.real_tk:
+        fake_tk.install(drive_letter_manager)
+    drive_letter_manager.print = lambda *a, **k: None
+
+    volumes = {f"{letter}:": f"Volume {letter}"
+               for letter in string.ascii_uppercase[2:2 + min(args.drives, 24)]}
+    budgets = {"first_paint": args.budget_first_paint, "table_populated": args.budget_populated}
+
+    worst = {}
+    for run in range(args.runs):
+        times = start_once(volumes, args.delay, args.real_tk)
+        print(f"Lauf {run + 1}: " + ", ".join(f"{key}={value * 1000:.1f} ms" for key, value in times.items()))
+        for key in budgets:
+            worst[key] = max(worst.get(key, 0.0), times.get(key, float("inf")))
+
+    failed = False
+    for key, budget in budgets.items():
+        ok = worst[key] <= budget
+        failed = failed or not ok
+        print(f"{key:<16} schlechtester Lauf {worst[key] * 1000:8.1f} ms  Budget {budget * 1000:8.1f} ms  "
+              f"{'OK' if ok else 'ÜBERSCHRITTEN'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
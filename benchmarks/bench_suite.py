@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark-Suite: Parser, Planer und Tabellenaufbau
+==================================================
+
+Misst die heißen Pfade ohne Windows und ohne Display: Auswertung großer
+synthetischer PowerShell-, wmic- und diskpart-Ausgaben, get_available_letters,
+das Planen von Buchstabenänderungen sowie den Aufbau der Laufwerkstabelle
+(populate_drives_table über benchmarks/fake_tk) für 5, 26 und 1.000 Volumes.
+
+Jeder Messwert ist das Minimum über mehrere Wiederholungen (Sekunden pro
+Aufruf). Mit --save wird eine JSON-Baseline geschrieben, mit --compare gegen
+eine Baseline verglichen; ist ein Fall um mehr als --threshold langsamer,
+endet das Skript mit Rückgabewert 1.
+
+Aufruf:
+    python benchmarks/bench_suite.py [--filter plan] [--save baseline.json]
+    python benchmarks/bench_suite.py --compare baseline.json [--threshold 1.25]
+"""
+
+import argparse
+import json
+import os
+import platform
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import diskpart  # noqa: E402
+import drive_backends  # noqa: E402
+import drive_letter_manager  # noqa: E402
+import letter_planner  # noqa: E402
+from benchmarks import fake_tk  # noqa: E402
+from benchmarks.bench_refresh_table import make_app, make_drives  # noqa: E402
+
+
+TABLE_SIZES = (5, 26, 1000)
+LETTERS = [f"{letter}:" for letter in string.ascii_uppercase[2:]]
+
+
+def powershell_records(count):
+    return [{"DeviceID": f"{LETTERS[index % len(LETTERS)]}", "VolumeName": f"Volume {index}",
+             "VolumeSerialNumber": f"{index:08X}", "FileSystem": "NTFS", "DriveType": 3,
+             "Size": "1000204886016", "FreeSpace": "500000000000"} for index in range(count)]
+
+
+def wmic_output(count):
+    lines = ["Caption  FreeSpace     Size           VolumeName"]
+    lines += [f"{LETTERS[index % len(LETTERS)]:<8} 500000000000  1000204886016  Volume {index}"
+              for index in range(count)]
+    return "\r\n".join(lines) + "\r\n"
+
+
+def volume_table(count):
+    lines = ["  Volume ###  Ltr  Label        Fs     Type        Size     Status     Info",
+             "  ----------  ---  -----------  -----  ----------  -------  ---------  --------"]
+    lines += [f"  Volume {index:<4} {LETTERS[index % len(LETTERS)][0]}   Volume {index:<4} NTFS   Partition"
+              f"    931 GB  Healthy" for index in range(count)]
+    return "\n".join(lines) + "\n"
+
+
+def rotation(count):
+    """Rotation über count Buchstaben (ein Zyklus, aufgelöst über einen freien Buchstaben)."""
+    used = LETTERS[:count]
+    mapping = {letter: used[(index + 1) % count] for index, letter in enumerate(used)}
+    return mapping, used
+
+
+def table_case(count):
+    """Tabellenaufbau: einmal komplett neu, danach Abgleich mit geänderten Bezeichnungen."""
+    datasets = [make_drives(count), make_drives(count, " (neu)")]
+    state = {"app": None, "index": 0}
+
+    def build():
+        app = make_app(drive_letter_manager.tk, drive_letter_manager.ttk)
+        app.update_volumes(datasets[0])
+        app.populate_drives_table()
+
+    def update():
+        if state["app"] is None:
+            state["app"] = make_app(drive_letter_manager.tk, drive_letter_manager.ttk)
+        state["index"] += 1
+        state["app"].update_volumes(datasets[state["index"] % 2])
+        state["app"].populate_drives_table()
+
+    return build, update
+
+
+def cases():
+    """Liefert (Name, Funktion) für alle Benchmarks."""
+    big_records = powershell_records(10000)
+    big_wmic = wmic_output(10000)
+    big_table = volume_table(1000)
+    app = make_app(drive_letter_manager.tk, drive_letter_manager.ttk)
+    app.update_volumes(make_drives(12))
+
+    yield "parse_powershell_json[10000]", lambda: drive_backends.parse_powershell_json(big_records)
+    yield "parse_wmic_output[10000]", lambda: drive_backends.parse_wmic_output(big_wmic)
+    yield "parse_volume_table[1000]", lambda: diskpart.parse_volume_table(big_table)
+    yield "get_available_letters[12]", app.get_available_letters
+    for count in (2, 6, 23):
+        mapping, used = rotation(count)
+        yield f"plan_changes[rotation {count}]", lambda m=mapping, u=used: letter_planner.plan_changes(m, u)
+    for count in TABLE_SIZES:
+        build, update = table_case(count)
+        yield f"table_build[{count}]", build
+        yield f"table_update[{count}]", update
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """Minimum der Zeit pro Aufruf über repeat Durchgänge mit je so vielen Aufrufen, dass min_time erreicht wird."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def format_time(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds * 1e6:9.2f} µs"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", default="", help="Nur Fälle, deren Name diesen Text enthält")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="DATEI", help="Ergebnisse als JSON-Baseline speichern")
+    parser.add_argument("--compare", metavar="DATEI", help="Mit einer JSON-Baseline vergleichen")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Faktor, ab dem ein Fall als Regression gilt (Standard: 1.25)")
+    args = parser.parse_args(argv)
+
+    fake_tk.install(drive_letter_manager)
+    drive_letter_manager.print = lambda *a, **k: None
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+
+    results = {}
+    regressions = []
+    for name, func in cases():
+        if args.filter not in name:
+            continue
+        results[name] = measure(func, args.repeat)
+        line = f"{name:<32} {format_time(results[name])}"
+        if name in baseline:
+            ratio = results[name] / baseline[name]
+            flag = "REGRESSION" if ratio > args.threshold else ""
+            if flag:
+                regressions.append(name)
+            line += f"   Baseline {format_time(baseline[name])}  {ratio:5.2f}x {flag}"
+        print(line.rstrip())
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as handle:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "created": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results},
+                      handle, indent=2)
+        print(f"Baseline gespeichert: {args.save}")
+
+    if regressions:
+        print(f"{len(regressions)} Regression(en) über Faktor {args.threshold}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
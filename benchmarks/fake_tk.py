@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Minimaler Tk-Ersatz für Benchmarks ohne Display
+===============================================
+
+Stellt die von drive_letter_manager genutzten tk/ttk-Klassen nach, ohne ein
+Fenster zu öffnen. Jeder Aufruf, der in echtem Tk einen Tcl-Befehl auslösen
+würde, wird in ``FakeTk.calls`` gezählt; so lassen sich Varianten auch ohne
+Xvfb vergleichen.
+"""
+
+import types
+
+
+class FakeTk:
+    """Zählt alle simulierten Tcl-Aufrufe."""
+
+    calls = 0
+    created = 0
+
+    @classmethod
+    def reset(cls):
+        cls.calls = 0
+        cls.created = 0
+
+
+class TclError(Exception):
+    pass
+
+
+class Widget:
+    """Universelles Widget: merkt sich Optionen und zählt Aufrufe."""
+
+    def __init__(self, master=None, **options):
+        FakeTk.calls += 1
+        FakeTk.created += 1
+        self.master = master
+        self.options = dict(options)
+        self.children = {}
+        self.states = set()
+        self.destroyed = False
+
+    def configure(self, **options):
+        FakeTk.calls += 1
+        self.options.update(options)
+
+    config = configure
+
+    def cget(self, key):
+        FakeTk.calls += 1
+        return self.options.get(key, "")
+
+    def set(self, value):
+        FakeTk.calls += 1
+        variable = self.options.get("textvariable")
+        if variable is not None:
+            variable.set(value)
+        self.options["value"] = value
+
+    def get(self):
+        variable = self.options.get("textvariable")
+        return variable.get() if variable is not None else self.options.get("value", "")
+
+    def state(self, flags=None):
+        """Setzt Zustände wie ttk ("disabled", "!disabled") und liefert die gesetzten."""
+        FakeTk.calls += 1
+        for flag in flags or ():
+            if flag.startswith("!"):
+                self.states.discard(flag[1:])
+            else:
+                self.states.add(flag)
+        return tuple(self.states)
+
+    def instate(self, flags):
+        return all((flag[1:] not in self.states) if flag.startswith("!") else (flag in self.states)
+                   for flag in flags)
+
+    def destroy(self):
+        FakeTk.calls += 1
+        self.destroyed = True
+
+    def _noop(self, *args, **kwargs):
+        FakeTk.calls += 1
+
+    grid = grid_remove = grid_forget = pack = pack_forget = place = place_forget = _noop
+    bind = columnconfigure = rowconfigure = update_idletasks = _noop
+    start = stop = title = geometry = resizable = yview = xview = quit = mainloop = _noop
+
+    def bbox(self, *args):
+        FakeTk.calls += 1
+        return (0, 0, 0, 0)
+
+    def create_window(self, *args, **kwargs):
+        FakeTk.calls += 1
+        return 1
+
+    def winfo_children(self):
+        return []
+
+    def after(self, delay, callback=None, *args):
+        FakeTk.calls += 1
+        return "after#0"
+
+    def after_cancel(self, job):
+        FakeTk.calls += 1
+
+
+class Treeview(Widget):
+    """Treeview-Ersatz: verwaltet Zeilen nur als Daten, wie die echte Treeview."""
+
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = {}
+        self.order = []
+
+    def insert(self, parent, index, iid=None, **options):
+        FakeTk.calls += 1
+        self.items[iid] = dict(options)
+        self.order.insert(len(self.order) if index in ("end", None) else index, iid)
+        return iid
+
+    def item(self, iid, **options):
+        FakeTk.calls += 1
+        self.items[iid].update(options)
+
+    def delete(self, *iids):
+        FakeTk.calls += 1
+        for iid in iids:
+            del self.items[iid]
+            self.order.remove(iid)
+
+    def move(self, iid, parent, index):
+        FakeTk.calls += 1
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def get_children(self, item=""):
+        return tuple(self.order)
+
+    def exists(self, iid):
+        return iid in self.items
+
+    column = heading = tag_configure = Widget._noop
+
+
+class Style:
+    def __init__(self, master=None):
+        pass
+
+    def configure(self, *args, **kwargs):
+        FakeTk.calls += 1
+
+
+class StringVar:
+    def __init__(self, master=None, value=""):
+        FakeTk.calls += 1
+        FakeTk.created += 1
+        self.value = value
+
+    def set(self, value):
+        FakeTk.calls += 1
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+tk = _module("tkinter", Tk=Widget, Canvas=Widget, StringVar=StringVar, TclError=TclError,
+             W="w", E="e", N="n", S="s", LEFT="left", RIGHT="right", VERTICAL="vertical")
+ttk = _module("tkinter.ttk", Frame=Widget, Label=Widget, Button=Widget, Combobox=Widget,
+              Scrollbar=Widget, LabelFrame=Widget, Progressbar=Widget, Treeview=Treeview, Style=Style)
+
+
+def install(module):
+    """Ersetzt tk/ttk im angegebenen Modul durch den Ersatz."""
+    module.tk = tk
+    module.ttk = ttk
@@ -42,6 +42,28 @@ if errorlevel 1 (
     exit /b 1
 )
 
+echo.
+echo Erstelle Kommandozeilen-Variante...
+echo.
+
+REM Konsolenprogramm ohne tkinter für Skripte und Provisionierung
+pyinstaller ^
+    --onefile ^
+    --console ^
+    --exclude-module tkinter ^
+    --name "DriveLetterManagerCLI" ^
+    --distpath "dist" ^
+    --workpath "build" ^
+    --specpath "build" ^
+    drive_cli.py
+
+if errorlevel 1 (
+    echo.
+    echo FEHLER: Build der Kommandozeilen-Variante fehlgeschlagen!
+    pause
+    exit /b 1
+)
+
 echo.
 echo ========================================
 echo Build erfolgreich abgeschlossen!
@@ -49,6 +71,7 @@ echo ========================================
 echo.
 echo Die portable .exe-Datei befindet sich in:
 echo %CD%\dist\DriveLetterManager.exe
+echo %CD%\dist\DriveLetterManagerCLI.exe (Kommandozeile)
 echo.
 echo WICHTIG: Starten Sie die .exe als Administrator,
 echo um Laufwerksbuchstaben ändern zu können.
@@ -5,7 +5,11 @@ echo.
 REM Einfacher Build ohne erweiterte Optionen
 pyinstaller --onefile --windowed --name DriveLetterManager drive_letter_manager.py
 
+REM Kommandozeilen-Variante ohne tkinter (schneller Start für Skripte)
+pyinstaller --onefile --console --exclude-module tkinter --name DriveLetterManagerCLI drive_cli.py
+
 echo.
 echo Build completed!
 echo Executable can be found in: dist\DriveLetterManager.exe
+echo Command line version: dist\DriveLetterManagerCLI.exe
 pause
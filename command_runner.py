@@ -0,0 +1,760 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ausführung externer Befehle mit Aufzeichnung und Wiedergabe
+===========================================================
+
+Alle externen Aufrufe (diskpart, wmic, PowerShell, Fleet-Befehle) laufen über
+einen ``CommandRunner``:
+
+* ``SubprocessRunner`` startet die Befehle wirklich (Standard).
+* ``RecordingRunner`` startet sie ebenfalls, hält dabei aber Kommandozeile,
+  Eingabe, Ausgaben, Rückgabewert und Laufzeit fest und speichert sie als
+  Fixture-Datei (JSON).
+* ``ReplayRunner`` spielt eine Fixture-Datei ohne Windows wieder ab. Die
+  Antworten kommen mit der aufgezeichneten Laufzeit; Skalierung, Zufallsjitter
+  (mit festem Startwert reproduzierbar) sowie künstliche Verzögerungen und
+  Hänger pro Befehl lassen sich einstellen. Ein aufgezeichneter Timeout hängt
+  bei der Wiedergabe bis zur Zeitgrenze des Aufrufers.
+
+Interaktive Programme wie diskpart laufen als ``CommandSession``: Der Aufrufer
+schickt Zeile für Zeile und liest jeweils die Antwort bis zur nächsten
+Eingabeaufforderung, kann also auf jede Antwort reagieren. Aufgezeichnet wird
+die Sitzung wie ein gewöhnlicher Befehl (alle gesendeten Zeilen als Eingabe,
+die gesamte Ausgabe); bei der Wiedergabe antwortet die Aufzeichnung, deren
+Eingabe mit den bisher gesendeten Zeilen beginnt, Abschnitt für Abschnitt.
+
+Der dauerhafte PowerShell-Prozess wird pro Anfrage aufgezeichnet: als Befehl
+``["powershell", <op>]`` mit der JSON-Antwort als Ausgabe.
+
+Der prozessweite Runner wird mit ``set_runner`` gesetzt oder von den
+Einstiegspunkten (Oberfläche, Kommandozeile) über ``configure_from_environment``
+aus den Umgebungsvariablen ``DLM_RECORD=<datei.json>`` (Aufzeichnung, gespeichert
+beim Programmende) bzw. ``DLM_REPLAY=<datei.json>`` gewählt. Bei der Wiedergabe
+wirken zusätzlich ``DLM_LATENCY_SCALE``, ``DLM_JITTER``, ``DLM_DELAY=wmic=2,...``
+und ``DLM_HANG=powershell,...``. Der Import selbst liest keine Umgebungsvariablen,
+damit eine fehlerhafte Angabe nicht schon den Import scheitern lässt.
+
+Fixture-Format:
+
+    {"version": 1, "commands": [
+        {"argv": ["diskpart"], "input": "list volume\\n...", "returncode": 0,
+         "stdout": "...", "stderr": "", "duration": 1.8, "timeout": false}]}
+"""
+
+import abc
+import atexit
+import codecs
+import ctypes
+import json
+import locale
+import os
+import random
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from powershell_worker import PowerShellWorker, PowerShellWorkerError
+
+
+FIXTURE_VERSION = 1
+
+# Umgebungsvariablen für den prozessweiten Runner
+RECORD_ENV = "DLM_RECORD"
+REPLAY_ENV = "DLM_REPLAY"
+# Störungen bei der Wiedergabe: Faktor, Zufallsanteil, "wmic=2,diskpart=5" bzw. "powershell,wmic"
+LATENCY_SCALE_ENV = "DLM_LATENCY_SCALE"
+JITTER_ENV = "DLM_JITTER"
+DELAY_ENV = "DLM_DELAY"
+HANG_ENV = "DLM_HANG"
+
+# Kommandozeile, unter der PowerShell-Anfragen aufgezeichnet werden (zzgl. Operation)
+POWERSHELL_ARGV = ["powershell"]
+
+# Rückgabewert eines über kill() beendeten Befehls bei der Wiedergabe
+KILLED_RETURNCODE = -9
+
+
+@dataclass
+class CommandResult:
+    """Ergebnis eines beendeten Befehls."""
+
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    duration: float = 0.0
+
+
+@dataclass
+class Fault:
+    """Künstliche Störung für alle Befehle, deren Kommandozeile ``match`` enthält."""
+
+    match: str
+    delay: Optional[float] = None  # Feste Laufzeit in Sekunden statt der aufgezeichneten
+    hang: bool = False  # Antwortet nie (bis zur Zeitgrenze oder kill())
+
+
+class MissingFixtureError(FileNotFoundError):
+    """Für den Befehl gibt es keine Aufzeichnung; verhält sich wie ein fehlendes Programm."""
+
+
+class RunningCommand(abc.ABC):
+    """Ein gestarteter Befehl."""
+
+    @abc.abstractmethod
+    def communicate(self, timeout: Optional[float] = None) -> CommandResult:
+        """
+        Wartet auf das Ende des Befehls.
+
+        Raises:
+            subprocess.TimeoutExpired: Nach Ablauf der Zeitgrenze; der Befehl ist dann
+                beendet, die Teilausgabe steht in ``output`` und ``stderr``
+        """
+
+    def kill(self):
+        """Beendet den Befehl aus einem anderen Thread."""
+
+
+class CommandSession(abc.ABC):
+    """Ein laufendes interaktives Programm, das Zeile für Zeile bedient wird (z.B. diskpart)."""
+
+    @abc.abstractmethod
+    def read(self, timeout: Optional[float] = None) -> str:
+        """
+        Liest die Ausgabe bis zur nächsten Eingabeaufforderung (ohne diese) oder bis zum Programmende.
+
+        Raises:
+            subprocess.TimeoutExpired: Nach Ablauf der Zeitgrenze; das Programm ist dann
+                beendet, die bisherige Ausgabe steht in ``output``
+        """
+
+    @abc.abstractmethod
+    def send(self, line: str, timeout: Optional[float] = None) -> str:
+        """Schickt eine Eingabezeile und liefert die Antwort darauf (siehe read)."""
+
+    @abc.abstractmethod
+    def close(self, timeout: Optional[float] = None) -> CommandResult:
+        """
+        Schließt die Eingabe, wartet auf das Programmende und liefert die gesamte Ausgabe.
+
+        Raises:
+            subprocess.TimeoutExpired: Wie bei read
+        """
+
+    def kill(self):
+        """Beendet das Programm aus einem anderen Thread."""
+
+
+class CommandRunner(abc.ABC):
+    """Basisklasse aller Runner."""
+
+    # True, wenn keine echten Befehle laufen (Win32-Abfragen per ctypes sind dann nicht vergleichbar)
+    simulated = False
+
+    @abc.abstractmethod
+    def start(self, argv: List[str], input: Optional[str] = None, shell: bool = False) -> RunningCommand:
+        """
+        Startet einen Befehl.
+
+        Args:
+            argv (List[str]): Kommandozeile
+            input (Optional[str]): Text für die Standardeingabe
+            shell (bool): Über die Shell starten (nur SubprocessRunner)
+
+        Raises:
+            FileNotFoundError: Wenn das Programm nicht vorhanden ist
+        """
+
+    def run(self, argv: List[str], input: Optional[str] = None, timeout: Optional[float] = None,
+            shell: bool = False) -> CommandResult:
+        """Startet einen Befehl und wartet auf sein Ende (siehe start und RunningCommand.communicate)."""
+        return self.start(argv, input, shell).communicate(timeout)
+
+    @abc.abstractmethod
+    def start_session(self, argv: List[str], prompt: str) -> CommandSession:
+        """
+        Startet ein interaktives Programm.
+
+        Args:
+            argv (List[str]): Kommandozeile
+            prompt (str): Eingabeaufforderung, mit der das Programm auf die nächste Zeile wartet
+
+        Raises:
+            FileNotFoundError: Wenn das Programm nicht vorhanden ist
+        """
+
+    @abc.abstractmethod
+    def powershell_worker(self, timeout: float) -> Any:
+        """Liefert einen PowerShell-Prozess (oder einen Ersatz mit derselben Schnittstelle)."""
+
+    @abc.abstractmethod
+    def is_admin(self) -> bool:
+        """Prüft, ob Befehle mit Administratorrechten laufen."""
+
+
+class _SubprocessCommand(RunningCommand):
+    def __init__(self, argv: List[str], input: Optional[str], shell: bool):
+        self.argv = argv
+        self.input = input
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            shell=shell,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)  # Verstecke Konsole
+        )
+
+    def communicate(self, timeout: Optional[float] = None) -> CommandResult:
+        try:
+            stdout, stderr = self.process.communicate(input=self.input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Bis dahin geschriebene Ausgaben bleiben über die Ausnahme auswertbar
+            self.process.kill()
+            stdout, stderr = self.process.communicate()
+            raise subprocess.TimeoutExpired(self.argv, timeout, output=stdout, stderr=stderr)
+        return CommandResult(self.process.returncode, stdout or "", stderr or "",
+                             time.perf_counter() - self.started)
+
+    def kill(self):
+        # communicate() im wartenden Thread räumt den beendeten Prozess ab
+        if self.process.poll() is None:
+            self.process.kill()
+
+
+class _SubprocessSession(CommandSession):
+    def __init__(self, argv: List[str], prompt: str):
+        self.argv = argv
+        self.prompt = prompt
+        self.started = time.perf_counter()
+        # Dieselbe Kodierung, die subprocess mit text=True verwenden würde
+        self.encoding = locale.getpreferredencoding(False)
+        self.process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)  # Verstecke Konsole
+        )
+        self._output = ""
+        self._position = 0  # Bis hier wurde die Ausgabe an den Aufrufer gegeben
+        self._eof = False
+        self._stderr = b""
+        self._changed = threading.Condition()
+        # Die Eingabeaufforderung endet ohne Zeilenumbruch: stdout wird blockweise gelesen
+        self._readers = [threading.Thread(target=self._read_stdout, name="session-stdout", daemon=True),
+                         threading.Thread(target=self._read_stderr, name="session-stderr", daemon=True)]
+        for reader in self._readers:
+            reader.start()
+
+    def read(self, timeout: Optional[float] = None) -> str:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                index = self._output.find(self.prompt, self._position)
+                if index >= 0:
+                    text = self._output[self._position:index]
+                    self._position = index + len(self.prompt)
+                    return text
+                if self._eof:
+                    text = self._output[self._position:]
+                    self._position = len(self._output)
+                    return text
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        self.kill()
+        raise subprocess.TimeoutExpired(self.argv, timeout, output=self._output,
+                                        stderr=self._stderr.decode(self.encoding, "replace"))
+
+    def send(self, line: str, timeout: Optional[float] = None) -> str:
+        try:
+            self.process.stdin.write((line + "\n").encode(self.encoding, "replace"))
+            self.process.stdin.flush()
+        except OSError:
+            # Programm hat sich beendet: read liefert die restliche Ausgabe
+            pass
+        return self.read(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> CommandResult:
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            raise subprocess.TimeoutExpired(self.argv, timeout, output=self._output,
+                                            stderr=self._stderr.decode(self.encoding, "replace"))
+        for reader in self._readers:
+            reader.join()
+        return CommandResult(self.process.returncode, self._output,
+                             self._stderr.decode(self.encoding, "replace"), time.perf_counter() - self.started)
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+
+    def _read_stdout(self):
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        while True:
+            chunk = self.process.stdout.read1(4096)
+            text = decoder.decode(chunk, final=not chunk).replace("\r\n", "\n")
+            with self._changed:
+                self._output += text
+                self._eof = not chunk
+                self._changed.notify_all()
+            if not chunk:
+                return
+
+    def _read_stderr(self):
+        self._stderr = self.process.stderr.read()
+
+
+class SubprocessRunner(CommandRunner):
+    """Startet Befehle über subprocess."""
+
+    def start(self, argv: List[str], input: Optional[str] = None, shell: bool = False) -> RunningCommand:
+        return _SubprocessCommand(list(argv), input, shell)
+
+    def start_session(self, argv: List[str], prompt: str) -> CommandSession:
+        return _SubprocessSession(list(argv), prompt)
+
+    def powershell_worker(self, timeout: float) -> PowerShellWorker:
+        return PowerShellWorker(timeout=timeout)
+
+    def is_admin(self) -> bool:
+        try:
+            return bool(ctypes.windll.shell32.IsUserAnAdmin())
+        except Exception:
+            return False
+
+
+class _RecordingCommand(RunningCommand):
+    def __init__(self, recorder: "RecordingRunner", argv: List[str], input: Optional[str],
+                 command: RunningCommand):
+        self.recorder = recorder
+        self.argv = argv
+        self.input = input
+        self.command = command
+        self.started = time.perf_counter()
+        self.killed = False
+
+    def communicate(self, timeout: Optional[float] = None) -> CommandResult:
+        try:
+            result = self.command.communicate(timeout)
+        except subprocess.TimeoutExpired as e:
+            self.recorder.record(self.argv, self.input, CommandResult(
+                -1, e.output or "", e.stderr or "", time.perf_counter() - self.started), timed_out=True)
+            raise
+        # Abgebrochene Befehle (z.B. verlorene Absicherungs-Läufe) sind kein Verhalten des Systems
+        if not self.killed:
+            self.recorder.record(self.argv, self.input, result)
+        return result
+
+    def kill(self):
+        self.killed = True
+        self.command.kill()
+
+
+class _RecordingSession(CommandSession):
+    def __init__(self, recorder: "RecordingRunner", argv: List[str], session: CommandSession):
+        self.recorder = recorder
+        self.argv = argv
+        self.session = session
+        self.sent: List[str] = []
+        self.started = time.perf_counter()
+        self.killed = False
+
+    def read(self, timeout: Optional[float] = None) -> str:
+        return self._recorded(lambda: self.session.read(timeout))
+
+    def send(self, line: str, timeout: Optional[float] = None) -> str:
+        self.sent.append(line)
+        return self._recorded(lambda: self.session.send(line, timeout))
+
+    def close(self, timeout: Optional[float] = None) -> CommandResult:
+        result = self._recorded(lambda: self.session.close(timeout))
+        if not self.killed:
+            self.recorder.record(self.argv, "\n".join(self.sent), result)
+        return result
+
+    def kill(self):
+        self.killed = True
+        self.session.kill()
+
+    def _recorded(self, call):
+        try:
+            return call()
+        except subprocess.TimeoutExpired as e:
+            self.recorder.record(self.argv, "\n".join(self.sent), CommandResult(
+                -1, e.output or "", e.stderr or "", time.perf_counter() - self.started), timed_out=True)
+            raise
+
+
+class RecordingWorker:
+    """Reicht Anfragen an einen echten PowerShell-Prozess weiter und zeichnet jede Antwort auf."""
+
+    def __init__(self, worker: PowerShellWorker, recorder: "RecordingRunner"):
+        self.worker = worker
+        self.recorder = recorder
+
+    def request(self, op: str, **params) -> Any:
+        started = time.perf_counter()
+        argv = POWERSHELL_ARGV + [op]
+        input = json.dumps(params, sort_keys=True) if params else None
+        try:
+            result = self.worker.request(op, **params)
+        except PowerShellWorkerError as e:
+            if str(e) != "Anfrage abgebrochen":
+                self.recorder.record(argv, input, CommandResult(1, "", str(e), time.perf_counter() - started))
+            raise
+        self.recorder.record(argv, input, CommandResult(0, json.dumps(result, ensure_ascii=False), "",
+                                                        time.perf_counter() - started))
+        return result
+
+    def cancel(self):
+        self.worker.cancel()
+
+    def close(self):
+        self.worker.close()
+
+
+class RecordingRunner(CommandRunner):
+    """Führt Befehle über einen anderen Runner aus und zeichnet sie als Fixtures auf."""
+
+    def __init__(self, inner: Optional[CommandRunner] = None, path: Optional[str] = None):
+        """
+        Args:
+            inner (Optional[CommandRunner]): Ausführender Runner; Standard ist SubprocessRunner
+            path (Optional[str]): Zieldatei für save() ohne Argument
+        """
+        self.inner = inner or SubprocessRunner()
+        self.path = path
+        self.commands: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def start(self, argv: List[str], input: Optional[str] = None, shell: bool = False) -> RunningCommand:
+        return _RecordingCommand(self, list(argv), input, self.inner.start(argv, input, shell))
+
+    def start_session(self, argv: List[str], prompt: str) -> CommandSession:
+        return _RecordingSession(self, list(argv), self.inner.start_session(argv, prompt))
+
+    def powershell_worker(self, timeout: float) -> RecordingWorker:
+        return RecordingWorker(self.inner.powershell_worker(timeout), self)
+
+    def is_admin(self) -> bool:
+        return self.inner.is_admin()
+
+    def record(self, argv: List[str], input: Optional[str], result: CommandResult, timed_out: bool = False):
+        entry = dict(asdict(result), argv=list(argv), input=input, timeout=timed_out)
+        with self._lock:
+            self.commands.append(entry)
+
+    def save(self, path: Optional[str] = None):
+        """Schreibt alle bisherigen Aufzeichnungen als Fixture-Datei."""
+        with self._lock:
+            data = {"version": FIXTURE_VERSION, "admin": self.inner.is_admin(), "commands": list(self.commands)}
+        with open(path or self.path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, ensure_ascii=False, indent=2)
+
+
+class _ReplayCommand(RunningCommand):
+    def __init__(self, argv: List[str], entry: Dict[str, Any], delay: float):
+        self.argv = argv
+        self.entry = entry
+        self.delay = delay  # float("inf") = hängt
+        self._killed = threading.Event()
+
+    def communicate(self, timeout: Optional[float] = None) -> CommandResult:
+        started = time.perf_counter()
+        wait = self.delay if timeout is None else min(self.delay, timeout)
+        killed = self._killed.wait(None if wait == float("inf") else wait)
+        if killed:
+            return CommandResult(KILLED_RETURNCODE, "", "", time.perf_counter() - started)
+        if timeout is not None and self.delay > timeout:
+            raise subprocess.TimeoutExpired(self.argv, timeout, output=self.entry.get("stdout", ""),
+                                            stderr=self.entry.get("stderr", ""))
+        return CommandResult(self.entry.get("returncode", 0), self.entry.get("stdout", ""),
+                             self.entry.get("stderr", ""), time.perf_counter() - started)
+
+    def kill(self):
+        self._killed.set()
+
+
+class _ReplaySession(CommandSession):
+    def __init__(self, runner: "ReplayRunner", argv: List[str], prompt: str, jitter: float):
+        self.runner = runner
+        self.argv = argv
+        self.prompt = prompt
+        self.jitter = jitter
+        self.sent: List[str] = []
+        self.served: List[str] = []  # Bisher gelieferte Abschnitte der Ausgabe
+        self.started = time.perf_counter()
+        self._key = None
+        self._entry: Dict[str, Any] = {}
+        self._killed = threading.Event()
+
+    def read(self, timeout: Optional[float] = None) -> str:
+        self._key, self._entry = self.runner._session_entry(self.argv, self.sent, self._key)
+        segments = self._entry.get("stdout", "").split(self.prompt)
+        index = len(self.served)
+        if index < len(segments):
+            delay = self.runner._delay(self.argv, dict(self._entry, timeout=False)) / len(segments)
+        else:
+            # Aufzeichnung endet vorher: hing bei der Aufnahme, sonst ist das Programm beendet
+            delay = float("inf") if self._entry.get("timeout") else 0.0
+        if index == 0:
+            delay += self.jitter
+        wait = delay if timeout is None else min(delay, timeout)
+        if self._killed.wait(None if wait == float("inf") else wait):
+            return ""
+        if timeout is not None and delay > timeout:
+            raise subprocess.TimeoutExpired(self.argv, timeout, output=self.prompt.join(self.served),
+                                            stderr=self._entry.get("stderr", ""))
+        if index >= len(segments):
+            return ""
+        self.served.append(segments[index])
+        return segments[index]
+
+    def send(self, line: str, timeout: Optional[float] = None) -> str:
+        self.sent.append(line)
+        return self.read(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> CommandResult:
+        if self._key is not None:
+            self.runner._finish_session(self._key)
+        returncode = KILLED_RETURNCODE if self._killed.is_set() else self._entry.get("returncode", 0)
+        return CommandResult(returncode, self.prompt.join(self.served), self._entry.get("stderr", ""),
+                             time.perf_counter() - self.started)
+
+    def kill(self):
+        self._killed.set()
+
+
+class RunnerWorker:
+    """Ersatz für PowerShellWorker, der jede Anfrage als Befehl über einen Runner ausführt (Wiedergabe)."""
+
+    def __init__(self, runner: CommandRunner, timeout: float):
+        self.runner = runner
+        self.timeout = timeout
+        self._command: Optional[RunningCommand] = None
+        self._cancelled = False
+
+    def request(self, op: str, **params) -> Any:
+        self._cancelled = False
+        input = json.dumps(params, sort_keys=True) if params else None
+        try:
+            self._command = self.runner.start(POWERSHELL_ARGV + [op], input)
+            result = self._command.communicate(self.timeout)
+        except subprocess.TimeoutExpired:
+            raise PowerShellWorkerError(f"Keine Antwort innerhalb von {self.timeout} s")
+        except FileNotFoundError as e:
+            raise PowerShellWorkerError(str(e))
+        finally:
+            self._command = None
+        if self._cancelled:
+            raise PowerShellWorkerError("Anfrage abgebrochen")
+        if result.returncode != 0:
+            raise PowerShellWorkerError(result.stderr or "Unbekannter Fehler")
+        return json.loads(result.stdout)
+
+    def cancel(self):
+        command = self._command
+        if command is not None:
+            self._cancelled = True
+            command.kill()
+
+    def close(self):
+        pass
+
+
+class ReplayRunner(CommandRunner):
+    """Spielt aufgezeichnete Befehle ab, mit einstellbarer Latenz, Jitter und Störungen."""
+
+    simulated = True
+
+    def __init__(self, commands: List[Dict[str, Any]], admin: bool = True, scale: float = 1.0,
+                 jitter: float = 0.0, faults: Optional[List[Fault]] = None, seed: Optional[int] = None):
+        """
+        Args:
+            commands (List[Dict[str, Any]]): Aufzeichnungen im Fixture-Format
+            admin (bool): Ergebnis von is_admin()
+            scale (float): Faktor für die aufgezeichneten Laufzeiten (0 = sofort)
+            jitter (float): Zufällige Zusatzlatenz von 0 bis jitter Sekunden pro Befehl
+            faults (Optional[List[Fault]]): Störungen; die erste passende gilt
+            seed (Optional[int]): Startwert für den Jitter (reproduzierbare Läufe)
+        """
+        self.admin = admin
+        self.scale = scale
+        self.jitter = jitter
+        self.faults = list(faults or [])
+        self.calls: List[Tuple[str, ...]] = []  # Abgespielte Kommandozeilen in Reihenfolge
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # Gleiche Befehle liefern ihre Aufzeichnungen der Reihe nach; die letzte wiederholt sich
+        self._entries: Dict[Tuple[Tuple[str, ...], Optional[str]], List[Dict[str, Any]]] = {}
+        self._positions: Dict[Tuple[Tuple[str, ...], Optional[str]], int] = {}
+        for entry in commands:
+            self._entries.setdefault(self._key(entry["argv"], entry.get("input")), []).append(entry)
+
+    @classmethod
+    def load(cls, path: str, **options) -> "ReplayRunner":
+        """
+        Lädt eine Fixture-Datei.
+
+        Raises:
+            ValueError: Wenn die Datei kein gültiges Fixture enthält
+            OSError: Wenn die Datei nicht gelesen werden kann
+        """
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if not isinstance(data, dict) or not isinstance(data.get("commands"), list):
+            raise ValueError(f"{path} enthält keine Liste 'commands'.")
+        if data.get("version", FIXTURE_VERSION) > FIXTURE_VERSION:
+            raise ValueError(f"Fixture-Version {data['version']} wird nicht unterstützt.")
+        options.setdefault("admin", bool(data.get("admin", True)))
+        return cls(data["commands"], **options)
+
+    def start(self, argv: List[str], input: Optional[str] = None, shell: bool = False) -> RunningCommand:
+        key = self._key(argv, input)
+        with self._lock:
+            self.calls.append(key[0])
+            entries = self._entries.get(key)
+            if not entries:
+                raise MissingFixtureError(f"Keine Aufzeichnung für {' '.join(argv)}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+            jitter = self._random.uniform(0.0, self.jitter) if self.jitter else 0.0
+        return _ReplayCommand(list(argv), entry, self._delay(argv, entry) + jitter)
+
+    def start_session(self, argv: List[str], prompt: str) -> CommandSession:
+        with self._lock:
+            self.calls.append(tuple(argv))
+            if not any(key[0] == tuple(argv) for key in self._entries):
+                raise MissingFixtureError(f"Keine Aufzeichnung für {' '.join(argv)}")
+            jitter = self._random.uniform(0.0, self.jitter) if self.jitter else 0.0
+        return _ReplaySession(self, list(argv), prompt, jitter)
+
+    def powershell_worker(self, timeout: float) -> RunnerWorker:
+        return RunnerWorker(self, timeout)
+
+    def is_admin(self) -> bool:
+        return self.admin
+
+    def _delay(self, argv: List[str], entry: Dict[str, Any]) -> float:
+        command_line = " ".join(argv)
+        for fault in self.faults:
+            if fault.match in command_line:
+                if fault.hang:
+                    return float("inf")
+                if fault.delay is not None:
+                    return fault.delay
+                break
+        if entry.get("timeout"):
+            # Bei der Aufzeichnung hing der Befehl bis zur Zeitgrenze
+            return float("inf")
+        return float(entry.get("duration", 0.0)) * self.scale
+
+    def _session_entry(self, argv: List[str], sent: List[str], current=None):
+        """
+        Aufzeichnung für eine Sitzung, deren Eingabe mit den bisher gesendeten Zeilen beginnt.
+
+        Die bisherige Aufzeichnung bleibt, solange sie passt; sonst gilt die erste
+        passende, deren Aufzeichnungen noch nicht alle abgespielt wurden.
+
+        Raises:
+            MissingFixtureError: Wenn keine Aufzeichnung passt
+        """
+        def matches(key):
+            return key[0] == tuple(argv) and (key[1] or "").split("\n")[:len(sent)] == sent
+
+        with self._lock:
+            if current is None or not matches(current):
+                candidates = [key for key in self._entries if matches(key)]
+                if not candidates:
+                    raise MissingFixtureError(f"Keine Aufzeichnung für {' '.join(argv)} mit Eingabe {sent[-1]!r}")
+                current = next((key for key in candidates
+                                if self._positions.get(key, 0) < len(self._entries[key])), candidates[0])
+            entries = self._entries[current]
+            return current, entries[min(self._positions.get(current, 0), len(entries) - 1)]
+
+    def _finish_session(self, key):
+        with self._lock:
+            self._positions[key] = self._positions.get(key, 0) + 1
+
+    @staticmethod
+    def _key(argv: List[str], input: Optional[str]) -> Tuple[Tuple[str, ...], Optional[str]]:
+        return tuple(argv), input
+
+
+_runner: Optional[CommandRunner] = None
+
+
+def get_runner() -> CommandRunner:
+    """Liefert den prozessweiten Runner (Standard: SubprocessRunner)."""
+    global _runner
+    if _runner is None:
+        _runner = SubprocessRunner()
+    return _runner
+
+
+def set_runner(runner: Optional[CommandRunner]):
+    """Setzt den prozessweiten Runner; None stellt den Standard wieder her."""
+    global _runner
+    _runner = runner
+
+
+def parse_fault(value: str, hang: bool = False) -> Fault:
+    """
+    Liest eine Störung aus "wmic=2.5" (feste Laufzeit) bzw. "powershell" (mit hang=True).
+
+    Raises:
+        ValueError: Bei ungültiger Laufzeit
+    """
+    match, separator, delay = value.partition("=")
+    if hang or not separator:
+        return Fault(match.strip(), hang=True)
+    return Fault(match.strip(), delay=float(delay))
+
+
+def configure_from_environment(environ: Optional[Dict[str, str]] = None) -> Optional[CommandRunner]:
+    """
+    Setzt den prozessweiten Runner gemäß DLM_REPLAY bzw. DLM_RECORD (Aufruf durch die Einstiegspunkte).
+
+    Ohne diese Variablen bleibt der Runner unverändert. Eine Aufzeichnung wird beim
+    Programmende gespeichert.
+
+    Args:
+        environ (Optional[Dict[str, str]]): Umgebung; Standard ist os.environ
+
+    Returns:
+        Optional[CommandRunner]: Der gesetzte Runner oder None
+
+    Raises:
+        ValueError: Bei ungültiger Fixture-Datei, Latenz oder Störungsangabe
+        OSError: Wenn die Fixture-Datei nicht gelesen werden kann
+    """
+    environ = os.environ if environ is None else environ
+    replay = environ.get(REPLAY_ENV)
+    record = environ.get(RECORD_ENV)
+    if replay:
+        faults = [parse_fault(value) for value in environ.get(DELAY_ENV, "").split(",") if value.strip()]
+        faults += [parse_fault(value, hang=True)
+                   for value in environ.get(HANG_ENV, "").split(",") if value.strip()]
+        runner = ReplayRunner.load(replay, scale=float(environ.get(LATENCY_SCALE_ENV, 1.0)),
+                                   jitter=float(environ.get(JITTER_ENV, 0.0)), faults=faults)
+    elif record:
+        runner = RecordingRunner(path=record)
+        atexit.register(runner.save)
+    else:
+        return None
+    set_runner(runner)
+    return runner
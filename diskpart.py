@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diskpart-Anbindung für den Drive Letter Manager
+===============================================
+
+Führt beliebig viele Buchstabenänderungen in einer einzigen diskpart-Sitzung
+aus. Die Sitzung läuft interaktiv (``command_runner.CommandSession``): Nach dem
+einleitenden ``list volume`` wird jedes Volume über seine Nummer aus dieser
+Tabelle gewählt und die Antwort auf ``select`` geprüft, bevor ``assign`` oder
+``remove`` folgen. Schlägt ein ``select`` fehl, bliebe in diskpart das zuvor
+gewählte Volume ausgewählt und die folgenden Befehle träfen das falsche
+Laufwerk; die restlichen Operationen werden dann nicht mehr ausgeführt.
+Ziele können auch leere NTFS-Ordner sein (``assign mount=``); der bisherige
+Zugriffspfad wird dann mit ``remove`` entfernt, denn anders als ein Buchstabe
+ersetzt ein Ordner ihn nicht.
+
+Ob eine Operation gewirkt hat, entscheidet nicht der Meldungstext (der von der
+Anzeigesprache abhängt), sondern ein Vergleich der ``list volume``-Tabellen vor
+und nach den Änderungen. Die Tabelle wird anhand ihrer Trennzeile aus
+Bindestrichen zerlegt und ist damit unabhängig von den Spaltenüberschriften.
+Nur wenn keine Tabellen vorliegen (z.B. nach einer Zeitüberschreitung), werden
+bekannte deutsche und englische Meldungen ausgewertet.
+"""
+
+import re
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import command_runner
+import tracing
+from letter_planner import is_mount_path
+
+
+# Prompt, den diskpart vor jedem gelesenen Befehl ausgibt
+DISKPART_PROMPT = "DISKPART>"
+
+# Trennzeile unter den Spaltenüberschriften von "list volume"
+SEPARATOR_LINE = re.compile(r"^\s*-{3,}(\s+-+)+\s*$")
+
+# Zeile unter einem Volume mit einem seiner Bereitstellungsordner (z.B. "    C:\Mounts\Daten1\")
+MOUNT_LINE = re.compile(r"^\s+([A-Za-z]:\\\S.*?)\s*$")
+
+# Timeout für die gesamte Sitzung: Startzeit plus Zeit pro Operation
+BASE_TIMEOUT = 30
+TIMEOUT_PER_OPERATION = 10
+
+# Fehlerklassen für fehlgeschlagene Operationen
+ERROR_ACCESS_DENIED = "access_denied"
+ERROR_IN_USE = "in_use"
+ERROR_NOT_FOUND = "not_found"
+ERROR_ALREADY_ASSIGNED = "already_assigned"
+ERROR_TIMEOUT = "timeout"
+ERROR_NOT_AVAILABLE = "diskpart_not_found"
+ERROR_SKIPPED = "skipped"  # Nicht ausgeführt, weil ein vorheriger Schritt fehlschlug
+ERROR_UNKNOWN = "unknown"
+
+# Bekannte Meldungen (englisch und deutsch) je Fehlerklasse, in Prüfreihenfolge.
+# Die Wortlaute stammen aus diskpart/VDS, z.B. "Access is denied.",
+# "The specified drive letter is not free to be assigned." oder
+# "Das ausgewählte Volume ist ungültig oder nicht vorhanden."
+ERROR_PATTERNS: List[Tuple[str, "re.Pattern[str]"]] = [
+    (ERROR_ACCESS_DENIED, re.compile(r"access (is )?denied|zugriff (wurde )?verweigert")),
+    (ERROR_IN_USE, re.compile(r"\b(currently )?in use\b|being used by another process"
+                              r"|von einem anderen prozess verwendet|(wird|werden) verwendet|in verwendung")),
+    (ERROR_ALREADY_ASSIGNED, re.compile(r"already assigned|not free to be assigned"
+                                        r"|bereits zugewiesen|nicht frei")),
+    (ERROR_NOT_FOUND, re.compile(r"not found|not valid or does not exist|no volume selected"
+                                 r"|nicht gefunden|ungültig oder nicht vorhanden|kein volume ausgewählt")),
+]
+
+
+@dataclass
+class DiskpartOperation:
+    """Eine einzelne Änderung (z.B. "D:" → "E:" oder "D:" → "C:\\Mounts\\Daten1")."""
+
+    old_letter: str
+    new_letter: str
+    label: str = ""
+
+
+@dataclass
+class DiskpartResult:
+    """Ergebnis einer Operation innerhalb einer diskpart-Sitzung."""
+
+    operation: DiskpartOperation
+    success: bool
+    message: str = ""
+    error_kind: Optional[str] = None
+    # diskpart lief ohne Fehler, die Ausgabe bestätigt den Erfolg aber nicht
+    unclear: bool = False
+    # Ergebnis wurde über die Volume-Tabelle nach der Änderung bestätigt
+    verified: bool = False
+
+
+@dataclass
+class VolumeRow:
+    """Eine Zeile aus der Ausgabe von "list volume"."""
+
+    number: int
+    letter: str = ""  # z.B. "D:"; leer ohne Buchstaben
+    label: str = ""  # von diskpart auf 11 Zeichen gekürzt
+    filesystem: str = ""
+    kind: str = ""  # Spalte "Type"/"Typ" in der Sprache des Systems
+    # Bereitstellungsordner ohne abschließenden Schrägstrich
+    mounts: List[str] = field(default_factory=list)
+
+
+def is_admin(runner: Optional[command_runner.CommandRunner] = None) -> bool:
+    """
+    Prüft, ob das Programm mit Administratorrechten läuft (Voraussetzung für diskpart).
+
+    Args:
+        runner (Optional[command_runner.CommandRunner]): Standard ist der prozessweite Runner
+
+    Returns:
+        bool: True wenn Admin-Rechte vorhanden, False sonst
+    """
+    return (runner or command_runner.get_runner()).is_admin()
+
+
+def quote_path(path: str) -> str:
+    """Setzt Pfade mit Leerzeichen für diskpart in Anführungszeichen."""
+    return f'"{path}"' if " " in path else path
+
+
+def operation_commands(operation: DiskpartOperation, number: Optional[int] = None) -> List[str]:
+    """
+    Liefert die diskpart-Befehle einer Operation: select, assign und bei
+    Ordnern ein remove für den bisherigen Zugriffspfad.
+
+    Args:
+        operation (DiskpartOperation): Die Änderung
+        number (Optional[int]): Volume-Nummer aus "list volume"; ohne Nummer wird
+            über den bisherigen Buchstaben bzw. Ordner gewählt
+    """
+    old, new = operation.old_letter, operation.new_letter
+    old_is_path, new_is_path = is_mount_path(old), is_mount_path(new)
+    if number is not None:
+        commands = [f"select volume {number}"]
+    else:
+        commands = [f"select volume {quote_path(old) if old_is_path else old[0]}"]
+    commands.append(f"assign mount={quote_path(new)}" if new_is_path else f"assign letter={new[0]}")
+    if old_is_path:
+        commands.append(f"remove mount={quote_path(old)}")
+    elif new_is_path:
+        commands.append(f"remove letter={old[0]}")
+    return commands
+
+
+def build_script(operations: List[DiskpartOperation], rows: Optional[List[VolumeRow]] = None) -> str:
+    """
+    Erstellt ein diskpart-Skript mit den Befehlen aus operation_commands pro Operation,
+    eingerahmt von "list volume" vor und nach den Änderungen.
+
+    Mit rows entspricht das Skript den Zeilen, die apply_operations schickt,
+    wenn alle Schritte gelingen (z.B. für Fixtures).
+
+    Args:
+        operations (List[DiskpartOperation]): Auszuführende Operationen in Reihenfolge
+        rows (Optional[List[VolumeRow]]): Tabelle vor den Änderungen; ohne wird über Buchstaben gewählt
+
+    Returns:
+        str: Skript für die Standardeingabe von diskpart
+    """
+    numbers = volume_numbers(operations, rows) if rows is not None else [None] * len(operations)
+    lines = ["list volume"]
+    for operation, number in zip(operations, numbers):
+        lines.extend(operation_commands(operation, number))
+    lines.append("list volume")
+    lines.append("exit")
+    return "\n".join(lines)
+
+
+def split_output(stdout: str) -> List[str]:
+    """
+    Zerlegt die diskpart-Ausgabe in die Antworten auf die einzelnen Befehle.
+
+    Das erste Element ist der Begrüßungstext, danach folgt je ein Element
+    pro gelesenem Befehl.
+    """
+    return [segment.strip() for segment in stdout.split(DISKPART_PROMPT)]
+
+
+def parse_volume_table(text: str) -> Optional[List[VolumeRow]]:
+    """
+    Zerlegt die Ausgabe von "list volume" unabhängig von der Anzeigesprache.
+
+    Die Spaltengrenzen ergeben sich aus der Trennzeile aus Bindestrichen; die
+    Reihenfolge der Spalten (Nummer, Buchstabe, Bezeichnung, Dateisystem, Typ, ...)
+    ist in allen Sprachen gleich.
+
+    Returns:
+        Optional[List[VolumeRow]]: Zeilen der Tabelle; None, wenn keine Tabelle gefunden wurde
+    """
+    lines = text.splitlines()
+    for index, line in enumerate(lines):
+        if SEPARATOR_LINE.match(line):
+            break
+    else:
+        return None
+
+    starts = [match.start() for match in re.finditer(r"-+", lines[index])]
+    rows = []
+    for line in lines[index + 1:]:
+        if not line.strip():
+            break
+        mount = MOUNT_LINE.match(line)
+        if mount is not None and rows:
+            rows[-1].mounts.append(mount.group(1).rstrip("\\"))
+            continue
+        # Spalte reicht bis zum Beginn der nächsten (Werte stehen teils rechtsbündig über den Rand)
+        cells = [line[start:end].strip() for start, end in zip(starts, starts[1:] + [len(line)])]
+        number = re.search(r"(\d+)\s*$", cells[0]) if cells else None
+        if number is None:
+            continue
+        cells += [""] * (5 - len(cells))
+        letter = cells[1][:1].upper() if len(cells[1]) == 1 and cells[1].isalpha() else ""
+        rows.append(VolumeRow(int(number.group(1)), f"{letter}:" if letter else "",
+                              cells[2], cells[3], cells[4]))
+    return rows
+
+
+def letters_by_volume(rows: List[VolumeRow]) -> Dict[int, str]:
+    """Ordnet jeder Volume-Nummer ihren Buchstaben zu (leer ohne Buchstaben)."""
+    return {row.number: row.letter for row in rows}
+
+
+def targets_by_volume(rows: List[VolumeRow]) -> Dict[int, Set[str]]:
+    """Ordnet jeder Volume-Nummer ihre Zugriffspfade (Buchstabe und Ordner) als Vergleichsschlüssel zu."""
+    return {row.number: {target.upper() for target in [row.letter] + row.mounts if target} for row in rows}
+
+
+def volume_numbers(operations: List[DiskpartOperation], rows: List[VolumeRow]) -> List[Optional[int]]:
+    """
+    Volume-Nummer jeder Operation unter der Annahme, dass alle Schritte gelingen.
+
+    Die Ziele werden ab der Tabelle vor den Änderungen verfolgt, damit auch
+    Schritte über ein temporäres Ziel das richtige Volume wählen.
+
+    Returns:
+        List[Optional[int]]: None für Operationen, deren Ausgangsziel unbekannt ist
+    """
+    volume_of = {target: number for number, targets in targets_by_volume(rows).items() for target in targets}
+    numbers = []
+    for operation in operations:
+        number = volume_of.pop(operation.old_letter.upper(), None)
+        if number is not None:
+            volume_of[operation.new_letter.upper()] = number
+        numbers.append(number)
+    return numbers
+
+
+def is_selected(text: str, number: Optional[int] = None) -> bool:
+    """
+    Prüft die Antwort auf "select volume" unabhängig von der Anzeigesprache.
+
+    Die Bestätigung nennt die Nummer des gewählten Volumes ("Volume 3 is the
+    selected volume." / "Volume 3 ist das gewählte Volume."), die Fehlermeldungen
+    enthalten keine Zahl.
+    """
+    if classify_error(text):
+        return False
+    numbers = re.findall(r"\d+", text)
+    return str(number) in numbers if number is not None else bool(numbers)
+
+
+def classify_error(text: str) -> Optional[str]:
+    """Ordnet eine Fehlermeldung einer bekannten Fehlerklasse zu (siehe ERROR_PATTERNS)."""
+    lowered = text.lower()
+    for error, pattern in ERROR_PATTERNS:
+        if pattern.search(lowered):
+            return error
+    return None
+
+
+def _is_success(text: str) -> bool:
+    lowered = text.lower()
+    return "successfully" in lowered or "erfolgreich" in lowered
+
+
+def parse_output(operations: List[DiskpartOperation], stdout: str,
+                 stderr: str = "") -> List[DiskpartResult]:
+    """
+    Ordnet die Ausgabe einer Sitzung (Skript aus build_script) den einzelnen Operationen zu.
+
+    Liegen beide Volume-Tabellen vor, entscheidet ihr Vergleich; sonst werden
+    die Meldungstexte ausgewertet.
+
+    Args:
+        operations (List[DiskpartOperation]): Operationen in Skript-Reihenfolge
+        stdout (str): Gesamte Standardausgabe von diskpart
+        stderr (str): Fehlerausgabe von diskpart
+
+    Returns:
+        List[DiskpartResult]: Ein Ergebnis pro Operation
+    """
+    segments = split_output(stdout)[1:]
+    before = parse_volume_table(segments[0]) if segments else None
+    after_index = 1 + sum(len(operation_commands(operation)) for operation in operations)
+    after = parse_volume_table(segments[after_index]) if after_index < len(segments) else None
+
+    results = parse_messages(operations, segments[1:], stderr)
+    if before is not None and after is not None:
+        results = verify_with_tables(results, before, after)
+    return results
+
+
+def parse_messages(operations: List[DiskpartOperation], segments: List[str],
+                   stderr: str = "") -> List[DiskpartResult]:
+    """
+    Wertet die Meldungen der select/assign/remove-Befehle aus (nur deutsche und englische Texte bekannt).
+
+    Args:
+        operations (List[DiskpartOperation]): Operationen in Skript-Reihenfolge
+        segments (List[str]): Antworten ab dem ersten select-Befehl
+        stderr (str): Fehlerausgabe von diskpart
+
+    Returns:
+        List[DiskpartResult]: Ein Ergebnis pro Operation; unbekannte Texte gelten als unklar
+    """
+    results = []
+    position = 0
+
+    for operation in operations:
+        count = len(operation_commands(operation))
+        select_index = position
+        position += count
+
+        if position > len(segments):
+            # diskpart hat die Sitzung vor diesem Befehl beendet
+            message = stderr.strip() or "Keine Ausgabe von diskpart für diese Operation."
+            results.append(DiskpartResult(operation, False, message,
+                                          classify_error(message) or ERROR_UNKNOWN))
+            continue
+
+        results.append(message_result(operation, segments[select_index], segments[select_index + 1:position]))
+
+    return results
+
+
+def message_result(operation: DiskpartOperation, select_text: str, change_texts: List[str]) -> DiskpartResult:
+    """
+    Wertet die Antworten auf select und die folgenden assign/remove-Befehle einer Operation aus.
+
+    Args:
+        operation (DiskpartOperation): Die Operation
+        select_text (str): Antwort auf select
+        change_texts (List[str]): Antworten auf assign und ggf. remove; der erste erkannte Fehler zählt
+
+    Returns:
+        DiskpartResult: Unbekannte Texte gelten als unklar
+    """
+    select_error = classify_error(select_text)
+    change_errors = [(text, classify_error(text)) for text in change_texts if classify_error(text)]
+    if select_error:
+        return DiskpartResult(operation, False, select_text, select_error)
+    if all(_is_success(text) for text in change_texts):
+        return DiskpartResult(operation, True, "\n".join(change_texts))
+    if change_errors:
+        return DiskpartResult(operation, False, *change_errors[0])
+    return DiskpartResult(operation, True, "\n".join(change_texts), unclear=True)
+
+
+def verify_with_tables(results: List[DiskpartResult], before: List[VolumeRow],
+                       after: List[VolumeRow]) -> List[DiskpartResult]:
+    """
+    Bestätigt oder korrigiert die Ergebnisse anhand der Volume-Tabellen vor und nach der Sitzung.
+
+    Die Schritte werden pro Volume verfolgt (bei Tauschs über ein temporäres
+    Ziel sind es mehrere). Trägt das Volume danach das letzte Ziel, waren alle
+    seine Schritte erfolgreich; sonst ist der Schritt fehlgeschlagen, dessen
+    Ausgangsziel das Volume noch trägt, und alle folgenden ebenso. Buchstaben
+    und Ordner werden ohne Groß-/Kleinschreibung verglichen. Fehlerklassen
+    stammen weiterhin aus dem Meldungstext, sofern bekannt.
+    """
+    volume_of = {target: number for number, targets in targets_by_volume(before).items() for target in targets}
+    final_targets = targets_by_volume(after)
+
+    # Schritte pro Volume in Ausführungsreihenfolge
+    steps: Dict[int, List[int]] = {}
+    for index, result in enumerate(results):
+        number = volume_of.pop(result.operation.old_letter.upper(), None)
+        if number is None:
+            continue
+        volume_of[result.operation.new_letter.upper()] = number
+        steps.setdefault(number, []).append(index)
+
+    verified = list(results)
+    for number, indices in steps.items():
+        actual = final_targets.get(number)
+        if actual is None:
+            # Volume verschwunden (z.B. Datenträger entfernt): Meldungstexte bleiben maßgeblich
+            continue
+        failed_from = len(indices)
+        if results[indices[-1]].operation.new_letter.upper() not in actual:
+            failed_from = next((position for position, index in enumerate(indices)
+                                if results[index].operation.old_letter.upper() in actual), 0)
+
+        for position, index in enumerate(indices):
+            result = results[index]
+            if position < failed_from:
+                verified[index] = DiskpartResult(result.operation, True, result.message, verified=True)
+            else:
+                error_kind = result.error_kind or classify_error(result.message) or ERROR_UNKNOWN
+                verified[index] = DiskpartResult(result.operation, False, result.message, error_kind,
+                                                 verified=True)
+    return verified
+
+
+def apply_operations(operations: List[DiskpartOperation],
+                     runner: Optional[command_runner.CommandRunner] = None) -> List[DiskpartResult]:
+    """
+    Führt alle Operationen in einer einzigen diskpart-Sitzung aus.
+
+    Args:
+        operations (List[DiskpartOperation]): Auszuführende Operationen in Reihenfolge
+        runner (Optional[command_runner.CommandRunner]): Standard ist der prozessweite Runner
+
+    Returns:
+        List[DiskpartResult]: Ein Ergebnis pro Operation, in derselben Reihenfolge
+    """
+    if not operations:
+        return []
+
+    runner = runner or command_runner.get_runner()
+    deadline = time.monotonic() + BASE_TIMEOUT + TIMEOUT_PER_OPERATION * len(operations)
+    results: List[Optional[DiskpartResult]] = [None] * len(operations)
+
+    with tracing.span("diskpart", "subprocess", operations=len(operations)):
+        try:
+            session = runner.start_session(['diskpart'], DISKPART_PROMPT)
+            run_session(session, operations, results, deadline)
+        except subprocess.TimeoutExpired:
+            # Bis dahin bestätigte Schritte bleiben gültig
+            return [result if result is not None and result.success else
+                    DiskpartResult(operation, False, "Zeitüberschreitung bei diskpart.", ERROR_TIMEOUT)
+                    for operation, result in zip(operations, results)]
+        except FileNotFoundError:
+            return [result if result is not None else
+                    DiskpartResult(operation, False, "diskpart wurde nicht gefunden.", ERROR_NOT_AVAILABLE)
+                    for operation, result in zip(operations, results)]
+    return results
+
+
+def run_session(session: command_runner.CommandSession, operations: List[DiskpartOperation],
+                results: List[Optional[DiskpartResult]], deadline: float):
+    """
+    Führt die Operationen in einer laufenden diskpart-Sitzung aus und trägt die Ergebnisse in results ein.
+
+    Jedes Volume wird über seine Nummer aus dem einleitenden "list volume"
+    gewählt; ein Schritt, dessen Ausgangsziel erst ein fehlgeschlagener
+    vorheriger Schritt hätte schaffen sollen, wird übersprungen. Schlägt ein
+    select fehl, werden keine weiteren Befehle außer dem abschließenden
+    "list volume" geschickt. Zum Schluss werden die ausgeführten Schritte mit
+    verify_with_tables bestätigt.
+
+    Args:
+        session (command_runner.CommandSession): Gestartete diskpart-Sitzung
+        operations (List[DiskpartOperation]): Auszuführende Operationen in Reihenfolge
+        results (List[Optional[DiskpartResult]]): Wird Schritt für Schritt gefüllt (auch bei Ausnahmen)
+        deadline (float): Zeitpunkt (time.monotonic), bis zu dem die Sitzung beendet sein muss
+
+    Raises:
+        subprocess.TimeoutExpired: Wenn diskpart nicht rechtzeitig antwortet
+        FileNotFoundError: Wenn diskpart nicht vorhanden ist
+    """
+    def remaining() -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    session.read(remaining())
+    before = parse_volume_table(session.send("list volume", remaining()))
+    # Ohne lesbare Tabelle wird wie früher über Buchstaben bzw. Ordner gewählt
+    volume_of = ({target: number for number, targets in targets_by_volume(before).items() for target in targets}
+                 if before is not None else None)
+    executed = []
+
+    for index, operation in enumerate(operations):
+        old = operation.old_letter.upper()
+        number = None
+        if volume_of is not None:
+            number = volume_of.get(old)
+            if number is None:
+                created = any(earlier.new_letter.upper() == old for earlier in operations[:index])
+                message = (f"Nicht ausgeführt: {operation.old_letter} entsteht erst durch einen "
+                           f"fehlgeschlagenen vorherigen Schritt." if created else
+                           f"{operation.old_letter} ist in der Volume-Liste von diskpart nicht vorhanden.")
+                results[index] = DiskpartResult(operation, False, message,
+                                                ERROR_SKIPPED if created else ERROR_NOT_FOUND)
+                continue
+
+        commands = operation_commands(operation, number)
+        select_text = session.send(commands[0], remaining()).strip()
+        if not is_selected(select_text, number):
+            results[index] = DiskpartResult(operation, False, select_text,
+                                            classify_error(select_text) or ERROR_NOT_FOUND)
+            for later in range(index + 1, len(operations)):
+                results[later] = DiskpartResult(operations[later], False,
+                                                "Nicht ausgeführt: Auswahl eines vorherigen Volumes fehlgeschlagen.",
+                                                ERROR_SKIPPED)
+            break
+
+        change_texts = [session.send(command, remaining()).strip() for command in commands[1:]]
+        results[index] = message_result(operation, select_text, change_texts)
+        executed.append(index)
+        if results[index].success and volume_of is not None:
+            del volume_of[old]
+            volume_of[operation.new_letter.upper()] = number
+
+    after = parse_volume_table(session.send("list volume", remaining()))
+    session.send("exit", remaining())
+    outcome = session.close(remaining())
+
+    if before is not None and after is not None and executed:
+        verified = verify_with_tables([results[index] for index in executed], before, after)
+        for index, result in zip(executed, verified):
+            results[index] = result
+    if outcome.returncode != 0:
+        # diskpart meldet einen Fehler: Unbestätigte Ergebnisse gelten nicht als Erfolg
+        for index in executed:
+            if results[index].unclear:
+                results[index] = DiskpartResult(operations[index], False, results[index].message, ERROR_UNKNOWN)
@@ -0,0 +1,870 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backends für die Laufwerksermittlung
+====================================
+
+Jedes Backend ermittelt die Laufwerke auf einem anderen Weg. Die Reihenfolge
+in ``default_backends`` entspricht der Priorität: zuerst direkte Win32-Aufrufe
+über ctypes (Millisekunden), danach ein dauerhaft laufender PowerShell-Prozess,
+wmic und als letzter Ausweg ``os.path.exists``. ``FakeBackend`` liefert feste Daten und macht die
+Ermittlung auch unter Linux testbar.
+
+``enumerate_volumes`` fragt die Backends nacheinander ab. ``HedgedEnumerator``
+wartet dagegen nicht auf ein hängendes Backend: Nach einer kurzen
+Absicherungsverzögerung startet er parallel das nächste, nimmt das erste
+gültige Ergebnis und bricht die übrigen ab.
+
+Neben Buchstaben melden das native und das PowerShell-Backend auch
+Bereitstellungsordner (``VolumeInfo.mount_points``). Laufwerke, die nur in
+Ordnern bereitgestellt sind, erscheinen mit ihrem ersten Ordner als ``letter``.
+"""
+
+import abc
+import ctypes
+import os
+import queue
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import command_runner
+import tracing
+from letter_planner import is_mount_path
+from powershell_worker import PowerShellWorker, PowerShellWorkerError
+
+
+# Bezeichnung für Laufwerke ohne eigenen Namen
+DEFAULT_LABEL = "Lokaler Datenträger"
+
+# Bezeichnung für Buchstaben, deren Prüfung nicht rechtzeitig antwortet (z.B. getrenntes Netzlaufwerk)
+UNRESPONSIVE_LABEL = "Nicht erreichbar"
+
+# Ergebnisse von PathProbeBackend.probe
+PROBE_PRESENT = "present"
+PROBE_ABSENT = "absent"
+PROBE_UNRESPONSIVE = "unresponsive"
+
+# Rückgabewerte von GetDriveTypeW
+DRIVE_UNKNOWN = 0
+DRIVE_NO_ROOT_DIR = 1
+DRIVE_REMOVABLE = 2
+DRIVE_FIXED = 3
+DRIVE_REMOTE = 4
+DRIVE_CDROM = 5
+DRIVE_RAMDISK = 6
+
+# Unterdrückt "Kein Datenträger"-Dialoge bei leeren Wechsellaufwerken
+SEM_FAILCRITICALERRORS = 0x0001
+
+INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+
+# Puffergrößen für Volume-GUID-Pfade und die Pfadliste eines Volumes (Zeichen)
+VOLUME_NAME_LENGTH = 50
+VOLUME_PATHS_LENGTH = 4096
+
+
+@dataclass
+class VolumeInfo:
+    """Ein ermitteltes Laufwerk."""
+
+    # Buchstabe ("D:"); bei Laufwerken ohne Buchstaben der erste Bereitstellungsordner
+    letter: str
+    label: str = DEFAULT_LABEL
+    serial: Optional[int] = None
+    filesystem: str = ""
+    drive_type: Optional[int] = None
+    # Größe und freier Speicher in Bytes, sofern das Backend sie ohnehin mitliefert
+    size: Optional[int] = None
+    free: Optional[int] = None
+    # Der Buchstabe ist belegt, das Laufwerk hat aber nicht rechtzeitig geantwortet
+    unresponsive: bool = False
+    # Weitere Bereitstellungsordner (z.B. "C:\Mounts\Daten1"), ohne abschließenden Schrägstrich
+    mount_points: List[str] = field(default_factory=list)
+    # Volume-GUID-Pfad ("\\?\Volume{...}\"), sofern das Backend ihn liefert; bleibt bei Buchstabenwechseln gleich
+    guid: Optional[str] = None
+
+
+class BackendError(Exception):
+    """Ein Backend konnte die Laufwerke nicht ermitteln."""
+
+
+class DriveBackend(abc.ABC):
+    """Basisklasse aller Backends."""
+
+    name = "base"
+    # Billig genug für Dauerabfragen durch drive_watcher (keine Prozesse, kein Netzwerk)
+    cheap = False
+    # Einzelabfragen über volume(); probe_letters fragt nur Backends, die sie unterstützen
+    supports_single_volume = False
+
+    def available(self) -> bool:
+        """Prüft, ob das Backend auf diesem System grundsätzlich nutzbar ist."""
+        return True
+
+    @abc.abstractmethod
+    def enumerate(self) -> List[VolumeInfo]:
+        """
+        Ermittelt alle Laufwerke.
+
+        Raises:
+            BackendError: Wenn die Ermittlung fehlschlägt
+        """
+
+    def fingerprint(self) -> Optional[Hashable]:
+        """
+        Liefert einen billigen Fingerabdruck des Laufwerksbestands.
+
+        Solange sich der Fingerabdruck nicht ändert, muss die teure Ermittlung
+        nicht wiederholt werden. None bedeutet: nicht unterstützt.
+        """
+        return None
+
+    def supports_volume(self, target: str) -> bool:
+        """Prüft, ob volume() diesen Buchstaben bzw. Bereitstellungsordner beantworten kann."""
+        return self.supports_single_volume
+
+    def volume(self, letter: str) -> Optional[VolumeInfo]:
+        """
+        Liest ein einzelnes Laufwerk, z.B. zur Kontrolle nach einer Änderung.
+
+        Nur für Ziele, für die supports_volume() True liefert.
+
+        Returns:
+            Optional[VolumeInfo]: Das Laufwerk oder None, wenn der Buchstabe nicht belegt ist
+
+        Raises:
+            BackendError: Wenn das Backend keine Einzelabfrage unterstützt oder sie fehlschlägt
+        """
+        raise BackendError(f"Das Backend {self.name} unterstützt keine Einzelabfrage.")
+
+    def cancel(self):
+        """Bricht eine laufende Ermittlung aus einem anderen Thread ab (z.B. durch Beenden des Prozesses)."""
+
+    def close(self):
+        """Gibt vom Backend gehaltene Ressourcen (z.B. Hintergrundprozesse) frei."""
+
+
+class NativeBackend(DriveBackend):
+    """
+    Ermittelt Laufwerke direkt über GetLogicalDrives/GetDriveTypeW/GetVolumeInformationW,
+    Bereitstellungsordner über FindFirstVolumeW/GetVolumePathNamesForVolumeNameW.
+    """
+
+    name = "native"
+    cheap = True
+    supports_single_volume = True
+
+    def available(self) -> bool:
+        return os.name == "nt" and hasattr(ctypes, "windll")
+
+    def enumerate(self) -> List[VolumeInfo]:
+        kernel32 = ctypes.windll.kernel32
+        old_mode = kernel32.SetErrorMode(SEM_FAILCRITICALERRORS)
+        try:
+            bitmask = kernel32.GetLogicalDrives()
+            if not bitmask:
+                raise BackendError(f"GetLogicalDrives fehlgeschlagen (Fehler {kernel32.GetLastError()})")
+
+            volumes = []
+            for index, letter in enumerate(string.ascii_uppercase):
+                if bitmask & (1 << index):
+                    volume = self.volume_info(letter)
+                    if volume is not None:
+                        volumes.append(volume)
+            return merge_mount_points(volumes, self.mounted_volumes())
+        finally:
+            kernel32.SetErrorMode(old_mode)
+
+    def mounted_volumes(self) -> List[VolumeInfo]:
+        """Liefert die Volumes mit Bereitstellungsordnern (Eingabe für merge_mount_points)."""
+        mounted = []
+        for paths in self.volume_paths():
+            folders = [path.rstrip("\\") for path in paths if is_mount_path(path)]
+            if not folders:
+                continue
+            letters = [path[:2] for path in paths if not is_mount_path(path)]
+            volume = VolumeInfo(letters[0]) if letters else self.volume_info(folders[0])
+            if volume is not None:
+                volume.mount_points = folders
+                mounted.append(volume)
+        return mounted
+
+    @staticmethod
+    def volume_paths() -> List[List[str]]:
+        """Liefert pro Volume seine Zugriffspfade, z.B. ["D:\\", "C:\\Mounts\\Daten1\\"]."""
+        kernel32 = ctypes.windll.kernel32
+        kernel32.FindFirstVolumeW.restype = ctypes.c_void_p
+        name = ctypes.create_unicode_buffer(VOLUME_NAME_LENGTH)
+        handle = kernel32.FindFirstVolumeW(name, len(name))
+        if handle in (None, INVALID_HANDLE_VALUE):
+            return []
+
+        volumes = []
+        try:
+            while True:
+                paths = ctypes.create_unicode_buffer(VOLUME_PATHS_LENGTH)
+                returned = ctypes.c_uint32()
+                if kernel32.GetVolumePathNamesForVolumeNameW(name, paths, len(paths), ctypes.byref(returned)):
+                    # Liste nullterminierter Pfade, abgeschlossen mit einer leeren Zeichenkette
+                    volumes.append([path for path in paths[:returned.value].split("\0") if path])
+                if not kernel32.FindNextVolumeW(ctypes.c_void_p(handle), name, len(name)):
+                    break
+        finally:
+            kernel32.FindVolumeClose(ctypes.c_void_p(handle))
+        return volumes
+
+    def fingerprint(self) -> Optional[Hashable]:
+        """
+        Bitmaske aus GetLogicalDrives plus Seriennummer und Bezeichnung aller Laufwerke
+        und Bereitstellungsordner.
+
+        Die Bezeichnung kommt aus demselben Aufruf wie die Seriennummer und kostet
+        nichts extra; ohne sie bliebe ein Umbenennen für Cache und Watcher unsichtbar.
+        """
+        kernel32 = ctypes.windll.kernel32
+        old_mode = kernel32.SetErrorMode(SEM_FAILCRITICALERRORS)
+        try:
+            bitmask = kernel32.GetLogicalDrives()
+            serials = []
+            name_buffer = ctypes.create_unicode_buffer(261)
+            for index, letter in enumerate(string.ascii_uppercase):
+                if bitmask & (1 << index):
+                    serial = ctypes.c_uint32()
+                    ok = kernel32.GetVolumeInformationW(ctypes.c_wchar_p(f"{letter}:\\"), name_buffer,
+                                                        len(name_buffer), ctypes.byref(serial), None, None, None, 0)
+                    serials.append((serial.value, name_buffer.value) if ok else None)
+            return bitmask, tuple(serials), tuple(sorted(tuple(paths) for paths in self.volume_paths()))
+        finally:
+            kernel32.SetErrorMode(old_mode)
+
+    def volume(self, letter: str) -> Optional[VolumeInfo]:
+        kernel32 = ctypes.windll.kernel32
+        old_mode = kernel32.SetErrorMode(SEM_FAILCRITICALERRORS)
+        try:
+            return self.volume_info(letter if is_mount_path(letter) else letter[0].upper())
+        finally:
+            kernel32.SetErrorMode(old_mode)
+
+    @staticmethod
+    def volume_info(letter: str) -> Optional[VolumeInfo]:
+        """Liest Typ, Bezeichnung, Seriennummer und Dateisystem eines Laufwerks ("D" oder Ordnerpfad)."""
+        kernel32 = ctypes.windll.kernel32
+        if is_mount_path(letter):
+            letter = letter.rstrip("\\")
+            target, root = letter, letter + "\\"
+        else:
+            target, root = f"{letter}:", f"{letter}:\\"
+
+        drive_type = kernel32.GetDriveTypeW(ctypes.c_wchar_p(root))
+        if drive_type == DRIVE_NO_ROOT_DIR:
+            return None
+
+        name_buffer = ctypes.create_unicode_buffer(261)
+        fs_buffer = ctypes.create_unicode_buffer(261)
+        serial = ctypes.c_uint32()
+        max_component = ctypes.c_uint32()
+        flags = ctypes.c_uint32()
+
+        guid_buffer = ctypes.create_unicode_buffer(VOLUME_NAME_LENGTH)
+        guid = (guid_buffer.value if kernel32.GetVolumeNameForVolumeMountPointW(
+            ctypes.c_wchar_p(root), guid_buffer, len(guid_buffer)) else None)
+
+        ok = kernel32.GetVolumeInformationW(
+            ctypes.c_wchar_p(root), name_buffer, len(name_buffer),
+            ctypes.byref(serial), ctypes.byref(max_component), ctypes.byref(flags),
+            fs_buffer, len(fs_buffer)
+        )
+        if not ok:
+            # z.B. leeres optisches Laufwerk: Buchstabe existiert, Datenträger nicht
+            return VolumeInfo(target, DEFAULT_LABEL, drive_type=drive_type, guid=guid)
+
+        return VolumeInfo(target, name_buffer.value or DEFAULT_LABEL,
+                          serial.value, fs_buffer.value, drive_type, guid=guid)
+
+
+class PowerShellBackend(DriveBackend):
+    """
+    Ermittelt Laufwerke über einen dauerhaft laufenden PowerShell-Prozess
+    (Win32_LogicalDisk, Bereitstellungsordner über Win32_MountPoint).
+    """
+
+    name = "powershell"
+    timeout = 15
+
+    def __init__(self, worker: Optional[PowerShellWorker] = None,
+                 runner: Optional[command_runner.CommandRunner] = None):
+        """
+        Args:
+            worker (Optional[PowerShellWorker]): Zu verwendender Prozess; Standard liefert der Runner
+                (startet PowerShell bei Bedarf)
+            runner (Optional[command_runner.CommandRunner]): Standard ist der prozessweite Runner
+        """
+        self.runner = runner or command_runner.get_runner()
+        self.worker = worker or self.runner.powershell_worker(self.timeout)
+
+    def available(self) -> bool:
+        return os.name == "nt" or self.runner.simulated
+
+    def enumerate(self) -> List[VolumeInfo]:
+        try:
+            records = self.worker.request("volumes")
+        except PowerShellWorkerError as e:
+            raise BackendError(str(e))
+        volumes = parse_powershell_json(records)
+        try:
+            mounts = self.worker.request("mounts")
+        except PowerShellWorkerError:
+            # Ordner sind eine Ergänzung; die Buchstaben bleiben auch ohne sie gültig
+            return volumes
+        return merge_mount_points(volumes, parse_powershell_mounts(mounts))
+
+    def cancel(self):
+        self.worker.cancel()
+
+    def close(self):
+        self.worker.close()
+
+
+class WmicBackend(DriveBackend):
+    """Ermittelt Laufwerke über wmic (in neueren Windows-Versionen entfernt); nur Buchstaben."""
+
+    name = "wmic"
+    timeout = 10
+
+    def __init__(self, runner: Optional[command_runner.CommandRunner] = None):
+        """
+        Args:
+            runner (Optional[command_runner.CommandRunner]): Standard ist der prozessweite Runner
+        """
+        self.runner = runner or command_runner.get_runner()
+        self._command = None
+
+    def available(self) -> bool:
+        return os.name == "nt" or self.runner.simulated
+
+    def enumerate(self) -> List[VolumeInfo]:
+        with tracing.span("wmic", "subprocess"):
+            command = self.runner.start([
+                'wmic', 'logicaldisk', 'get', 'size,freespace,caption,volumename'
+            ], shell=True)
+            self._command = command
+            try:
+                result = command.communicate(timeout=self.timeout)
+            finally:
+                self._command = None
+
+        if result.returncode != 0:
+            raise BackendError(f"wmic beendet mit Code {result.returncode}")
+        return parse_wmic_output(result.stdout)
+
+    def cancel(self):
+        command = self._command
+        if command is not None:
+            command.kill()
+
+
+def path_exists_probe(letter: str) -> bool:
+    """Prüft einen Buchstaben über os.path.exists (kann bei Netz- und optischen Laufwerken hängen)."""
+    return os.path.exists(f"{letter}:\\")
+
+
+class PathProbeBackend(DriveBackend):
+    """
+    Letzter Ausweg: prüft jeden Buchstaben einzeln, z.B. mit os.path.exists.
+
+    Die Prüfungen laufen parallel in höchstens ``workers`` Threads. Antwortet
+    ein Buchstabe nicht innerhalb von ``deadline`` Sekunden, wird er als
+    "nicht erreichbar" gemeldet und sein Platz freigegeben; solange seine
+    Prüfung noch hängt, wird er bei weiteren Durchläufen nicht erneut geprüft.
+    """
+
+    name = "path"
+    supports_single_volume = True
+
+    def __init__(self, probe: Callable[[str], bool] = path_exists_probe, workers: int = 8,
+                 deadline: float = 2.0, letters: str = string.ascii_uppercase):
+        """
+        Args:
+            probe (Callable[[str], bool]): Prüft einen Buchstaben ("D"); austauschbar für Tests
+            workers (int): Höchstzahl gleichzeitiger Prüfungen
+            deadline (float): Frist pro Buchstabe in Sekunden
+            letters (str): Zu prüfende Buchstaben
+        """
+        self.probe_func = probe
+        self.workers = max(1, workers)
+        self.deadline = deadline
+        self.letters = letters
+        self._lock = threading.Lock()
+        self._running: Set[str] = set()  # Buchstaben, deren Prüfung noch läuft (auch über die Frist hinaus)
+        self._cancelled = threading.Event()
+
+    def enumerate(self) -> List[VolumeInfo]:
+        volumes = []
+        for letter, state in self.probe():
+            if state == PROBE_PRESENT:
+                volumes.append(VolumeInfo(f"{letter}:"))
+            elif state == PROBE_UNRESPONSIVE:
+                volumes.append(VolumeInfo(f"{letter}:", UNRESPONSIVE_LABEL, unresponsive=True))
+        return sorted(volumes, key=lambda volume: volume.letter)
+
+    def supports_volume(self, target: str) -> bool:
+        # Ein vorhandener Ordner sagt nichts darüber, ob dort ein Laufwerk bereitgestellt ist
+        return not is_mount_path(target)
+
+    def volume(self, letter: str) -> Optional[VolumeInfo]:
+        if not self.supports_volume(letter):
+            raise BackendError(f"Bereitstellungsordner lassen sich nicht einzeln prüfen: {letter}")
+        letter = letter[0].upper()
+        for _, state in self.probe(letter):
+            if state == PROBE_PRESENT:
+                return VolumeInfo(f"{letter}:")
+            if state == PROBE_UNRESPONSIVE:
+                return VolumeInfo(f"{letter}:", UNRESPONSIVE_LABEL, unresponsive=True)
+        return None
+
+    def probe(self, letters: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+        """
+        Prüft die Buchstaben parallel und liefert die Ergebnisse in der Reihenfolge der Fertigstellung.
+
+        Args:
+            letters (Optional[str]): Zu prüfende Buchstaben; Standard sind alle des Backends
+
+        Yields:
+            Tuple[str, str]: Buchstabe und PROBE_PRESENT, PROBE_ABSENT oder PROBE_UNRESPONSIVE
+        """
+        self._cancelled.clear()
+        pending = iter(letters if letters is not None else self.letters)
+        finished: queue.Queue = queue.Queue()
+        in_flight: Dict[str, float] = {}  # Buchstabe → Frist
+
+        def work(letter: str):
+            state = PROBE_ABSENT
+            try:
+                state = PROBE_PRESENT if self.probe_func(letter) else PROBE_ABSENT
+            except Exception:
+                # Nicht nur OSError: auch z.B. ValueError einer Prüffunktion gilt als "nicht vorhanden"
+                state = PROBE_ABSENT
+            finally:
+                # Sonst bliebe der Buchstabe für alle weiteren Durchläufe als hängend markiert
+                with self._lock:
+                    self._running.discard(letter)
+                finished.put((letter, state))
+
+        while not self._cancelled.is_set():
+            while len(in_flight) < self.workers:
+                letter = next(pending, None)
+                if letter is None:
+                    break
+                with self._lock:
+                    # Eine aus einem früheren Durchlauf noch hängende Prüfung wird nicht verdoppelt
+                    hung = letter in self._running
+                    self._running.add(letter)
+                if hung:
+                    yield letter, PROBE_UNRESPONSIVE
+                    continue
+                in_flight[letter] = time.monotonic() + self.deadline
+                # Daemon-Threads: eine hängende Prüfung hält weder die Ermittlung noch das Programmende auf
+                threading.Thread(target=work, args=(letter,), name=f"path-probe-{letter}", daemon=True).start()
+            if not in_flight:
+                break
+
+            wait = max(0.0, min(in_flight.values()) - time.monotonic())
+            try:
+                letter, state = finished.get(timeout=wait)
+            except queue.Empty:
+                letter = None
+            # Verspätete Ergebnisse bereits abgeschriebener Buchstaben werden verworfen
+            if letter is not None and in_flight.pop(letter, None) is not None:
+                yield letter, state
+
+            now = time.monotonic()
+            for letter, deadline in list(in_flight.items()):
+                if deadline <= now:
+                    del in_flight[letter]
+                    yield letter, PROBE_UNRESPONSIVE
+
+    def cancel(self):
+        self._cancelled.set()
+
+
+class FakeBackend(DriveBackend):
+    """Backend mit festen Daten für Tests und Benchmarks."""
+
+    name = "fake"
+    cheap = True
+    supports_single_volume = True
+
+    def __init__(self, volumes: Union[Dict[str, str], Iterable[VolumeInfo]] = (),
+                 delay: float = 0.0, error: Optional[Exception] = None):
+        """
+        Args:
+            volumes: Laufwerke als {"D:": "Daten"} oder als VolumeInfo-Objekte
+            delay (float): Künstliche Verzögerung pro Aufruf in Sekunden
+            error (Optional[Exception]): Wird bei jedem Aufruf geworfen, falls gesetzt
+        """
+        if isinstance(volumes, dict):
+            volumes = [VolumeInfo(letter, label) for letter, label in volumes.items()]
+        self.volumes = list(volumes)
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    def enumerate(self) -> List[VolumeInfo]:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return list(self.volumes)
+
+    def fingerprint(self) -> Optional[Hashable]:
+        return tuple((volume.letter, volume.serial, volume.label) for volume in self.volumes)
+
+    def volume(self, letter: str) -> Optional[VolumeInfo]:
+        letter = letter if is_mount_path(letter) else letter[0].upper() + ":"
+        return next((volume for volume in self.volumes
+                     if volume.letter == letter or letter in volume.mount_points), None)
+
+    def cancel(self):
+        self.cancelled += 1
+
+
+def parse_powershell_json(records: Any) -> List[VolumeInfo]:
+    """Wertet die JSON-Datensätze von Win32_LogicalDisk aus."""
+    if isinstance(records, dict):
+        # ConvertTo-Json entpackt Arrays mit nur einem Element
+        records = [records]
+
+    volumes = []
+    for record in records or []:
+        device_id = (record.get("DeviceID") or "").strip()  # z.B. "C:"
+        if not device_id or ':' not in device_id:
+            continue
+
+        serial = record.get("VolumeSerialNumber")
+        try:
+            serial = int(serial, 16) if serial else None
+        except (TypeError, ValueError):
+            serial = None
+
+        volumes.append(VolumeInfo(
+            device_id,
+            (record.get("VolumeName") or "").strip() or DEFAULT_LABEL,
+            serial,
+            record.get("FileSystem") or "",
+            record.get("DriveType"),
+            parse_bytes(record.get("Size")),
+            parse_bytes(record.get("FreeSpace")),
+        ))
+    return volumes
+
+
+def parse_powershell_mounts(records: Any) -> List[VolumeInfo]:
+    """
+    Wertet die JSON-Datensätze der Operation "mounts" (Win32_MountPoint mit Win32_Volume) aus.
+
+    Returns:
+        List[VolumeInfo]: Volumes mit Bereitstellungsordnern, Eingabe für merge_mount_points
+    """
+    if isinstance(records, dict):
+        records = [records]
+
+    by_device: Dict[str, VolumeInfo] = {}
+    for record in records or []:
+        path = (record.get("Path") or "").strip()
+        device = record.get("DeviceID") or path
+        if not is_mount_path(path):
+            continue  # Buchstaben liefert bereits Win32_LogicalDisk
+        volume = by_device.get(device)
+        if volume is None:
+            letter = (record.get("DriveLetter") or "").strip()
+            serial = record.get("SerialNumber")
+            volume = VolumeInfo(letter or path.rstrip("\\"),
+                                (record.get("Label") or "").strip() or DEFAULT_LABEL,
+                                serial if isinstance(serial, int) else None,
+                                record.get("FileSystem") or "",
+                                record.get("DriveType"),
+                                parse_bytes(record.get("Size")),
+                                parse_bytes(record.get("FreeSpace")),
+                                guid=record.get("DeviceID") or None)
+            by_device[device] = volume
+        volume.mount_points.append(path.rstrip("\\"))
+    return list(by_device.values())
+
+
+def merge_mount_points(volumes: List[VolumeInfo], mounted: Iterable[VolumeInfo]) -> List[VolumeInfo]:
+    """
+    Ergänzt die ermittelten Laufwerke um ihre Bereitstellungsordner.
+
+    Args:
+        volumes (List[VolumeInfo]): Laufwerke mit Buchstaben
+        mounted (Iterable[VolumeInfo]): Volumes mit allen ihren Ordnern in mount_points; steht
+            in letter ein Buchstabe, werden nur die Ordner übernommen, sonst kommt das Volume
+            mit seinem ersten Ordner als letter hinzu
+
+    Returns:
+        List[VolumeInfo]: Laufwerke mit Buchstaben, danach die nur in Ordnern bereitgestellten
+    """
+    by_letter = {volume.letter: volume for volume in volumes}
+    merged = list(volumes)
+    for volume in mounted:
+        folders = sorted(volume.mount_points, key=str.upper)
+        if not folders:
+            continue
+        if not is_mount_path(volume.letter):
+            if volume.letter in by_letter:
+                by_letter[volume.letter].mount_points = folders
+                by_letter[volume.letter].guid = by_letter[volume.letter].guid or volume.guid
+            continue
+        volume.letter, volume.mount_points = folders[0], folders[1:]
+        merged.append(volume)
+    return merged
+
+
+def parse_bytes(value: Any) -> Optional[int]:
+    """Liest eine Byte-Angabe (Zahl oder Text wie "1000204886016"); leer oder ungültig ergibt None."""
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_wmic_output(output: str) -> List[VolumeInfo]:
+    """Wertet die Spaltenausgabe von wmic logicaldisk aus."""
+    volumes = []
+    lines = output.strip().split('\n')
+    for line in lines[1:]:  # Erste Zeile ist Header
+        if line.strip():
+            parts = line.split()
+            if len(parts) >= 3:
+                caption = parts[0]  # z.B. "C:"
+                if len(parts) > 3:
+                    volume_name = ' '.join(parts[3:])
+                else:
+                    volume_name = DEFAULT_LABEL
+
+                if caption and ':' in caption:
+                    # Spalten in alphabetischer Reihenfolge: Caption, FreeSpace, Size, VolumeName
+                    volumes.append(VolumeInfo(caption, volume_name, size=parse_bytes(parts[2]),
+                                              free=parse_bytes(parts[1])))
+    return volumes
+
+
+def default_backends(runner: Optional[command_runner.CommandRunner] = None) -> List[DriveBackend]:
+    """
+    Liefert die Standard-Backends in Prioritätsreihenfolge.
+
+    Spielt der Runner Aufzeichnungen ab, bleiben nur die Backends, die über ihn
+    laufen; direkte Win32-Abfragen und Pfadprüfungen würden am Fixture vorbei
+    das echte System befragen.
+    """
+    runner = runner or command_runner.get_runner()
+    if runner.simulated:
+        return [PowerShellBackend(runner=runner), WmicBackend(runner)]
+    return [NativeBackend(), PowerShellBackend(runner=runner), WmicBackend(runner), PathProbeBackend()]
+
+
+def enumerate_volumes(backends: Iterable[DriveBackend]) -> Tuple[List[VolumeInfo], str]:
+    """
+    Fragt die Backends der Reihe nach ab, bis eines erfolgreich ist.
+
+    Args:
+        backends (Iterable[DriveBackend]): Backends in Prioritätsreihenfolge
+
+    Returns:
+        Tuple[List[VolumeInfo], str]: Ermittelte Laufwerke und Name des erfolgreichen Backends
+
+    Raises:
+        BackendError: Wenn kein Backend erfolgreich war
+    """
+    errors = []
+    for backend in backends:
+        if not backend.available():
+            continue
+        try:
+            with tracing.span(f"enumerate.{backend.name}", "backend"):
+                return backend.enumerate(), backend.name
+        except Exception as e:
+            errors.append(f"{backend.name}: {e}")
+
+    raise BackendError("; ".join(errors) or "Kein Backend verfügbar")
+
+
+class HedgedEnumerator:
+    """
+    Ermittlung mit Absicherung gegen hängende Backends.
+
+    Das erste Backend startet sofort; liegt nach ``hedge_delay`` Sekunden kein
+    Ergebnis vor oder ist es fehlgeschlagen, startet zusätzlich das nächste.
+    Das erste gültige Ergebnis gewinnt, noch laufende Backends werden über
+    ``cancel()`` abgebrochen. Gewinner und ihre Laufzeit werden gezählt: Backends,
+    die schon gewonnen haben, rücken nach Laufzeit sortiert nach vorne, Backends mit
+    wiederholten Fehlern nach hinten. ``hedge_delay=0`` startet alle gleichzeitig.
+    """
+
+    # Nach so vielen Fehlern in Folge wird ein Backend zuletzt versucht
+    MAX_FAILURES = 3
+
+    def __init__(self, hedge_delay: float = 0.3, timeout: Optional[float] = None):
+        """
+        Args:
+            hedge_delay (float): Wartezeit in Sekunden, bevor das nächste Backend zusätzlich startet
+            timeout (Optional[float]): Gesamtgrenze in Sekunden; None wartet auf die Grenzen der Backends
+        """
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.wins: Dict[str, int] = {}
+        self.latency: Dict[str, float] = {}  # Gleitender Mittelwert der Laufzeit der Gewinner
+        self.failures: Dict[str, int] = {}  # Fehler in Folge
+        self._lock = threading.Lock()
+
+    def order(self, backends: Iterable[DriveBackend]) -> List[DriveBackend]:
+        """Sortiert die Backends nach bisheriger Erfahrung; ohne Erfahrung bleibt die Priorität."""
+        backends = list(backends)
+        with self._lock:
+            def key(item):
+                index, backend = item
+                failing = self.failures.get(backend.name, 0) >= self.MAX_FAILURES
+                return failing, self.latency.get(backend.name, float("inf")), index
+            return [backend for _, backend in sorted(enumerate(backends), key=key)]
+
+    def stats(self) -> str:
+        """Liefert die Gewinne pro Backend als kurze Textzeile."""
+        with self._lock:
+            return " ".join(f"{name}={count}" for name, count in sorted(self.wins.items()))
+
+    def __call__(self, backends: Iterable[DriveBackend]) -> Tuple[List[VolumeInfo], str]:
+        """
+        Ermittelt die Laufwerke über das schnellste funktionierende Backend.
+
+        Returns:
+            Tuple[List[VolumeInfo], str]: Ermittelte Laufwerke und Name des Gewinners
+
+        Raises:
+            BackendError: Wenn kein Backend ein Ergebnis geliefert hat
+        """
+        pending = self.order(backend for backend in backends if backend.available())
+        if not pending:
+            raise BackendError("Kein Backend verfügbar")
+
+        results = queue.Queue()
+        running = []
+        errors = []
+        empty = None  # Leeres Ergebnis gilt nur, wenn nichts Besseres kommt
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+        def run(backend: DriveBackend):
+            started = time.perf_counter()
+            try:
+                with tracing.span(f"enumerate.{backend.name}", "backend", hedged=True):
+                    volumes = backend.enumerate()
+                results.put((backend, volumes, None, time.perf_counter() - started))
+            except Exception as e:
+                results.put((backend, None, e, time.perf_counter() - started))
+
+        def launch():
+            backend = pending.pop(0)
+            running.append(backend)
+            threading.Thread(target=run, args=(backend,), name=f"hedged-{backend.name}", daemon=True).start()
+
+        launch()
+        while running:
+            wait = self.hedge_delay if pending else None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+                wait = remaining if wait is None else min(wait, remaining)
+            try:
+                backend, volumes, error, duration = results.get(timeout=wait)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    errors.append("Zeitüberschreitung")
+                    break
+                launch()  # Absicherung: nächstes Backend zusätzlich starten
+                continue
+
+            running.remove(backend)
+            if error is None and volumes:
+                self._record(backend.name, duration, won=True)
+                self._cancel(running)
+                return volumes, backend.name
+
+            self._record(backend.name, duration, won=False)
+            if error is None:
+                empty = empty or (volumes, backend.name)
+            else:
+                errors.append(f"{backend.name}: {error}")
+            if pending:
+                launch()  # Fehler: nicht auf die Absicherungsverzögerung warten
+
+        self._cancel(running)
+        if empty is not None:
+            return empty
+        raise BackendError("; ".join(errors) or "Kein Backend verfügbar")
+
+    def _record(self, name: str, duration: float, won: bool):
+        with self._lock:
+            if won:
+                self.wins[name] = self.wins.get(name, 0) + 1
+                previous = self.latency.get(name)
+                self.latency[name] = duration if previous is None else 0.8 * previous + 0.2 * duration
+                self.failures[name] = 0
+            else:
+                self.failures[name] = self.failures.get(name, 0) + 1
+
+    @staticmethod
+    def _cancel(backends: Iterable[DriveBackend]):
+        for backend in backends:
+            try:
+                backend.cancel()
+            except Exception:
+                pass
+
+
+def fingerprint(backends: Iterable[DriveBackend]) -> Optional[Hashable]:
+    """Liefert den Fingerabdruck des ersten verfügbaren Backends, das einen unterstützt."""
+    for backend in backends:
+        if not backend.available():
+            continue
+        try:
+            with tracing.span(f"fingerprint.{backend.name}", "backend"):
+                value = backend.fingerprint()
+        except Exception:
+            continue
+        if value is not None:
+            return value
+    return None
+
+
+def probe_letters(backends: Iterable[DriveBackend],
+                  letters: Iterable[str]) -> Optional[Dict[str, Optional[VolumeInfo]]]:
+    """
+    Liest gezielt einzelne Buchstaben oder Ordner über das erste Backend, das Einzelabfragen
+    für alle angefragten Ziele unterstützt.
+
+    Returns:
+        Optional[Dict[str, Optional[VolumeInfo]]]: Buchstabe/Ordner → Laufwerk (None = nicht belegt);
+            None, wenn kein Backend Einzelabfragen unterstützt oder die Abfrage fehlschlägt
+    """
+    letters = [letter if is_mount_path(letter) else letter[0].upper() + ":" for letter in letters]
+    for backend in backends:
+        if not backend.available() or not all(backend.supports_volume(letter) for letter in letters):
+            continue
+        try:
+            return {letter: backend.volume(letter) for letter in letters}
+        except Exception:
+            return None
+    return None
+
+
+def volumes_to_dict(volumes: Iterable[VolumeInfo]) -> Dict[str, str]:
+    """Wandelt VolumeInfo-Objekte in das Format {"D:": "Bezeichnung"} um."""
+    return {volume.letter: volume.label for volume in volumes}
+
+
+def used_targets(volumes: Iterable[VolumeInfo]) -> List[str]:
+    """Liefert alle belegten Ziele: Buchstaben bzw. erste Ordner sowie weitere Bereitstellungsordner."""
+    return [target for volume in volumes for target in [volume.letter] + volume.mount_points]
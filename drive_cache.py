@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zwischenspeicher für die Laufwerksermittlung
+============================================
+
+Hält das letzte Ermittlungsergebnis vor. Ein billiger Fingerabdruck
+(Bitmaske aus GetLogicalDrives plus Seriennummern) entscheidet, ob sich der
+Laufwerksbestand geändert hat; nur dann oder nach Ablauf der TTL wird die
+teure Ermittlung erneut ausgeführt.
+"""
+
+import threading
+import time
+from typing import Callable, Hashable, Iterable, List, Optional, Tuple
+
+import drive_backends
+from drive_backends import DriveBackend, VolumeInfo
+
+
+class DriveCache:
+    """Zwischenspeicher um drive_backends.enumerate_volumes mit Treffer-/Fehlzähler."""
+
+    def __init__(self, backends: List[DriveBackend], ttl: float = 60.0,
+                 fingerprint: Optional[Callable[[], Optional[Hashable]]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 enumerate_func: Callable[[Iterable[DriveBackend]], Tuple[List[VolumeInfo], str]]
+                 = drive_backends.enumerate_volumes):
+        """
+        Args:
+            backends (List[DriveBackend]): Backends in Prioritätsreihenfolge
+            ttl (float): Maximales Alter eines Eintrags in Sekunden; 0 schaltet den Cache ab
+            fingerprint (Optional[Callable]): Liefert den Fingerabdruck; Standard fragt die Backends
+            clock (Callable[[], float]): Zeitquelle (austauschbar für Tests)
+            enumerate_func (Callable): Ermittlung bei Fehlzugriffen, z.B. ein drive_backends.HedgedEnumerator
+        """
+        self.backends = backends
+        self.enumerate_func = enumerate_func
+        self.ttl = ttl
+        self.fingerprint = fingerprint or (lambda: drive_backends.fingerprint(self.backends))
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Eine Ermittlung zur Zeit
+        self._entry_lock = threading.Lock()  # Nur um Eintrag und Generation, nie während der Ermittlung
+        self._entry = None  # (Zeitpunkt, Fingerabdruck, Laufwerke, Backend-Name)
+        self._generation = 0  # Erhöht durch invalidate; ältere Ergebnisse werden nicht gespeichert
+
+    def get(self) -> Tuple[List[VolumeInfo], str]:
+        """
+        Liefert die Laufwerke aus dem Cache oder ermittelt sie neu.
+
+        Returns:
+            Tuple[List[VolumeInfo], str]: Laufwerke und Name des Backends, das sie ermittelt hat
+
+        Raises:
+            drive_backends.BackendError: Wenn eine nötige Neuermittlung fehlschlägt
+        """
+        with self._lock:
+            current = self.fingerprint() if self.ttl > 0 else None
+
+            entry = self._entry
+            if entry is not None:
+                stamp, cached_fingerprint, volumes, backend_name = entry
+                fresh = self.clock() - stamp < self.ttl
+                # Ohne Fingerabdruck entscheidet allein die TTL
+                if fresh and current == cached_fingerprint:
+                    self.hits += 1
+                    return list(volumes), backend_name
+
+            self.misses += 1
+            generation = self._generation
+            volumes, backend_name = self.enumerate_func(self.backends)
+            with self._entry_lock:
+                if generation == self._generation:
+                    self._entry = (self.clock(), current, volumes, backend_name)
+            return list(volumes), backend_name
+
+    def invalidate(self):
+        """
+        Verwirft den Eintrag, z.B. nach einer Buchstabenänderung.
+
+        Wartet nicht auf eine laufende Ermittlung (Aufruf aus dem Tk-Thread); deren
+        Ergebnis wird geliefert, aber nicht mehr gespeichert.
+        """
+        with self._entry_lock:
+            self._generation += 1
+            self._entry = None
+
+    def stats(self) -> str:
+        """Liefert die Zähler als kurze Textzeile."""
+        return f"cache hits={self.hits} misses={self.misses}"
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Drive Letter Manager - Kommandozeile
+====================================
+
+Headless-Variante für Skripte und Provisionierung. Importiert tkinter nicht
+und zeigt keine Dialoge; das Ergebnis steht in der Ausgabe (optional als JSON)
+und im Rückgabewert.
+
+Beispiele:
+    drive_cli.py list --json
+    drive_cli.py plan --map D:=E: E:=D:
+    drive_cli.py apply --map D:=X: E:=Y:
+    drive_cli.py apply --map F:=C:\\Mounts\\Daten1 --temp-mount C:\\Mounts\\Tausch
+    drive_cli.py export-profile arbeitsplatz.json
+    drive_cli.py apply-profile arbeitsplatz.json --dry-run
+    drive_cli.py fleet arbeitsplatz.json --hosts-file rechner.txt --command "ssh {host} DriveLetterManagerCLI"
+    drive_cli.py --record refresh.json list
+    drive_cli.py --replay refresh.json --hang powershell --jitter 0.05 list
+    drive_cli.py serve
+    drive_cli.py --service apply --map D:=X:
+"""
+
+import argparse
+import json
+import shlex
+import sys
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+import command_runner
+import diskpart
+import drive_backends
+import drive_service
+import fleet
+import letter_planner
+import profiles
+import tracing
+
+
+# Rückgabewerte für Skripte
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2  # auch von argparse verwendet
+EXIT_ENUMERATION_FAILED = 3
+EXIT_PLAN_INVALID = 4
+EXIT_NOT_ADMIN = 5
+EXIT_APPLY_FAILED = 6
+
+
+class UsageError(Exception):
+    """Ungültige Argumente, die argparse nicht selbst erkennt."""
+
+
+def parse_mapping(pairs: List[str]) -> Dict[str, str]:
+    """
+    Wandelt Angaben wie "D:=X:", "d=x" oder "D:=C:\\Mounts\\Daten1" in eine Zuordnung um.
+
+    Raises:
+        UsageError: Bei Einträgen ohne "=" oder mit ungültigen Zielen
+    """
+    mapping = {}
+    for pair in pairs:
+        old, separator, new = pair.partition("=")
+        if not separator or not old.strip() or not new.strip():
+            raise UsageError(f"Ungültige Zuordnung: {pair!r} (erwartet z.B. D:=X:)")
+        try:
+            mapping[letter_planner.normalize_target(old)] = letter_planner.normalize_target(new)
+        except letter_planner.PlanError as e:
+            raise UsageError(f"Ungültige Zuordnung: {pair!r} ({e})")
+    return mapping
+
+
+def emit(args: argparse.Namespace, data: dict, lines: List[str]):
+    """Gibt das Ergebnis als JSON oder als lesbaren Text aus."""
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        for line in lines:
+            print(line)
+
+
+def fail(args: argparse.Namespace, code: int, message: str) -> int:
+    """Meldet einen Fehler (als JSON auf stdout bzw. als Text auf stderr)."""
+    if args.json:
+        print(json.dumps({"ok": False, "exit_code": code, "error": message}, ensure_ascii=False))
+    else:
+        print(f"Fehler: {message}", file=sys.stderr)
+    return code
+
+
+def enumerate_drives(args: argparse.Namespace, backends: Optional[List[drive_backends.DriveBackend]] = None):
+    """Ermittelt die Laufwerke über den Dienst (--service) oder die Standard-Backends und gibt diese wieder frei."""
+    if args.client is not None:
+        return args.client.list()
+    backends = backends if backends is not None else drive_backends.default_backends()
+    try:
+        return drive_backends.HedgedEnumerator()(backends)
+    finally:
+        for backend in backends:
+            backend.close()
+
+
+def build_plan(args: argparse.Namespace, volumes: List[drive_backends.VolumeInfo]) -> letter_planner.LetterPlan:
+    mapping = parse_mapping(args.map)
+    return letter_planner.plan_changes(mapping, drive_backends.used_targets(volumes),
+                                       temporary_mount=args.temp_mount)
+
+
+def plan_data(plan: letter_planner.LetterPlan) -> dict:
+    return {
+        "steps": [asdict(step) for step in plan.steps],
+        "chains": plan.chains,
+        "cycles": plan.cycles,
+        "temporary_letter": plan.temporary_letter,
+    }
+
+
+def command_list(args: argparse.Namespace) -> int:
+    volumes, backend_name = enumerate_drives(args)
+    emit(args,
+         {"ok": True, "backend": backend_name, "volumes": [asdict(volume) for volume in volumes]},
+         [f"{volume.letter:<4} {volume.label}" + "".join(f"\n     ↳ {path}" for path in volume.mount_points)
+          for volume in volumes])
+    return EXIT_OK
+
+
+def command_plan(args: argparse.Namespace) -> int:
+    if args.client is not None:
+        plan = args.client.plan(parse_mapping(args.map), args.temp_mount)
+    else:
+        volumes, _ = enumerate_drives(args)
+        plan = build_plan(args, volumes)
+    emit(args, dict(plan_data(plan), ok=True), plan.preview_lines())
+    return EXIT_OK
+
+
+def command_apply(args: argparse.Namespace) -> int:
+    volumes, _ = enumerate_drives(args)
+    return execute_plan(args, build_plan(args, volumes), volumes)
+
+
+def command_export_profile(args: argparse.Namespace) -> int:
+    volumes, _ = enumerate_drives(args)
+    profile = profiles.profile_from_volumes(volumes, args.name)
+    profiles.save_profile(profile, args.path)
+    emit(args, dict(profiles.profile_to_dict(profile), ok=True, path=args.path),
+         [f"{len(profile.entries)} Laufwerke in {args.path} gespeichert"])
+    return EXIT_OK
+
+
+def command_apply_profile(args: argparse.Namespace) -> int:
+    profile = profiles.load_profile(args.path)
+    volumes, _ = enumerate_drives(args)
+    match = profiles.match_profile(profile, volumes)
+
+    notes = {"missing": [asdict(entry) for entry in match.missing],
+             "ambiguous": [asdict(entry) for entry in match.ambiguous]}
+    lines = [f"Nicht gefunden: {entry.letter} ({entry.label or profiles.format_serial(entry.serial)})"
+             for entry in match.missing]
+    lines += [f"Mehrdeutig: {entry.letter} ({entry.label})" for entry in match.ambiguous]
+
+    # Ein erfülltes Profil ergibt einen leeren Plan und damit keinen diskpart-Aufruf
+    plan = letter_planner.plan_changes(match.mapping, drive_backends.used_targets(volumes),
+                                       temporary_mount=args.temp_mount)
+    return execute_plan(args, plan, volumes, notes, lines)
+
+
+def read_hosts(args: argparse.Namespace) -> List[str]:
+    """Sammelt die Rechner aus --hosts und --hosts-file (eine Zeile pro Rechner, # für Kommentare)."""
+    hosts = list(args.hosts or [])
+    if args.hosts_file:
+        with open(args.hosts_file, encoding="utf-8") as handle:
+            hosts += [line.split("#")[0].strip() for line in handle]
+    hosts = [host for host in hosts if host]
+    if not hosts:
+        raise UsageError("Keine Rechner angegeben (--hosts oder --hosts-file).")
+    return hosts
+
+
+def command_fleet(args: argparse.Namespace) -> int:
+    profile = profiles.load_profile(args.path)
+    hosts = read_hosts(args)
+    if not args.command and len(hosts) > 1:
+        # Ohne --command wird im eigenen Prozess gearbeitet: jeder Rechner wäre dieser Rechner
+        raise UsageError("Mehrere Rechner benötigen --command (z.B. \"ssh {host} DriveLetterManagerCLI\").")
+    transport = fleet.CommandTransport(shlex.split(args.command)) if args.command else fleet.LocalTransport()
+
+    def progress(result: fleet.HostResult, done: int, total: int):
+        # Fortschritt laufend ausgeben; bei --json auf stderr, damit stdout ein JSON-Dokument bleibt
+        line = f"[{done}/{total}] {result.host}: {result.status} ({result.duration:.1f} s) {result.error}".rstrip()
+        print(line, file=sys.stderr if args.json else sys.stdout, flush=True)
+
+    summary = fleet.run_fleet(hosts, profile, transport, workers=args.workers, timeout=args.timeout,
+                              dry_run=args.dry_run, progress=progress)
+    emit(args, {
+        "ok": summary.ok,
+        "counts": summary.counts(),
+        "duration": summary.duration,
+        "hosts": [{"host": result.host, "status": result.status, "steps": result.steps,
+                   "error": result.error, "duration": result.duration,
+                   "missing": [asdict(entry) for entry in result.missing],
+                   "results": [dict(asdict(r.operation), success=r.success, error_kind=r.error_kind,
+                                    verified=r.verified) for r in result.results]}
+                  for result in summary.results],
+    }, summary.lines())
+    return EXIT_OK if summary.ok else EXIT_APPLY_FAILED
+
+
+def execute_plan(args: argparse.Namespace, plan: letter_planner.LetterPlan,
+                 volumes: List[drive_backends.VolumeInfo], extra: Optional[dict] = None,
+                 extra_lines: Optional[List[str]] = None) -> int:
+    """Führt einen Plan in einer diskpart-Sitzung aus (oder zeigt ihn bei --dry-run bzw. leerem Plan nur an)."""
+    extra = extra or {}
+    extra_lines = extra_lines or []
+
+    if args.dry_run or not plan.steps:
+        emit(args, dict(plan_data(plan), ok=True, applied=False, **extra), extra_lines + plan.preview_lines())
+        return EXIT_OK
+
+    # Über den Dienst zählen dessen Rechte; seine Sperre reiht gleichzeitige Änderungen hintereinander
+    if not (args.client.admin if args.client is not None else diskpart.is_admin()):
+        return fail(args, EXIT_NOT_ADMIN, "Administratorrechte erforderlich.")
+
+    labels = {volume.letter: volume.label for volume in volumes}
+    operations = [diskpart.DiskpartOperation(step.old_letter, step.new_letter, labels.get(step.source, ""))
+                  for step in plan.steps]
+    if args.client is not None:
+        results = args.client.apply_operations(operations)
+    else:
+        results = diskpart.apply_operations(operations)
+
+    lines = list(extra_lines)
+    for result in results:
+        status = "OK" if result.success else f"FEHLER ({result.error_kind})"
+        if result.unclear:
+            status = "UNKLAR"
+        lines.append(f"{result.operation.old_letter} → {result.operation.new_letter}: {status}")
+
+    ok = all(result.success for result in results)
+    emit(args, {
+        **extra,
+        "ok": ok,
+        "applied": True,
+        "results": [dict(asdict(result.operation), success=result.success, unclear=result.unclear,
+                         error_kind=result.error_kind, verified=result.verified,
+                         message=result.message)
+                    for result in results],
+    }, lines)
+    return EXIT_OK if ok else EXIT_APPLY_FAILED
+
+
+def command_serve(args: argparse.Namespace) -> int:
+    address = args.address or drive_service.default_address()
+    if args.stop:
+        drive_service.ServiceClient(address).shutdown()
+        emit(args, {"ok": True, "address": address, "stopped": True}, [f"Dienst unter {address} beendet"])
+        return EXIT_OK
+
+    service = drive_service.DriveService(address=address)
+    service.start()
+    # Meldung auf stderr, damit Aufrufer auf die Zeile warten können, ohne stdout zu belegen
+    print(f"Dienst bereit unter {address} (Administratorrechte: {'ja' if service.admin else 'nein'}); "
+          "Beenden mit Strg+C oder serve --stop", file=sys.stderr, flush=True)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.close()
+    return EXIT_OK
+
+
+def configure_runner(args: argparse.Namespace) -> Optional[command_runner.RecordingRunner]:
+    """
+    Setzt den prozessweiten Runner gemäß --record bzw. --replay, ohne diese gemäß DLM_REPLAY/DLM_RECORD.
+
+    Returns:
+        Optional[command_runner.RecordingRunner]: Der aufzeichnende Runner, falls --record angegeben ist
+
+    Raises:
+        UsageError: Bei gleichzeitigem --record und --replay
+        ValueError: Bei ungültiger Fixture-Datei oder Störungsangabe
+    """
+    if args.record and args.replay:
+        raise UsageError("--record und --replay schließen sich aus.")
+    if args.replay:
+        faults = [command_runner.parse_fault(value) for value in args.delay or []]
+        faults += [command_runner.parse_fault(value, hang=True) for value in args.hang or []]
+        command_runner.set_runner(command_runner.ReplayRunner.load(
+            args.replay, scale=args.latency_scale, jitter=args.jitter, faults=faults, seed=args.seed))
+    elif args.record:
+        recorder = command_runner.RecordingRunner(path=args.record)
+        command_runner.set_runner(recorder)
+        return recorder
+    else:
+        command_runner.configure_from_environment()
+    return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="drive_cli",
+        description="Laufwerksbuchstaben ohne Oberfläche anzeigen, planen und ändern.",
+    )
+    parser.add_argument("--json", action="store_true", help="Ausgabe als JSON")
+    parser.add_argument("--trace", metavar="DATEI", help="Zeitmessung als Chrome-Trace (JSON) speichern")
+
+    parser.add_argument("--service", action="store_true",
+                        help="Anfragen an den laufenden Dienst (serve) richten statt selbst zu ermitteln; "
+                             f"Adresse über {drive_service.SERVICE_ENV}")
+
+    simulation = parser.add_argument_group("Aufzeichnung und Wiedergabe externer Befehle")
+    simulation.add_argument("--record", metavar="DATEI", help="diskpart/wmic/PowerShell-Aufrufe als Fixture speichern")
+    simulation.add_argument("--replay", metavar="DATEI", help="Aufrufe aus einem Fixture abspielen statt ausführen")
+    simulation.add_argument("--latency-scale", type=float, default=1.0,
+                            help="Faktor für die aufgezeichneten Laufzeiten (0 = sofort, Standard: 1)")
+    simulation.add_argument("--jitter", type=float, default=0.0, help="Zufällige Zusatzlatenz bis zu n Sekunden")
+    simulation.add_argument("--seed", type=int, help="Startwert für den Jitter")
+    simulation.add_argument("--delay", action="append", metavar="BEFEHL=SEK",
+                            help="Feste Laufzeit für Befehle, die BEFEHL enthalten (z.B. wmic=20)")
+    simulation.add_argument("--hang", action="append", metavar="BEFEHL",
+                            help="Befehle, die BEFEHL enthalten, antworten nie (z.B. powershell)")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.required = True
+
+    list_parser = commands.add_parser("list", help="Laufwerke auflisten")
+    list_parser.set_defaults(handler=command_list)
+
+    for name, handler, help_text in (("plan", command_plan, "Ausführungsplan anzeigen (ändert nichts)"),
+                                     ("apply", command_apply, "Änderungen in einer diskpart-Sitzung ausführen")):
+        command_parser = commands.add_parser(name, help=help_text)
+        command_parser.add_argument("--map", nargs="+", required=True, metavar="ALT=NEU",
+                                    help="Gewünschte Zuordnung, z.B. D:=X: E:=Y: F:=C:\\Mounts\\Daten1")
+        command_parser.set_defaults(handler=handler)
+    export_parser = commands.add_parser("export-profile", help="Aktuelles Layout als Profil speichern")
+    export_parser.add_argument("path", help="Zieldatei (JSON)")
+    export_parser.add_argument("--name", default="", help="Name des Profils")
+    export_parser.set_defaults(handler=command_export_profile)
+
+    profile_parser = commands.add_parser("apply-profile", help="Profil anwenden (nur fehlende Änderungen)")
+    profile_parser.add_argument("path", help="Profildatei (JSON)")
+    profile_parser.set_defaults(handler=command_apply_profile)
+
+    fleet_parser = commands.add_parser("fleet", help="Profil auf vielen Rechnern gleichzeitig anwenden")
+    fleet_parser.add_argument("path", help="Profildatei (JSON)")
+    fleet_parser.add_argument("--hosts", nargs="+", metavar="RECHNER", help="Rechnernamen")
+    fleet_parser.add_argument("--hosts-file", help="Datei mit einem Rechner pro Zeile")
+    fleet_parser.add_argument("--command", help='Aufruf pro Rechner, z.B. "ssh {host} DriveLetterManagerCLI"; '
+                                               'ohne Angabe wird nur dieser Rechner bearbeitet (ein Rechnername)')
+    fleet_parser.add_argument("--workers", type=int, default=8, help="Rechner gleichzeitig (Standard: 8)")
+    fleet_parser.add_argument("--timeout", type=float, default=120.0,
+                              help="Zeitgrenze pro Rechner in Sekunden (Standard: 120)")
+    fleet_parser.set_defaults(handler=command_fleet)
+
+    serve_parser = commands.add_parser("serve", help="Als Dienst laufen und den Laufwerksbestand warm halten")
+    serve_parser.add_argument("--address", help="Named Pipe bzw. Unix-Socket (Standard: "
+                                                f"{drive_service.PIPE_NAME} unter Windows)")
+    serve_parser.add_argument("--stop", action="store_true", help="Laufenden Dienst beenden")
+    serve_parser.set_defaults(handler=command_serve)
+
+    for name in ("apply", "apply-profile", "fleet"):
+        commands.choices[name].add_argument("--dry-run", action="store_true",
+                                            help="Nur planen, nichts ausführen")
+    for name in ("plan", "apply", "apply-profile"):
+        commands.choices[name].add_argument("--temp-mount", metavar="ORDNER",
+                                            help="Leerer NTFS-Ordner für Tauschs, wenn kein Buchstabe frei ist")
+
+    # --json auch hinter dem Unterbefehl erlauben
+    for command_parser in commands.choices.values():
+        command_parser.add_argument("--json", action="store_true", default=argparse.SUPPRESS,
+                                    help="Ausgabe als JSON")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Hauptfunktion der Kommandozeile; liefert den Rückgabewert für sys.exit."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.enable()
+
+    recorder = None
+    args.client = None
+    try:
+        recorder = configure_runner(args)
+        if args.service:
+            if args.command == "serve":
+                raise UsageError("--service und serve schließen sich aus.")
+            args.client = drive_service.ServiceClient()
+        with tracing.span(f"cli.{args.command}", "cli"):
+            return args.handler(args)
+    except UsageError as e:
+        return fail(args, EXIT_USAGE, str(e))
+    except drive_backends.BackendError as e:
+        return fail(args, EXIT_ENUMERATION_FAILED, f"Fehler beim Ermitteln der Laufwerke: {e}")
+    except (letter_planner.PlanError, profiles.ProfileError) as e:
+        return fail(args, EXIT_PLAN_INVALID, str(e))
+    except drive_service.ServiceError as e:
+        codes = {drive_service.KIND_ENUMERATION: EXIT_ENUMERATION_FAILED, drive_service.KIND_PLAN: EXIT_PLAN_INVALID,
+                 drive_service.KIND_NOT_ADMIN: EXIT_NOT_ADMIN}
+        return fail(args, codes.get(e.kind, EXIT_ERROR), str(e))
+    except OSError as e:
+        return fail(args, EXIT_ERROR, str(e))
+    except ValueError as e:
+        return fail(args, EXIT_USAGE, str(e))
+    except Exception as e:
+        return fail(args, EXIT_ERROR, f"Ein unerwarteter Fehler ist aufgetreten: {e}")
+    finally:
+        if args.trace:
+            tracing.export_chrome_trace(args.trace)
+        if recorder is not None:
+            recorder.save()
+        if args.client is not None:
+            args.client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,42 +13,155 @@ Lizenz: MIT
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
-import subprocess
+from tkinter import ttk, messagebox, filedialog
+import math
 import sys
-import ctypes
-import os
-import string
-import json
-from typing import Dict, List
+import queue
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import apply_executor
+import command_runner
+import diskpart
+import drive_backends
+import drive_service
+import drive_watcher
+import letter_planner
+import profiles
+import tracing
+import volume_index
+import volume_metadata
+from drive_cache import DriveCache
+from enumeration_worker import EnumerationWorker
+
+
+# Zeilenhöhe der Laufwerkstabelle in Pixeln
+ROW_HEIGHT = 24
+
+# Abfrageintervall für Meldungen des Laufwerks-Watchers in Millisekunden
+WATCH_POLL_MS = 250
+
+# Abfrageintervall für nachgeladene Laufwerksdetails in Millisekunden
+METADATA_POLL_MS = 100
+
+# Abfrageintervall für Fortschritt und Bericht laufender Änderungen in Millisekunden
+APPLY_POLL_MS = 100
+
+# Platzhalter für Details, die noch geladen werden
+PENDING_CELL = "…"
+
+# Übersetzungsschlüssel der Laufwerkstypen (GetDriveTypeW)
+DRIVE_TYPE_KEYS = {
+    drive_backends.DRIVE_REMOVABLE: "type_removable",
+    drive_backends.DRIVE_FIXED: "type_fixed",
+    drive_backends.DRIVE_REMOTE: "type_remote",
+    drive_backends.DRIVE_CDROM: "type_cdrom",
+    drive_backends.DRIVE_RAMDISK: "type_ramdisk",
+}
+
+def drive_sort_key(drive: str) -> Tuple[bool, str]:
+    """Sortiert Buchstaben vor Bereitstellungsordnern, Ordner ohne Groß-/Kleinschreibung."""
+    return letter_planner.is_mount_path(drive), drive.upper()
+
+
+def format_duration(seconds: float) -> str:
+    """Formatiert eine Dauer für die Statusleiste (z.B. "12 ms" oder "1.4 s")."""
+    return f"{seconds * 1000:.0f} ms" if seconds < 1 else f"{seconds:.1f} s"
+
+
+# Bezugspunkt für die Startzeitmessung (Import des Moduls ≈ Programmstart)
+PROCESS_START = time.perf_counter()
 
 
 class DriveLetterManager:
     """Hauptklasse für den Drive Letter Manager."""
 
-    def __init__(self):
-        """Initialisiert den Drive Letter Manager."""
+    def __init__(self, backends: Optional[List[drive_backends.DriveBackend]] = None,
+                 started: Optional[float] = None,
+                 metadata_reader: Optional[volume_metadata.MetadataReader] = None,
+                 service: Optional[drive_service.ServiceClient] = None):
+        """
+        Initialisiert den Drive Letter Manager.
+
+        Das Fenster erscheint sofort als Gerüst; die Tabelle wird gefüllt,
+        sobald die Ermittlung im Hintergrund fertig ist.
+
+        Args:
+            backends (Optional[List[drive_backends.DriveBackend]]): Backends für die Laufwerksermittlung
+                in Prioritätsreihenfolge; Standard ist drive_backends.default_backends()
+            started (Optional[float]): Startzeitpunkt (time.perf_counter) für die Startzeitmessung;
+                Standard ist der Import des Moduls
+            metadata_reader (Optional[volume_metadata.MetadataReader]): Liest die Details eines Laufwerks
+                für die Zusatzspalten; Standard ist volume_metadata.default_reader()
+            service (Optional[drive_service.ServiceClient]): Laufender Dienst; ist er angegeben, laufen
+                Ermittlung und Änderungen über ihn (mit seinen Administratorrechten)
+        """
+        self.startup_started = started if started is not None else PROCESS_START
+        self.startup_times = {}  # Messpunkt → Sekunden seit Start
         self.root = tk.Tk()
-        self.drives_data = {}
-        self.drive_widgets = []
+        self.service = service
+        if backends is None:
+            backends = ([drive_service.ServiceBackend(service)] if service is not None
+                        else drive_backends.default_backends())
+        self.backends = backends
+        # Hängende Backends (z.B. PowerShell) verzögern die Ermittlung höchstens um die Absicherungszeit
+        self.enumerator = drive_backends.HedgedEnumerator()
+        self.drive_cache = DriveCache(self.backends, enumerate_func=self.enumerator)
+        self.last_backend = None
+        # Zeilen, vorgemerkte Änderungen und Details hängen am Volume (GUID/Seriennummer), nicht am
+        # Buchstaben; ein Buchstabenwechsel verschiebt daher nur die Zeile
+        self.volume_index = volume_index.VolumeIndex()
+        self.drives_data = {}  # Buchstabe → Bezeichnung (aus volume_index abgeleitet)
+        # Größe, Dateisystem usw. werden pro Laufwerk im Hintergrund nachgeladen
+        self.metadata_loader = volume_metadata.MetadataLoader(metadata_reader)
+        self.volume_metadata = {}  # Volume-Schlüssel → VolumeMetadata
+        self.metadata_cell_cache = {}  # Volume-Schlüssel → (VolumeMetadata, Sprache, formatierte Zellen)
+        self.metadata_poll_job = None
+        self.table_rows = {}  # Volume-Schlüssel → angezeigte Zeile (für den Abgleich)
+        self.pending_letters = {}  # Volume-Schlüssel → vorgemerkter neuer Buchstabe oder Ordner
+        self.letter_values = ()  # Auswahl des Inline-Editors
+        self.letter_values_for = None  # Belegte Ziele, aus denen letter_values berechnet wurde
+        self.editor_drive = None
         self.current_language = "de"  # Standard: Deutsch
         self.setup_translations()  # Initialisiere Widget-Liste
-        self.drives_canvas = None  # Initialisiere Canvas-Referenz
-        self.drives_frame = None  # Initialisiere Frame-Referenz
+        self.drives_tree = None  # Initialisiere Tabellen-Referenz
+        self.text_bindings = []  # (Setter, Übersetzungsschlüssel, Zusatz) für Sprachwechsel
+        self.enumeration_worker = EnumerationWorker(self.enumerate_drives)
+        self.enumeration_poll_job = None
+        self.enumeration_callbacks = []  # Warten auf das Ergebnis der laufenden Ermittlung (z.B. Profile)
+        # Nachprüfung einzelner Buchstaben nach einer Änderung (Ergebnis über poll_verification)
+        self.verify_worker = EnumerationWorker(self.probe_letters)
+        self.verify_poll_job = None
+        self.last_enumeration_time = None  # Dauer der letzten Ermittlung (Statusleiste)
+        self.last_apply_time = None  # Dauer der letzten Ausführung inkl. Wiederholungen (Statusleiste)
+        self.moved_volumes = []  # Von außen verschobene Volumes des letzten Abgleichs (Statusleiste)
+        # Änderungen laufen ohne Dialoge im Hintergrund; belegte Laufwerke werden wiederholt versucht
+        self.apply_executor = apply_executor.ApplyExecutor(
+            service.apply_operations if service is not None else None)
+        self.applying = None  # (Plan, Änderungen) des laufenden Ausführungslaufs
+        self.progress_key = "loading_drives"  # Text der Fortschrittsanzeige
+        self.progress_tasks = set()  # Laufende Vorgänge (Übersetzungsschlüssel), je einzeln ein- und ausgeblendet
+        # Änderungen am Laufwerksbestand meldet der Watcher; ohne billige Sonde bleibt nur "Aktualisieren"
+        self.watch_events = queue.Queue()
+        probe = drive_watcher.default_probe(self.backends)
+        self.drive_watcher = drive_watcher.DriveWatcher(probe) if probe is not None else None
         self.setup_gui()
+        self.mark_startup("skeleton")
+        # Erstes <Map> des Hauptfensters = erstes Zeichnen
+        self.root.bind("<Map>", lambda event: self.mark_startup("first_paint"), add="+")
 
-        # Prüfe Admin-Rechte beim Start
-        if not self.is_admin():
-            messagebox.showwarning(
-                self.t("admin_required_title"),
-                self.t("admin_required_message")
-            )
+        if self.drive_watcher is not None:
+            # Der Watcher ruft im eigenen Thread auf; die Queue übergibt an den Tk-Thread
+            self.drive_watcher.subscribe(lambda changes, volumes: self.watch_events.put((changes, volumes)))
+            self.drive_watcher.start()
+            self.root.after(WATCH_POLL_MS, self.poll_watcher)
 
     def setup_translations(self):
         """Initialisiert die Übersetzungen für Deutsch und Englisch."""
         self.translations = {
             "de": {
                 "title": "Laufwerksbuchstaben ändern",
+                "other_language": "English",
                 "current_drives": "Aktuelle Laufwerke:",
                 "drive": "Laufwerk",
                 "description": "Bezeichnung",
@@ -57,6 +170,8 @@ class DriveLetterManager:
                 "instruction_text": (
                     "• Verwenden Sie die Dropdown-Menüs in der Spalte 'Neuer Buchstabe'\n"
                     "• Wählen Sie für jedes Laufwerk den gewünschten neuen Buchstaben\n"
+                    "• Für einen NTFS-Ordner statt eines Buchstabens den Pfad eines leeren Ordners "
+                    "eintippen (Enter übernimmt)\n"
                     "• Klicken Sie auf 'Änderungen durchführen' um alle Änderungen zu übernehmen\n"
                     "• Administratorrechte sind für Änderungen erforderlich"
                 ),
@@ -77,10 +192,44 @@ class DriveLetterManager:
                 "changes_applied": "Alle Änderungen wurden erfolgreich angewendet!",
                 "error": "Fehler",
                 "error_occurred": "Ein Fehler ist aufgetreten:",
-                "drives_updated": "Laufwerke aktualisiert"
+                "drives_updated": "Laufwerke aktualisiert",
+                "failed_changes": "Fehlgeschlagene Änderungen:",
+                "unclear_changes": "Status unklar, bitte manuell prüfen:",
+                "execution_plan": "Ausführungsplan (Probelauf):",
+                "loading_drives": "Laufwerke werden ermittelt...",
+                "cancel": "Abbrechen",
+                "admin_notice": "⚠ Ohne Administratorrechte können Laufwerksbuchstaben nicht geändert werden.",
+                "export_profile": "Profil speichern...",
+                "import_profile": "Profil anwenden...",
+                "profile_files": "Layout-Profile",
+                "profile_satisfied": "Das Profil ist bereits erfüllt, es sind keine Änderungen nötig.",
+                "profile_missing": "Im Profil, aber nicht gefunden:",
+                "profile_ambiguous": "Bezeichnung passt auf mehrere Laufwerke:",
+                "status_enumeration": "Ermittlung",
+                "status_apply": "Ändern",
+                "status_cache": "Cache",
+                "status_moved": "Verschoben",
+                "size": "Größe",
+                "free": "Frei",
+                "filesystem": "Dateisystem",
+                "type": "Typ",
+                "disk": "Datenträger",
+                "mounts": "Ordner",
+                "type_removable": "Wechselmedium",
+                "type_fixed": "Lokal",
+                "type_remote": "Netzwerk",
+                "type_cdrom": "Optisch",
+                "type_ramdisk": "RAM-Disk",
+                "applying_changes": "Änderungen werden ausgeführt...",
+                "verifying_changes": "Änderungen werden geprüft...",
+                "retry_waiting": "belegt, neuer Versuch in",
+                "busy_changes": "Laufwerk blieb belegt (bitte Programme schließen, die darauf zugreifen):",
+                "attempts": "Versuche",
+                "retries_cancelled": "Weitere Versuche wurden abgebrochen."
             },
             "en": {
                 "title": "Change Drive Letters",
+                "other_language": "Deutsch",
                 "current_drives": "Current Drives:",
                 "drive": "Drive",
                 "description": "Description",
@@ -89,6 +238,8 @@ class DriveLetterManager:
                 "instruction_text": (
                     "• Use the dropdown menus in the 'New Letter' column\n"
                     "• Select the desired new letter for each drive\n"
+                    "• To mount a drive in an NTFS folder instead, type the path of an empty folder "
+                    "(Enter confirms)\n"
                     "• Click 'Apply Changes' to apply all changes\n"
                     "• Administrator rights are required for changes"
                 ),
@@ -109,7 +260,40 @@ class DriveLetterManager:
                 "changes_applied": "All changes have been applied successfully!",
                 "error": "Error",
                 "error_occurred": "An error occurred:",
-                "drives_updated": "Drives updated"
+                "drives_updated": "Drives updated",
+                "failed_changes": "Failed changes:",
+                "unclear_changes": "Status unclear, please check manually:",
+                "execution_plan": "Execution plan (dry run):",
+                "loading_drives": "Detecting drives...",
+                "cancel": "Cancel",
+                "admin_notice": "⚠ Drive letters cannot be changed without administrator rights.",
+                "export_profile": "Save Profile...",
+                "import_profile": "Apply Profile...",
+                "profile_files": "Layout profiles",
+                "profile_satisfied": "The profile is already satisfied; no changes are needed.",
+                "profile_missing": "In the profile but not found:",
+                "profile_ambiguous": "Label matches several drives:",
+                "status_enumeration": "Enumeration",
+                "status_apply": "Apply",
+                "status_cache": "Cache",
+                "status_moved": "Moved",
+                "size": "Size",
+                "free": "Free",
+                "filesystem": "File System",
+                "type": "Type",
+                "disk": "Disk",
+                "mounts": "Folders",
+                "type_removable": "Removable",
+                "type_fixed": "Fixed",
+                "type_remote": "Network",
+                "type_cdrom": "Optical",
+                "type_ramdisk": "RAM disk",
+                "applying_changes": "Applying changes...",
+                "verifying_changes": "Checking changes...",
+                "retry_waiting": "in use, retrying in",
+                "busy_changes": "Drive stayed in use (close programs accessing it):",
+                "attempts": "attempts",
+                "retries_cancelled": "Further retries were cancelled."
             }
         }
 
@@ -122,86 +306,88 @@ class DriveLetterManager:
         self.current_language = "en" if self.current_language == "de" else "de"
         self.update_ui_language()
 
+    def bind_text(self, widget, key: str, suffix: str = ""):
+        """
+        Setzt den übersetzten Text eines Widgets und merkt die Bindung für Sprachwechsel vor.
+
+        Args:
+            widget: Widget mit einer "text"-Option
+            key (str): Schlüssel aus self.translations
+            suffix (str): Fester Zusatz hinter dem übersetzten Text (z.B. ":")
+
+        Returns:
+            Das übergebene Widget (für verkettete grid/pack-Aufrufe)
+        """
+        return self.bind_translation(lambda text: widget.configure(text=text), key, suffix) or widget
+
+    def bind_heading(self, tree, column: str, key: str):
+        """Wie bind_text, aber für die Spaltenüberschrift einer Treeview."""
+        self.bind_translation(lambda text: tree.heading(column, text=text), key)
+
+    def bind_translation(self, setter, key: str, suffix: str = ""):
+        """Ruft setter mit dem übersetzten Text auf und wiederholt das bei jedem Sprachwechsel."""
+        setter(self.t(key) + suffix)
+        self.text_bindings.append((setter, key, suffix))
+
     def update_ui_language(self):
-        """Aktualisiert alle UI-Texte in der neuen Sprache."""
+        """Aktualisiert alle UI-Texte in der neuen Sprache, ohne Widgets neu aufzubauen."""
         self.root.title(self.t("title"))
-        # UI wird komplett neu aufgebaut
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        self.setup_gui()
-        self.refresh_drives()
+        alive = []
+        for setter, key, suffix in self.text_bindings:
+            try:
+                setter(self.t(key) + suffix)
+                alive.append((setter, key, suffix))
+            except tk.TclError:
+                # Widget existiert nicht mehr
+                pass
+        self.text_bindings = alive
+        self.update_status_bar()
+        if hasattr(self, 'progress_label'):
+            self.update_progress_text()
+        # Die Spalte "Typ" enthält übersetzte Texte
+        for drive, row in list(self.table_rows.items()):
+            self.update_table_row(drive, row[0][1], None)
 
     def is_admin(self) -> bool:
         """
         Prüft, ob das Programm mit Administratorrechten läuft.
         
         Returns:
-            bool: True wenn Admin-Rechte vorhanden, False sonst
+            bool: True wenn Admin-Rechte vorhanden (bei Verbindung zum Dienst: dessen Rechte), False sonst
         """
-        try:
-            return ctypes.windll.shell32.IsUserAnAdmin()
-        except:
-            return False
+        if self.service is not None:
+            return self.service.admin
+        return diskpart.is_admin()
     
-    def get_drives(self) -> Dict[str, str]:
+    @tracing.traced("enumerate_drives", "backend")
+    def enumerate_drives(self) -> List[drive_backends.VolumeInfo]:
+        """
+        Ermittelt die Laufwerke ohne Dialoge; sicher aus einem Worker-Thread aufrufbar.
+
+        Returns:
+            List[drive_backends.VolumeInfo]: Die ermittelten Laufwerke (Übernahme über update_volumes)
+
+        Raises:
+            drive_backends.BackendError: Wenn kein Backend die Laufwerke ermitteln konnte
         """
-        Ermittelt alle verfügbaren Laufwerke und deren Bezeichnungen.
+        volumes, backend_name = self.drive_cache.get()
+        self.last_backend = backend_name
+        return volumes
+
+    def update_volumes(self, volumes: List[drive_backends.VolumeInfo]) -> volume_index.IndexUpdate:
+        """
+        Übernimmt eine vollständige Ermittlung in den Volume-Index (läuft im Tk-Thread).
 
         Returns:
-            Dict[str, str]: Dictionary mit Laufwerksbuchstaben als Key und Bezeichnung als Value
+            volume_index.IndexUpdate: Hinzugekommene, entfernte, verschobene und geänderte Volumes
         """
-        drives = {}
+        changes = self.volume_index.update(volumes)
+        self.sync_volume_views()
+        return changes
 
-        try:
-            # Versuche zuerst PowerShell (moderne Methode)
-            result = subprocess.run([
-                'powershell', '-Command',
-                'Get-WmiObject -Class Win32_LogicalDisk | Select-Object DeviceID, VolumeName | ConvertTo-Csv -NoTypeInformation'
-            ], capture_output=True, text=True, timeout=15)
-
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                for line in lines[1:]:  # Erste Zeile ist Header
-                    if line.strip() and ',' in line:
-                        # CSV-Format: "DeviceID","VolumeName"
-                        parts = line.replace('"', '').split(',')
-                        if len(parts) >= 2:
-                            device_id = parts[0].strip()  # z.B. "C:"
-                            volume_name = parts[1].strip() if parts[1].strip() else "Lokaler Datenträger"
-
-                            if device_id and ':' in device_id:
-                                drives[device_id] = volume_name
-            else:
-                # Fallback zu wmic (falls PowerShell fehlschlägt)
-                result = subprocess.run([
-                    'wmic', 'logicaldisk', 'get', 'size,freespace,caption,volumename'
-                ], capture_output=True, text=True, shell=True, timeout=10)
-
-                if result.returncode == 0:
-                    lines = result.stdout.strip().split('\n')
-                    for line in lines[1:]:  # Erste Zeile ist Header
-                        if line.strip():
-                            parts = line.split()
-                            if len(parts) >= 3:
-                                caption = parts[0]  # z.B. "C:"
-                                if len(parts) > 3:
-                                    volume_name = ' '.join(parts[3:])
-                                else:
-                                    volume_name = "Lokaler Datenträger"
-
-                                if caption and ':' in caption:
-                                    drives[caption] = volume_name
-                else:
-                    # Letzter Fallback: Einfache Laufwerkserkennung
-                    for letter in string.ascii_uppercase:
-                        drive_path = f"{letter}:\\"
-                        if os.path.exists(drive_path):
-                            drives[f"{letter}:"] = "Lokaler Datenträger"
-
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Ermitteln der Laufwerke: {str(e)}")
-
-        return drives
+    def sync_volume_views(self):
+        """Leitet drives_data (Buchstabe → Bezeichnung) aus dem Volume-Index ab."""
+        self.drives_data = self.volume_index.labels()
     
     def get_available_letters(self) -> List[str]:
         """
@@ -210,141 +396,133 @@ class DriveLetterManager:
         Returns:
             List[str]: Liste der verfügbaren Buchstaben
         """
-        used_letters = set(drive[0].upper() for drive in self.drives_data.keys())
-        all_letters = set(chr(i) for i in range(ord('A'), ord('Z') + 1))
-        # Entferne A: und B: (normalerweise für Disketten reserviert)
-        all_letters.discard('A')
-        all_letters.discard('B')
-        available = sorted(list(all_letters - used_letters))
-        return [f"{letter}:" for letter in available]
+        return letter_planner.available_letters(self.drives_data.keys())
     
-    def change_drive_letter(self, old_letter: str, new_letter: str) -> bool:
+    def plan_changes(self, changes: List[Tuple[str, str, str]]) -> letter_planner.LetterPlan:
         """
-        Ändert einen Laufwerksbuchstaben mittels diskpart.
+        Erstellt einen Ausführungsplan für die gewünschten Änderungen.
+
+        Tausch und Rotation (z.B. D: ↔ E:) werden über einen freien temporären
+        Buchstaben aufgelöst. Ziele können auch Ordnerpfade sein.
 
         Args:
-            old_letter (str): Aktueller Laufwerksbuchstabe (z.B. "D:")
-            new_letter (str): Neuer Laufwerksbuchstabe (z.B. "E:")
+            changes (List[Tuple[str, str, str]]): Tupel aus altem Ziel, neuem Ziel und Bezeichnung
 
         Returns:
-            bool: True bei Erfolg, False bei Fehler
+            letter_planner.LetterPlan: Geordnete Schritte für diskpart
+
+        Raises:
+            letter_planner.PlanError: Wenn die Zuordnung nicht umsetzbar ist
+        """
+        mapping = {old: new for old, new, _ in changes}
+        # Weitere Ordner von Laufwerken mit Buchstaben sind ebenfalls belegt
+        used = drive_backends.used_targets(self.volume_index.volumes())
+        return letter_planner.plan_changes(mapping, used, self.get_available_letters())
+
+    def start_apply(self, plan: letter_planner.LetterPlan, changes: List[Tuple[str, str, str]]):
         """
+        Startet die Schritte eines Plans im Hintergrund; der Bericht folgt über poll_apply.
+
+        Args:
+            plan (letter_planner.LetterPlan): Geordneter Ausführungsplan
+            changes (List[Tuple[str, str, str]]): Die bestätigten Änderungen (für den Bericht)
+        """
+        if self.applying is not None:
+            # Pro Fenster läuft höchstens ein Ausführungslauf (ApplyExecutor.start würde ablehnen)
+            return
         if not self.is_admin():
             messagebox.showerror(
                 "Administratorrechte erforderlich",
                 "Dieses Programm benötigt Administratorrechte, um Laufwerksbuchstaben zu ändern.\n\n"
                 "Bitte starten Sie das Programm als Administrator."
             )
-            return False
-
-        # Validierung der Eingaben
-        if not old_letter or not new_letter:
-            messagebox.showerror("Ungültige Eingabe", "Laufwerksbuchstaben dürfen nicht leer sein.")
-            return False
-
-        if old_letter == new_letter:
-            messagebox.showwarning("Gleiche Buchstaben", "Alter und neuer Laufwerksbuchstabe sind identisch.")
-            return False
-
-        # Prüfe ob neuer Buchstabe bereits verwendet wird
-        if new_letter in self.drives_data:
-            messagebox.showerror(
-                "Buchstabe bereits vergeben",
-                f"Der Laufwerksbuchstabe {new_letter} wird bereits verwendet."
-            )
-            return False
+            return
 
-        try:
-            # Erstelle diskpart-Skript mit verbesserter Fehlerbehandlung
-            diskpart_script = f"""select volume {old_letter[0]}
-assign letter={new_letter[0]}
-exit"""
-
-            # Führe diskpart aus
-            process = subprocess.Popen(
-                ['diskpart'],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                creationflags=subprocess.CREATE_NO_WINDOW  # Verstecke Konsole
-            )
+        operations = [diskpart.DiskpartOperation(step.old_letter, step.new_letter,
+                                                 self.drives_data.get(step.source, ""))
+                      for step in plan.steps]
+        self.apply_executor.start(plan.steps, operations)
+        self.applying = (plan, changes)
+        self.show_progress(True, "applying_changes")
+        self.root.after(APPLY_POLL_MS, self.poll_apply)
+
+    def poll_apply(self):
+        """Fragt Fortschritt und Bericht der laufenden Änderungen ab (läuft im Tk-Thread)."""
+        report = self.apply_executor.poll()
+        if report is None:
+            self.update_progress_text()
+            self.root.after(APPLY_POLL_MS, self.poll_apply)
+            return
 
-            stdout, stderr = process.communicate(input=diskpart_script, timeout=30)
-
-            # Analysiere die Ausgabe für bessere Fehlermeldungen
-            if process.returncode == 0:
-                # Prüfe ob die Änderung wirklich erfolgreich war
-                if "successfully" in stdout.lower() or "erfolgreich" in stdout.lower():
-                    messagebox.showinfo(
-                        "Erfolg",
-                        f"Laufwerksbuchstabe erfolgreich von {old_letter} zu {new_letter} geändert!\n\n"
-                        f"Die Änderung wird nach einer kurzen Aktualisierung sichtbar."
-                    )
-                    return True
-                else:
-                    # Diskpart lief ohne Fehler, aber möglicherweise ohne Erfolg
-                    messagebox.showwarning(
-                        "Unklarer Status",
-                        f"Diskpart wurde ausgeführt, aber der Status ist unklar.\n\n"
-                        f"Bitte prüfen Sie manuell, ob die Änderung erfolgreich war.\n\n"
-                        f"Ausgabe: {stdout}"
-                    )
-                    return True
-            else:
-                # Analysiere spezifische Fehlermeldungen
-                error_msg = stderr.strip() if stderr.strip() else stdout.strip()
-
-                if "access denied" in error_msg.lower() or "zugriff verweigert" in error_msg.lower():
-                    messagebox.showerror(
-                        "Zugriff verweigert",
-                        "Zugriff verweigert. Mögliche Ursachen:\n"
-                        "• Das Laufwerk wird gerade verwendet\n"
-                        "• Unzureichende Berechtigungen\n"
-                        "• Systemlaufwerk kann nicht geändert werden\n\n"
-                        "Schließen Sie alle Programme, die auf das Laufwerk zugreifen."
-                    )
-                elif "not found" in error_msg.lower() or "nicht gefunden" in error_msg.lower():
-                    messagebox.showerror(
-                        "Laufwerk nicht gefunden",
-                        f"Das Laufwerk {old_letter} wurde nicht gefunden.\n\n"
-                        "Aktualisieren Sie die Laufwerksliste und versuchen Sie es erneut."
-                    )
-                elif "already assigned" in error_msg.lower() or "bereits zugewiesen" in error_msg.lower():
-                    messagebox.showerror(
-                        "Buchstabe bereits vergeben",
-                        f"Der Laufwerksbuchstabe {new_letter} ist bereits vergeben.\n\n"
-                        "Wählen Sie einen anderen Buchstaben."
-                    )
-                else:
-                    messagebox.showerror(
-                        "Diskpart-Fehler",
-                        f"Fehler beim Ändern des Laufwerksbuchstabens:\n\n{error_msg}"
-                    )
-                return False
-
-        except subprocess.TimeoutExpired:
-            messagebox.showerror(
-                "Timeout",
-                "Die Operation hat zu lange gedauert und wurde abgebrochen.\n\n"
-                "Versuchen Sie es erneut oder starten Sie das System neu."
-            )
-            return False
-        except FileNotFoundError:
-            messagebox.showerror(
-                "Diskpart nicht gefunden",
-                "Das Windows-Tool 'diskpart' wurde nicht gefunden.\n\n"
-                "Stellen Sie sicher, dass Sie Windows verwenden."
-            )
-            return False
-        except Exception as e:
+        plan, changes = self.applying
+        self.applying = None
+        self.show_progress(False, "applying_changes")
+        self.last_apply_time = report.duration
+        self.update_status_bar()
+        self.drive_cache.invalidate()
+        if self.drive_watcher is not None:
+            # Auf eigene Änderungen folgen oft weitere (z.B. Explorer, Autostart): wieder häufiger nachsehen
+            self.drive_watcher.poke()
+
+        if report.error is not None:
             messagebox.showerror(
                 "Unerwarteter Fehler",
-                f"Ein unerwarteter Fehler ist aufgetreten:\n\n{str(e)}\n\n"
+                f"Ein unerwarteter Fehler ist aufgetreten:\n\n{str(report.error)}\n\n"
                 "Versuchen Sie es erneut oder starten Sie das Programm neu."
             )
-            return False
-    
+            self.refresh_drives()
+            return
+
+        # Erledigte Änderungen sind nicht mehr vorgemerkt; fehlgeschlagene bleiben zum erneuten Versuch stehen
+        failed_sources = report.failed_sources()
+        for current, _, _ in changes:
+            if current not in failed_sources:
+                self.pending_letters.pop(self.volume_index.key_for(current), None)
+        # Ausgeführte Schritte vorab eintragen, damit auch Laufwerke ohne GUID und Seriennummer
+        # bei der Nachprüfung ihrer Zeile zugeordnet bleiben
+        for outcome in report.by_status(apply_executor.STATUS_APPLIED):
+            self.volume_index.move(outcome.step.old_letter, outcome.step.new_letter)
+        self.sync_volume_views()
+
+        self.show_apply_report(report, changes)
+        # Nur die betroffenen Buchstaben neu einlesen
+        self.verify_letters({letter for step in plan.steps for letter in (step.old_letter, step.new_letter)})
+
+    def show_apply_report(self, report: apply_executor.ApplyReport, changes: List[Tuple[str, str, str]]):
+        """Zeigt einen einzigen Bericht über alle ausgeführten Schritte."""
+        # Eine Änderung gilt als erfolgreich, wenn alle ihre Schritte erfolgreich waren
+        failed_sources = report.failed_sources()
+        successful_changes = sum(1 for current, _, _ in changes if current not in failed_sources)
+
+        if self.current_language == "en":
+            result_msg = f"{successful_changes} of {len(changes)} changes applied successfully."
+        else:
+            result_msg = f"{successful_changes} von {len(changes)} Änderungen erfolgreich durchgeführt."
+
+        sections = ((apply_executor.STATUS_UNCLEAR, "unclear_changes"),
+                    (apply_executor.STATUS_BUSY, "busy_changes"),
+                    (apply_executor.STATUS_FAILED, "failed_changes"))
+        for status, key in sections:
+            outcomes = report.by_status(status)
+            if not outcomes:
+                continue
+            result_msg += "\n\n" + self.t(key) + "\n"
+            for outcome in outcomes:
+                result = outcome.result
+                line = f"• {result.operation.old_letter} → {result.operation.new_letter}"
+                if status != apply_executor.STATUS_UNCLEAR:
+                    line += f": {result.message.splitlines()[-1] if result.message else result.error_kind}"
+                if outcome.attempts > 1:
+                    line += f" ({outcome.attempts} {self.t('attempts')})"
+                result_msg += line + "\n"
+        if report.cancelled:
+            result_msg += "\n" + self.t("retries_cancelled")
+
+        if report.ok:
+            messagebox.showinfo(self.t("success"), result_msg)
+        else:
+            messagebox.showwarning(self.t("error"), result_msg)
+
     def setup_gui(self):
         """Erstellt die grafische Benutzeroberfläche."""
         self.root.title(self.t("title"))
@@ -365,13 +543,13 @@ exit"""
         lang_frame = ttk.Frame(main_frame)
         lang_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
 
-        ttk.Label(lang_frame, text=self.t("language") + ":").grid(row=0, column=0, sticky=tk.W)
-        lang_button = ttk.Button(lang_frame, text="English" if self.current_language == "de" else "Deutsch",
-                                command=self.switch_language, width=10)
+        self.bind_text(ttk.Label(lang_frame), "language", ":").grid(row=0, column=0, sticky=tk.W)
+        lang_button = self.bind_text(ttk.Button(lang_frame, command=self.switch_language, width=10),
+                                     "other_language")
         lang_button.grid(row=0, column=1, padx=(10, 0), sticky=tk.W)
 
         # Titel
-        title_label = ttk.Label(main_frame, text=self.t("current_drives"), font=("Arial", 12, "bold"))
+        title_label = self.bind_text(ttk.Label(main_frame, font=("Arial", 12, "bold")), "current_drives")
         title_label.grid(row=1, column=0, sticky=tk.W, pady=(10, 10))
         
         # Laufwerks-Tabelle
@@ -383,108 +561,155 @@ exit"""
         # Buttons
         self.create_buttons(main_frame)
 
-        # Lade Laufwerke und passe Fenstergröße an
+        # Hinweis statt modalem Dialog, damit der Start nicht blockiert
+        if not self.is_admin():
+            admin_label = self.bind_text(ttk.Label(main_frame, foreground="#b35c00"), "admin_notice")
+            admin_label.grid(row=5, column=0, sticky=tk.W, pady=(10, 0))
+
+        # Statusleiste: Dauer der letzten Ermittlung (mit Backend) und der letzten Änderung
+        self.status_label = ttk.Label(main_frame, foreground="gray")
+        self.status_label.grid(row=6, column=0, sticky=tk.W, pady=(10, 0))
+
+        # Gerüst sofort in Standardgröße zeigen; Laufwerke folgen aus dem Hintergrund
+        self.adjust_window_size()
         self.refresh_drives()
 
     def adjust_window_size(self):
         """Passt die Fenstergröße an die Anzahl der Laufwerke an."""
         if not hasattr(self, 'drives_data') or not self.drives_data:
             # Fallback wenn noch keine Laufwerke geladen
-            self.root.geometry("750x500")
+            self.root.geometry("1200x500")
             return
 
         num_drives = len(self.drives_data)
-        print(f"Adjusting window size for {num_drives} drives")
-
-        # Basis-Höhe für UI-Elemente (Sprache, Titel, Anweisungen, Buttons)
-        base_height = 380
-
-        # Höhe pro Laufwerk (ca. 35px pro Zeile)
-        drive_height = 35
+        with tracing.span("window.resize", "ui", drives=num_drives) as span:
+            # Basis-Höhe für UI-Elemente (Sprache, Titel, Anweisungen, Buttons, Tabellenkopf)
+            base_height = 430
 
-        # Berechne Gesamthöhe
-        total_height = base_height + (num_drives * drive_height)
+            # Mindest- und Maximalhöhe
+            min_height = 550
+            max_height = 800
 
-        # Mindest- und Maximalhöhe
-        min_height = 550
-        max_height = 800
+            # Die Tabelle zeigt höchstens so viele Zeilen, wie ins Fenster passen; der Rest wird gescrollt
+            visible_rows = max(1, min(num_drives, (max_height - base_height) // ROW_HEIGHT))
+            window_height = max(min_height, base_height + visible_rows * ROW_HEIGHT)
 
-        # Begrenze die Höhe
-        window_height = max(min_height, min(max_height, total_height))
+            # Feste Breite
+            window_width = 1200
 
-        # Feste Breite
-        window_width = 750
+            span.set(width=window_width, height=window_height, visible_rows=visible_rows)
+            self.root.geometry(f"{window_width}x{window_height}")
+            if self.drives_tree is not None:
+                self.drives_tree.configure(height=visible_rows)
 
-        print(f"Setting window size to {window_width}x{window_height}")
-        self.root.geometry(f"{window_width}x{window_height}")
-
-        # Canvas-Höhe anpassen
-        if hasattr(self, 'canvas') and self.canvas:
-            if total_height > max_height:
-                # Scrolling erforderlich
-                canvas_height = max_height - base_height
-            else:
-                # Alle Laufwerke passen ins Fenster
-                canvas_height = num_drives * drive_height + 50
-
-            print(f"Setting canvas height to {canvas_height}")
-            self.canvas.configure(height=canvas_height)
-
-        # GUI aktualisieren
-        self.root.update_idletasks()
+            # GUI aktualisieren
+            self.root.update_idletasks()
 
     def create_drives_table(self, parent):
-        """Erstellt die Tabelle für die Laufwerksanzeige mit Dropdown-Spalte."""
+        """
+        Erstellt die Laufwerkstabelle als ttk.Treeview.
+
+        Die Treeview zeichnet nur sichtbare Zeilen; für die Spalte "Neuer
+        Buchstabe" gibt es einen einzigen Combobox-Editor, der über der
+        angeklickten Zelle eingeblendet wird. Er bietet die Buchstaben zur
+        Auswahl an und nimmt als Eingabe auch einen Ordnerpfad an.
+        """
         # Frame für Tabelle
         table_frame = ttk.Frame(parent)
         table_frame.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 20))
         table_frame.columnconfigure(0, weight=1)
         table_frame.rowconfigure(0, weight=1)
 
-        # Hauptframe für Tabelle und Dropdowns
-        content_frame = ttk.Frame(table_frame)
-        content_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        content_frame.columnconfigure(0, weight=0, minsize=80)   # Laufwerk Spalte - breiter
-        content_frame.columnconfigure(1, weight=0, minsize=350)  # Bezeichnung Spalte - breiter
-        content_frame.columnconfigure(2, weight=0, minsize=200)  # Neuer Buchstabe Spalte
-        content_frame.rowconfigure(0, weight=0)
-        content_frame.rowconfigure(1, weight=1)
-
-        # Header mit angepassten Breiten und Padding
-        ttk.Label(content_frame, text=self.t("drive"), font=("Arial", 9, "bold"), width=10).grid(row=0, column=0, sticky=tk.W, padx=(5,10), pady=5)
-        ttk.Label(content_frame, text=self.t("description"), font=("Arial", 9, "bold"), width=40).grid(row=0, column=1, sticky=tk.W, padx=(5,10), pady=5)
-        ttk.Label(content_frame, text=self.t("new_letter"), font=("Arial", 9, "bold"), width=20).grid(row=0, column=2, sticky=tk.W, padx=(5,10), pady=5)
-
-        # Scrollbarer Frame für Laufwerke
-        self.canvas = tk.Canvas(content_frame, height=200)
-        scrollbar = ttk.Scrollbar(content_frame, orient=tk.VERTICAL, command=self.canvas.yview)
-        self.drives_frame = ttk.Frame(self.canvas)
-
-        # Konfiguriere Spalten im drives_frame
-        self.drives_frame.columnconfigure(0, weight=0, minsize=80)   # Laufwerk - breiter
-        self.drives_frame.columnconfigure(1, weight=0, minsize=350)  # Bezeichnung - breiter
-        self.drives_frame.columnconfigure(2, weight=0, minsize=200)  # Neuer Buchstabe
-
-        self.drives_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-
-        self.canvas.create_window((0, 0), window=self.drives_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.canvas.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S))
-        scrollbar.grid(row=1, column=3, sticky=(tk.N, tk.S))
-        self.drive_widgets = []
-    
+        style = ttk.Style(self.root)
+        style.configure("Drives.Treeview", rowheight=ROW_HEIGHT)
+
+        # Laufwerke ohne Buchstaben stehen mit ihrem Ordnerpfad in der ersten Spalte
+        columns = (("drive", 150, False), ("description", 220, True), ("new_letter", 180, False),
+                   ("size", 80, False), ("free", 80, False), ("filesystem", 90, False),
+                   ("type", 100, False), ("disk", 90, False), ("mounts", 160, True))
+        self.drives_tree = ttk.Treeview(table_frame, columns=tuple(column for column, _, _ in columns),
+                                        show="headings", selectmode="browse", height=8,
+                                        style="Drives.Treeview")
+        for column, width, stretch in columns:
+            self.drives_tree.column(column, width=width, minwidth=60, stretch=stretch, anchor=tk.W)
+            self.bind_heading(self.drives_tree, column, column)
+        # Vorgemerkte Änderungen hervorheben
+        self.drives_tree.tag_configure("changed", foreground="#0050a0")
+
+        scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.scroll_table)
+        self.drives_tree.configure(yscrollcommand=scrollbar.set)
+
+        self.drives_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        # Gemeinsamer Inline-Editor für die Spalte "Neuer Buchstabe"
+        self.letter_editor = ttk.Combobox(self.drives_tree, width=8)
+        self.letter_editor.bind("<<ComboboxSelected>>", self.on_letter_selected)
+        self.letter_editor.bind("<Return>", self.on_letter_selected)
+        self.letter_editor.bind("<Escape>", lambda e: self.hide_letter_editor())
+        self.drives_tree.bind("<Button-1>", self.on_table_click)
+        self.drives_tree.bind("<MouseWheel>", lambda e: self.hide_letter_editor(), add="+")
+
+        self.table_rows = {}
+        self.editor_drive = None
+
+    def scroll_table(self, *args):
+        """Scrollt die Tabelle; der Inline-Editor würde sonst über der falschen Zeile stehen."""
+        self.hide_letter_editor()
+        self.drives_tree.yview(*args)
+
+    def on_table_click(self, event):
+        """Blendet den Inline-Editor über der angeklickten Zelle der Spalte "Neuer Buchstabe" ein."""
+        self.hide_letter_editor()
+
+        key = self.drives_tree.identify_row(event.y)
+        volume = self.volume_index.get(key) if key else None
+        if (volume is None or self.drives_tree.identify_region(event.x, event.y) != "cell"
+                or self.drives_tree.identify_column(event.x) != "#3"):
+            return
+
+        bbox = self.drives_tree.bbox(key, "new_letter")
+        if not bbox:
+            return
+        x, y, width, height = bbox
+
+        self.editor_drive = key
+        self.letter_editor.configure(values=self.letter_values)
+        self.letter_editor.set(self.pending_letters.get(key, volume.letter))
+        self.letter_editor.place(x=x, y=y, width=width, height=height)
+        self.letter_editor.focus_set()
+
+    def on_letter_selected(self, event=None):
+        """Übernimmt die Auswahl oder Eingabe des Inline-Editors als vorgemerkte Änderung."""
+        key = self.editor_drive
+        volume = self.volume_index.get(key) if key is not None else None
+        if volume is not None and key in self.table_rows:
+            try:
+                selection = letter_planner.normalize_target(self.letter_editor.get())
+            except letter_planner.PlanError as e:
+                messagebox.showerror(self.t("error"), str(e))
+                return
+            if selection.upper() == volume.letter.upper():
+                self.pending_letters.pop(key, None)
+            else:
+                self.pending_letters[key] = selection
+            self.update_table_row(key, self.table_rows[key][0][1], None)
+        self.hide_letter_editor()
+
+    def hide_letter_editor(self):
+        """Blendet den Inline-Editor aus."""
+        if self.editor_drive is not None:
+            self.letter_editor.place_forget()
+            self.editor_drive = None
+
     def create_instructions(self, parent):
         """Erstellt den Bereich mit Anweisungen."""
         # Frame für Anweisungen
-        info_frame = ttk.LabelFrame(parent, text=self.t("instructions"), padding="10")
+        info_frame = self.bind_text(ttk.LabelFrame(parent, padding="10"), "instructions")
         info_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(0, 20))
 
         # Anweisungstext
-        instruction_label = ttk.Label(info_frame, text=self.t("instruction_text"), justify=tk.LEFT)
+        instruction_label = self.bind_text(ttk.Label(info_frame, justify=tk.LEFT), "instruction_text")
         instruction_label.grid(row=0, column=0, sticky=(tk.W, tk.E))
     
     def create_buttons(self, parent):
@@ -493,159 +718,513 @@ exit"""
         button_frame.grid(row=4, column=0, sticky=(tk.W, tk.E))
 
         # Ändern Button
-        self.change_button = ttk.Button(button_frame, text=self.t("apply_changes"),
-                                       command=self.on_change_click)
+        self.change_button = self.bind_text(ttk.Button(button_frame, command=self.on_change_click),
+                                            "apply_changes")
         self.change_button.pack(side=tk.LEFT, padx=(0, 10))
 
         # Aktualisieren Button
-        refresh_button = ttk.Button(button_frame, text=self.t("refresh"), command=self.refresh_drives)
+        refresh_button = self.bind_text(ttk.Button(button_frame, command=self.on_refresh_click), "refresh")
         refresh_button.pack(side=tk.LEFT, padx=(0, 10))
 
+        # Layout-Profile (während laufender Änderungen gesperrt)
+        self.profile_buttons = [
+            self.bind_text(ttk.Button(button_frame, command=self.export_profile), "export_profile"),
+            self.bind_text(ttk.Button(button_frame, command=self.import_profile), "import_profile"),
+        ]
+        for button in self.profile_buttons:
+            button.pack(side=tk.LEFT, padx=(0, 10))
+
         # Beenden Button
-        exit_button = ttk.Button(button_frame, text=self.t("exit"), command=self.root.quit)
+        exit_button = self.bind_text(ttk.Button(button_frame, command=self.root.quit), "exit")
         exit_button.pack(side=tk.RIGHT)
+
+        # Fortschrittsanzeige während Ermittlung oder Änderungen (nur sichtbar, solange sie laufen)
+        self.progress_frame = ttk.Frame(button_frame)
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="indeterminate", length=100)
+        self.progress_bar.pack(side=tk.LEFT, padx=(0, 10))
+        self.progress_label = ttk.Label(self.progress_frame)
+        self.progress_label.pack(side=tk.LEFT, padx=(0, 10))
+        self.bind_text(ttk.Button(self.progress_frame, command=self.cancel_progress),
+                       "cancel").pack(side=tk.LEFT)
     
 
 
-    def refresh_drives(self):
-        """Aktualisiert die Laufwerksliste und erstellt neue Dropdown-Menüs."""
-        # Laufwerke neu laden
-        self.drives_data = self.get_drives()
+    def on_refresh_click(self):
+        """Aktualisieren-Button: liest die Laufwerke neu, auch wenn der Cache noch gültig wäre."""
+        # Ohne Fingerabdruck entschiede sonst allein die TTL, die Daten könnten bis zu einer Minute alt sein
+        self.drive_cache.invalidate()
+        self.refresh_drives()
+
+    def refresh_drives(self, then: Optional[Callable[[List[drive_backends.VolumeInfo]], None]] = None):
+        """
+        Startet die Laufwerksermittlung im Hintergrund; die Tabelle folgt, sobald sie fertig ist.
+
+        Args:
+            then (Optional[Callable]): Wird nach dem Abgleich der Tabelle mit den ermittelten
+                Laufwerken aufgerufen (im Tk-Thread); entfällt bei Fehler oder Abbruch
+        """
+        if then is not None:
+            self.enumeration_callbacks.append(then)
+        # Freier Speicher ändert sich laufend: eine ausdrückliche Aktualisierung liest die Details neu
+        self.metadata_loader.invalidate()
+        self.enumeration_worker.start()
+        self.show_progress(True)
+
+        if self.enumeration_poll_job is None:
+            self.enumeration_poll_job = self.root.after(50, self.poll_enumeration)
+
+    def mark_startup(self, name: str):
+        """
+        Hält einen Messpunkt des Programmstarts fest (nur beim ersten Erreichen).
 
+        Messpunkte: "skeleton" (Fenster aufgebaut), "first_paint" (erstes Zeichnen),
+        "table_populated" (Tabelle erstmals gefüllt).
+        """
+        if name in self.startup_times:
+            return
+        self.startup_times[name] = time.perf_counter() - self.startup_started
+
+    def update_progress_text(self):
+        """Setzt den Text der Fortschrittsanzeige, bei wartenden Wiederholungen mit Zwischenstand."""
+        text = self.t(self.progress_key)
+        progress = self.apply_executor.progress if self.applying is not None else None
+        if progress is not None:
+            text += f"  {', '.join(progress.waiting)} {self.t('retry_waiting')} {math.ceil(progress.retry_in)} s"
+        self.progress_label.configure(text=text)
+
+    def cancel_progress(self):
+        """Abbrechen-Button der Fortschrittsanzeige: verzichtet auf weitere Versuche oder bricht die Ermittlung ab."""
+        if self.applying is not None:
+            # Der Bericht folgt nach der laufenden diskpart-Sitzung über poll_apply
+            self.apply_executor.cancel()
+        else:
+            self.cancel_refresh()
+
+    def cancel_refresh(self):
+        """Bricht die laufende Laufwerksermittlung und Nachprüfung ab; die bisherige Tabelle bleibt erhalten."""
+        self.enumeration_worker.cancel()
+        self.enumeration_callbacks = []
+        self.verify_worker.cancel()
+        self.show_progress(False)
+        self.show_progress(False, "verifying_changes")
+
+    def update_status_bar(self):
+        """Zeigt die Dauer der letzten Ermittlung und der letzten Änderung in der Statusleiste."""
+        if not hasattr(self, 'status_label'):
+            return
+        parts = []
+        if self.last_enumeration_time is not None:
+            parts.append(f"{self.t('status_enumeration')}: {format_duration(self.last_enumeration_time)}"
+                         f" ({self.last_backend})")
+            # Treffer/Abfragen des Laufwerks-Caches
+            cache = self.drive_cache
+            parts.append(f"{self.t('status_cache')}: {cache.hits}/{cache.hits + cache.misses}")
+        if self.last_apply_time is not None:
+            parts.append(f"{self.t('status_apply')}: {format_duration(self.last_apply_time)}")
+        if self.moved_volumes:
+            parts.append(f"{self.t('status_moved')}: {', '.join(self.moved_volumes)}")
+        self.status_label.configure(text="   |   ".join(parts))
+
+    def poll_enumeration(self):
+        """Fragt das Ergebnis der Hintergrund-Ermittlung ab (läuft im Tk-Thread)."""
+        self.enumeration_poll_job = None
+        result = self.enumeration_worker.poll()
+
+        if result is not None:
+            self.show_progress(False)
+            self.last_enumeration_time = result.duration
+            self.update_status_bar()
+            callbacks, self.enumeration_callbacks = self.enumeration_callbacks, []
+            if result.error is not None:
+                messagebox.showerror("Fehler", f"Fehler beim Ermitteln der Laufwerke: {str(result.error)}")
+            else:
+                self.report_index_changes(self.update_volumes(result.volumes))
+                self.populate_drives_table()
+                for callback in callbacks:
+                    callback(result.volumes)
+
+        if self.enumeration_worker.busy:
+            self.enumeration_poll_job = self.root.after(50, self.poll_enumeration)
+
+    def poll_watcher(self):
+        """Übernimmt vom Watcher gemeldete Änderungen in die Tabelle (läuft im Tk-Thread)."""
+        latest = None
+        while True:
+            try:
+                _, latest = self.watch_events.get_nowait()
+            except queue.Empty:
+                break
+
+        if latest is not None:
+            # Der Watcher liefert den vollständigen Bestand; eine Neuermittlung ist nicht nötig
+            self.drive_cache.invalidate()
+            self.report_index_changes(self.update_volumes(latest))
+            self.populate_drives_table()
+
+        self.root.after(WATCH_POLL_MS, self.poll_watcher)
+
+    def report_index_changes(self, changes: volume_index.IndexUpdate):
+        """
+        Zeigt von außen verschobene Volumes in der Statusleiste (z.B. durch die
+        Datenträgerverwaltung); ihre Zeilen und Vormerkungen bleiben erhalten.
+
+        Eigene Änderungen trägt poll_apply vorab mit move() ein, sie erscheinen hier nicht.
+        """
+        self.moved_volumes = [f"{volume.label} → {volume.letter}"
+                              for volume in map(self.volume_index.get, changes.moved) if volume is not None]
+        self.update_status_bar()
+
+    def show_progress(self, active: bool, key: str = "loading_drives"):
+        """
+        Meldet einen Vorgang an oder ab; die Anzeige bleibt sichtbar, solange noch einer läuft.
+
+        Ermittlung und Änderungen werden getrennt verfolgt: Endet eine Änderung während
+        einer Ermittlung, bleibt die Anzeige für die Ermittlung stehen (und umgekehrt).
+        Solange ein Vorgang läuft, ist der Ändern-Button gesperrt, während Änderungen
+        zusätzlich die Profil-Buttons.
+
+        Args:
+            active (bool): Vorgang beginnt oder endet
+            key (str): Übersetzungsschlüssel des Vorgangs; laufende Änderungen haben Vorrang vor der Ermittlung
+        """
+        if active:
+            self.progress_tasks.add(key)
+        else:
+            self.progress_tasks.discard(key)
+        if not hasattr(self, 'progress_frame'):
+            return
+        applying = "applying_changes" in self.progress_tasks
+        try:
+            if self.progress_tasks:
+                self.progress_key = "applying_changes" if applying else min(self.progress_tasks)
+                self.update_progress_text()
+                self.progress_frame.pack(side=tk.LEFT, padx=(10, 0))
+                self.progress_bar.start(10)
+                self.change_button.state(["disabled"])
+            else:
+                self.progress_bar.stop()
+                self.progress_frame.pack_forget()
+                self.change_button.state(["!disabled"])
+            for button in self.profile_buttons:
+                button.state(["disabled" if applying else "!disabled"])
+        except tk.TclError:
+            # Widgets wurden beim Sprachwechsel bereits zerstört
+            pass
+
+    @tracing.traced("table.populate", "ui")
+    def populate_drives_table(self):
+        """Gleicht die Tabellenzeilen mit dem Volume-Index ab; nur geänderte Zeilen werden angefasst."""
         # Prüfe ob GUI-Komponenten existieren
-        if not hasattr(self, 'drives_frame') or self.drives_frame is None:
-            print("GUI noch nicht initialisiert, überspringe refresh_drives")
+        if self.drives_tree is None:
+            print("GUI noch nicht initialisiert, überspringe populate_drives_table")
             return
 
-        # Lösche alte Widgets sicher
-        if hasattr(self, 'drive_widgets') and self.drive_widgets:
-            for widget_row in self.drive_widgets:
-                for widget in widget_row:
-                    try:
-                        if hasattr(widget, 'destroy'):
-                            widget.destroy()
-                    except tk.TclError:
-                        # Widget bereits zerstört
-                        pass
-            self.drive_widgets.clear()
-
-        # Erstelle neue Zeilen für jedes Laufwerk
-        available_letters = self.get_available_letters()
-
-        for i, (drive, label) in enumerate(sorted(self.drives_data.items())):
+        # Belegte Buchstaben und Ordner bleiben wählbar, damit Tausch und Rotation möglich sind
+        targets = tuple(self.drives_data)
+        if targets != self.letter_values_for:
+            dropdown_values = self.get_available_letters() + list(targets)
+            self.letter_values = tuple(sorted(set(dropdown_values), key=drive_sort_key))
+            self.letter_values_for = targets
+        self.hide_letter_editor()
+
+        # Entfernte Laufwerke
+        for key in [key for key in self.table_rows if key not in self.volume_index]:
+            self.drives_tree.delete(key)
+            del self.table_rows[key]
+            self.pending_letters.pop(key, None)
+            self.metadata_cell_cache.pop(key, None)
+
+        order = sorted(self.volume_index, key=lambda key: drive_sort_key(self.volume_index.get(key).letter))
+        for i, key in enumerate(order):
+            # Eine vorgemerkte Auswahl, die nicht mehr möglich ist, wird verworfen (Ordner prüft der Planer)
+            pending = self.pending_letters.get(key)
+            if pending not in (None,) + self.letter_values and not letter_planner.is_mount_path(pending):
+                del self.pending_letters[key]
+            volume = self.volume_index.get(key)
             try:
-                # Laufwerk Label - breiter
-                drive_label = ttk.Label(self.drives_frame, text=drive, width=8)
-                drive_label.grid(row=i, column=0, padx=(5,10), pady=2, sticky=tk.W)
-
-                # Bezeichnung Label - breiter für bessere Lesbarkeit
-                display_label = label if len(label) <= 40 else label[:37] + "..."
-                desc_label = ttk.Label(self.drives_frame, text=display_label, width=40)
-                desc_label.grid(row=i, column=1, padx=(5,10), pady=2, sticky=tk.W)
-
-                # Dropdown für neuen Buchstaben - mit kürzeren Werten
-                new_drive_var = tk.StringVar()
-                dropdown_values = available_letters + [drive]  # Aktueller Buchstabe auch verfügbar
-                dropdown_values = sorted(list(set(dropdown_values)))  # Duplikate entfernen und sortieren
-
-                # Kürze die Dropdown-Werte auf nur den Buchstaben
-                short_dropdown_values = [letter.split(':')[0] + ':' for letter in dropdown_values]
-
-                new_drive_combo = ttk.Combobox(self.drives_frame, textvariable=new_drive_var,
-                                             values=short_dropdown_values, state="readonly", width=8)
-                new_drive_combo.set(drive.split(':')[0] + ':')  # Nur Buchstabe mit Doppelpunkt
-                new_drive_combo.grid(row=i, column=2, padx=(5,10), pady=2, sticky=tk.W+tk.E)
-
-                # Speichere Widget-Referenzen
-                widget_row = [drive_label, desc_label, new_drive_combo, new_drive_var, drive]
-                self.drive_widgets.append(widget_row)
-
-            except Exception as e:
-                print(f"Fehler beim Erstellen von Laufwerk {drive}: {e}")
+                self.update_table_row(key, volume.label, i)
+            except tk.TclError as e:
+                print(f"Fehler beim Erstellen von Laufwerk {volume.letter}: {e}")
                 continue
 
-        # Canvas-Scroll-Region aktualisieren
-        try:
-            if self.drives_frame and self.drives_canvas:
-                self.drives_frame.update_idletasks()
-                self.drives_canvas.configure(scrollregion=self.drives_canvas.bbox("all"))
-        except Exception as e:
-            print(f"Fehler beim Aktualisieren der Scroll-Region: {e}")
+        # Laufwerke mit neuem Buchstaben behalten ihre Zeile; sie wandert nur an die neue Position
+        if [key for key in self.drives_tree.get_children() if key in self.table_rows] != order:
+            for i, key in enumerate(key for key in order if key in self.table_rows):
+                self.drives_tree.move(key, "", i)
 
-        drives_count = len(self.drives_data)
-        update_msg = f"Drives updated: {drives_count} drives found" if self.current_language == "en" else f"Laufwerke aktualisiert: {drives_count} Laufwerke gefunden"
-        print(update_msg)
+        self.request_metadata()
+        self.mark_startup("table_populated")
 
         # Passe Fenstergröße an die Anzahl der Laufwerke an
         self.root.after(100, self.adjust_window_size)  # Verzögert ausführen nach GUI-Update
     
+    def update_table_row(self, key: str, label: str, index: Optional[int]):
+        """
+        Fügt eine Zeile ein oder aktualisiert sie, falls sich ihr Inhalt geändert hat.
+
+        Args:
+            key (str): Schlüssel des Volumes im Volume-Index (zugleich ID der Zeile)
+            label (str): Bezeichnung des Laufwerks
+            index (Optional[int]): Position für neue Zeilen; None nur für bestehende Zeilen
+        """
+        volume = self.volume_index.get(key)
+        drive = volume.letter if volume is not None else key
+        selection = self.pending_letters.get(key, drive)
+        mounts = ", ".join(volume.mount_points) if volume is not None else ""
+        row = ((drive, label, selection) + self.metadata_cells(key) + (mounts,),
+               "changed" if selection != drive else "")
+
+        previous = self.table_rows.get(key)
+        if previous is None:
+            self.drives_tree.insert("", index, iid=key, values=row[0], tags=(row[1],))
+        elif previous != row:
+            self.drives_tree.item(key, values=row[0], tags=(row[1],))
+        self.table_rows[key] = row
+
+    def metadata_cells(self, key: str) -> Tuple[str, str, str, str, str]:
+        """
+        Liefert die Zellen Größe, Frei, Dateisystem, Typ und Datenträger einer Zeile.
+
+        Solange die Details noch geladen werden oder wenn das Lesen fehlschlägt,
+        stehen dort die Angaben aus der Ermittlung (sofern das Backend sie
+        mitliefert); noch ausstehende Felder zeigen einen Platzhalter.
+        """
+        metadata = self.volume_metadata.get(key)
+        cached = self.metadata_cell_cache.get(key)
+        if cached is not None and cached[0] is metadata and cached[1] == self.current_language:
+            # Dieselben Details wie beim letzten Mal: Formatierung und Übersetzung entfallen
+            return cached[2]
+
+        volume = self.volume_index.get(key)
+        if metadata is None or metadata.error:
+            pending = PENDING_CELL if metadata is None and self.metadata_loader.enabled else ""
+            if volume is None:
+                return (pending,) * 5
+            return (volume_metadata.format_size(volume.size) or pending,
+                    volume_metadata.format_size(volume.free) or pending,
+                    volume.filesystem or pending,
+                    self.drive_type_name(volume.drive_type) or pending,
+                    pending)
+
+        disk = ""
+        if metadata.disk_number is not None:
+            disk = f"{metadata.disk_number}"
+            if metadata.partition_number:
+                disk += f" / {metadata.partition_number}"
+        cells = (volume_metadata.format_size(metadata.size),
+                 volume_metadata.format_size(metadata.free),
+                 metadata.filesystem,
+                 self.drive_type_name(metadata.drive_type),
+                 disk)
+        self.metadata_cell_cache[key] = (metadata, self.current_language, cells)
+        return cells
+
+    def drive_type_name(self, drive_type: Optional[int]) -> str:
+        key = DRIVE_TYPE_KEYS.get(drive_type)
+        return self.t(key) if key else ""
+
+    def request_metadata(self):
+        """Fordert die Details aller angezeigten Laufwerke an; fehlende folgen über poll_metadata."""
+        if not self.metadata_loader.enabled:
+            return
+        # Der Loader meldet nach Buchstabe; die Zuordnung zur Zeile läuft über den Volume-Index
+        previous, self.volume_metadata = self.volume_metadata, {}
+        for letter, metadata in self.metadata_loader.request(self.volume_index.volumes()).items():
+            key = self.volume_index.key_for(letter)
+            if key in self.table_rows:
+                self.volume_metadata[key] = metadata
+                # Zeilen mit unveränderten Details hat populate_drives_table bereits abgeglichen
+                if previous.get(key) is not metadata:
+                    self.update_table_row(key, self.table_rows[key][0][1], None)
+
+        if self.metadata_loader.busy and self.metadata_poll_job is None:
+            self.metadata_poll_job = self.root.after(METADATA_POLL_MS, self.poll_metadata)
+
+    def poll_metadata(self):
+        """Trägt eingetroffene Details in ihre Zeilen ein (läuft im Tk-Thread)."""
+        self.metadata_poll_job = None
+        for letter, metadata in self.metadata_loader.poll():
+            key = self.volume_index.key_for(letter)
+            if key not in self.table_rows:
+                continue
+            self.volume_metadata[key] = metadata
+            self.update_table_row(key, self.table_rows[key][0][1], None)
+
+        if self.metadata_loader.busy:
+            self.metadata_poll_job = self.root.after(METADATA_POLL_MS, self.poll_metadata)
+
     def on_change_click(self):
         """Behandelt den Klick auf den Ändern-Button."""
         # Sammle alle geplanten Änderungen aus den Dropdown-Menüs
         changes = []
 
-        for widget_row in self.drive_widgets:
-            _, desc_label, _, var, original_drive = widget_row
-            current_selection = var.get()
-
-            # Vergleiche nur die Buchstaben (ohne Beschreibung)
-            original_letter = original_drive.split(':')[0] + ':'
-            selected_letter = current_selection
-
-            if selected_letter != original_letter:
-                drive_desc = desc_label.cget("text")
-                changes.append((original_letter, selected_letter, drive_desc))
+        for key, selected_letter in self.pending_letters.items():
+            volume = self.volume_index.get(key)
+            if volume is not None and selected_letter != volume.letter:
+                changes.append((volume.letter, selected_letter, volume.label))
+        changes.sort(key=lambda change: drive_sort_key(change[0]))
 
         if not changes:
             messagebox.showinfo(self.t("no_changes"), self.t("no_changes_message"))
             return
 
+        self.apply_changes(changes)
+
+    def apply_changes(self, changes: List[Tuple[str, str, str]], notes: str = ""):
+        """
+        Plant die Änderungen, lässt sie bestätigen und führt sie im Hintergrund aus.
+
+        Args:
+            changes (List[Tuple[str, str, str]]): Tupel aus altem Buchstaben, neuem Buchstaben und Bezeichnung
+            notes (str): Zusätzliche Hinweise für den Bestätigungsdialog
+        """
+        try:
+            plan = self.plan_changes(changes)
+        except letter_planner.PlanError as e:
+            messagebox.showerror(self.t("error"), str(e))
+            return
+
         # Zeige Zusammenfassung der Änderungen
         change_summary = self.t("changes_summary") + "\n\n"
         for current, new, label in changes:
             change_summary += f"• {current} → {new} ({label})\n"
 
+        # Probelauf: tatsächliche diskpart-Schritte in Ausführungsreihenfolge
+        if len(plan.steps) != len(changes):
+            change_summary += "\n" + self.t("execution_plan") + "\n"
+            change_summary += "\n".join(plan.preview_lines()) + "\n"
+
+        change_summary += notes
         change_summary += f"\n{len(changes)} " + ("change" if len(changes) == 1 else "changes") + ". Continue?" if self.current_language == "en" else f"\nInsgesamt {len(changes)} Änderung(en). Fortfahren?"
 
         # Bestätigung
         if messagebox.askyesno(self.t("confirm_changes"), change_summary):
-            successful_changes = 0
-
-            for current, new, label in changes:
-                if self.change_drive_letter(current, new):
-                    successful_changes += 1
-                else:
-                    # Bei Fehler fragen ob fortfahren
-                    if not messagebox.askyesno("Fehler aufgetreten",
-                                             f"Fehler bei Änderung {current} → {new}.\n\n"
-                                             f"Möchten Sie mit den verbleibenden Änderungen fortfahren?"):
-                        break
-
-            # Ergebnis anzeigen
-            if successful_changes > 0:
-                success_msg = f"{successful_changes} of {len(changes)} changes applied successfully." if self.current_language == "en" else f"{successful_changes} von {len(changes)} Änderungen erfolgreich durchgeführt."
-                messagebox.showinfo(self.t("success"), success_msg)
-
-            # Liste aktualisieren
-            self.refresh_drives()
+            self.start_apply(plan, changes)
+
+    def export_profile(self):
+        """Speichert das aktuelle Layout als Profil, sobald die Ermittlung im Hintergrund fertig ist."""
+        path = filedialog.asksaveasfilename(title=self.t("export_profile"), defaultextension=".json",
+                                            filetypes=[(self.t("profile_files"), "*.json")])
+        if not path:
+            return
+        self.refresh_drives(then=lambda volumes: self.save_profile(volumes, path))
+
+    def save_profile(self, volumes: List[drive_backends.VolumeInfo], path: str):
+        """Schreibt das Profil der ermittelten Laufwerke (Fortsetzung von export_profile)."""
+        try:
+            profiles.save_profile(profiles.profile_from_volumes(volumes), path)
+        except OSError as e:
+            messagebox.showerror(self.t("error"), f"{self.t('error_occurred')}\n{e}")
+
+    def import_profile(self):
+        """Lädt ein Profil; der Abgleich folgt, sobald die Ermittlung im Hintergrund fertig ist."""
+        path = filedialog.askopenfilename(title=self.t("import_profile"),
+                                          filetypes=[(self.t("profile_files"), "*.json")])
+        if not path:
+            return
+        try:
+            profile = profiles.load_profile(path)
+        except (profiles.ProfileError, OSError) as e:
+            messagebox.showerror(self.t("error"), f"{self.t('error_occurred')}\n{e}")
+            return
+        # Abgleich gegen den aktuellen Bestand, nicht gegen eine womöglich veraltete Tabelle
+        self.refresh_drives(then=lambda volumes: self.apply_profile(profile, volumes))
+
+    def apply_profile(self, profile: profiles.LayoutProfile, volumes: List[drive_backends.VolumeInfo]):
+        """Führt nur die Änderungen aus, die zum Profil fehlen (Fortsetzung von import_profile)."""
+        if self.applying is not None:
+            # Während der Ermittlung wurden bereits Änderungen gestartet
+            return
+        match = profiles.match_profile(profile, volumes)
+
+        notes = ""
+        for key, entries in (("profile_missing", match.missing), ("profile_ambiguous", match.ambiguous)):
+            if entries:
+                notes += "\n" + self.t(key) + "\n"
+                notes += "".join(f"• {entry.letter} ({entry.label or profiles.format_serial(entry.serial)})\n"
+                                 for entry in entries)
+
+        if match.satisfied:
+            messagebox.showinfo(profile.name or self.t("no_changes"), self.t("profile_satisfied") + "\n" + notes)
+            return
+
+        labels = {volume.letter: volume.label for volume in volumes}
+        self.apply_changes([(old, new, labels.get(old, "")) for old, new in sorted(match.mapping.items())], notes)
+
+    def verify_letters(self, letters):
+        """
+        Liest nach einer Änderung nur die betroffenen Buchstaben im Hintergrund neu ein.
+
+        Die Tabelle gleicht poll_verification ab, sobald das Ergebnis vorliegt.
+        """
+        self.verify_worker.start(sorted(letters))
+        self.show_progress(True, "verifying_changes")
+        if self.verify_poll_job is None:
+            self.verify_poll_job = self.root.after(50, self.poll_verification)
+
+    @tracing.traced("verify_letters", "backend")
+    def probe_letters(self, letters: List[str]) -> Optional[Dict[str, Optional[drive_backends.VolumeInfo]]]:
+        """
+        Fragt einzelne Buchstaben oder Ordner ab; sicher aus einem Worker-Thread aufrufbar.
+
+        Returns:
+            Optional[Dict[str, Optional[drive_backends.VolumeInfo]]]: Siehe drive_backends.probe_letters
+        """
+        return drive_backends.probe_letters(self.backends, letters)
+
+    def poll_verification(self):
+        """
+        Übernimmt das Ergebnis der Nachprüfung in die Tabelle (läuft im Tk-Thread).
+
+        Unterstützt kein Backend Einzelabfragen, wird die vollständige Ermittlung gestartet.
+        """
+        self.verify_poll_job = None
+        result = self.verify_worker.poll()
+
+        if result is not None:
+            self.show_progress(False, "verifying_changes")
+            if result.error is not None or result.volumes is None:
+                self.refresh_drives()
+            else:
+                # Der Index ordnet die Ergebnisse den bestehenden Volumes zu; nur deren Einträge ändern sich
+                self.report_index_changes(self.volume_index.merge(result.volumes))
+                self.sync_volume_views()
+                self.populate_drives_table()
+
+        if self.verify_worker.busy:
+            self.verify_poll_job = self.root.after(50, self.poll_verification)
     
     def run(self):
         """Startet die Anwendung."""
-        # Prüfe Admin-Rechte beim Start
-        if not self.is_admin():
-            messagebox.showwarning(
-                "Administratorrechte empfohlen",
-                "Für das Ändern von Laufwerksbuchstaben sind Administratorrechte erforderlich.\n\n"
-                "Starten Sie das Programm als Administrator, um alle Funktionen nutzen zu können."
-            )
-        
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Beendet Watcher, ausstehende Wiederholungen und Hintergrundprozesse der Backends (z.B. PowerShell)."""
+        self.apply_executor.cancel()
+        self.verify_worker.cancel()
+        self.metadata_loader.close()
+        if self.drive_watcher is not None:
+            self.drive_watcher.stop()
+        for backend in self.backends:
+            backend.close()
 
 
 def main():
     """Hauptfunktion."""
     try:
-        app = DriveLetterManager()
+        command_runner.configure_from_environment()
+    except (OSError, ValueError) as e:
+        # Eine fehlerhafte DLM_REPLAY/DLM_RECORD-Angabe soll den Start nicht verhindern
+        print(f"Warnung: {e} - es werden die echten Programme aufgerufen")
+    try:
+        # Läuft ein Dienst (drive_cli.py serve), wird die Oberfläche zu dessen Client
+        service = drive_service.connect()
+        if service is not None:
+            print(f"Verbunden mit Dienst unter {service.address}")
+        app = DriveLetterManager(service=service)
         app.run()
     except Exception as e:
         messagebox.showerror("Kritischer Fehler", f"Ein kritischer Fehler ist aufgetreten:\n{str(e)}")
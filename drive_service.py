@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident-Dienst für Ermittlung und Änderungen
+=============================================
+
+Jeder Start von Oberfläche oder Kommandozeile bezahlt erneut für die kalte
+Ermittlung und die Administratorrechte. Der Dienst läuft dagegen dauerhaft
+(einmal mit Administratorrechten gestartet), hält den Laufwerksbestand in
+einem DriveCache warm und beantwortet Anfragen vieler Clients über
+``multiprocessing.connection``: unter Windows über eine Named Pipe, sonst über
+einen Unix-Socket (Ersatz zum Testen). Anfragen und Antworten sind JSON, wie
+beim PowerShell-Worker:
+
+    → {"op": "list", "refresh": false}
+    ← {"ok": true, "result": {"backend": "native", "volumes": [...]}}
+    ← {"ok": false, "kind": "plan", "error": "..."}
+
+Operationen: ping, fingerprint, list, volume, plan, apply (diskpart-Operationen
+einer Sitzung) und shutdown. Jede Verbindung hat einen eigenen Thread, sodass
+Lesezugriffe parallel laufen; apply ist über eine Sperre serialisiert und
+verwirft danach den Cache.
+
+Zugang erhält nur, wer den Schlüssel kennt: Der Dienst erzeugt beim Start einen
+Zufallsschlüssel (authkey von multiprocessing.connection) und legt ihn in einer
+nur für den Benutzer lesbaren Datei ab, aus der ihn die Clients lesen.
+"""
+
+import json
+import os
+import secrets
+import sys
+import tempfile
+import threading
+from dataclasses import asdict, fields
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import command_runner
+import diskpart
+import drive_backends
+import letter_planner
+import tracing
+from drive_backends import DriveBackend, VolumeInfo
+from drive_cache import DriveCache
+
+
+# Adresse des Dienstes überschreiben; "off" verhindert, dass sich die Oberfläche verbindet
+SERVICE_ENV = "DLM_SERVICE"
+SERVICE_OFF = "off"
+
+PIPE_NAME = r"\\.\pipe\DriveLetterManager"
+PROTOCOL_VERSION = 1
+
+# Fehlerarten in Antworten
+KIND_REQUEST = "request"  # Unbekannte Operation oder ungültige Parameter
+KIND_ENUMERATION = "enumeration"
+KIND_PLAN = "plan"
+KIND_NOT_ADMIN = "not_admin"
+KIND_ERROR = "error"
+
+# Maximale Wartezeit auf Antworten in Sekunden; apply wartet unbegrenzt (diskpart hat eigene Zeitgrenzen)
+REQUEST_TIMEOUT = 30.0
+
+ApplyFunc = Callable[[List[diskpart.DiskpartOperation]], List[diskpart.DiskpartResult]]
+
+
+class ServiceError(Exception):
+    """Der Dienst ist nicht erreichbar oder hat eine Anfrage abgelehnt."""
+
+    def __init__(self, message: str, kind: str = KIND_ERROR):
+        super().__init__(message)
+        self.kind = kind
+
+
+def default_address() -> str:
+    """Named Pipe unter Windows, sonst ein Unix-Socket pro Benutzer im Temp-Verzeichnis; DLM_SERVICE überschreibt."""
+    address = os.environ.get(SERVICE_ENV, "")
+    if address and address != SERVICE_OFF:
+        return address
+    if os.name == "nt":
+        return PIPE_NAME
+    return os.path.join(tempfile.gettempdir(), f"drive-letter-manager-{os.getuid()}.sock")
+
+
+def is_pipe(address: str) -> bool:
+    return address.startswith("\\\\")
+
+
+def key_path(address: str) -> str:
+    """Datei mit dem Zugangsschlüssel: im Benutzerprofil für Named Pipes, sonst neben dem Socket."""
+    if is_pipe(address):
+        base = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+        name = address.rsplit("\\", 1)[-1]
+        return os.path.join(base, "DriveLetterManager", f"{name}.key")
+    return address + ".key"
+
+
+def read_key(address: str) -> bytes:
+    """
+    Liest den Zugangsschlüssel eines laufenden Dienstes.
+
+    Raises:
+        ServiceError: Wenn kein Dienst unter der Adresse gestartet wurde
+    """
+    try:
+        with open(key_path(address), "rb") as handle:
+            return handle.read()
+    except OSError:
+        raise ServiceError(f"Kein Dienst unter {address} gestartet")
+
+
+def volume_from_dict(data: Dict[str, Any]) -> VolumeInfo:
+    """Erzeugt ein VolumeInfo aus einer Antwort; unbekannte Felder (neuerer Dienst) werden ignoriert."""
+    names = {field.name for field in fields(VolumeInfo)}
+    return VolumeInfo(**{key: value for key, value in data.items() if key in names})
+
+
+def result_from_dict(data: Dict[str, Any]) -> diskpart.DiskpartResult:
+    return diskpart.DiskpartResult(diskpart.DiskpartOperation(**data["operation"]), data["success"],
+                                   data.get("message", ""), data.get("error_kind"),
+                                   data.get("unclear", False), data.get("verified", False))
+
+
+class DriveService:
+    """Beantwortet Anfragen vieler Clients aus einem warm gehaltenen Laufwerksbestand."""
+
+    def __init__(self, backends: Optional[List[DriveBackend]] = None, address: Optional[str] = None,
+                 runner: Optional[command_runner.CommandRunner] = None,
+                 apply_func: Optional[ApplyFunc] = None, ttl: float = 60.0):
+        """
+        Args:
+            backends (Optional[List[DriveBackend]]): Standard ist drive_backends.default_backends(runner)
+            address (Optional[str]): Pipe-Name bzw. Socket-Pfad; Standard ist default_address()
+            runner (Optional[command_runner.CommandRunner]): Für Backends, diskpart und die Rechteprüfung;
+                Standard ist der prozessweite Runner
+            apply_func (Optional[ApplyFunc]): Führt diskpart-Operationen in einer Sitzung aus;
+                Standard ist diskpart.apply_operations über runner
+            ttl (float): Gültigkeit des Laufwerksbestands ohne Fingerabdruck in Sekunden
+        """
+        self.backends = backends if backends is not None else drive_backends.default_backends(runner)
+        self.address = address or default_address()
+        self.apply_func = apply_func or (lambda operations: diskpart.apply_operations(operations, runner))
+        self.cache = DriveCache(self.backends, ttl=ttl, enumerate_func=drive_backends.HedgedEnumerator())
+        self.admin = diskpart.is_admin(runner)
+        self.requests = 0
+        self.clients = 0
+        self.generation = 0  # Zählt ausgeführte Änderungen (Teil des Fingerabdrucks)
+        self._apply_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._listener = None
+        self._authkey = secrets.token_bytes(32)
+
+    def start(self):
+        """
+        Öffnet die Pipe bzw. den Socket, legt den Schlüssel ab und ermittelt die Laufwerke vorab.
+
+        Raises:
+            ServiceError: Wenn unter der Adresse bereits ein Dienst läuft
+        """
+        try:
+            ServiceClient(self.address).close()
+        except ServiceError:
+            pass
+        else:
+            raise ServiceError(f"Unter {self.address} läuft bereits ein Dienst")
+        if not is_pipe(self.address) and os.path.exists(self.address):
+            os.remove(self.address)  # Überrest eines abgestürzten Dienstes
+
+        path = key_path(self.address)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)  # Neu anlegen, damit die Zugriffsrechte unten sicher gelten
+        # Nur der Benutzer darf den Schlüssel lesen; unter Windows schützt das Benutzerprofil
+        handle = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(handle, "wb") as key_file:
+            key_file.write(self._authkey)
+        self._listener = Listener(self.address, authkey=self._authkey)
+        if not is_pipe(self.address):
+            os.chmod(self.address, 0o600)
+        threading.Thread(target=self._warm, name="drive-service-warm", daemon=True).start()
+
+    def serve_forever(self):
+        """Nimmt Verbindungen an, bis shutdown angefragt oder stop() aufgerufen wird."""
+        if self._listener is None:
+            self.start()
+        try:
+            while not self._stopping.is_set():
+                try:
+                    connection = self._listener.accept()
+                except AuthenticationError:
+                    continue  # Falscher Schlüssel: Verbindung wird verworfen
+                except OSError:
+                    if self._stopping.is_set():
+                        break
+                    raise
+                if self._stopping.is_set():
+                    connection.close()
+                    break
+                threading.Thread(target=self._serve_connection, args=(connection,),
+                                 name="drive-service-client", daemon=True).start()
+        finally:
+            self.close()
+
+    def stop(self):
+        """Beendet serve_forever aus einem anderen Thread."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        # accept() wartet blockierend; eine eigene Verbindung weckt es auf
+        try:
+            Client(self.address, authkey=self._authkey).close()
+        except (OSError, AuthenticationError):
+            pass
+
+    def close(self):
+        """Schließt Pipe bzw. Socket, entfernt den Schlüssel und gibt die Backends frei."""
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.remove(key_path(self.address))
+            except OSError:
+                pass
+        for backend in self.backends:
+            backend.close()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Beantwortet eine Anfrage; Fehler werden als Antwort mit "kind" gemeldet, nie als Ausnahme.
+
+        Args:
+            request (Dict[str, Any]): {"op": ..., weitere Felder je nach Operation}
+
+        Returns:
+            Dict[str, Any]: {"ok": True, "result": ...} oder {"ok": False, "kind": ..., "error": ...}
+        """
+        with self._lock:
+            self.requests += 1
+        op = request.get("op") if isinstance(request, dict) else None
+        handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+        if handler is None:
+            return {"ok": False, "kind": KIND_REQUEST, "error": f"Unbekannte Operation: {op}"}
+
+        try:
+            with tracing.span(f"service.{op}", "service"):
+                return {"ok": True, "result": handler(request)}
+        except drive_backends.BackendError as e:
+            return {"ok": False, "kind": KIND_ENUMERATION, "error": str(e)}
+        except letter_planner.PlanError as e:
+            return {"ok": False, "kind": KIND_PLAN, "error": str(e)}
+        except ServiceError as e:
+            return {"ok": False, "kind": e.kind, "error": str(e)}
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "kind": KIND_REQUEST, "error": f"Ungültige Anfrage: {e}"}
+        except Exception as e:
+            return {"ok": False, "kind": KIND_ERROR, "error": str(e)}
+
+    def op_ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        single_volume = any(backend.supports_single_volume and backend.available() for backend in self.backends)
+        return {"version": PROTOCOL_VERSION, "pid": os.getpid(), "admin": self.admin,
+                "single_volume": single_volume, "clients": self.clients, "requests": self.requests,
+                "cache": self.cache.stats()}
+
+    def op_fingerprint(self, request: Dict[str, Any]) -> Optional[str]:
+        """Fingerabdruck der Backends plus Änderungszähler; None, wenn kein Backend einen liefert."""
+        value = drive_backends.fingerprint(self.backends)
+        return repr((value, self.generation)) if value is not None else None
+
+    def op_list(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if request.get("refresh"):
+            self.cache.invalidate()
+        volumes, backend_name = self.cache.get()
+        return {"backend": backend_name, "volumes": [asdict(volume) for volume in volumes]}
+
+    def op_volume(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Einzelabfragen (drive_backends.probe_letters); None, wenn kein Backend sie unterstützt."""
+        probed = drive_backends.probe_letters(self.backends, request["targets"])
+        if probed is None:
+            return None
+        return {target: asdict(volume) if volume is not None else None for target, volume in probed.items()}
+
+    def op_plan(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        mapping = {letter_planner.normalize_target(old): letter_planner.normalize_target(new)
+                   for old, new in request["map"].items()}
+        volumes, _ = self.cache.get()
+        plan = letter_planner.plan_changes(mapping, drive_backends.used_targets(volumes),
+                                           temporary_mount=request.get("temp_mount"))
+        return asdict(plan)
+
+    def op_apply(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Führt die Operationen in einer diskpart-Sitzung aus; gleichzeitige Anfragen warten aufeinander."""
+        if not self.admin:
+            raise ServiceError("Der Dienst läuft ohne Administratorrechte.", KIND_NOT_ADMIN)
+        operations = [diskpart.DiskpartOperation(**operation) for operation in request["operations"]]
+        with self._apply_lock:
+            try:
+                results = self.apply_func(operations)
+            finally:
+                self.generation += 1
+                self.cache.invalidate()
+        return [asdict(result) for result in results]
+
+    def op_shutdown(self, request: Dict[str, Any]) -> bool:
+        # Erst nach der Antwort beenden, damit der Client sie noch erhält
+        threading.Thread(target=self.stop, name="drive-service-stop", daemon=True).start()
+        return True
+
+    def _warm(self):
+        try:
+            self.cache.get()
+        except drive_backends.BackendError as e:
+            print(f"Dienst: Ermittlung fehlgeschlagen: {e}", file=sys.stderr)
+
+    def _serve_connection(self, connection):
+        with self._lock:
+            self.clients += 1
+        try:
+            while True:
+                try:
+                    data = connection.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                try:
+                    request = json.loads(data.decode("utf-8"))
+                except ValueError:
+                    response = {"ok": False, "kind": KIND_REQUEST, "error": "Kein gültiges JSON"}
+                else:
+                    response = self.handle(request)
+                try:
+                    connection.send_bytes(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+                except OSError:
+                    break
+        finally:
+            connection.close()
+            with self._lock:
+                self.clients -= 1
+
+
+class ServiceClient:
+    """
+    Client des Dienstes; sicher aus mehreren Threads nutzbar.
+
+    Jede gleichzeitige Anfrage erhält eine eigene Verbindung aus einem kleinen
+    Vorrat, sodass z.B. eine laufende Änderung die Ermittlung nicht aufhält.
+    """
+
+    def __init__(self, address: Optional[str] = None, timeout: float = REQUEST_TIMEOUT):
+        """
+        Raises:
+            ServiceError: Wenn der Dienst nicht erreichbar ist oder den Schlüssel ablehnt
+        """
+        self.address = address or default_address()
+        self.timeout = timeout
+        self._authkey = read_key(self.address)
+        self._idle = []
+        self._lock = threading.Lock()
+        info = self.request("ping")
+        if info.get("version") != PROTOCOL_VERSION:
+            self.close()
+            raise ServiceError(f"Dienst spricht Protokoll {info.get('version')}, erwartet {PROTOCOL_VERSION}")
+        self.admin = bool(info.get("admin"))
+        # Ältere Dienste melden die Fähigkeit nicht und werden nicht einzeln gefragt
+        self.single_volume = bool(info.get("single_volume"))
+
+    def request(self, op: str, timeout: Optional[float] = -1, **params) -> Any:
+        """
+        Schickt eine Anfrage und wartet auf die Antwort.
+
+        Args:
+            op (str): Name der Operation (z.B. "list")
+            timeout (Optional[float]): Wartezeit in Sekunden; None wartet unbegrenzt, Standard ist self.timeout
+            **params: Zusätzliche Felder der Anfrage
+
+        Returns:
+            Any: Feld "result" der Antwort
+
+        Raises:
+            ServiceError: Bei Verbindungsfehler, Zeitüberschreitung oder Fehlerantwort (mit kind)
+        """
+        timeout = self.timeout if timeout == -1 else timeout
+        connection = self._acquire()
+        try:
+            connection.send_bytes(json.dumps(dict(params, op=op), ensure_ascii=False).encode("utf-8"))
+            if timeout is not None and not connection.poll(timeout):
+                raise ServiceError(f"Keine Antwort des Dienstes innerhalb von {timeout} s")
+            response = json.loads(connection.recv_bytes().decode("utf-8"))
+        except ServiceError:
+            connection.close()
+            raise
+        except (EOFError, OSError, ValueError) as e:
+            connection.close()
+            raise ServiceError(f"Verbindung zum Dienst unterbrochen: {e}")
+        with self._lock:
+            self._idle.append(connection)
+
+        if not response.get("ok"):
+            raise ServiceError(response.get("error") or "Unbekannter Fehler", response.get("kind", KIND_ERROR))
+        return response.get("result")
+
+    def list(self, refresh: bool = False) -> Tuple[List[VolumeInfo], str]:
+        result = self.request("list", refresh=refresh)
+        return [volume_from_dict(volume) for volume in result["volumes"]], result["backend"]
+
+    def volumes(self, targets: List[str]) -> Optional[Dict[str, Optional[VolumeInfo]]]:
+        result = self.request("volume", targets=targets)
+        if result is None:
+            return None
+        return {target: volume_from_dict(volume) if volume is not None else None
+                for target, volume in result.items()}
+
+    def plan(self, mapping: Dict[str, str], temporary_mount: Optional[str] = None) -> letter_planner.LetterPlan:
+        """
+        Raises:
+            letter_planner.PlanError: Wenn die Zuordnung nicht umsetzbar ist
+        """
+        try:
+            result = self.request("plan", map=mapping, temp_mount=temporary_mount)
+        except ServiceError as e:
+            if e.kind == KIND_PLAN:
+                raise letter_planner.PlanError(str(e))
+            raise
+        return letter_planner.LetterPlan([letter_planner.PlanStep(**step) for step in result["steps"]],
+                                         result["chains"], result["cycles"], result["temporary_letter"])
+
+    def apply_operations(self, operations: List[diskpart.DiskpartOperation]) -> List[diskpart.DiskpartResult]:
+        """Ersatz für diskpart.apply_operations (z.B. als apply_func eines ApplyExecutor)."""
+        result = self.request("apply", timeout=None, operations=[asdict(operation) for operation in operations])
+        return [result_from_dict(record) for record in result]
+
+    def shutdown(self):
+        self.request("shutdown")
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return Client(self.address, authkey=self._authkey)
+        except (OSError, AuthenticationError) as e:
+            raise ServiceError(f"Dienst unter {self.address} nicht erreichbar: {e}")
+
+
+class ServiceBackend(DriveBackend):
+    """Backend, das den Dienst fragt; damit wird die Oberfläche zum reinen Client."""
+
+    name = "service"
+    # Anfragen beantwortet der Dienst aus seinem Cache
+    cheap = True
+
+    def __init__(self, client: ServiceClient):
+        self.client = client
+        # Einzelabfragen nur, wenn eines der Backends des Dienstes sie unterstützt
+        self.supports_single_volume = client.single_volume
+
+    def enumerate(self) -> List[VolumeInfo]:
+        try:
+            volumes, _ = self.client.list()
+        except ServiceError as e:
+            raise drive_backends.BackendError(str(e))
+        return volumes
+
+    def fingerprint(self) -> Optional[str]:
+        return self.client.request("fingerprint")
+
+    def volume(self, letter: str) -> Optional[VolumeInfo]:
+        try:
+            probed = self.client.volumes([letter])
+        except ServiceError as e:
+            raise drive_backends.BackendError(str(e))
+        if probed is None:
+            # Z.B. ein Ordner, den nur ein Backend ohne Ordnerabfrage prüfen könnte
+            raise drive_backends.BackendError(f"Der Dienst kann {letter} nicht einzeln abfragen")
+        return next(iter(probed.values()))
+
+    def close(self):
+        self.client.close()
+
+
+def connect(address: Optional[str] = None) -> Optional[ServiceClient]:
+    """
+    Verbindet sich mit einem laufenden Dienst, falls es einen gibt.
+
+    Returns:
+        Optional[ServiceClient]: Der Client oder None (kein Dienst erreichbar oder DLM_SERVICE=off)
+    """
+    if os.environ.get(SERVICE_ENV) == SERVICE_OFF:
+        return None
+    try:
+        return ServiceClient(address)
+    except ServiceError:
+        return None
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Überwachung des Laufwerksbestands
+=================================
+
+Fragt in einem Hintergrund-Thread regelmäßig eine billige Sonde ab
+(standardmäßig der Fingerabdruck des NativeBackends: Bitmaske aus
+GetLogicalDrives plus Seriennummern; vollständig ermittelt wird nur, wenn er
+sich ändert) und meldet hinzugekommene, entfernte und umbenannte Laufwerke an alle
+Abonnenten. Das Intervall wächst, solange sich nichts ändert, und fällt nach
+einer Änderung wieder auf das Minimum zurück. Die Sonde ist austauschbar,
+sodass sich der Watcher unter Linux mit einem gescripteten Ersatz testen lässt.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+from drive_backends import DriveBackend, VolumeInfo
+
+
+# Arten von Änderungen
+CHANGE_ADDED = "added"
+CHANGE_REMOVED = "removed"
+CHANGE_RELABELED = "relabeled"
+
+
+@dataclass
+class DriveChange:
+    """Eine erkannte Änderung am Laufwerksbestand."""
+
+    kind: str
+    letter: str
+    volume: Optional[VolumeInfo] = None  # Neuer Zustand (None bei CHANGE_REMOVED)
+    previous: Optional[VolumeInfo] = None  # Alter Zustand (None bei CHANGE_ADDED)
+
+
+Probe = Callable[[], Iterable[VolumeInfo]]
+Subscriber = Callable[[List[DriveChange], List[VolumeInfo]], None]
+
+
+def diff_volumes(previous: Iterable[VolumeInfo], current: Iterable[VolumeInfo]) -> List[DriveChange]:
+    """
+    Vergleicht zwei Momentaufnahmen.
+
+    Ein anderer Datenträger unter demselben Buchstaben (andere Seriennummer)
+    wird als Entfernen plus Hinzufügen gemeldet, eine neue Bezeichnung
+    desselben Datenträgers als Umbenennung.
+    """
+    before = {volume.letter: volume for volume in previous}
+    after = {volume.letter: volume for volume in current}
+
+    changes = []
+    for letter in sorted(set(before) | set(after)):
+        old, new = before.get(letter), after.get(letter)
+        if new is None:
+            changes.append(DriveChange(CHANGE_REMOVED, letter, previous=old))
+        elif old is None:
+            changes.append(DriveChange(CHANGE_ADDED, letter, volume=new))
+        elif old.serial != new.serial:
+            changes.append(DriveChange(CHANGE_REMOVED, letter, previous=old))
+            changes.append(DriveChange(CHANGE_ADDED, letter, volume=new))
+        elif old.label != new.label:
+            changes.append(DriveChange(CHANGE_RELABELED, letter, volume=new, previous=old))
+    return changes
+
+
+class FingerprintProbe:
+    """
+    Sonde über den Fingerabdruck eines Backends.
+
+    Jede Abfrage liest nur den Fingerabdruck; die vollständige Ermittlung läuft
+    beim ersten Aufruf und danach nur, wenn sich der Fingerabdruck geändert hat.
+    Backends ohne Fingerabdruck werden bei jeder Abfrage ermittelt.
+    """
+
+    def __init__(self, backend: DriveBackend):
+        self.backend = backend
+        self.enumerations = 0
+        self._fingerprint: Optional[Hashable] = None
+        self._volumes: Optional[List[VolumeInfo]] = None
+
+    def __call__(self) -> List[VolumeInfo]:
+        current = self.backend.fingerprint()
+        if self._volumes is None or current is None or current != self._fingerprint:
+            # Erst nach erfolgreicher Ermittlung merken, sonst ginge eine Änderung bei einem Fehler verloren
+            self._volumes = list(self.backend.enumerate())
+            self._fingerprint = current
+            self.enumerations += 1
+        return list(self._volumes)
+
+
+def default_probe(backends: Iterable[DriveBackend]) -> Optional[Probe]:
+    """Liefert eine Fingerabdruck-Sonde über das erste verfügbare Backend, das billig genug für Dauerabfragen ist."""
+    for backend in backends:
+        if backend.cheap and backend.available():
+            return FingerprintProbe(backend)
+    return None
+
+
+class DriveWatcher:
+    """Fragt eine Sonde mit adaptivem Intervall ab und verteilt Änderungen an Abonnenten."""
+
+    def __init__(self, probe: Probe, min_interval: float = 0.5, max_interval: float = 8.0,
+                 backoff: float = 2.0):
+        """
+        Args:
+            probe (Probe): Liefert den aktuellen Laufwerksbestand; darf Ausnahmen werfen
+            min_interval (float): Intervall nach einer Änderung in Sekunden
+            max_interval (float): Höchstes Intervall bei längerer Ruhe in Sekunden
+            backoff (float): Faktor, um den das Intervall pro ruhiger Abfrage wächst
+        """
+        self.probe = probe
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.probes = 0
+        self.errors = 0
+        self._snapshot = None  # Letzter bekannter Bestand (None bis zur ersten Abfrage)
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback: Subscriber) -> int:
+        """
+        Meldet einen Abonnenten an.
+
+        Der Aufruf erfolgt im Thread des Watchers mit den Änderungen und dem
+        vollständigen neuen Bestand; Tk-Code muss die Daten selbst in den
+        Tk-Thread übergeben.
+
+        Returns:
+            int: Kennung für unsubscribe
+        """
+        with self._lock:
+            self._next_token += 1
+            self._subscribers[self._next_token] = callback
+            return self._next_token
+
+    def unsubscribe(self, token: int):
+        """Meldet einen Abonnenten ab."""
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def check(self) -> List[DriveChange]:
+        """
+        Fragt die Sonde einmal ab, verteilt erkannte Änderungen und passt das Intervall an.
+
+        Die erste Abfrage legt nur den Ausgangsbestand fest.
+        """
+        self.probes += 1
+        try:
+            current = list(self.probe())
+        except Exception:
+            # Vorübergehender Fehler: Bestand behalten, seltener nachfragen
+            self.errors += 1
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+            return []
+
+        previous, self._snapshot = self._snapshot, current
+        changes = diff_volumes(previous, current) if previous is not None else []
+
+        if changes:
+            self.interval = self.min_interval
+            with self._lock:
+                subscribers = list(self._subscribers.values())
+            for callback in subscribers:
+                callback(changes, list(current))
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return changes
+
+    def poke(self):
+        """Weckt den Watcher sofort und setzt das Intervall zurück (z.B. nach eigenen Änderungen)."""
+        self.interval = self.min_interval
+        self._wake.set()
+
+    def start(self):
+        """Startet den Hintergrund-Thread (mehrfacher Aufruf ist unschädlich)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="drive-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Beendet den Hintergrund-Thread."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            # Vor der Abfrage zurücksetzen, damit ein poke() währenddessen nicht verloren geht
+            self._wake.clear()
+            self.check()
+            self._wake.wait(self.interval)
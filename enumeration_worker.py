@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hintergrund-Ermittlung der Laufwerke
+====================================
+
+Führt die (langsame) Laufwerksermittlung in einem Worker-Thread aus. Die
+Oberfläche fragt das Ergebnis per ``root.after`` ab, sodass die Tk-Hauptschleife
+nie blockiert. Jede neue Anfrage erhöht die Generation; Ergebnisse älterer
+Generationen werden verworfen. Derselbe Mechanismus dient auch für andere
+langsame Abfragen, etwa die gezielte Nachprüfung einzelner Buchstaben; deren
+Argumente werden beim Start übergeben.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from drive_backends import VolumeInfo
+
+
+@dataclass
+class EnumerationResult:
+    """Ergebnis eines Ermittlungslaufs."""
+
+    generation: int
+    volumes: Any  # Rückgabe der Funktion; bei der Laufwerksermittlung List[VolumeInfo]
+    error: Optional[Exception] = None
+    duration: float = 0.0
+
+
+class EnumerationWorker:
+    """Startet Ermittlungsläufe im Hintergrund und liefert nur aktuelle Ergebnisse aus."""
+
+    def __init__(self, enumerate_func: Callable[..., List[VolumeInfo]]):
+        """
+        Args:
+            enumerate_func (Callable[..., List[VolumeInfo]]): Ermittelt die Laufwerke; darf Ausnahmen werfen
+        """
+        self.enumerate_func = enumerate_func
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._running = 0
+
+    @property
+    def busy(self) -> bool:
+        """True, solange ein nicht verworfener Lauf aussteht."""
+        with self._lock:
+            return self._running == self._generation and self._running > 0
+
+    def start(self, *args) -> int:
+        """
+        Startet einen neuen Lauf; ein noch laufender älterer Lauf wird überholt.
+
+        Args:
+            *args: Werden an enumerate_func übergeben
+
+        Returns:
+            int: Generation des gestarteten Laufs
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._running = generation
+
+        thread = threading.Thread(target=self._run, args=(generation, args),
+                                  name=f"drive-enumeration-{generation}", daemon=True)
+        thread.start()
+        return generation
+
+    def cancel(self):
+        """Bricht den aktuellen Lauf ab; sein Ergebnis wird verworfen."""
+        with self._lock:
+            self._generation += 1
+
+    def poll(self) -> Optional[EnumerationResult]:
+        """
+        Liefert das Ergebnis des aktuellen Laufs, falls es bereits vorliegt.
+
+        Muss aus dem Tk-Thread aufgerufen werden. Veraltete Ergebnisse werden
+        dabei stillschweigend verworfen.
+        """
+        latest = None
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                if result.generation == self._generation:
+                    self._running = 0
+                    latest = result
+        return latest
+
+    def _run(self, generation: int, args: tuple):
+        started = time.perf_counter()
+        try:
+            volumes = self.enumerate_func(*args)
+            error = None
+        except Exception as e:
+            volumes, error = [], e
+        self._results.put(EnumerationResult(generation, volumes, error,
+                                            time.perf_counter() - started))
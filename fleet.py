@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Layout-Profile auf vielen Rechnern anwenden
+===========================================
+
+Führt für jeden Rechner einer Liste Ermitteln → Abgleich mit dem Profil →
+Planen → Ausführen aus. Der Zugriff auf die Rechner läuft über einen
+austauschbaren Transport:
+
+* ``LocalTransport`` arbeitet im eigenen Prozess, wahlweise gegen diesen
+  Rechner (andere Rechnernamen werden abgelehnt) oder gegen simulierte
+  Rechner aus FakeBackends. So lassen sich
+  Parallelität, Gegendruck und Fehlerisolation ohne Netzwerk prüfen.
+* ``CommandTransport`` ruft pro Rechner eine Kommandozeile auf, z.B.
+  ``ssh {host} DriveLetterManagerCLI``, und wertet deren JSON-Ausgabe aus.
+
+Es laufen höchstens ``workers`` Rechner gleichzeitig; weitere werden erst
+nachgereicht, wenn ein Platz frei wird. Jeder Rechner hat eine eigene
+Zeitgrenze, und ein Fehler betrifft nur den jeweiligen Rechner. Ein Rechner,
+der seine Zeitgrenze überschreitet, wird sofort gemeldet, belegt seinen Platz
+aber weiter, bis sein Aufruf tatsächlich endet.
+"""
+
+import abc
+import contextlib
+import json
+import queue
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import command_runner
+import diskpart
+import drive_backends
+import drive_service
+import letter_planner
+import profiles
+from drive_backends import FakeBackend, VolumeInfo
+
+
+# Ergebnis pro Rechner
+STATUS_APPLIED = "applied"
+STATUS_UNCHANGED = "unchanged"  # Profil war bereits erfüllt
+STATUS_PLANNED = "planned"  # Probelauf
+STATUS_FAILED = "failed"  # mindestens eine diskpart-Operation fehlgeschlagen
+STATUS_ERROR = "error"  # Ermittlung, Abgleich oder Transport fehlgeschlagen
+STATUS_TIMEOUT = "timeout"
+
+SUCCESS_STATUSES = (STATUS_APPLIED, STATUS_UNCHANGED, STATUS_PLANNED)
+
+
+class TransportError(Exception):
+    """Der Transport konnte einen Rechner nicht erreichen oder nicht auswerten."""
+
+
+class Transport(abc.ABC):
+    """Zugriff auf einen Rechner: Laufwerke ermitteln und einen Plan ausführen."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def enumerate(self, host: str, timeout: float) -> List[VolumeInfo]:
+        """
+        Ermittelt die Laufwerke eines Rechners.
+
+        Raises:
+            TransportError: Wenn der Rechner nicht erreichbar ist oder die Ermittlung fehlschlägt
+            subprocess.TimeoutExpired: Bei Überschreitung der Zeitgrenze
+        """
+
+    @abc.abstractmethod
+    def apply(self, host: str, plan: letter_planner.LetterPlan, volumes: List[VolumeInfo],
+              timeout: float) -> List[diskpart.DiskpartResult]:
+        """
+        Führt einen Plan auf einem Rechner in einer diskpart-Sitzung aus.
+
+        Raises:
+            TransportError: Wenn der Plan nicht ausgeführt werden konnte
+            subprocess.TimeoutExpired: Bei Überschreitung der Zeitgrenze
+        """
+
+
+def plan_operations(plan: letter_planner.LetterPlan,
+                    volumes: Iterable[VolumeInfo]) -> List[diskpart.DiskpartOperation]:
+    """Wandelt die Schritte eines Plans in diskpart-Operationen mit Bezeichnung um."""
+    labels = {volume.letter: volume.label for volume in volumes}
+    return [diskpart.DiskpartOperation(step.old_letter, step.new_letter, labels.get(step.source, ""))
+            for step in plan.steps]
+
+
+def plan_mapping(plan: letter_planner.LetterPlan) -> Dict[str, str]:
+    """Liefert die Zuordnung alt → neu, aus der ein Plan entstanden ist."""
+    mapping = {}
+    for chain in plan.chains:
+        mapping.update(zip(chain, chain[1:]))
+    for cycle in plan.cycles:
+        mapping.update(zip(cycle, cycle[1:] + cycle[:1]))
+    return mapping
+
+
+def is_local_host(host: str) -> bool:
+    """Prüft, ob ein Rechnername diesen Rechner bezeichnet (Name, FQDN, localhost, Loopback oder ".")."""
+    names = {"localhost", ".", "127.0.0.1", "::1", socket.gethostname().lower(), socket.getfqdn().lower()}
+    return host.strip().lower() in names
+
+
+class LocalTransport(Transport):
+    """
+    Transport im eigenen Prozess.
+
+    Ohne ``hosts`` wird dieser Rechner über die Standard-Backends und diskpart
+    bearbeitet; andere Rechnernamen als dieser (siehe is_local_host) werden
+    mit TransportError abgelehnt, statt stillschweigend den eigenen Rechner
+    zu ändern. Mit ``hosts`` wird jeder Rechner durch ein FakeBackend
+    simuliert; ``apply`` verschiebt dann die Buchstaben in dessen Daten
+    (mit der Verzögerung des Backends pro Operation).
+    """
+
+    name = "local"
+
+    def __init__(self, hosts: Optional[Dict[str, FakeBackend]] = None):
+        self.hosts = hosts
+        self.active = 0
+        self.peak = 0  # Höchste Zahl gleichzeitig bearbeiteter Aufrufe
+        self._lock = threading.Lock()
+
+    def enumerate(self, host: str, timeout: float) -> List[VolumeInfo]:
+        self._check_local(host)
+        with self._track():
+            if self.hosts is None:
+                backends = drive_backends.default_backends()
+                try:
+                    volumes, _ = drive_backends.enumerate_volumes(backends)
+                finally:
+                    for backend in backends:
+                        backend.close()
+                return volumes
+            try:
+                return self._backend(host).enumerate()
+            except TransportError:
+                raise
+            except Exception as e:
+                raise TransportError(str(e))
+
+    def apply(self, host: str, plan: letter_planner.LetterPlan, volumes: List[VolumeInfo],
+              timeout: float) -> List[diskpart.DiskpartResult]:
+        self._check_local(host)
+        operations = plan_operations(plan, volumes)
+        with self._track():
+            if self.hosts is None:
+                if not diskpart.is_admin():
+                    raise TransportError("Administratorrechte erforderlich.")
+                return diskpart.apply_operations(operations)
+
+            backend = self._backend(host)
+            results = []
+            for operation in operations:
+                if backend.delay:
+                    time.sleep(backend.delay)
+                volume = backend.volume(operation.old_letter)
+                if volume is None or backend.volume(operation.new_letter) is not None:
+                    results.append(diskpart.DiskpartResult(operation, False, "Simulierter Fehler",
+                                                           diskpart.ERROR_NOT_FOUND))
+                    continue
+                volume.letter = operation.new_letter
+                results.append(diskpart.DiskpartResult(operation, True, verified=True))
+            return results
+
+    def _check_local(self, host: str):
+        if self.hosts is None and not is_local_host(host):
+            raise TransportError(f"{host} ist nicht dieser Rechner; entfernte Rechner benötigen --command")
+
+    def _backend(self, host: str) -> FakeBackend:
+        try:
+            return self.hosts[host]
+        except KeyError:
+            raise TransportError(f"Unbekannter Rechner: {host}")
+
+    @contextlib.contextmanager
+    def _track(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class CommandTransport(Transport):
+    """Ruft drive_cli pro Rechner über eine Kommandozeile auf (z.B. per ssh)."""
+
+    name = "command"
+
+    def __init__(self, command: List[str], runner: Optional[command_runner.CommandRunner] = None):
+        """
+        Args:
+            command (List[str]): Aufruf der Kommandozeile; "{host}" wird durch den Rechnernamen ersetzt,
+                z.B. ["ssh", "{host}", "DriveLetterManagerCLI"]
+            runner (Optional[command_runner.CommandRunner]): Standard ist der prozessweite Runner
+        """
+        self.command = command
+        self.runner = runner or command_runner.get_runner()
+
+    def enumerate(self, host: str, timeout: float) -> List[VolumeInfo]:
+        data = self._run(host, ["list"], timeout)
+        # Felder einer neueren Gegenseite werden wie beim Dienst ignoriert
+        return [drive_service.volume_from_dict(volume) for volume in data.get("volumes", [])]
+
+    def apply(self, host: str, plan: letter_planner.LetterPlan, volumes: List[VolumeInfo],
+              timeout: float) -> List[diskpart.DiskpartResult]:
+        # Die Gegenseite plant dieselbe Zuordnung erneut und führt sie in einer Sitzung aus
+        pairs = [f"{old}={new}" for old, new in plan_mapping(plan).items()]
+        data = self._run(host, ["apply", "--map"] + pairs, timeout)
+        results = []
+        for record in data.get("results", []):
+            operation = diskpart.DiskpartOperation(record["old_letter"], record["new_letter"],
+                                                   record.get("label", ""))
+            results.append(diskpart.DiskpartResult(operation, bool(record.get("success")),
+                                                   record.get("message", ""), record.get("error_kind"),
+                                                   bool(record.get("unclear")), bool(record.get("verified"))))
+        return results
+
+    def _run(self, host: str, arguments: List[str], timeout: float) -> dict:
+        argv = [part.replace("{host}", host) for part in self.command] + ["--json"] + arguments
+        try:
+            completed = self.runner.run(argv, timeout=timeout)
+        except FileNotFoundError as e:
+            raise TransportError(str(e))
+
+        try:
+            data = json.loads(completed.stdout)
+        except ValueError:
+            message = completed.stderr.strip() or f"Rückgabewert {completed.returncode} ohne JSON-Ausgabe"
+            raise TransportError(message)
+        if not isinstance(data, dict):
+            raise TransportError("Unerwartete Antwort")
+        if data.get("error"):
+            raise TransportError(data["error"])
+        return data
+
+
+@dataclass
+class HostResult:
+    """Ergebnis für einen Rechner."""
+
+    host: str
+    status: str
+    steps: List[str] = field(default_factory=list)  # Vorschau des Plans
+    results: List[diskpart.DiskpartResult] = field(default_factory=list)
+    missing: List[profiles.ProfileEntry] = field(default_factory=list)
+    error: str = ""
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status in SUCCESS_STATUSES
+
+
+@dataclass
+class FleetSummary:
+    """Zusammenfassung über alle Rechner."""
+
+    results: List[HostResult] = field(default_factory=list)
+    duration: float = 0.0
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for result in self.results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results)
+
+    def lines(self) -> List[str]:
+        counts = ", ".join(f"{status}={count}" for status, count in sorted(self.counts().items()))
+        lines = [f"{len(self.results)} Rechner in {self.duration:.1f} s: {counts}"]
+        lines += [f"  {result.host}: {result.status} {result.error}".rstrip()
+                  for result in self.results if not result.ok]
+        return lines
+
+
+def process_host(transport: Transport, host: str, profile: profiles.LayoutProfile,
+                 timeout: float, dry_run: bool = False) -> HostResult:
+    """
+    Ermitteln → Abgleich → Planen → Ausführen für einen Rechner.
+
+    Fehler werden im Ergebnis festgehalten und nicht weitergereicht.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+
+    def remaining() -> float:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise subprocess.TimeoutExpired(host, timeout)
+        return left
+
+    result = HostResult(host, STATUS_ERROR)
+    try:
+        volumes = transport.enumerate(host, remaining())
+        match = profiles.match_profile(profile, volumes)
+        result.missing = match.missing + match.ambiguous
+        plan = letter_planner.plan_changes(match.mapping, drive_backends.used_targets(volumes))
+        result.steps = plan.preview_lines()
+
+        if not plan.steps:
+            result.status = STATUS_UNCHANGED
+        elif dry_run:
+            result.status = STATUS_PLANNED
+        else:
+            result.results = transport.apply(host, plan, volumes, remaining())
+            result.status = STATUS_APPLIED if all(r.success for r in result.results) else STATUS_FAILED
+    except subprocess.TimeoutExpired:
+        result.status = STATUS_TIMEOUT
+        result.error = f"Zeitgrenze von {timeout} s überschritten"
+    except Exception as e:
+        result.status = STATUS_ERROR
+        result.error = str(e)
+
+    result.duration = time.monotonic() - started
+    return result
+
+
+def run_fleet(hosts: Iterable[str], profile: profiles.LayoutProfile, transport: Transport,
+              workers: int = 8, timeout: float = 120.0, dry_run: bool = False,
+              progress: Optional[Callable[[HostResult, int, int], None]] = None) -> FleetSummary:
+    """
+    Wendet ein Profil auf alle Rechner an.
+
+    Es sind höchstens ``workers`` Rechner gleichzeitig in Arbeit; der nächste
+    wird erst übergeben, wenn einer fertig ist. Überschreitet ein Rechner seine
+    Zeitgrenze, wird er sofort als STATUS_TIMEOUT gemeldet ("läuft noch"); sein
+    Platz bleibt aber belegt, bis der Aufruf tatsächlich endet, damit nie mehr als
+    ``workers`` Aufrufe gleichzeitig laufen. CommandTransport beendet seinen
+    Prozess an der Zeitgrenze selbst; auf noch hängende Aufrufe wird am Ende nicht
+    gewartet. Doppelte Rechnernamen werden nur einmal bearbeitet.
+
+    Args:
+        hosts (Iterable[str]): Rechnernamen
+        profile (profiles.LayoutProfile): Ziel-Layout
+        transport (Transport): Zugriff auf die Rechner
+        workers (int): Höchstzahl gleichzeitig bearbeiteter Rechner
+        timeout (float): Zeitgrenze pro Rechner in Sekunden
+        dry_run (bool): Nur planen, nichts ausführen
+        progress (Optional[Callable]): Wird nach jedem Rechner mit Ergebnis, Anzahl fertiger
+            und Gesamtzahl der Rechner aufgerufen (im aufrufenden Thread)
+
+    Returns:
+        FleetSummary: Ergebnisse in der Reihenfolge der Fertigstellung
+    """
+    hosts = list(dict.fromkeys(hosts))
+    workers = max(1, workers)
+    summary = FleetSummary()
+    started = time.monotonic()
+    pending = iter(hosts)
+    exhausted = False
+    finished: queue.Queue = queue.Queue()
+    running: Dict[str, float] = {}  # Rechner mit laufendem Aufruf → Frist
+    overdue: Set[str] = set()  # Bereits als STATUS_TIMEOUT gemeldet, Aufruf läuft noch
+
+    def work(host: str):
+        finished.put(process_host(transport, host, profile, timeout, dry_run))
+
+    def finish(result: HostResult):
+        summary.results.append(result)
+        if progress is not None:
+            progress(result, len(summary.results), len(hosts))
+
+    while True:
+        while not exhausted and len(running) < workers:
+            host = next(pending, None)
+            if host is None:
+                exhausted = True
+                break
+            running[host] = time.monotonic() + timeout
+            # Daemon-Threads: ein hängender Rechner hält das Programmende nicht auf
+            threading.Thread(target=work, args=(host,), name=f"fleet-{host}", daemon=True).start()
+
+        deadlines = [deadline for host, deadline in running.items() if host not in overdue]
+        if not deadlines and exhausted:
+            # Alle Rechner gemeldet; noch hängende Aufrufe werden nicht abgewartet
+            break
+
+        # Sind alle Plätze von überfälligen Aufrufen belegt, wartet der nächste Rechner auf deren Ende
+        wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        try:
+            result = finished.get(timeout=wait)
+        except queue.Empty:
+            result = None
+        if result is not None:
+            del running[result.host]
+            if result.host in overdue:
+                # Verspätetes Ergebnis eines bereits gemeldeten Rechners: nur der Platz wird frei
+                overdue.discard(result.host)
+            else:
+                finish(result)
+
+        now = time.monotonic()
+        for host, deadline in running.items():
+            if host not in overdue and deadline <= now:
+                overdue.add(host)
+                finish(HostResult(host, STATUS_TIMEOUT,
+                                  error=f"Zeitgrenze von {timeout} s überschritten (läuft noch)",
+                                  duration=timeout))
+
+    summary.duration = time.monotonic() - started
+    return summary
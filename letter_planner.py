@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planer für Laufwerksbuchstaben-Änderungen
+=========================================
+
+Zerlegt die gewünschte Zuordnung alt → neu in Ketten und Zyklen und erzeugt
+daraus eine minimale, geordnete Liste von assign-Operationen. Zyklen
+(z.B. D: ↔ E: oder D: → E: → F: → D:) werden über einen freien temporären
+Buchstaben aufgebrochen; ein einziger temporärer Buchstabe genügt für alle
+Zyklen, da er nach jedem Zyklus wieder frei ist.
+
+Ziele können neben Buchstaben auch leere NTFS-Ordner sein (Bereitstellungspunkte,
+z.B. "C:\\Mounts\\Daten1"). Buchstaben und Ordnerpfade bilden einen gemeinsamen
+Namensraum: Ein Laufwerk kann von einem Buchstaben in einen Ordner wechseln und
+umgekehrt, und belegte Ordner werden wie belegte Buchstaben behandelt. Damit
+lassen sich mehr Laufwerke einbinden, als es Buchstaben gibt.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+# Buchstabe als Ziel: "d", "D", "D:" oder "D:\"
+LETTER_TARGET = re.compile(r"^[A-Za-z](:[\\/]*)?$")
+# Absoluter Ordnerpfad als Ziel: Buchstabe, Doppelpunkt, Schrägstrich und mindestens ein Ordner
+MOUNT_PATH = re.compile(r"^[A-Za-z]:[\\/]+[^\\/]")
+
+
+class PlanError(ValueError):
+    """Die gewünschte Zuordnung lässt sich nicht umsetzen."""
+
+
+@dataclass
+class PlanStep:
+    """Eine einzelne assign-Operation innerhalb eines Plans."""
+
+    # Buchstabe ("D:") oder Ordnerpfad ("C:\Mounts\Daten1")
+    old_letter: str
+    new_letter: str
+    # Ursprüngliches Ziel des Laufwerks, zu dem dieser Schritt gehört
+    source: str
+    temporary: bool = False
+
+
+@dataclass
+class LetterPlan:
+    """Geordneter Ausführungsplan für eine Menge von Buchstabenänderungen."""
+
+    steps: List[PlanStep] = field(default_factory=list)
+    chains: List[List[str]] = field(default_factory=list)
+    cycles: List[List[str]] = field(default_factory=list)
+    temporary_letter: Optional[str] = None
+
+    def preview_lines(self) -> List[str]:
+        """Liefert eine lesbare Vorschau der Schritte für einen Probelauf."""
+        lines = []
+        for number, step in enumerate(self.steps, start=1):
+            marker = " (temp)" if step.temporary else ""
+            lines.append(f"{number}. {step.old_letter} → {step.new_letter}{marker}")
+        return lines
+
+
+def available_letters(used_letters: Iterable[str]) -> List[str]:
+    """
+    Ermittelt alle verfügbaren Laufwerksbuchstaben (C-Z).
+
+    Args:
+        used_letters (Iterable[str]): Aktuell belegte Buchstaben (z.B. "D:")
+
+    Returns:
+        List[str]: Liste der verfügbaren Buchstaben
+    """
+    used = set(drive[0].upper() for drive in used_letters if not is_mount_path(drive))
+    all_letters = set(chr(i) for i in range(ord('A'), ord('Z') + 1))
+    # Entferne A: und B: (normalerweise für Disketten reserviert)
+    all_letters.discard('A')
+    all_letters.discard('B')
+    available = sorted(list(all_letters - used))
+    return [f"{letter}:" for letter in available]
+
+
+def is_mount_path(target: str) -> bool:
+    """
+    True für einen absoluten Ordnerpfad wie "C:\\Mounts\\Daten1".
+
+    False für Buchstaben ("D:", "D:\\") und für alles, was kein absoluter Pfad ist
+    (z.B. "Mounts\\Daten1" oder "D:Daten"); solche Werte lehnt normalize_target ab.
+    """
+    return MOUNT_PATH.match(target.strip()) is not None
+
+
+def normalize_target(value: str) -> str:
+    """
+    Normalisiert ein Ziel: "d", "D" oder "D:\\" zu "D:", Ordnerpfade zu "C:\\Mounts\\Daten1"
+    (Rückwärtsschrägstriche, ohne abschließenden Schrägstrich).
+
+    Raises:
+        PlanError: Wenn der Wert weder Buchstabe noch absoluter Ordnerpfad ist
+    """
+    value = value.strip().replace("/", "\\")
+    if LETTER_TARGET.match(value):
+        return _letter(value)
+    if not is_mount_path(value):
+        raise PlanError(f"Ungültiges Ziel: {value!r} "
+                        f"(erwartet Buchstabe wie D: oder Ordnerpfad wie C:\\Mounts\\Daten)")
+    path = value.rstrip("\\")
+    return path[0].upper() + path[1:]
+
+
+def _letter(value: str) -> str:
+    """Normalisiert "d", "D" oder "D:" zu "D:"."""
+    value = value.strip().upper()
+    if not value or not value[0].isalpha():
+        raise PlanError(f"Ungültiger Laufwerksbuchstabe: {value!r}")
+    return value[0] + ":"
+
+
+def plan_changes(mapping: Dict[str, str], used_letters: Iterable[str],
+                 free_letters: Optional[Iterable[str]] = None,
+                 temporary_mount: Optional[str] = None) -> LetterPlan:
+    """
+    Erstellt einen Ausführungsplan für die gewünschte Zuordnung.
+
+    Args:
+        mapping (Dict[str, str]): Gewünschte Zuordnung aktuelles → neues Ziel (Buchstabe oder Ordnerpfad)
+        used_letters (Iterable[str]): Aktuell belegte Buchstaben und Ordnerpfade
+        free_letters (Optional[Iterable[str]]): Freie Buchstaben; Standard ist available_letters(used_letters)
+        temporary_mount (Optional[str]): Leerer Ordner, über den Tauschs laufen, wenn kein
+            Buchstabe frei ist (z.B. wenn alle 24 Buchstaben vergeben sind)
+
+    Returns:
+        LetterPlan: Geordnete Schritte inklusive erkannter Ketten und Zyklen
+
+    Raises:
+        PlanError: Bei unbekannten Laufwerken, doppelten Zielen, Konflikten mit
+            Laufwerken, die nicht verschoben werden, Ordnern auf fehlenden oder
+            verschobenen Laufwerken oder fehlendem temporärem Ziel
+    """
+    used = {normalize_target(target) for target in used_letters}
+    if free_letters is None:
+        free_letters = available_letters(used)
+    free = [_letter(letter) for letter in free_letters]
+
+    # Ordnerpfade in der Schreibweise des Bestands, damit "c:\mounts\x" dasselbe Ziel ist
+    spelling = {target.upper(): target for target in used}
+
+    def resolve(value: str) -> str:
+        target = normalize_target(value)
+        return spelling.get(target.upper(), target)
+
+    moves: Dict[str, str] = {}
+    for old, new in mapping.items():
+        old, new = resolve(old), resolve(new)
+        if old == new:
+            continue
+        if old not in used:
+            raise PlanError(f"Das Laufwerk {old} existiert nicht.")
+        moves[old] = new
+
+    # Jedes Ziel darf nur einmal vorkommen und muss frei werden
+    sources: Dict[str, str] = {}
+    for old, new in moves.items():
+        if new in sources:
+            raise PlanError(f"{sources[new]} und {old} sollen beide {new} erhalten.")
+        if new in used and new not in moves:
+            if is_mount_path(new):
+                raise PlanError(f"Im Ordner {new} ist bereits ein Laufwerk bereitgestellt.")
+            raise PlanError(f"Der Laufwerksbuchstabe {new} wird bereits verwendet.")
+        for target in (old, new):
+            if is_mount_path(target):
+                _check_host(target, used, moves)
+        sources[new] = old
+
+    plan = LetterPlan()
+    visited = set()
+
+    # Ketten beginnen bei Laufwerken, deren Buchstabe von niemandem übernommen wird
+    for head in moves:
+        if head in sources:
+            continue
+        chain = [head]
+        while chain[-1] in moves:
+            chain.append(moves[chain[-1]])
+        visited.update(chain)
+        plan.chains.append(chain)
+
+    # Alle übrigen Laufwerke liegen auf Zyklen
+    for start in moves:
+        if start in visited:
+            continue
+        cycle = [start]
+        visited.add(start)
+        while moves[cycle[-1]] != start:
+            cycle.append(moves[cycle[-1]])
+            visited.add(cycle[-1])
+        plan.cycles.append(cycle)
+
+    if plan.cycles:
+        targets = set(sources)
+        candidates = [letter for letter in free if letter not in used]
+        preferred = [letter for letter in candidates if letter not in targets]
+        if not candidates and temporary_mount:
+            mount = resolve(temporary_mount)
+            if mount in used or mount in targets:
+                raise PlanError(f"Der temporäre Ordner {mount} ist bereits belegt.")
+            _check_host(mount, used, moves)
+            candidates = [mount]
+        if not candidates:
+            raise PlanError("Kein freier Buchstabe zum Auflösen eines Tauschs verfügbar.")
+        # Zyklen laufen vor den Ketten; notfalls wird ein Kettenziel kurz ausgeliehen
+        plan.temporary_letter = (preferred or candidates)[0]
+
+    temp = plan.temporary_letter
+    for cycle in plan.cycles:
+        # x → T, dann rückwärts jeden Buchstaben nachziehen, zuletzt T → Nachfolger von x
+        plan.steps.append(PlanStep(cycle[0], temp, cycle[0], temporary=True))
+        for index in range(len(cycle) - 1, 0, -1):
+            plan.steps.append(PlanStep(cycle[index], moves[cycle[index]], cycle[index]))
+        plan.steps.append(PlanStep(temp, moves[cycle[0]], cycle[0]))
+
+    for chain in plan.chains:
+        # Vom Ende her, damit jedes Ziel bereits frei ist
+        for index in range(len(chain) - 2, -1, -1):
+            plan.steps.append(PlanStep(chain[index], chain[index + 1], chain[index]))
+
+    return plan
+
+
+def _check_host(path: str, used: Set[str], moves: Dict[str, str]):
+    """Ein Ordner muss auf einem vorhandenen Laufwerk liegen, das seinen Buchstaben behält."""
+    host = path[:2]
+    if host not in used:
+        raise PlanError(f"Der Ordner {path} liegt auf keinem vorhandenen Laufwerk.")
+    if host in moves:
+        raise PlanError(f"Der Ordner {path} liegt auf {host}, das selbst verschoben wird.")
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dauerhafter PowerShell-Prozess
+==============================
+
+Startet PowerShell einmalig und hält den Prozess offen. Anfragen werden als
+JSON-Zeilen über stdin geschickt, Antworten kommen als ``ConvertTo-Json``-Zeilen
+über stdout zurück:
+
+    → {"id": 1, "op": "volumes"}
+    ← {"id": 1, "ok": true, "result": [...]}
+    ← {"id": 2, "ok": false, "error": "..."}
+
+Stürzt der Prozess ab, wird er bei der nächsten Anfrage neu gestartet. Ein
+Abbruch (``cancel``) gibt nur die wartende Anfrage auf: Der Prozess läuft weiter,
+und ihre verspätete Antwort wird anhand der Anfrage-ID verworfen. Über
+``command`` lässt sich ein beliebiges Ersatzprogramm einsetzen, das dasselbe
+Protokoll spricht, z.B. ``tests/fake_powershell.py`` unter Linux.
+"""
+
+import base64
+import json
+import queue
+import subprocess
+import threading
+from typing import Any, List, Optional
+
+import tracing
+
+
+# Serverschleife, die innerhalb von PowerShell läuft
+SERVER_SCRIPT = r"""
+$ErrorActionPreference = 'Stop'
+[Console]::InputEncoding = [System.Text.Encoding]::UTF8
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    $request = $null
+    try {
+        $request = $line | ConvertFrom-Json
+        switch ($request.op) {
+            'ping' { $result = 'pong' }
+            'volumes' {
+                $result = @(Get-WmiObject -Class Win32_LogicalDisk |
+                    Select-Object DeviceID, VolumeName, VolumeSerialNumber, FileSystem, DriveType, Size, FreeSpace)
+            }
+            'mounts' {
+                $result = @(Get-WmiObject -Class Win32_MountPoint | ForEach-Object {
+                    $volume = [wmi]$_.Volume
+                    [pscustomobject]@{
+                        Path = ([wmi]$_.Directory).Name; DeviceID = $volume.DeviceID
+                        DriveLetter = $volume.DriveLetter; Label = $volume.Label
+                        SerialNumber = $volume.SerialNumber; FileSystem = $volume.FileSystem
+                        DriveType = $volume.DriveType; Size = $volume.Capacity; FreeSpace = $volume.FreeSpace
+                    }
+                })
+            }
+            default { throw "Unbekannte Operation: $($request.op)" }
+        }
+        $response = @{ id = $request.id; ok = $true; result = $result }
+    } catch {
+        $id = $null
+        if ($request) { $id = $request.id }
+        $response = @{ id = $id; ok = $false; error = $_.Exception.Message }
+    }
+    [Console]::Out.WriteLine(($response | ConvertTo-Json -Compress -Depth 4))
+    [Console]::Out.Flush()
+}
+"""
+
+
+# Marke in der Zeilenwarteschlange: (CANCELLED, Anfrage-ID) weckt die wartende Anfrage bei cancel()
+CANCELLED = "cancelled"
+
+
+class PowerShellWorkerError(Exception):
+    """Der PowerShell-Prozess hat nicht oder fehlerhaft geantwortet."""
+
+
+def default_command() -> List[str]:
+    """Liefert die Kommandozeile für den PowerShell-Server."""
+    encoded = base64.b64encode(SERVER_SCRIPT.encode("utf-16-le")).decode("ascii")
+    return ['powershell', '-NoLogo', '-NoProfile', '-NonInteractive',
+            '-ExecutionPolicy', 'Bypass', '-EncodedCommand', encoded]
+
+
+class PowerShellWorker:
+    """Langlebiger PowerShell-Prozess mit zeilenbasiertem JSON-Protokoll."""
+
+    def __init__(self, command: Optional[List[str]] = None, timeout: float = 15.0):
+        """
+        Args:
+            command (Optional[List[str]]): Kommandozeile des Servers; Standard ist PowerShell
+            timeout (float): Maximale Wartezeit pro Anfrage in Sekunden (inklusive Start)
+        """
+        self.command = command or default_command()
+        self.timeout = timeout
+        self.starts = 0
+        self._process = None
+        self._lines = None
+        self._next_id = 0
+        self._pending_id = None  # ID der Anfrage, auf deren Antwort gerade gewartet wird
+        self._abandoned = set()  # IDs abgebrochener Anfragen; ihre Antworten werden verworfen
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def abandoned(self) -> frozenset:
+        """IDs abgebrochener Anfragen, deren Antwort noch aussteht."""
+        return frozenset(self._abandoned)
+
+    def request(self, op: str, **params) -> Any:
+        """
+        Schickt eine Anfrage und wartet auf die zugehörige Antwort.
+
+        Ist der Prozess abgestürzt, wird er einmal neu gestartet und die
+        Anfrage wiederholt.
+
+        Args:
+            op (str): Name der Operation (z.B. "volumes")
+            **params: Zusätzliche Felder der Anfrage
+
+        Returns:
+            Any: Feld "result" der Antwort
+
+        Raises:
+            PowerShellWorkerError: Bei Zeitüberschreitung, Absturz, Abbruch oder Fehlerantwort
+        """
+        with self._lock, tracing.span("powershell.request", "subprocess", op=op):
+            try:
+                return self._request(op, params)
+            except (BrokenPipeError, EOFError, OSError):
+                # Prozess ist abgestürzt: neu starten und einmal wiederholen
+                self._stop()
+                try:
+                    return self._request(op, params)
+                except (BrokenPipeError, EOFError, OSError) as e:
+                    self._stop()
+                    raise PowerShellWorkerError(f"PowerShell-Prozess beendet: {e}")
+
+    def cancel(self):
+        """
+        Gibt eine laufende Anfrage aus einem anderen Thread heraus auf.
+
+        Die wartende Anfrage endet sofort mit PowerShellWorkerError. Der Prozess
+        bleibt warm; seine Antwort auf die aufgegebene Anfrage wird verworfen.
+        Hängt er, ersetzt ihn die Zeitgrenze der nächsten Anfrage.
+        """
+        request_id, lines = self._pending_id, self._lines
+        if request_id is not None and lines is not None:
+            # Weckt nur die Anfrage mit dieser ID; eine inzwischen folgende ignoriert die Marke
+            lines.put((CANCELLED, request_id))
+
+    def close(self):
+        """Beendet den Prozess."""
+        with self._lock:
+            self._stop()
+
+    def _request(self, op: str, params: dict) -> Any:
+        if not self.running:
+            self._start()
+
+        self._next_id += 1
+        request_id = self._next_id
+        message = dict(params, id=request_id, op=op)
+
+        self._process.stdin.write(json.dumps(message) + "\n")
+        self._process.stdin.flush()
+
+        self._pending_id = request_id
+        try:
+            return self._receive(request_id)
+        finally:
+            self._pending_id = None
+
+    def _receive(self, request_id: int) -> Any:
+        while True:
+            try:
+                line = self._lines.get(timeout=self.timeout)
+            except queue.Empty:
+                # Hängender Prozess wird verworfen; die nächste Anfrage startet neu
+                self._stop()
+                raise PowerShellWorkerError(f"Keine Antwort innerhalb von {self.timeout} s")
+
+            if line is None:
+                raise EOFError("stdout geschlossen")
+            if isinstance(line, tuple):
+                if line == (CANCELLED, request_id):
+                    self._abandoned.add(request_id)
+                    raise PowerShellWorkerError("Anfrage abgebrochen")
+                continue
+
+            try:
+                response = json.loads(line)
+            except ValueError:
+                # Kein Protokoll (z.B. Warnungen von PowerShell) - überspringen
+                continue
+
+            if not isinstance(response, dict):
+                continue
+            if response.get("id") != request_id:
+                # Verspätete Antwort einer abgebrochenen Anfrage
+                self._abandoned.discard(response.get("id"))
+                continue
+            if not response.get("ok"):
+                raise PowerShellWorkerError(response.get("error") or "Unbekannter Fehler")
+            return response.get("result")
+
+    @tracing.traced("powershell.start", "subprocess")
+    def _start(self):
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            bufsize=1,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)  # Verstecke Konsole
+        )
+        self.starts += 1
+        self._lines = queue.Queue()
+        self._abandoned.clear()
+        reader = threading.Thread(target=self._read_lines, args=(self._process, self._lines),
+                                  name="powershell-reader", daemon=True)
+        reader.start()
+
+    @staticmethod
+    def _read_lines(process: subprocess.Popen, lines: queue.Queue):
+        for line in process.stdout:
+            lines.put(line.strip())
+        lines.put(None)
+
+    def _stop(self):
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        self._process = None
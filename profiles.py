@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Layout-Profile für Laufwerksbuchstaben
+======================================
+
+Ein Profil hält fest, welches Laufwerk welchen Buchstaben tragen soll. Die
+Laufwerke werden über ihre Seriennummer und ersatzweise über ihre Bezeichnung
+erkannt, nicht über den aktuellen Buchstaben; so lässt sich dasselbe Layout
+auch auf anderen Rechnern (andere Seriennummern, gleiche Bezeichnungen)
+herstellen. Beim Anwenden entstehen nur die Änderungen, die zum Ziel fehlen;
+ist das Profil bereits erfüllt, ist die Zuordnung leer. Statt eines Buchstabens
+kann ein Eintrag auch einen Bereitstellungsordner ("C:\\Mounts\\Daten1") nennen.
+
+Dateiformat:
+
+    {"version": 1, "name": "Arbeitsplatz",
+     "volumes": [{"letter": "D:", "serial": "1A2B-3C4D", "label": "Daten"}]}
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from drive_backends import DEFAULT_LABEL, VolumeInfo
+from letter_planner import PlanError, normalize_target
+
+
+PROFILE_VERSION = 1
+
+
+class ProfileError(ValueError):
+    """Die Profildatei ist ungültig."""
+
+
+@dataclass
+class ProfileEntry:
+    """Gewünschter Buchstabe für ein über Seriennummer oder Bezeichnung erkanntes Laufwerk."""
+
+    letter: str
+    serial: Optional[int] = None
+    label: str = ""
+
+
+@dataclass
+class LayoutProfile:
+    """Ein gespeichertes Layout."""
+
+    name: str = ""
+    entries: List[ProfileEntry] = field(default_factory=list)
+
+
+@dataclass
+class ProfileMatch:
+    """Abgleich eines Profils mit dem aktuellen Laufwerksbestand."""
+
+    # Aktueller → gewünschter Buchstabe, nur für Laufwerke, die wechseln müssen
+    mapping: Dict[str, str] = field(default_factory=dict)
+    # Einträge ohne passendes Laufwerk
+    missing: List[ProfileEntry] = field(default_factory=list)
+    # Einträge, deren Bezeichnung auf mehrere Laufwerke passt
+    ambiguous: List[ProfileEntry] = field(default_factory=list)
+
+    @property
+    def satisfied(self) -> bool:
+        """True, wenn keine diskpart-Operation nötig ist."""
+        return not self.mapping
+
+
+def format_serial(serial: Optional[int]) -> Optional[str]:
+    """Formatiert eine Seriennummer wie Windows (z.B. "1A2B-3C4D")."""
+    if serial is None:
+        return None
+    return f"{serial >> 16:04X}-{serial & 0xFFFF:04X}"
+
+
+def parse_serial(value) -> Optional[int]:
+    """Liest eine Seriennummer als "1A2B-3C4D", "1A2B3C4D" oder Zahl."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        return int(str(value).replace("-", ""), 16)
+    except ValueError:
+        raise ProfileError(f"Ungültige Seriennummer: {value!r}")
+
+
+def profile_from_volumes(volumes: Iterable[VolumeInfo], name: str = "") -> LayoutProfile:
+    """
+    Erstellt ein Profil aus dem aktuellen Laufwerksbestand.
+
+    Laufwerke ohne Seriennummer und ohne eigene Bezeichnung (z.B. leere
+    optische oder nicht erreichbare Laufwerke) lassen sich nicht wiedererkennen
+    und werden ausgelassen.
+    """
+    entries = []
+    for volume in sorted(volumes, key=lambda volume: volume.letter):
+        # Die Standardbezeichnung ist kein brauchbares Erkennungsmerkmal
+        label = volume.label if volume.label != DEFAULT_LABEL and not volume.unresponsive else ""
+        if volume.serial is None and not label:
+            continue
+        entries.append(ProfileEntry(volume.letter, volume.serial, label))
+    return LayoutProfile(name, entries)
+
+
+def profile_to_dict(profile: LayoutProfile) -> dict:
+    return {
+        "version": PROFILE_VERSION,
+        "name": profile.name,
+        "volumes": [{"letter": entry.letter, "serial": format_serial(entry.serial), "label": entry.label}
+                    for entry in profile.entries],
+    }
+
+
+def profile_from_dict(data: dict) -> LayoutProfile:
+    """
+    Liest ein Profil aus seiner JSON-Form.
+
+    Raises:
+        ProfileError: Bei fehlenden Feldern, ungültigen Buchstaben oder doppelten Zielen
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("volumes"), list):
+        raise ProfileError("Profil enthält keine Liste 'volumes'.")
+    if data.get("version", PROFILE_VERSION) > PROFILE_VERSION:
+        raise ProfileError(f"Profilversion {data['version']} wird nicht unterstützt.")
+
+    entries = []
+    targets = set()
+    for record in data["volumes"]:
+        try:
+            letter = normalize_target(str(record.get("letter") or ""))
+        except PlanError:
+            raise ProfileError(f"Ungültiger Laufwerksbuchstabe im Profil: {record.get('letter')!r}")
+        if letter.upper() in targets:
+            raise ProfileError(f"Der Buchstabe {letter} ist im Profil mehrfach vergeben.")
+        targets.add(letter.upper())
+
+        entry = ProfileEntry(letter, parse_serial(record.get("serial")), str(record.get("label") or ""))
+        if entry.serial is None and not entry.label:
+            raise ProfileError(f"Eintrag für {letter} hat weder Seriennummer noch Bezeichnung.")
+        entries.append(entry)
+    return LayoutProfile(str(data.get("name") or ""), entries)
+
+
+def save_profile(profile: LayoutProfile, path: str):
+    """Speichert ein Profil als JSON-Datei."""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(profile_to_dict(profile), handle, ensure_ascii=False, indent=2)
+
+
+def load_profile(path: str) -> LayoutProfile:
+    """
+    Lädt ein Profil aus einer JSON-Datei.
+
+    Raises:
+        ProfileError: Wenn die Datei kein gültiges Profil enthält
+        OSError: Wenn die Datei nicht gelesen werden kann
+    """
+    with open(path, encoding="utf-8") as handle:
+        try:
+            data = json.load(handle)
+        except ValueError as e:
+            raise ProfileError(f"Keine gültige JSON-Datei: {e}")
+    return profile_from_dict(data)
+
+
+def match_profile(profile: LayoutProfile, volumes: Iterable[VolumeInfo]) -> ProfileMatch:
+    """
+    Gleicht ein Profil mit dem aktuellen Laufwerksbestand ab.
+
+    Ein Eintrag wird zuerst über die Seriennummer gesucht; ist sie auf diesem
+    Rechner unbekannt, über die Bezeichnung, sofern diese eindeutig ist.
+
+    Returns:
+        ProfileMatch: Nötige Änderungen sowie fehlende und mehrdeutige Einträge
+    """
+    volumes = list(volumes)
+    by_serial = {volume.serial: volume for volume in volumes if volume.serial is not None}
+    claimed = set()
+    match = ProfileMatch()
+
+    for entry in profile.entries:
+        volume = by_serial.get(entry.serial) if entry.serial is not None else None
+        if volume is None and entry.label:
+            candidates = [candidate for candidate in volumes
+                          if candidate.label == entry.label and candidate.letter not in claimed]
+            if len(candidates) > 1:
+                match.ambiguous.append(entry)
+                continue
+            volume = candidates[0] if candidates else None
+        if volume is None or volume.letter in claimed:
+            match.missing.append(entry)
+            continue
+
+        claimed.add(volume.letter)
+        if volume.letter.upper() != entry.letter.upper():
+            match.mapping[volume.letter] = entry.letter
+    return match
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""Gemeinsame Einstellungen für die Tests: Module liegen im Projektverzeichnis."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def headless(monkeypatch):
+    """Ersetzt tk/ttk in drive_letter_manager durch benchmarks/fake_tk und unterdrückt Ausgaben."""
+    import drive_letter_manager
+    from benchmarks import fake_tk
+
+    monkeypatch.setattr(drive_letter_manager, "tk", fake_tk.tk)
+    monkeypatch.setattr(drive_letter_manager, "ttk", fake_tk.ttk)
+    monkeypatch.setattr(drive_letter_manager, "print", lambda *a, **k: None, raising=False)
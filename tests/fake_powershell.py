@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ersatz für den PowerShell-Server aus powershell_worker
+======================================================
+
+Spricht dasselbe JSON-Zeilenprotokoll wie SERVER_SCRIPT und läuft überall,
+wo Python läuft:
+
+* "echo" liefert die Anfrage selbst als Ergebnis zurück,
+* "volumes" liefert die Datensätze aus --volumes (JSON),
+* "fail" antwortet mit ok=false,
+* "crash" beendet den Prozess ohne Antwort,
+* "hang" antwortet nie,
+* "slow" antwortet wie "echo", aber erst nach "seconds" Sekunden.
+
+Mit --crash-once DATEI beendet sich der erste Prozess bei seiner ersten
+Anfrage ohne Antwort (die Datei merkt sich, dass es passiert ist); mit --noise
+kommt vor jeder Antwort eine Zeile, die kein JSON ist.
+
+Aufruf:
+    python tests/fake_powershell.py [--volumes JSON] [--crash-once DATEI] [--noise]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--volumes", default="[]")
+    parser.add_argument("--crash-once", metavar="DATEI")
+    parser.add_argument("--noise", action="store_true")
+    args = parser.parse_args()
+    volumes = json.loads(args.volumes)
+
+    for line in sys.stdin:
+        request = json.loads(line)
+        if args.crash_once and not os.path.exists(args.crash_once):
+            open(args.crash_once, "w").close()
+            os._exit(1)
+
+        op = request.get("op")
+        if op == "crash":
+            os._exit(1)
+        if op == "hang":
+            time.sleep(3600)
+        if op == "slow":
+            time.sleep(request.get("seconds", 1.0))
+        if op in ("echo", "slow"):
+            response = {"id": request["id"], "ok": True, "result": request}
+        elif op == "volumes":
+            response = {"id": request["id"], "ok": True, "result": volumes}
+        else:
+            response = {"id": request["id"], "ok": False, "error": f"Unbekannte Operation: {op}"}
+
+        if args.noise:
+            sys.stdout.write("WARNUNG: Dies ist keine Antwort\n")
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Tests für apply_executor: Wiederholung belegter Laufwerke, Wartezeiten, Frist und Abbruch."""
+
+import time
+import types
+
+import pytest
+
+import apply_executor
+import diskpart
+from apply_executor import STATUS_APPLIED, STATUS_BUSY, STATUS_FAILED, ApplyExecutor, execute, retry_positions
+from diskpart import DiskpartOperation, DiskpartResult
+from letter_planner import PlanStep
+
+BUSY = diskpart.ERROR_IN_USE
+
+
+class ScriptedApply:
+    """
+    Ersatz für diskpart.apply_operations: pro Sitzung {alter Buchstabe: Fehlerklasse};
+    nicht genannte Operationen gelingen, nach dem Skript gelingt alles.
+    """
+
+    def __init__(self, *sessions):
+        self.sessions = list(sessions)
+        self.calls = []
+
+    def __call__(self, operations):
+        script = self.sessions[len(self.calls)] if len(self.calls) < len(self.sessions) else {}
+        self.calls.append([operation.old_letter for operation in operations])
+        return [DiskpartResult(operation, False, "Fehler", script[operation.old_letter])
+                if script.get(operation.old_letter) else DiskpartResult(operation, True, verified=True)
+                for operation in operations]
+
+
+class FakeClock:
+    """Ersetzt time.monotonic; wait() lässt die Zeit vergehen, statt zu schlafen."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.waits = []
+        self.cancel_after = None  # Nach so vielen Wartezeiten gilt der Lauf als abgebrochen
+
+    def monotonic(self):
+        return self.now
+
+    def wait(self, delay):
+        self.waits.append(delay)
+        self.now += delay
+        return self.cancel_after is not None and len(self.waits) >= self.cancel_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # Nur das Modul sieht die falsche Uhr, nicht andere Threads des Testlaufs
+    monkeypatch.setattr(apply_executor, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def plan(*pairs):
+    """Schritte und Operationen für [(alt, neu), ...]; die Quelle ist jeweils der alte Buchstabe."""
+    steps = [PlanStep(old, new, old) for old, new in pairs]
+    return steps, [DiskpartOperation(old, new) for old, new in pairs]
+
+
+def result(success=True, error_kind=None):
+    return DiskpartResult(DiskpartOperation("D:", "X:"), success, error_kind=error_kind)
+
+
+def test_retry_positions_start_at_first_busy_step():
+    results = [result(), result(False, diskpart.ERROR_NOT_FOUND), result(False, BUSY), result(),
+               result(False, diskpart.ERROR_ALREADY_ASSIGNED), result(False, diskpart.ERROR_ACCESS_DENIED)]
+    # Der Fehler vor dem belegten Laufwerk ist endgültig, die späteren Fehler können an ihm liegen
+    assert retry_positions(results) == [2, 4, 5]
+    assert retry_positions([result(), result(False, diskpart.ERROR_NOT_FOUND)]) == []
+
+
+def test_busy_step_and_dependent_step_are_retried_in_plan_order(clock):
+    steps, operations = plan(("C:", "X:"), ("D:", "T:"), ("E:", "D:"))
+    apply = ScriptedApply({"D:": BUSY, "E:": diskpart.ERROR_ALREADY_ASSIGNED})
+    progress = []
+
+    report = execute(steps, operations, apply, retry_delay=1.0, cancelled=clock, progress=progress.append)
+
+    assert apply.calls == [["C:", "D:", "E:"], ["D:", "E:"]]
+    assert [(outcome.step.old_letter, outcome.status, outcome.attempts) for outcome in report.outcomes] == [
+        ("C:", STATUS_APPLIED, 1), ("D:", STATUS_APPLIED, 2), ("E:", STATUS_APPLIED, 2)]
+    assert report.sessions == 2 and report.ok and not report.cancelled
+    # Gewartet wird nur auf das belegte Laufwerk, nicht auf den abhängigen Schritt
+    assert [entry.waiting for entry in progress] == [["D:"]]
+
+
+def test_aggregated_report_keeps_final_failures(clock):
+    steps, operations = plan(("C:", "X:"), ("D:", "Y:"), ("E:", "Z:"))
+    apply = ScriptedApply({"C:": diskpart.ERROR_NOT_FOUND, "D:": BUSY}, {"D:": BUSY})
+
+    report = execute(steps, operations, apply, retry_delay=1.0, deadline=2.5, cancelled=clock)
+
+    assert apply.calls == [["C:", "D:", "E:"], ["D:"]]
+    assert [outcome.status for outcome in report.outcomes] == [STATUS_FAILED, STATUS_BUSY, STATUS_APPLIED]
+    assert [outcome.step.old_letter for outcome in report.by_status(STATUS_BUSY)] == ["D:"]
+    assert report.failed_sources() == {"C:", "D:"}
+    assert not report.ok
+
+
+def test_wait_grows_by_backoff_up_to_max_delay(clock):
+    steps, operations = plan(("D:", "X:"))
+    apply = ScriptedApply(*[{"D:": BUSY}] * 5)
+
+    report = execute(steps, operations, apply, retry_delay=1.0, backoff=2.0, max_delay=4.0,
+                     deadline=100.0, cancelled=clock)
+
+    assert clock.waits == [1.0, 2.0, 4.0, 4.0, 4.0]
+    assert report.sessions == 6 and report.outcomes[0].attempts == 6 and report.ok
+
+
+def test_deadline_stops_retries(clock):
+    steps, operations = plan(("D:", "X:"))
+    apply = ScriptedApply(*[{"D:": BUSY}] * 10)
+
+    report = execute(steps, operations, apply, retry_delay=1.0, backoff=2.0, deadline=5.0, cancelled=clock)
+
+    # Versuche bei 0, 1 und 3 s; der nächste nach weiteren 4 s läge hinter der Frist
+    assert clock.waits == [1.0, 2.0]
+    assert report.sessions == 3
+    assert report.outcomes[0].status == STATUS_BUSY and report.failed_sources() == {"D:"}
+
+
+def test_cancel_stops_retries(clock):
+    steps, operations = plan(("D:", "X:"))
+    apply = ScriptedApply(*[{"D:": BUSY}] * 10)
+    clock.cancel_after = 2
+
+    report = execute(steps, operations, apply, retry_delay=1.0, cancelled=clock)
+
+    assert report.cancelled and report.sessions == 2
+    assert report.outcomes[0].status == STATUS_BUSY
+
+
+def wait_for_report(executor, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        report = executor.poll()
+        if report is not None:
+            return report
+        assert time.monotonic() < deadline, "Zeitüberschreitung"
+        time.sleep(0.01)
+
+
+def test_executor_cancel_during_wait():
+    steps, operations = plan(("D:", "X:"))
+    executor = ApplyExecutor(ScriptedApply(*[{"D:": BUSY}] * 10), retry_delay=30.0)
+    executor.start(steps, operations)
+    deadline = time.monotonic() + 5.0
+    while executor.progress is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert executor.progress.waiting == ["D:"] and executor.busy
+
+    executor.cancel()
+    report = wait_for_report(executor)
+
+    assert report.cancelled and report.sessions == 1 and not executor.busy
+
+
+def test_executor_refuses_second_run_and_reports_errors():
+    def broken(operations):
+        raise OSError("diskpart fehlt")
+
+    steps, operations = plan(("D:", "X:"))
+    executor = ApplyExecutor(broken)
+    executor.start(steps, operations)
+    with pytest.raises(RuntimeError):
+        executor.start(steps, operations)
+
+    report = wait_for_report(executor)
+    assert isinstance(report.error, OSError) and not report.ok
+    executor.start(steps, operations)  # Nach abgeholtem Bericht ist ein neuer Lauf möglich
+    wait_for_report(executor)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Tests für command_runner.py: Auswahl des Runners über die Umgebung."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import command_runner
+import drive_cli
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def restore_runner():
+    yield
+    command_runner.set_runner(None)
+
+
+def test_import_ignores_broken_replay_variable():
+    # Eine fehlerhafte Angabe darf weder den Import noch den der Oberfläche scheitern lassen
+    env = dict(os.environ, DLM_REPLAY=os.path.join(ROOT, "gibt-es-nicht.json"), DLM_LATENCY_SCALE="schnell")
+    completed = subprocess.run([sys.executable, "-c", "import command_runner, drive_letter_manager, drive_cli"],
+                               cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+
+
+def test_configure_from_environment_sets_replay_runner(tmp_path):
+    path = tmp_path / "sitzung.json"
+    path.write_text(json.dumps({"version": 1, "admin": False, "commands": []}), encoding="utf-8")
+
+    runner = command_runner.configure_from_environment(
+        {"DLM_REPLAY": str(path), "DLM_LATENCY_SCALE": "0.5", "DLM_HANG": "powershell"})
+
+    assert command_runner.get_runner() is runner
+    assert isinstance(runner, command_runner.ReplayRunner)
+    assert (runner.scale, runner.admin) == (0.5, False)
+    assert [fault.match for fault in runner.faults] == ["powershell"]
+
+
+def test_configure_from_environment_without_variables_keeps_runner():
+    current = command_runner.get_runner()
+    assert command_runner.configure_from_environment({}) is None
+    assert command_runner.get_runner() is current
+
+
+@pytest.mark.parametrize("environ", [{"DLM_REPLAY": "gibt-es-nicht.json"},
+                                     {"DLM_REPLAY": __file__},
+                                     {"DLM_REPLAY": __file__, "DLM_DELAY": "wmic=lange"}])
+def test_configure_from_environment_reports_invalid_settings(environ):
+    with pytest.raises((OSError, ValueError)):
+        command_runner.configure_from_environment(environ)
+
+
+def test_cli_reports_broken_replay_variable(monkeypatch, capsys):
+    monkeypatch.setenv("DLM_REPLAY", "gibt-es-nicht.json")
+    assert drive_cli.main(["list"]) == drive_cli.EXIT_ERROR
+    assert "gibt-es-nicht.json" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("base", [command_runner.CommandRunner, command_runner.RunningCommand,
+                                  command_runner.CommandSession])
+def test_bases_are_abstract(base):
+    with pytest.raises(TypeError):
+        base()
+
+
+def test_runner_must_implement_every_operation():
+    class WithoutAdminCheck(command_runner.CommandRunner):
+        def start(self, argv, input=None, shell=False):
+            pass
+
+        def start_session(self, argv, prompt):
+            pass
+
+        def powershell_worker(self, timeout):
+            pass
+
+    # Fehlt eine Methode, scheitert schon die Erzeugung und nicht erst der Aufruf
+    with pytest.raises(TypeError, match="is_admin"):
+        WithoutAdminCheck()
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""Tests für diskpart.py: Sitzungsablauf über abgespielte Aufzeichnungen."""
+
+import pytest
+
+import command_runner
+import diskpart
+from diskpart import DiskpartOperation
+
+
+PROMPT = diskpart.DISKPART_PROMPT
+GREETING = "\nMicrosoft DiskPart version 10.0.19041.964\n\nOn computer: TEST\n\n"
+
+LABELS = ["System", "Daten", "Backup"]
+
+
+def table(letters=None):
+    """Ausgabe von "list volume"; letters überschreibt einzelne Buchstaben {Nummer: Buchstabe}."""
+    current = {**dict(enumerate("CDE")), **(letters or {})}
+    lines = ["", "  Volume ###  Ltr  Label        Fs     Type        Size     Status     Info",
+             "  ----------  ---  -----------  -----  ----------  -------  ---------  --------"]
+    for number, label in enumerate(LABELS):
+        lines.append(f"  Volume {number:<3}  {current[number]:<3}  {label:<11}  NTFS   Partition"
+                     f"    931 GB  Healthy")
+    return "\n".join(lines) + "\n\n"
+
+
+TABLE = table()
+
+SELECTED = "\nVolume {} is the selected volume.\n\n"
+ASSIGNED = "\nDiskPart successfully assigned the drive letter or mount point.\n\n"
+INVALID = "\nThe volume you selected is not valid or does not exist.\n\n"
+
+
+def session(commands, responses, returncode=0):
+    """Aufzeichnung einer Sitzung: gesendete Zeilen und die Antwort auf jede."""
+    stdout = GREETING + "".join(f"{PROMPT} {response}" for response in responses)
+    return {"argv": ["diskpart"], "input": "\n".join(commands), "returncode": returncode,
+            "stdout": stdout, "stderr": "", "duration": 0.0, "timeout": False}
+
+
+def replay(*entries):
+    return command_runner.ReplayRunner(list(entries), scale=0)
+
+
+def test_selects_volumes_by_number_from_leading_table():
+    runner = replay(session(
+        ["list volume", "select volume 1", "assign letter=X", "select volume 2", "assign letter=Y",
+         "list volume", "exit"],
+        [TABLE, SELECTED.format(1), ASSIGNED, SELECTED.format(2), ASSIGNED,
+         table({1: "X", 2: "Y"}), "\nLeaving DiskPart...\n"]))
+
+    results = diskpart.apply_operations([DiskpartOperation("D:", "X:"), DiskpartOperation("E:", "Y:")], runner)
+
+    assert [(result.success, result.verified) for result in results] == [(True, True), (True, True)]
+
+
+def test_rotation_through_temporary_letter_selects_same_volume_again():
+    operations = [DiskpartOperation("D:", "T:"), DiskpartOperation("E:", "D:"), DiskpartOperation("T:", "E:")]
+    rows = diskpart.parse_volume_table(TABLE)
+    assert diskpart.volume_numbers(operations, rows) == [1, 2, 1]
+    assert diskpart.build_script(operations, rows).splitlines()[1:7] == [
+        "select volume 1", "assign letter=T", "select volume 2", "assign letter=D",
+        "select volume 1", "assign letter=E"]
+
+
+def test_failed_select_aborts_remaining_operations():
+    # Nach dem fehlgeschlagenen select darf kein assign mehr folgen: das vorherige Volume wäre noch gewählt
+    runner = replay(session(
+        ["list volume", "select volume 1", "assign letter=X", "select volume 2", "list volume", "exit"],
+        [TABLE, SELECTED.format(1), ASSIGNED, INVALID, table({1: "X"}), "\nLeaving DiskPart...\n"]))
+    operations = [DiskpartOperation("D:", "X:"), DiskpartOperation("E:", "Y:"), DiskpartOperation("C:", "Z:")]
+
+    results = diskpart.apply_operations(operations, runner)
+
+    assert results[0].success and results[0].verified
+    assert (results[1].success, results[1].error_kind) == (False, diskpart.ERROR_NOT_FOUND)
+    assert (results[2].success, results[2].error_kind) == (False, diskpart.ERROR_SKIPPED)
+
+
+def test_step_depending_on_failed_step_is_skipped_without_select():
+    busy = "\nVirtual Disk Service error:\nThe volume is in use.\n\n"
+    not_free = "\nVirtual Disk Service error:\nThe specified drive letter is not free to be assigned.\n\n"
+    runner = replay(session(
+        ["list volume", "select volume 1", "assign letter=T", "select volume 2", "assign letter=D",
+         "list volume", "exit"],
+        [TABLE, SELECTED.format(1), busy, SELECTED.format(2), not_free, TABLE, "\nLeaving DiskPart...\n"]))
+    operations = [DiskpartOperation("D:", "T:"), DiskpartOperation("E:", "D:"), DiskpartOperation("T:", "E:")]
+
+    results = diskpart.apply_operations(operations, runner)
+
+    assert results[0].error_kind == diskpart.ERROR_IN_USE
+    assert (results[1].success, results[1].error_kind) == (False, diskpart.ERROR_ALREADY_ASSIGNED)
+    assert results[2].error_kind == diskpart.ERROR_SKIPPED
+
+
+def test_unknown_source_is_not_selected():
+    runner = replay(session(
+        ["list volume", "select volume 1", "assign letter=X", "list volume", "exit"],
+        [TABLE, SELECTED.format(1), ASSIGNED, table({1: "X"}), "\nLeaving DiskPart...\n"]))
+
+    results = diskpart.apply_operations([DiskpartOperation("Q:", "R:"), DiskpartOperation("D:", "X:")], runner)
+
+    assert (results[0].success, results[0].error_kind) == (False, diskpart.ERROR_NOT_FOUND)
+    assert results[1].success and results[1].verified
+
+
+def test_timeout_keeps_confirmed_steps():
+    entry = session(["list volume", "select volume 1", "assign letter=X", "select volume 2"],
+                    [TABLE, SELECTED.format(1), ASSIGNED])
+    entry["timeout"] = True
+    runner = command_runner.ReplayRunner([entry], scale=0)
+    diskpart_timeout = diskpart.BASE_TIMEOUT, diskpart.TIMEOUT_PER_OPERATION
+    diskpart.BASE_TIMEOUT, diskpart.TIMEOUT_PER_OPERATION = 0.2, 0.0
+    try:
+        results = diskpart.apply_operations([DiskpartOperation("D:", "X:"), DiskpartOperation("E:", "Y:")], runner)
+    finally:
+        diskpart.BASE_TIMEOUT, diskpart.TIMEOUT_PER_OPERATION = diskpart_timeout
+
+    assert results[0].success
+    assert (results[1].success, results[1].error_kind) == (False, diskpart.ERROR_TIMEOUT)
+
+
+def test_missing_diskpart():
+    results = diskpart.apply_operations([DiskpartOperation("D:", "X:")], replay())
+    assert results[0].error_kind == diskpart.ERROR_NOT_AVAILABLE
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Virtual Disk Service error:\nAccess is denied.", diskpart.ERROR_ACCESS_DENIED),
+    ("Access denied", diskpart.ERROR_ACCESS_DENIED),
+    ("Fehler des Dienstes für virtuelle Datenträger:\nZugriff verweigert", diskpart.ERROR_ACCESS_DENIED),
+    ("Der Zugriff wurde verweigert.", diskpart.ERROR_ACCESS_DENIED),
+    ("Virtual Disk Service error:\nThe volume is in use.", diskpart.ERROR_IN_USE),
+    ("The process cannot access the file because it is being used by another process.",
+     diskpart.ERROR_IN_USE),
+    ("Der Prozess kann nicht auf die Datei zugreifen, da sie von einem anderen Prozess verwendet wird.",
+     diskpart.ERROR_IN_USE),
+    ("The specified drive letter is not free to be assigned.", diskpart.ERROR_ALREADY_ASSIGNED),
+    ("Der angegebene Laufwerkbuchstabe ist nicht frei und kann nicht zugewiesen werden.",
+     diskpart.ERROR_ALREADY_ASSIGNED),
+    ("The volume you selected is not valid or does not exist.", diskpart.ERROR_NOT_FOUND),
+    ("Das ausgewählte Volume ist ungültig oder nicht vorhanden.", diskpart.ERROR_NOT_FOUND),
+    ("There is no volume selected.", diskpart.ERROR_NOT_FOUND),
+    ("DiskPart successfully assigned the drive letter or mount point.", None),
+    ("Volume 1 is the selected volume.", None),
+    ("Le volume est introuvable.", None),
+])
+def test_classify_error_matches_real_diskpart_wording(text, expected):
+    assert diskpart.classify_error(text) == expected
+
+
+# Vollständige Mitschriften einer Skriptsitzung (build_script) in drei Anzeigesprachen
+
+HEADERS = {
+    "de": "  Volume ###  Bst  Bezeichnung  DS     Typ         Größe    Status     Info",
+    "en": "  Volume ###  Ltr  Label        Fs     Type        Size     Status     Info",
+    "fr": "  N° volume   Ltr  Nom          Fs     Type        Taille   Statut     Info",
+}
+STATUS = {"de": "Fehlerfre", "en": "Healthy", "fr": "Sain"}
+MESSAGES = {
+    "de": {"greeting": "\nMicrosoft DiskPart-Version 10.0.19041.964\n\nAuf Computer: TEST\n\n",
+           "selected": "\nVolume {} ist das ausgewählte Volume.\n\n",
+           "assigned": "\nDiskPart hat dem Volume erfolgreich einen Laufwerkbuchstaben oder "
+                       "Bereitstellungspunkt zugewiesen.\n\n",
+           "not_free": "\nFehler des Dienstes für virtuelle Datenträger:\nDer angegebene Laufwerkbuchstabe "
+                       "ist nicht frei und kann nicht zugewiesen werden.\n\n",
+           "exit": "\nDiskPart wird beendet...\n"},
+    "en": {"greeting": GREETING,
+           "selected": SELECTED,
+           "assigned": ASSIGNED,
+           "not_free": "\nVirtual Disk Service error:\nAccess is denied.\n\n",
+           "exit": "\nLeaving DiskPart...\n"},
+    "fr": {"greeting": "\nMicrosoft DiskPart version 10.0.19041.964\n\nSur l'ordinateur : TEST\n\n",
+           "selected": "\nLe volume {} est le volume sélectionné.\n\n",
+           "assigned": "\nDiskPart a correctement assigné la lettre de lecteur ou le point de montage.\n\n",
+           "not_free": "\nErreur du service de disque virtuel :\nLa lettre de lecteur n'est pas libre.\n\n",
+           "exit": "\nFermeture de DiskPart...\n"},
+}
+EXPECTED_ERROR = {"de": diskpart.ERROR_ALREADY_ASSIGNED, "en": diskpart.ERROR_ACCESS_DENIED,
+                  "fr": diskpart.ERROR_UNKNOWN}
+
+
+def localized_table(language, letters=None):
+    """Wie table(), aber mit Überschriften und Status der angegebenen Sprache."""
+    return table(letters).replace(TABLE.splitlines()[1], HEADERS[language]).replace("Healthy", STATUS[language])
+
+
+def transcript(language, responses):
+    """Standardausgabe einer Skriptsitzung: Begrüßung, dann je Befehl Prompt und Antwort."""
+    return MESSAGES[language]["greeting"] + "".join(f"{PROMPT} {response}" for response in responses)
+
+
+def second_step_refused(language):
+    """D: → X: gelingt, E: → Y: wird abgelehnt; danach trägt nur Volume 1 den neuen Buchstaben."""
+    messages = MESSAGES[language]
+    return transcript(language, [
+        localized_table(language),
+        messages["selected"].format(1), messages["assigned"],
+        messages["selected"].format(2), messages["not_free"],
+        localized_table(language, {1: "X"}), messages["exit"]])
+
+
+TWO_CHANGES = [DiskpartOperation("D:", "X:"), DiskpartOperation("E:", "Y:")]
+
+
+@pytest.mark.parametrize("language", ["de", "en", "fr"])
+def test_parse_volume_table_in_every_language(language):
+    rows = diskpart.parse_volume_table(localized_table(language, {2: " "}))
+    assert [(row.number, row.letter, row.label) for row in rows] == [
+        (0, "C:", "System"), (1, "D:", "Daten"), (2, "", "Backup")]
+
+
+@pytest.mark.parametrize("language", ["de", "en", "fr"])
+def test_parse_output_decides_by_tables_in_every_language(language):
+    results = diskpart.parse_output(TWO_CHANGES, second_step_refused(language))
+
+    assert (results[0].success, results[0].verified) == (True, True)
+    assert (results[1].success, results[1].verified) == (False, True)
+    assert results[1].error_kind == EXPECTED_ERROR[language]
+
+
+@pytest.mark.parametrize("language", ["de", "en"])
+def test_parse_messages_knows_german_and_english(language):
+    segments = diskpart.split_output(second_step_refused(language))[2:]
+
+    results = diskpart.parse_messages(TWO_CHANGES, segments)
+
+    assert [(result.success, result.unclear) for result in results] == [(True, False), (False, False)]
+    assert results[1].error_kind == EXPECTED_ERROR[language]
+
+
+def test_parse_messages_treats_unknown_language_as_unclear():
+    # Ohne Tabellen lässt sich eine französische Ablehnung nicht erkennen: der Schritt gilt als unklar
+    segments = diskpart.split_output(second_step_refused("fr"))[2:]
+
+    results = diskpart.parse_messages(TWO_CHANGES, segments)
+
+    assert [(result.success, result.unclear, result.error_kind) for result in results] == [
+        (True, True, None), (True, True, None)]
+
+
+def test_parse_messages_without_output_for_remaining_operations():
+    segments = diskpart.split_output(transcript("de", [
+        localized_table("de"), MESSAGES["de"]["selected"].format(1), MESSAGES["de"]["assigned"]]))[2:]
+
+    results = diskpart.parse_messages(TWO_CHANGES, segments, stderr="Zugriff verweigert")
+
+    assert results[0].success
+    assert (results[1].success, results[1].error_kind) == (False, diskpart.ERROR_ACCESS_DENIED)
+
+
+@pytest.mark.parametrize("language", ["de", "en", "fr"])
+def test_verify_with_tables_finds_failed_step_of_rotation(language):
+    # D: → T:, E: → D:, T: → E:; der zweite Schritt scheitert, Volume 1 bleibt auf T: stehen
+    messages = MESSAGES[language]
+    operations = [DiskpartOperation("D:", "T:"), DiskpartOperation("E:", "D:"), DiskpartOperation("T:", "E:")]
+    segments = diskpart.split_output(transcript(language, [
+        localized_table(language),
+        messages["selected"].format(1), messages["assigned"],
+        messages["selected"].format(2), messages["not_free"],
+        messages["selected"].format(1), messages["not_free"],
+        localized_table(language, {1: "T"}), messages["exit"]]))[1:]
+    before = diskpart.parse_volume_table(segments[0])
+    after = diskpart.parse_volume_table(segments[7])
+
+    results = diskpart.verify_with_tables(diskpart.parse_messages(operations, segments[1:7]), before, after)
+
+    assert [(result.success, result.verified) for result in results] == [(True, True), (False, True), (False, True)]
+    assert results[1].error_kind == EXPECTED_ERROR[language]
+
+
+def test_verify_with_tables_confirms_unclear_success():
+    segments = diskpart.split_output(transcript("fr", [
+        localized_table("fr"), MESSAGES["fr"]["selected"].format(1), MESSAGES["fr"]["assigned"],
+        localized_table("fr", {1: "X"})]))[1:]
+    operations = TWO_CHANGES[:1]
+    results = diskpart.parse_messages(operations, segments[1:3])
+    assert results[0].unclear
+
+    verified = diskpart.verify_with_tables(results, diskpart.parse_volume_table(segments[0]),
+                                           diskpart.parse_volume_table(segments[3]))
+
+    assert (verified[0].success, verified[0].unclear, verified[0].verified) == (True, False, True)
+
+
+@pytest.mark.parametrize("language", ["de", "en"])
+def test_classify_error_on_transcript_segments(language):
+    segments = diskpart.split_output(second_step_refused(language))
+    assert [diskpart.classify_error(segment) for segment in segments] == [
+        None, None, None, None, None, EXPECTED_ERROR[language], None, None]
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    ("D:", "E:", ["select volume D", "assign letter=E"]),
+    ("D:", "C:\\Mounts\\Daten", ["select volume D", "assign mount=C:\\Mounts\\Daten", "remove letter=D"]),
+    ("C:\\Mounts\\Daten", "E:", ["select volume C:\\Mounts\\Daten", "assign letter=E",
+                                 "remove mount=C:\\Mounts\\Daten"]),
+    ("C:\\Mounts\\Alt", "C:\\Meine Daten", ["select volume C:\\Mounts\\Alt", 'assign mount="C:\\Meine Daten"',
+                                            "remove mount=C:\\Mounts\\Alt"]),
+])
+def test_operation_commands_for_letters_and_folders(old, new, expected):
+    assert diskpart.operation_commands(DiskpartOperation(old, new)) == expected
+
+
+def test_build_script_for_mixed_plan_selects_by_number():
+    rows = [diskpart.VolumeRow(0, "C:"), diskpart.VolumeRow(1, "D:"), diskpart.VolumeRow(2, "E:"),
+            diskpart.VolumeRow(3, mounts=["C:\\Mounts\\Alt"])]
+    operations = [DiskpartOperation("D:", "C:\\Mounts\\Daten"), DiskpartOperation("E:", "D:"),
+                  DiskpartOperation("C:\\Mounts\\Alt", "E:")]
+    assert diskpart.build_script(operations, rows).splitlines() == [
+        "list volume",
+        "select volume 1", "assign mount=C:\\Mounts\\Daten", "remove letter=D",
+        "select volume 2", "assign letter=D",
+        "select volume 3", "assign letter=E", "remove mount=C:\\Mounts\\Alt",
+        "list volume", "exit",
+    ]
+
+
+def test_letter_moved_to_folder_is_verified_from_mount_line():
+    removed = "\nDiskPart successfully removed the drive letter or mount point.\n\n"
+    # Ordner stehen in einer eigenen Zeile unter ihrem Volume
+    lines = table({1: ""}).splitlines()
+    after = "\n".join(lines[:5] + ["    C:\\Mounts\\Daten\\"] + lines[5:]) + "\n\n"
+    runner = replay(session(
+        ["list volume", "select volume 1", "assign mount=C:\\Mounts\\Daten", "remove letter=D",
+         "list volume", "exit"],
+        [TABLE, SELECTED.format(1), ASSIGNED, removed, after, "\nLeaving DiskPart...\n"]))
+
+    results = diskpart.apply_operations([DiskpartOperation("D:", "C:\\Mounts\\Daten")], runner)
+
+    assert (results[0].success, results[0].verified) == (True, True)
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""Tests für drive_backends.py: Auswahl und Rückfall mit FakeBackend, Auswertung der echten Backends."""
+
+import json
+import threading
+import time
+
+import pytest
+
+import command_runner
+import drive_backends
+from drive_backends import BackendError, FakeBackend, VolumeInfo
+from powershell_worker import PowerShellWorkerError
+
+
+class UnavailableBackend(FakeBackend):
+    name = "unavailable"
+
+    def available(self):
+        return False
+
+
+def named(backend, name):
+    backend.name = name
+    return backend
+
+
+class CannedWorker:
+    """Ersatz für PowerShellWorker mit festen Antworten pro Operation (Ausnahmen werden geworfen)."""
+
+    def __init__(self, **responses):
+        self.responses = responses
+        self.cancelled = 0
+
+    def request(self, op, **params):
+        response = self.responses[op]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def cancel(self):
+        self.cancelled += 1
+
+    def close(self):
+        pass
+
+
+# Ausgaben der echten Backends, gekürzt aus Aufzeichnungen
+LOGICAL_DISKS = [
+    {"DeviceID": "C:", "VolumeName": "System", "VolumeSerialNumber": "1A2B3C4D", "FileSystem": "NTFS",
+     "DriveType": 3, "Size": "255369490432", "FreeSpace": "80000000000"},
+    {"DeviceID": "D:", "VolumeName": "", "VolumeSerialNumber": None, "FileSystem": None,
+     "DriveType": 5, "Size": None, "FreeSpace": None},
+]
+MOUNTS = [
+    {"Path": "C:\\Mounts\\Archiv\\", "DeviceID": "\\\\?\\Volume{0005}\\", "DriveLetter": None, "Label": "Archiv",
+     "SerialNumber": 5, "FileSystem": "NTFS", "DriveType": 3, "Size": "4000787030016", "FreeSpace": "1"},
+    {"Path": "C:\\Mounts\\Archiv2\\", "DeviceID": "\\\\?\\Volume{0005}\\", "DriveLetter": None, "Label": "Archiv",
+     "SerialNumber": 5, "FileSystem": "NTFS", "DriveType": 3, "Size": "4000787030016", "FreeSpace": "1"},
+    {"Path": "C:\\Mounts\\System\\", "DeviceID": "\\\\?\\Volume{0001}\\", "DriveLetter": "C:", "Label": "System",
+     "SerialNumber": 439041101, "FileSystem": "NTFS", "DriveType": 3, "Size": "255369490432", "FreeSpace": "1"},
+]
+WMIC = ("Caption  FreeSpace     Size           VolumeName\r\n"
+        "C:       80000000000   255369490432   System\r\n"
+        "D:                                    \r\n"
+        "E:       500000000000  1000204886016  Daten und Medien\r\n")
+
+
+def test_enumerate_volumes_uses_first_available_backend():
+    first = named(FakeBackend({"C:": "System"}), "first")
+    second = named(FakeBackend({"C:": "Andere"}), "second")
+
+    volumes, name = drive_backends.enumerate_volumes([UnavailableBackend({"X:": "Nie"}), first, second])
+
+    assert (name, [volume.label for volume in volumes]) == ("first", ["System"])
+    assert second.calls == 0
+
+
+def test_enumerate_volumes_falls_back_on_error():
+    failing = named(FakeBackend(error=BackendError("kaputt")), "failing")
+    working = named(FakeBackend({"C:": "System"}), "working")
+
+    volumes, name = drive_backends.enumerate_volumes([failing, working])
+
+    assert name == "working" and failing.calls == 1
+
+
+def test_enumerate_volumes_reports_all_errors():
+    with pytest.raises(BackendError, match="a: eins; b: zwei"):
+        drive_backends.enumerate_volumes([named(FakeBackend(error=BackendError("eins")), "a"),
+                                          named(FakeBackend(error=RuntimeError("zwei")), "b")])
+    with pytest.raises(BackendError, match="Kein Backend"):
+        drive_backends.enumerate_volumes([UnavailableBackend()])
+
+
+def test_hedged_enumerator_starts_next_backend_when_first_hangs():
+    slow = named(FakeBackend({"C:": "Langsam"}, delay=1.0), "slow")
+    fast = named(FakeBackend({"C:": "Schnell"}), "fast")
+    enumerator = drive_backends.HedgedEnumerator(hedge_delay=0.05)
+
+    started = time.perf_counter()
+    volumes, name = enumerator([slow, fast])
+
+    assert name == "fast" and time.perf_counter() - started < 0.5
+    assert slow.cancelled == 1
+    # Der Gewinner rückt beim nächsten Mal nach vorne
+    assert [backend.name for backend in enumerator.order([slow, fast])] == ["fast", "slow"]
+
+
+def test_hedged_enumerator_moves_on_at_once_after_error():
+    failing = named(FakeBackend(error=BackendError("kaputt")), "failing")
+    working = named(FakeBackend({"C:": "System"}), "working")
+
+    started = time.perf_counter()
+    _, name = drive_backends.HedgedEnumerator(hedge_delay=5.0)([failing, working])
+
+    assert name == "working" and time.perf_counter() - started < 1.0
+
+
+def test_hedged_enumerator_prefers_non_empty_result():
+    empty = named(FakeBackend(), "empty")
+    full = named(FakeBackend({"C:": "System"}), "full")
+    assert drive_backends.HedgedEnumerator(hedge_delay=0)([empty, full])[1] == "full"
+    assert drive_backends.HedgedEnumerator(hedge_delay=0)([empty])[1] == "empty"
+
+
+def test_hedged_enumerator_demotes_failing_backend():
+    failing = named(FakeBackend(error=BackendError("kaputt")), "failing")
+    working = named(FakeBackend({"C:": "System"}), "working")
+    enumerator = drive_backends.HedgedEnumerator(hedge_delay=0.5)
+    enumerator.latency["failing"] = 0.001  # War früher schnell
+    for _ in range(enumerator.MAX_FAILURES):
+        enumerator([failing, working])
+    assert enumerator.order([failing, working])[0] is working
+
+
+def test_fingerprint_and_probe_skip_unsupported_backends():
+    volumes = [VolumeInfo("C:", "System", serial=1), VolumeInfo("D:", "Daten", serial=2, mount_points=["C:\\M"])]
+    # Die Pfadprüfung kann Bereitstellungsordner nicht einzeln beantworten und wird übergangen
+    path_probe = drive_backends.PathProbeBackend(probe=lambda letter: True, letters="CD")
+    fake = FakeBackend(volumes)
+
+    assert drive_backends.fingerprint([UnavailableBackend(), fake]) == (("C:", 1, "System"), ("D:", 2, "Daten"))
+    probed = drive_backends.probe_letters([UnavailableBackend(), path_probe, fake], ["d", "E:", "C:\\M"])
+    assert probed == {"D:": volumes[1], "E:": None, "C:\\M": volumes[1]}
+    assert fake.calls == 0
+
+
+def test_path_probe_answers_letters_but_not_mount_paths():
+    backend = drive_backends.PathProbeBackend(probe=lambda letter: letter == "D", letters="CDE")
+
+    assert backend.supports_volume("d:") and not backend.supports_volume("C:\\Mounts\\Daten")
+    assert drive_backends.probe_letters([backend], ["D:", "e"]) == {"D:": VolumeInfo("D:"), "E:": None}
+    assert drive_backends.probe_letters([backend], ["D:", "C:\\Mounts\\Daten"]) is None
+    with pytest.raises(BackendError):
+        backend.volume("C:\\Mounts\\Daten")
+
+
+def test_backend_must_implement_enumerate():
+    with pytest.raises(TypeError):
+        drive_backends.DriveBackend()
+
+    class WholeList(drive_backends.DriveBackend):
+        name = "ganze-liste"
+
+        def enumerate(self):
+            return []
+
+    # Ohne Einzelabfrage meldet volume() einen Backend-Fehler statt NotImplementedError
+    with pytest.raises(BackendError, match="ganze-liste"):
+        WholeList().volume("D:")
+
+
+def test_powershell_backend_parses_volumes_and_mounts():
+    backend = drive_backends.PowerShellBackend(worker=CannedWorker(volumes=LOGICAL_DISKS, mounts=MOUNTS))
+
+    volumes = backend.enumerate()
+
+    assert [volume.letter for volume in volumes] == ["C:", "D:", "C:\\Mounts\\Archiv"]
+    system, cdrom, archive = volumes
+    assert (system.serial, system.size, system.free, system.filesystem) == (0x1A2B3C4D, 255369490432,
+                                                                           80000000000, "NTFS")
+    assert system.mount_points == ["C:\\Mounts\\System"] and system.guid == "\\\\?\\Volume{0001}\\"
+    assert (cdrom.label, cdrom.serial, cdrom.size) == (drive_backends.DEFAULT_LABEL, None, None)
+    assert archive.mount_points == ["C:\\Mounts\\Archiv2"] and archive.serial == 5
+
+
+def test_powershell_backend_single_record_and_missing_mounts():
+    # ConvertTo-Json entpackt Arrays mit einem Element
+    backend = drive_backends.PowerShellBackend(worker=CannedWorker(
+        volumes=LOGICAL_DISKS[0], mounts=PowerShellWorkerError("Win32_MountPoint fehlt")))
+    assert [volume.letter for volume in backend.enumerate()] == ["C:"]
+
+
+def test_powershell_backend_error_is_backend_error():
+    backend = drive_backends.PowerShellBackend(worker=CannedWorker(volumes=PowerShellWorkerError("weg")))
+    with pytest.raises(BackendError, match="weg"):
+        backend.enumerate()
+
+
+def test_wmic_backend_parses_columns():
+    runner = command_runner.ReplayRunner([
+        {"argv": ["wmic", "logicaldisk", "get", "size,freespace,caption,volumename"], "input": None,
+         "returncode": 0, "stdout": WMIC, "stderr": "", "duration": 0.0, "timeout": False}], scale=0)
+
+    volumes = drive_backends.WmicBackend(runner).enumerate()
+
+    assert [(volume.letter, volume.label, volume.size, volume.free) for volume in volumes] == [
+        ("C:", "System", 255369490432, 80000000000),
+        ("E:", "Daten und Medien", 1000204886016, 500000000000)]
+
+
+def test_wmic_backend_error_code():
+    runner = command_runner.ReplayRunner([
+        {"argv": ["wmic", "logicaldisk", "get", "size,freespace,caption,volumename"], "input": None,
+         "returncode": 44210, "stdout": "", "stderr": "", "duration": 0.0, "timeout": False}], scale=0)
+    with pytest.raises(BackendError):
+        drive_backends.WmicBackend(runner).enumerate()
+
+
+def test_default_backends_during_replay_only_use_runner():
+    runner = command_runner.ReplayRunner([], scale=0)
+    assert [backend.name for backend in drive_backends.default_backends(runner)] == ["powershell", "wmic"]
+
+
+def test_replayed_powershell_requests():
+    runner = command_runner.ReplayRunner([
+        {"argv": command_runner.POWERSHELL_ARGV + ["volumes"], "input": None, "returncode": 0,
+         "stdout": json.dumps(LOGICAL_DISKS), "stderr": "", "duration": 0.0, "timeout": False},
+        {"argv": command_runner.POWERSHELL_ARGV + ["mounts"], "input": None, "returncode": 0,
+         "stdout": json.dumps(MOUNTS), "stderr": "", "duration": 0.0, "timeout": False}], scale=0)
+    volumes, name = drive_backends.enumerate_volumes(drive_backends.default_backends(runner))
+    assert name == "powershell" and len(volumes) == 3
+
+
+def test_path_probe_reports_letters():
+    backend = drive_backends.PathProbeBackend(probe=lambda letter: letter in "CD", letters="CDE")
+    assert [volume.letter for volume in backend.enumerate()] == ["C:", "D:"]
+
+
+@pytest.mark.parametrize("error", [OSError("Gerät nicht bereit"), ValueError("ungültiger Pfad"),
+                                   RuntimeError("Prüffunktion defekt")])
+def test_path_probe_treats_any_probe_error_as_absent(error):
+    def probe(letter):
+        if letter == "E":
+            raise error
+        return True
+
+    backend = drive_backends.PathProbeBackend(probe=probe, letters="CDE", deadline=5.0)
+    started = time.monotonic()
+    assert [volume.letter for volume in backend.enumerate()] == ["C:", "D:"]
+    # Das Ergebnis kommt sofort, nicht erst nach der Frist
+    assert time.monotonic() - started < 1.0
+    # Der Buchstabe gilt nicht als weiterhin hängend und wird beim nächsten Durchlauf erneut geprüft
+    assert dict(backend.probe("E")) == {"E": drive_backends.PROBE_ABSENT}
+
+
+def test_path_probe_marks_hanging_letter_until_it_returns():
+    release = threading.Event()
+
+    def probe(letter):
+        if letter == "E":
+            release.wait(5.0)
+        return True
+
+    backend = drive_backends.PathProbeBackend(probe=probe, letters="DE", deadline=0.1)
+    try:
+        assert dict(backend.probe()) == {"D": drive_backends.PROBE_PRESENT, "E": drive_backends.PROBE_UNRESPONSIVE}
+        assert dict(backend.probe("E")) == {"E": drive_backends.PROBE_UNRESPONSIVE}
+    finally:
+        release.set()
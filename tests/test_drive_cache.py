@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Tests für drive_cache.py: Invalidierung während einer laufenden Ermittlung."""
+
+import threading
+import time
+
+from drive_backends import VolumeInfo
+from drive_cache import DriveCache
+
+
+def slow_cache(release):
+    """Cache, dessen Ermittlung bis release.set() hängt; zählt die Aufrufe in calls."""
+    calls = []
+
+    def enumerate_func(backends):
+        calls.append(time.monotonic())
+        release.wait(5.0)
+        return [VolumeInfo("D:", f"Lauf {len(calls)}")], "fake"
+
+    return DriveCache([], fingerprint=lambda: "gleich", enumerate_func=enumerate_func), calls
+
+
+def test_invalidate_does_not_wait_for_running_enumeration():
+    release = threading.Event()
+    cache, calls = slow_cache(release)
+    worker = threading.Thread(target=cache.get)
+    worker.start()
+    while not calls:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    cache.invalidate()
+    assert time.monotonic() - started < 0.1
+
+    release.set()
+    worker.join()
+
+
+def test_result_of_invalidated_run_is_not_stored():
+    release = threading.Event()
+    cache, calls = slow_cache(release)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(cache.get()))
+    worker.start()
+    while not calls:
+        time.sleep(0.001)
+    cache.invalidate()
+    release.set()
+    worker.join()
+
+    # Der laufende Aufruf liefert sein Ergebnis, der nächste ermittelt neu
+    assert results[0][0][0].label == "Lauf 1"
+    assert cache.get()[0][0].label == "Lauf 2"
+    assert cache.get()[0][0].label == "Lauf 2"
+    assert (cache.hits, cache.misses) == (1, 2)
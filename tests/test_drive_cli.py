@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""Tests für drive_cli.main mit FakeBackend und ReplayRunner: JSON-Ausgabe, Zuordnungen und Rückgabewerte."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import command_runner
+import diskpart
+import drive_backends
+import drive_cli
+import profiles
+from drive_backends import FakeBackend, VolumeInfo
+from drive_cli import UsageError, parse_mapping
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VOLUMES = [VolumeInfo("C:", "System", serial=1), VolumeInfo("D:", "Daten", serial=2,
+                                                             mount_points=["C:\\Mounts\\Daten\\"]),
+           VolumeInfo("E:", "Backup", serial=3)]
+
+
+class Session:
+    """Ersatz für diskpart.apply_operations; Operationen für die alten Buchstaben in ``failing`` scheitern."""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+
+    def __call__(self, operations):
+        self.calls.append([(operation.old_letter, operation.new_letter) for operation in operations])
+        return [diskpart.DiskpartResult(operation, False, "Fehler", diskpart.ERROR_ACCESS_DENIED)
+                if operation.old_letter in self.failing else diskpart.DiskpartResult(operation, True, verified=True)
+                for operation in operations]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = FakeBackend(list(VOLUMES))
+    monkeypatch.delenv(command_runner.REPLAY_ENV, raising=False)
+    monkeypatch.delenv(command_runner.RECORD_ENV, raising=False)
+    monkeypatch.setattr(drive_backends, "default_backends", lambda *args, **kwargs: [backend])
+    command_runner.set_runner(command_runner.ReplayRunner([], admin=True))
+    yield backend
+    command_runner.set_runner(None)
+
+
+@pytest.fixture
+def session(backend, monkeypatch):
+    session = Session()
+    monkeypatch.setattr(diskpart, "apply_operations", session)
+    return session
+
+
+def run_json(capsys, *argv):
+    code = drive_cli.main(list(argv) + ["--json"])
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_list_json(backend, capsys):
+    code, output = run_json(capsys, "list")
+
+    assert code == drive_cli.EXIT_OK
+    assert output["ok"] and output["backend"] == "fake"
+    assert [volume["letter"] for volume in output["volumes"]] == ["C:", "D:", "E:"]
+    assert output["volumes"][1]["label"] == "Daten"
+    assert output["volumes"][1]["serial"] == 2
+    assert output["volumes"][1]["mount_points"] == ["C:\\Mounts\\Daten\\"]
+
+
+def test_list_text_shows_mount_points(backend, capsys):
+    assert drive_cli.main(["list"]) == drive_cli.EXIT_OK
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split() == ["D:", "Daten"]
+    assert lines[2].strip() == "↳ C:\\Mounts\\Daten\\"
+
+
+@pytest.mark.parametrize("pairs, expected", [
+    (["D:=X:"], {"D:": "X:"}),
+    (["d=x", " e: = y "], {"D:": "X:", "E:": "Y:"}),
+    (["F:=C:\\Mounts\\Daten1"], {"F:": "C:\\Mounts\\Daten1"}),
+])
+def test_parse_mapping(pairs, expected):
+    assert parse_mapping(pairs) == expected
+
+
+@pytest.mark.parametrize("pair", ["D:", "D:X:", "=X:", "D:=", "D:= ", "1:=X:", "D:=XY", "D:=Mounts\\Daten"])
+def test_parse_mapping_rejects_invalid_pairs(pair):
+    with pytest.raises(UsageError):
+        parse_mapping([pair])
+
+
+def test_exit_ok_for_dry_run_without_diskpart(session, capsys):
+    code, output = run_json(capsys, "apply", "--map", "D:=E:", "E:=D:", "--dry-run")
+
+    assert code == drive_cli.EXIT_OK
+    assert output["ok"] and not output["applied"] and len(output["steps"]) == 3
+    assert session.calls == []
+
+
+def test_exit_ok_after_apply(session, capsys):
+    code, output = run_json(capsys, "apply", "--map", "D:=X:")
+
+    assert code == drive_cli.EXIT_OK
+    assert output["applied"] and output["results"][0]["success"]
+    assert session.calls == [[("D:", "X:")]]
+
+
+def test_exit_error_for_unreadable_replay_file(backend, tmp_path, capsys):
+    code, output = run_json(capsys, "--replay", str(tmp_path / "fehlt.json"), "list")
+
+    assert code == drive_cli.EXIT_ERROR
+    assert output == {"ok": False, "exit_code": drive_cli.EXIT_ERROR, "error": output["error"]}
+
+
+def test_exit_usage_for_invalid_mapping(session, capsys):
+    code, output = run_json(capsys, "apply", "--map", "D:X:")
+
+    assert code == drive_cli.EXIT_USAGE and "D:X:" in output["error"]
+    assert session.calls == []
+
+
+def test_exit_usage_for_record_and_replay(backend, tmp_path, capsys):
+    code, _ = run_json(capsys, "--record", str(tmp_path / "a.json"), "--replay", str(tmp_path / "b.json"), "list")
+    assert code == drive_cli.EXIT_USAGE
+
+
+def test_argparse_errors_use_exit_usage(backend, capsys):
+    with pytest.raises(SystemExit) as info:
+        drive_cli.main(["apply"])
+    assert info.value.code == drive_cli.EXIT_USAGE
+
+
+def test_exit_enumeration_failed(backend, capsys):
+    backend.error = drive_backends.BackendError("WMI antwortet nicht")
+
+    code, output = run_json(capsys, "list")
+
+    assert code == drive_cli.EXIT_ENUMERATION_FAILED and not output["ok"]
+
+
+def test_exit_plan_invalid(session, capsys):
+    code, output = run_json(capsys, "apply", "--map", "D:=X:", "E:=X:")
+
+    assert code == drive_cli.EXIT_PLAN_INVALID and "X:" in output["error"]
+    assert session.calls == []
+
+
+def test_exit_plan_invalid_for_broken_profile(session, tmp_path, capsys):
+    path = tmp_path / "profil.json"
+    path.write_text(json.dumps({"volumes": [{"letter": "D:"}]}), encoding="utf-8")
+
+    code, _ = run_json(capsys, "apply-profile", str(path))
+
+    assert code == drive_cli.EXIT_PLAN_INVALID
+
+
+def test_exit_not_admin(session, capsys):
+    command_runner.set_runner(command_runner.ReplayRunner([], admin=False))
+
+    code, output = run_json(capsys, "apply", "--map", "D:=X:")
+
+    assert code == drive_cli.EXIT_NOT_ADMIN
+    assert session.calls == []
+
+
+def test_exit_apply_failed(session, capsys):
+    session.failing = {"E:"}
+
+    code, output = run_json(capsys, "apply", "--map", "D:=X:", "E:=Y:")
+
+    assert code == drive_cli.EXIT_APPLY_FAILED
+    assert not output["ok"] and output["applied"]
+    assert [result["success"] for result in output["results"]] == [True, False]
+    assert output["results"][1]["error_kind"] == diskpart.ERROR_ACCESS_DENIED
+
+
+def test_export_then_apply_profile_is_noop(session, tmp_path, capsys):
+    path = tmp_path / "profil.json"
+    code, output = run_json(capsys, "export-profile", str(path), "--name", "Arbeitsplatz")
+    assert code == drive_cli.EXIT_OK and len(output["volumes"]) == 3
+    assert profiles.load_profile(str(path)).name == "Arbeitsplatz"
+
+    code, output = run_json(capsys, "apply-profile", str(path))
+
+    assert code == drive_cli.EXIT_OK and not output["applied"]
+    assert session.calls == []
+
+
+def test_cli_does_not_import_tkinter():
+    # Eigener Prozess: im Testlauf haben andere Tests tkinter (bzw. den Ersatz) längst geladen
+    script = (
+        "import sys, drive_backends, drive_cli\n"
+        "drive_backends.default_backends = lambda *args, **kwargs: [drive_backends.FakeBackend({'C:': 'System'})]\n"
+        "code = drive_cli.main(['list', '--json'])\n"
+        "assert code == 0, code\n"
+        "assert 'tkinter' not in sys.modules, 'tkinter geladen'\n"
+    )
+    env = {key: value for key, value in os.environ.items()
+           if key not in (command_runner.REPLAY_ENV, command_runner.RECORD_ENV)}
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    assert json.loads(completed.stdout)["volumes"][0]["letter"] == "C:"
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""Tests für die Oberfläche ohne Display (benchmarks/fake_tk): Hintergrundvorgänge und Buttons."""
+
+import threading
+import time
+
+import pytest
+
+import diskpart
+import drive_backends
+import drive_letter_manager
+import profiles
+import tracing
+
+VOLUMES = {"C:": "System", "D:": "Daten", "E:": "Backup"}
+
+
+def wait_for(app, condition, timeout=5.0):
+    """Pumpt die Abfragen, die unter fake_tk nicht über root.after laufen, bis condition() gilt."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Zeitüberschreitung"
+        time.sleep(0.01)
+        app.poll_enumeration()
+        app.poll_verification()
+        if app.applying is not None:
+            app.poll_apply()
+
+
+@pytest.fixture
+def app(headless, monkeypatch):
+    """Fenster mit FakeBackend und gefüllter Tabelle; Dialoge werden still beantwortet."""
+    monkeypatch.setattr(drive_letter_manager.messagebox, "showinfo", lambda *a, **k: None)
+    monkeypatch.setattr(drive_letter_manager.messagebox, "showerror", lambda *a, **k: None)
+    monkeypatch.setattr(drive_letter_manager.messagebox, "showwarning", lambda *a, **k: None)
+    app = drive_letter_manager.DriveLetterManager(backends=[drive_backends.FakeBackend(VOLUMES)])
+    app.is_admin = lambda: True
+    wait_for(app, lambda: "table_populated" in app.startup_times)
+    yield app
+    app.enumeration_worker.cancel()
+    app.shutdown()
+    app.root.destroy()
+
+
+@pytest.fixture
+def blocked_apply(app):
+    """Ersetzt diskpart durch eine Funktion, die bis release.set() wartet und dann Erfolg meldet."""
+    release = threading.Event()
+
+    def apply(operations):
+        release.wait(5.0)
+        return [diskpart.DiskpartResult(operation, True, verified=True) for operation in operations]
+
+    app.apply_executor.apply_func = apply
+    yield release
+    release.set()
+
+
+def start_change(app, old="D:", new="X:"):
+    changes = [(old, new, VOLUMES[old])]
+    app.start_apply(app.plan_changes(changes), changes)
+
+
+def test_second_apply_while_applying_is_ignored(app, blocked_apply):
+    start_change(app)
+    start_change(app, "E:", "Y:")  # Darf nicht mit RuntimeError aus ApplyExecutor.start scheitern
+
+    assert app.applying[1] == [("D:", "X:", "Daten")]
+    blocked_apply.set()
+    wait_for(app, lambda: app.applying is None)
+
+
+def test_profile_buttons_disabled_while_applying(app, blocked_apply):
+    assert all(button.instate(["!disabled"]) for button in app.profile_buttons)
+
+    start_change(app)
+    assert all(button.instate(["disabled"]) for button in app.profile_buttons)
+    assert app.change_button.instate(["disabled"])
+
+    blocked_apply.set()
+    wait_for(app, lambda: app.applying is None and not app.progress_tasks)
+    assert all(button.instate(["!disabled"]) for button in app.profile_buttons)
+    assert app.change_button.instate(["!disabled"])
+
+
+def test_progress_stays_for_enumeration_after_apply_ends(app, blocked_apply):
+    start_change(app)
+    app.backends[0].delay = 0.5
+    app.drive_cache.invalidate()
+    app.refresh_drives()
+    assert app.progress_tasks == {"applying_changes", "loading_drives"}
+    assert app.progress_key == "applying_changes"
+
+    blocked_apply.set()
+    wait_for(app, lambda: app.applying is None and not app.verify_worker.busy)
+    # Die Ermittlung läuft noch: Anzeige und gesperrter Ändern-Button bleiben
+    assert app.enumeration_worker.busy
+    assert app.progress_tasks == {"loading_drives"}
+    assert app.progress_key == "loading_drives"
+    assert app.change_button.instate(["disabled"])
+
+    wait_for(app, lambda: not app.enumeration_worker.busy)
+    assert app.progress_tasks == set()
+    assert app.change_button.instate(["!disabled"])
+
+
+def test_enumeration_ending_during_apply_keeps_apply_progress(app, blocked_apply):
+    start_change(app)
+    app.refresh_drives()
+    wait_for(app, lambda: not app.enumeration_worker.busy)
+
+    assert app.progress_tasks == {"applying_changes"}
+    assert app.change_button.instate(["disabled"])
+    blocked_apply.set()
+
+
+def test_verification_probes_in_background(app, blocked_apply, monkeypatch):
+    backend = app.backends[0]
+    probed = threading.Event()
+
+    def slow_volume(letter):
+        assert threading.current_thread() is not threading.main_thread()
+        time.sleep(0.2)
+        probed.set()
+        return drive_backends.VolumeInfo("X:", "Daten") if letter == "X:" else None
+
+    monkeypatch.setattr(backend, "volume", slow_volume)
+    start_change(app)
+    blocked_apply.set()
+    wait_for(app, lambda: app.applying is None)
+
+    # Der Bericht ist da, die Nachprüfung läuft noch im Hintergrund
+    assert app.progress_tasks == {"verifying_changes"}
+    wait_for(app, lambda: not app.verify_worker.busy)
+    assert probed.is_set()
+    assert app.progress_tasks == set()
+    assert sorted(app.drives_data) == ["C:", "E:", "X:"]
+
+
+@pytest.fixture
+def enumeration_off_tk_thread(app, monkeypatch):
+    """Schlägt fehl, sobald der Tk-Thread selbst ermittelt; verzögert die Ermittlung im Hintergrund."""
+    original = app.drive_cache.get
+
+    def get():
+        assert threading.current_thread() is not threading.main_thread(), "Ermittlung im Tk-Thread"
+        time.sleep(0.1)
+        return original()
+
+    monkeypatch.setattr(app.drive_cache, "get", get)
+
+
+def test_export_profile_enumerates_in_background(app, enumeration_off_tk_thread, monkeypatch, tmp_path):
+    path = tmp_path / "layout.json"
+    monkeypatch.setattr(drive_letter_manager.filedialog, "asksaveasfilename", lambda **k: str(path))
+
+    app.export_profile()
+    assert not path.exists()
+    wait_for(app, path.exists)
+
+    profile = profiles.load_profile(str(path))
+    assert sorted((entry.letter, entry.label) for entry in profile.entries) == sorted(VOLUMES.items())
+
+
+def test_import_profile_matches_after_background_enumeration(app, enumeration_off_tk_thread,
+                                                            monkeypatch, tmp_path):
+    path = tmp_path / "layout.json"
+    profiles.save_profile(profiles.LayoutProfile("Ziel", [profiles.ProfileEntry("X:", None, "Daten")]), str(path))
+    monkeypatch.setattr(drive_letter_manager.filedialog, "askopenfilename", lambda **k: str(path))
+    requested = []
+    monkeypatch.setattr(app, "apply_changes", lambda changes, notes="": requested.append(changes))
+
+    app.import_profile()
+    assert requested == []
+    wait_for(app, lambda: requested)
+
+    assert requested == [[("D:", "X:", "Daten")]]
+
+
+def test_cancelled_enumeration_drops_profile_continuation(app, enumeration_off_tk_thread, monkeypatch, tmp_path):
+    path = tmp_path / "layout.json"
+    monkeypatch.setattr(drive_letter_manager.filedialog, "asksaveasfilename", lambda **k: str(path))
+
+    app.export_profile()
+    app.cancel_refresh()
+    app.refresh_drives()
+    wait_for(app, lambda: not app.enumeration_worker.busy)
+
+    assert not path.exists()
+
+
+def test_finished_apply_pokes_watcher(app, blocked_apply, monkeypatch):
+    pokes = []
+    monkeypatch.setattr(app.drive_watcher, "poke", lambda: pokes.append(True))
+    start_change(app)
+    assert pokes == []
+
+    blocked_apply.set()
+    wait_for(app, lambda: app.applying is None)
+    assert pokes == [True]
+
+
+def test_refresh_button_bypasses_drive_cache(app):
+    app.drive_watcher.stop()  # Der Watcher ermittelt sonst zwischendurch über dasselbe Backend
+    backend = app.backends[0]
+    calls = backend.calls
+    app.refresh_drives()
+    wait_for(app, lambda: not app.enumeration_worker.busy)
+    assert backend.calls == calls  # Interne Aktualisierung: Fingerabdruck unverändert, Cache gilt
+
+    app.on_refresh_click()
+    wait_for(app, lambda: not app.enumeration_worker.busy)
+    assert backend.calls == calls + 1
+    assert f"Cache: {app.drive_cache.hits}/{app.drive_cache.hits + app.drive_cache.misses}" in \
+        app.status_label.cget("text")
+
+
+def test_window_resize_is_traced_not_printed(app, monkeypatch):
+    printed = []
+    monkeypatch.setattr(drive_letter_manager, "print", lambda *a, **k: printed.append(a), raising=False)
+    tracing.clear()
+    tracing.enable()
+    try:
+        app.adjust_window_size()
+        [event] = [event for event in tracing.events() if event["name"] == "window.resize"]
+    finally:
+        tracing.disable()
+        tracing.clear()
+
+    assert event["args"] == {"drives": len(VOLUMES), "width": 1200, "height": 550, "visible_rows": len(VOLUMES)}
+    assert printed == []
+
+
+def test_moved_volume_is_shown_in_status_bar(app):
+    system = drive_backends.VolumeInfo("C:", "System", serial=1)
+    app.update_volumes([system, drive_backends.VolumeInfo("D:", "Daten", serial=2)])
+
+    app.report_index_changes(app.update_volumes([system, drive_backends.VolumeInfo("F:", "Daten", serial=2)]))
+    assert "Verschoben: Daten → F:" in app.status_label.cget("text")
+
+    app.report_index_changes(app.update_volumes([system, drive_backends.VolumeInfo("F:", "Daten", serial=2)]))
+    assert "Verschoben" not in app.status_label.cget("text")
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Tests für drive_service über einen Unix-Socket in tmp_path (FakeBackend, ReplayRunner)."""
+
+import os
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client
+
+import pytest
+
+import command_runner
+import diskpart
+import drive_backends
+import drive_service
+from drive_backends import FakeBackend, VolumeInfo
+from drive_service import DriveService, ServiceBackend, ServiceClient, ServiceError
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="Unix-Socket-Ersatz der Named Pipe")
+
+VOLUMES = [VolumeInfo("C:", "System", serial=1), VolumeInfo("D:", "Daten", serial=2)]
+
+
+class WholeListBackend(FakeBackend):
+    """Backend ohne Einzelabfragen (wie wmic)."""
+
+    supports_single_volume = False
+
+
+def succeed(operations):
+    return [diskpart.DiskpartResult(operation, True, verified=True) for operation in operations]
+
+
+def start_service(tmp_path, backend=None, admin=True, apply_func=succeed):
+    # Kurzer Dateiname: Unix-Socket-Pfade sind auf gut 100 Zeichen begrenzt
+    service = DriveService([backend or FakeBackend(VOLUMES)], address=str(tmp_path / "s.sock"),
+                           runner=command_runner.ReplayRunner([], admin=admin), apply_func=apply_func)
+    service.start()
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    return service, thread
+
+
+@pytest.fixture
+def service(tmp_path):
+    service, thread = start_service(tmp_path)
+    yield service
+    service.stop()
+    thread.join(5)
+
+
+def test_wrong_authkey_is_rejected(service):
+    with pytest.raises(AuthenticationError):
+        Client(service.address, authkey=b"falsch")
+
+    # Der Dienst nimmt danach weiter Verbindungen mit dem richtigen Schlüssel an
+    client = ServiceClient(service.address)
+    assert client.list()[0] == VOLUMES
+    client.close()
+
+
+def test_key_file_is_private(service):
+    assert os.stat(drive_service.key_path(service.address)).st_mode & 0o077 == 0
+
+
+def test_concurrent_list_from_several_clients(service):
+    backend = service.backends[0]
+    clients = [ServiceClient(service.address) for _ in range(6)]
+    results, errors = [], []
+
+    def work(client):
+        try:
+            for _ in range(5):
+                results.append(client.list())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert errors == []
+    assert results == [(VOLUMES, "fake")] * 30
+    # Alle Anfragen kommen aus dem warmen Cache
+    assert backend.calls == 1
+    for client in clients:
+        client.close()
+
+
+def test_apply_is_serialized(tmp_path):
+    active, peak, locked = [0], [0], []
+    counter = threading.Lock()
+
+    def apply(operations):
+        locked.append(service._apply_lock.locked())
+        with counter:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with counter:
+            active[0] -= 1
+        return succeed(operations)
+
+    service, thread = start_service(tmp_path, apply_func=apply)
+    try:
+        client = ServiceClient(service.address)
+        operations = [diskpart.DiskpartOperation("D:", "X:", "Daten")]
+        threads = [threading.Thread(target=client.apply_operations, args=(operations,)) for _ in range(4)]
+        for worker in threads:
+            worker.start()
+        for worker in threads:
+            worker.join(10)
+
+        assert peak[0] == 1
+        assert locked == [True] * 4
+        # Jede Änderung verwirft den Cache und geht in den Fingerabdruck ein
+        assert service.generation == 4
+        client.close()
+    finally:
+        service.stop()
+        thread.join(5)
+
+
+def test_apply_without_admin_is_refused(tmp_path):
+    service, thread = start_service(tmp_path, admin=False)
+    try:
+        client = ServiceClient(service.address)
+        assert client.admin is False
+        with pytest.raises(ServiceError) as info:
+            client.apply_operations([diskpart.DiskpartOperation("D:", "X:")])
+        assert info.value.kind == drive_service.KIND_NOT_ADMIN
+        client.close()
+    finally:
+        service.stop()
+        thread.join(5)
+
+
+def test_shutdown_stops_service_and_removes_key(tmp_path):
+    service, thread = start_service(tmp_path)
+    client = ServiceClient(service.address)
+
+    client.shutdown()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert not os.path.exists(drive_service.key_path(service.address))
+    with pytest.raises(ServiceError):
+        ServiceClient(service.address)
+    client.close()
+
+
+def test_second_service_on_same_address_is_refused(service, tmp_path):
+    with pytest.raises(ServiceError):
+        DriveService([FakeBackend(VOLUMES)], address=service.address,
+                     runner=command_runner.ReplayRunner([])).start()
+
+
+def test_service_backend_declares_single_volume_support(service):
+    client = ServiceClient(service.address)
+    backend = ServiceBackend(client)
+    assert backend.supports_single_volume
+    assert drive_backends.probe_letters([backend], ["d", "E:"]) == {"D:": VOLUMES[1], "E:": None}
+    client.close()
+
+
+def test_service_backend_without_single_volume_is_skipped(tmp_path):
+    service, thread = start_service(tmp_path, backend=WholeListBackend(VOLUMES))
+    try:
+        client = ServiceClient(service.address)
+        backend = ServiceBackend(client)
+        assert not backend.supports_single_volume
+        assert drive_backends.probe_letters([backend], ["D:"]) is None
+        assert backend.enumerate() == VOLUMES
+        client.close()
+    finally:
+        service.stop()
+        thread.join(5)
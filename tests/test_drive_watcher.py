@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Tests für drive_watcher mit gescripteter Sonde: Intervall, Abonnenten und Änderungen."""
+
+import time
+
+import pytest
+
+import drive_watcher
+from drive_backends import FakeBackend, VolumeInfo
+from drive_watcher import CHANGE_ADDED, CHANGE_RELABELED, CHANGE_REMOVED, DriveWatcher, diff_volumes
+
+
+BASE = [VolumeInfo("C:", "System", serial=1), VolumeInfo("D:", "Daten", serial=2)]
+
+
+class ScriptedProbe:
+    """Liefert nacheinander die vorgegebenen Bestände (danach immer den letzten); Ausnahmen werden geworfen."""
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.calls = 0
+
+    def __call__(self):
+        snapshot = self.snapshots[min(self.calls, len(self.snapshots) - 1)]
+        self.calls += 1
+        if isinstance(snapshot, Exception):
+            raise snapshot
+        return list(snapshot)
+
+
+class UnavailableBackend(FakeBackend):
+    def available(self):
+        return False
+
+
+class ExpensiveBackend(FakeBackend):
+    cheap = False
+
+
+def with_volume(*volumes):
+    return BASE + list(volumes)
+
+
+def watcher(probe):
+    return DriveWatcher(probe, min_interval=0.5, max_interval=4.0, backoff=2.0)
+
+
+def test_interval_backs_off_to_max_interval():
+    watch = watcher(ScriptedProbe(BASE))
+    intervals = []
+    for _ in range(6):
+        watch.check()
+        intervals.append(watch.interval)
+    assert intervals == [1.0, 2.0, 4.0, 4.0, 4.0, 4.0]
+
+
+def test_change_resets_interval_and_notifies_subscribers():
+    usb = VolumeInfo("F:", "USB", serial=3)
+    watch = watcher(ScriptedProbe(BASE, BASE, BASE, with_volume(usb), with_volume(usb)))
+    calls = []
+    watch.subscribe(lambda changes, volumes: calls.append((changes, volumes)))
+
+    for _ in range(3):
+        watch.check()
+    assert watch.interval == 4.0 and calls == []
+
+    changes = watch.check()
+    assert watch.interval == 0.5
+    assert [(change.kind, change.letter) for change in changes] == [(CHANGE_ADDED, "F:")]
+    assert calls == [(changes, with_volume(usb))]
+
+    watch.check()
+    assert watch.interval == 1.0 and len(calls) == 1
+
+
+def test_probe_errors_back_off_and_keep_snapshot():
+    usb = VolumeInfo("F:", "USB", serial=3)
+    watch = watcher(ScriptedProbe(BASE, OSError("weg"), with_volume(usb)))
+    watch.check()
+    assert watch.check() == [] and watch.errors == 1 and watch.interval == 2.0
+    # Verglichen wird mit dem Bestand vor dem Fehler
+    assert [change.letter for change in watch.check()] == ["F:"]
+
+
+def test_unsubscribed_callback_is_not_called():
+    watch = watcher(ScriptedProbe(BASE, with_volume(VolumeInfo("F:", serial=3)), BASE))
+    first, second = [], []
+    token = watch.subscribe(lambda changes, volumes: first.append(changes))
+    watch.subscribe(lambda changes, volumes: second.append(changes))
+
+    watch.check()
+    watch.check()
+    watch.unsubscribe(token)
+    watch.unsubscribe(token)  # Doppeltes Abmelden ist unschädlich
+    watch.check()
+
+    assert len(first) == 1 and len(second) == 2
+
+
+def test_poke_wakes_running_watcher():
+    probe = ScriptedProbe(BASE)
+    watch = DriveWatcher(probe, min_interval=30.0, max_interval=60.0)
+    watch.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        while watch.probes < 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        watch.poke()
+        while watch.probes < 2:
+            assert time.monotonic() < deadline, "poke() hat den Watcher nicht geweckt"
+            time.sleep(0.01)
+    finally:
+        watch.stop()
+
+
+@pytest.mark.parametrize("current, expected", [
+    (with_volume(VolumeInfo("F:", "USB", serial=3)), [(CHANGE_ADDED, "F:")]),
+    (BASE[:1], [(CHANGE_REMOVED, "D:")]),
+    ([BASE[0], VolumeInfo("D:", "Archiv", serial=2)], [(CHANGE_RELABELED, "D:")]),
+    # Anderer Datenträger unter demselben Buchstaben
+    ([BASE[0], VolumeInfo("D:", "Daten", serial=9)], [(CHANGE_REMOVED, "D:"), (CHANGE_ADDED, "D:")]),
+    (BASE, []),
+])
+def test_diff_volumes(current, expected):
+    changes = diff_volumes(BASE, current)
+    assert [(change.kind, change.letter) for change in changes] == expected
+    for change in changes:
+        assert (change.previous is None) == (change.kind == CHANGE_ADDED)
+        assert (change.volume is None) == (change.kind == CHANGE_REMOVED)
+
+
+def test_fingerprint_probe_enumerates_only_on_change():
+    backend = FakeBackend(list(BASE))
+    probe = drive_watcher.FingerprintProbe(backend)
+
+    assert probe() == BASE
+    assert probe() == BASE
+    assert backend.calls == 1
+
+    backend.volumes = [BASE[0], VolumeInfo("D:", "Archiv", serial=2)]
+    assert probe()[1].label == "Archiv"
+    assert backend.calls == 2
+
+
+def test_fingerprint_probe_retries_enumeration_after_error():
+    backend = FakeBackend(list(BASE))
+    probe = drive_watcher.FingerprintProbe(backend)
+    probe()
+    backend.volumes = with_volume(VolumeInfo("F:", serial=3))
+    backend.error = OSError("belegt")
+    with pytest.raises(OSError):
+        probe()
+    backend.error = None
+    assert [volume.letter for volume in probe()] == ["C:", "D:", "F:"]
+
+
+def test_default_probe_uses_first_cheap_available_backend():
+    cheap = FakeBackend(BASE)
+    probe = drive_watcher.default_probe([ExpensiveBackend(), UnavailableBackend(), cheap])
+    assert isinstance(probe, drive_watcher.FingerprintProbe) and probe.backend is cheap
+    assert drive_watcher.default_probe([ExpensiveBackend()]) is None
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Tests für fleet.py und den fleet-Befehl: Zeitgrenzen, Plätze und Transporte."""
+
+import json
+import socket
+import time
+
+import pytest
+
+import command_runner
+import drive_cli
+import fleet
+import profiles
+from drive_backends import FakeBackend
+
+PROFILE = profiles.LayoutProfile("Ziel", [profiles.ProfileEntry("X:", None, "Daten")])
+
+
+class HangingBackend(FakeBackend):
+    """Simulierter Rechner, dessen Ermittlung erst nach ``hang`` Sekunden antwortet."""
+
+    def __init__(self, hang):
+        super().__init__({"D:": "Daten"})
+        self.hang = hang
+
+    def enumerate(self):
+        time.sleep(self.hang)
+        return super().enumerate()
+
+
+def test_overdue_host_keeps_its_slot_until_call_ends():
+    transport = fleet.LocalTransport({"langsam": HangingBackend(0.5), "schnell": FakeBackend({"D:": "Daten"})})
+    reported = []
+
+    summary = fleet.run_fleet(["langsam", "schnell"], PROFILE, transport, workers=1, timeout=0.1,
+                              progress=lambda result, done, total: reported.append((result.host, time.monotonic())))
+
+    statuses = {result.host: result.status for result in summary.results}
+    assert statuses == {"langsam": fleet.STATUS_TIMEOUT, "schnell": fleet.STATUS_APPLIED}
+    assert "läuft noch" in summary.results[0].error
+    # Nie mehr Aufrufe gleichzeitig als Plätze, obwohl "langsam" schon nach 0,1 s gemeldet wurde
+    assert transport.peak == 1
+    assert reported[1][1] - reported[0][1] >= 0.3
+
+
+def test_overdue_host_is_not_awaited_at_the_end():
+    transport = fleet.LocalTransport({"hängt": HangingBackend(2.0)})
+    started = time.monotonic()
+
+    summary = fleet.run_fleet(["hängt"], PROFILE, transport, workers=4, timeout=0.1)
+
+    assert summary.results[0].status == fleet.STATUS_TIMEOUT
+    assert time.monotonic() - started < 1.0
+
+
+def test_slots_are_filled_in_parallel():
+    hosts = {f"pc{number}": FakeBackend({"D:": "Daten"}, delay=0.05) for number in range(8)}
+    transport = fleet.LocalTransport(hosts)
+
+    summary = fleet.run_fleet(hosts, PROFILE, transport, workers=4, timeout=5.0)
+
+    assert summary.ok and len(summary.results) == 8
+    assert transport.peak == 4
+
+
+@pytest.mark.parametrize("host", ["localhost", ".", "127.0.0.1", socket.gethostname().upper()])
+def test_is_local_host(host):
+    assert fleet.is_local_host(host)
+
+
+def test_transport_must_implement_enumerate_and_apply():
+    class EnumerateOnly(fleet.Transport):
+        def enumerate(self, host, timeout):
+            return []
+
+    with pytest.raises(TypeError, match="apply"):
+        EnumerateOnly()
+
+
+def test_local_transport_refuses_other_hosts():
+    with pytest.raises(fleet.TransportError):
+        fleet.LocalTransport().enumerate("server-im-keller", 1.0)
+
+    summary = fleet.run_fleet(["server-im-keller"], PROFILE, fleet.LocalTransport(), timeout=1.0)
+    assert summary.results[0].status == fleet.STATUS_ERROR
+
+
+def test_command_transport_ignores_unknown_volume_fields():
+    # Eine neuere Gegenseite liefert zusätzliche Felder; VolumeInfo(**volume) würde daran scheitern
+    argv = ["ssh", "pc1", "DriveLetterManagerCLI", "--json", "list"]
+    runner = command_runner.ReplayRunner([{"argv": argv, "returncode": 0, "stdout": json.dumps(
+        {"volumes": [{"letter": "D:", "label": "Daten", "serial": 1234, "health": "ok", "bus": "NVMe"}]})}])
+    transport = fleet.CommandTransport(["ssh", "{host}", "DriveLetterManagerCLI"], runner)
+
+    volumes = transport.enumerate("pc1", 5.0)
+
+    assert [(volume.letter, volume.label, volume.serial) for volume in volumes] == [("D:", "Daten", 1234)]
+    assert runner.calls == [tuple(argv)]
+
+
+def test_fleet_command_rejects_several_hosts_without_command(tmp_path, capsys):
+    path = tmp_path / "ziel.json"
+    profiles.save_profile(PROFILE, str(path))
+
+    code = drive_cli.main(["fleet", str(path), "--hosts", "pc1", "pc2"])
+
+    assert code == drive_cli.EXIT_USAGE
+    assert "--command" in capsys.readouterr().err
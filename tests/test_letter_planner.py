@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Eigenschaftstests für letter_planner.plan_changes mit zufälligen Zuordnungen."""
+
+import random
+
+import pytest
+
+from letter_planner import PlanError, available_letters, is_mount_path, normalize_target, plan_changes
+
+
+LETTERS = [f"{chr(code)}:" for code in range(ord("C"), ord("Z") + 1)]
+RUNS = 500
+
+
+def apply_plan(plan, used):
+    """
+    Führt die Schritte auf einem simulierten Bestand aus.
+
+    Returns:
+        Dict[str, str]: Ziel → ursprüngliches Ziel des Laufwerks, das es danach trägt
+    """
+    state = {target: target for target in used}
+    for step in plan.steps:
+        assert step.old_letter in state, f"{step.old_letter} ist bei {step} nicht belegt"
+        assert step.new_letter not in state, f"{step.new_letter} ist bei {step} noch belegt"
+        state[step.new_letter] = state.pop(step.old_letter)
+    return state
+
+
+def check_plan(mapping, used):
+    plan = plan_changes(mapping, used)
+    state = apply_plan(plan, used)
+
+    moves = {old: new for old, new in mapping.items() if old != new}
+    expected = {target: target for target in used if target not in moves}
+    expected.update({new: old for old, new in moves.items()})
+    assert state == expected
+    assert len(plan.steps) == len(moves) + len(plan.cycles)
+    if plan.temporary_letter is not None and plan.temporary_letter not in moves.values():
+        # Ein ausgeliehenes Kettenziel ist danach belegt, jeder andere temporäre Buchstabe wieder frei
+        assert plan.temporary_letter not in state
+    return plan
+
+
+def random_layout(rng):
+    """Belegte Buchstaben mit mindestens einem freien."""
+    return rng.sample(LETTERS, rng.randint(2, len(LETTERS) - 1))
+
+
+@pytest.mark.parametrize("seed", range(RUNS))
+def test_random_permutation(seed):
+    rng = random.Random(seed)
+    used = random_layout(rng)
+    sources = rng.sample(used, rng.randint(1, len(used)))
+    targets = list(sources)
+    rng.shuffle(targets)
+    check_plan(dict(zip(sources, targets)), used)
+
+
+@pytest.mark.parametrize("seed", range(RUNS))
+def test_random_chains_and_cycles(seed):
+    # Ziele sind verschobene oder freie Buchstaben: ergibt gemischte Ketten und Zyklen
+    rng = random.Random(seed)
+    used = random_layout(rng)
+    free = [letter for letter in LETTERS if letter not in used]
+    sources = rng.sample(used, rng.randint(1, len(used)))
+    targets = rng.sample(sources + free, len(sources))
+    check_plan(dict(zip(sources, targets)), used)
+
+
+def test_single_cycle_of_every_length():
+    for length in range(2, len(LETTERS)):
+        used = LETTERS[:length]
+        plan = check_plan({used[index]: used[(index + 1) % length] for index in range(length)}, used)
+        assert len(plan.cycles) == 1 and len(plan.steps) == length + 1
+
+
+def test_pure_chain_needs_no_temporary_letter():
+    plan = check_plan({"D:": "E:", "E:": "F:", "F:": "G:"}, ["C:", "D:", "E:", "F:"])
+    assert plan.cycles == [] and plan.temporary_letter is None
+    assert [(step.old_letter, step.new_letter) for step in plan.steps] == [("F:", "G:"), ("E:", "F:"), ("D:", "E:")]
+
+
+def test_chain_target_is_borrowed_when_it_is_the_only_free_letter():
+    used = [letter for letter in LETTERS if letter != "Z:"]
+    plan = check_plan({"D:": "E:", "E:": "D:", "F:": "Z:"}, used)
+    assert plan.temporary_letter == "Z:"
+
+
+def test_cycle_without_free_letter_fails():
+    with pytest.raises(PlanError):
+        plan_changes({"D:": "E:", "E:": "D:"}, LETTERS)
+
+
+def test_occupied_target_that_does_not_move_fails():
+    with pytest.raises(PlanError):
+        plan_changes({"D:": "E:"}, ["D:", "E:"])
+
+
+def test_duplicate_target_fails():
+    with pytest.raises(PlanError):
+        plan_changes({"D:": "X:", "E:": "X:"}, ["D:", "E:"])
+
+
+def test_available_letters_skip_floppy_and_used():
+    assert available_letters(["C:", "D:"]) == LETTERS[2:]
+
+
+@pytest.mark.parametrize("target, expected", [
+    ("C:\\Mounts\\Daten1", True),
+    ("c:/mounts/x/", True),
+    ("  C:\\Mounts  ", True),
+    ("D:\\", False),
+    ("D:/", False),
+    ("D:", False),
+    ("d", False),
+    ("D:Daten", False),
+    ("Mounts\\Daten", False),
+    ("\\\\server\\share", False),
+    ("", False),
+])
+def test_is_mount_path_needs_absolute_folder(target, expected):
+    assert is_mount_path(target) is expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("d", "D:"),
+    ("D:\\", "D:"),
+    ("d:/", "D:"),
+    ("c:\\Mounts\\Daten\\", "C:\\Mounts\\Daten"),
+    ("C:/Mounts/Daten", "C:\\Mounts\\Daten"),
+])
+def test_normalize_target(value, expected):
+    assert normalize_target(value) == expected
+
+
+@pytest.mark.parametrize("value", ["Mounts", "Mounts\\Daten", "D:Daten", "\\\\server\\share", "", "DE"])
+def test_normalize_target_rejects_relative_and_unknown_targets(value):
+    with pytest.raises(PlanError):
+        normalize_target(value)
+
+
+def test_mixed_chain_of_letters_and_folders():
+    used = ["C:", "D:", "E:", "C:\\Mounts\\Alt"]
+    plan = check_plan({"D:": "C:\\Mounts\\Daten", "E:": "D:", "C:\\Mounts\\Alt": "E:"}, used)
+    assert plan.cycles == [] and plan.temporary_letter is None
+    assert [(step.old_letter, step.new_letter) for step in plan.steps] == [
+        ("D:", "C:\\Mounts\\Daten"), ("E:", "D:"), ("C:\\Mounts\\Alt", "E:")]
+
+
+def test_swap_between_letter_and_folder_uses_temporary_letter():
+    plan = check_plan({"D:": "C:\\Mounts\\X", "C:\\Mounts\\X": "D:"}, ["C:", "D:", "C:\\Mounts\\X"])
+    assert len(plan.cycles) == 1 and plan.temporary_letter is not None
+
+
+def test_folder_to_folder_matches_existing_spelling():
+    used = ["C:", "D:", "C:\\Mounts\\Alt"]
+    plan = plan_changes({"c:/mounts/alt": "d:/Neu/"}, used)
+    assert [(step.old_letter, step.new_letter) for step in plan.steps] == [("C:\\Mounts\\Alt", "D:\\Neu")]
+
+
+def test_folder_on_moved_drive_fails():
+    with pytest.raises(PlanError, match="selbst verschoben"):
+        plan_changes({"D:": "F:", "E:": "D:\\Mounts\\E"}, ["C:", "D:", "E:"])
+
+
+def test_folder_on_missing_drive_fails():
+    with pytest.raises(PlanError, match="keinem vorhandenen Laufwerk"):
+        plan_changes({"E:": "X:\\Mounts\\E"}, ["C:", "E:"])
+
+
+def test_occupied_folder_fails():
+    with pytest.raises(PlanError, match="bereits ein Laufwerk bereitgestellt"):
+        plan_changes({"E:": "c:\\mounts\\daten"}, ["C:", "E:", "C:\\Mounts\\Daten"])
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Tests für powershell_worker.py gegen den Ersatzserver tests/fake_powershell.py."""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import drive_backends
+from powershell_worker import PowerShellWorker, PowerShellWorkerError
+
+
+STANDIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_powershell.py")
+
+
+def worker(*options, timeout=5.0):
+    return PowerShellWorker(command=[sys.executable, STANDIN, *options], timeout=timeout)
+
+
+def test_requests_reuse_one_process():
+    ps = worker()
+    try:
+        assert ps.request("echo", value=1)["value"] == 1
+        assert ps.request("echo", value=2)["value"] == 2
+        assert ps.starts == 1
+    finally:
+        ps.close()
+    assert not ps.running
+
+
+def test_error_response_keeps_process():
+    ps = worker()
+    try:
+        with pytest.raises(PowerShellWorkerError, match="Unbekannte Operation"):
+            ps.request("fail")
+        assert ps.request("echo")["op"] == "echo" and ps.starts == 1
+    finally:
+        ps.close()
+
+
+def test_non_protocol_lines_are_skipped():
+    ps = worker("--noise")
+    try:
+        assert ps.request("echo", text="a")["text"] == "a"
+    finally:
+        ps.close()
+
+
+def test_restarts_and_repeats_request_after_crash(tmp_path):
+    ps = worker("--crash-once", str(tmp_path / "crashed"))
+    try:
+        assert ps.request("echo", value=7)["value"] == 7
+        assert ps.starts == 2
+    finally:
+        ps.close()
+
+
+def test_repeated_crash_is_reported_and_next_request_restarts():
+    ps = worker()
+    try:
+        with pytest.raises(PowerShellWorkerError, match="beendet"):
+            ps.request("crash")
+        assert ps.request("echo")["op"] == "echo"
+        assert ps.starts == 3  # Zwei Versuche für "crash", ein Neustart für "echo"
+    finally:
+        ps.close()
+
+
+def test_hanging_request_times_out_and_process_is_replaced():
+    ps = worker(timeout=0.5)
+    try:
+        started = time.perf_counter()
+        with pytest.raises(PowerShellWorkerError, match="Keine Antwort"):
+            ps.request("hang")
+        assert time.perf_counter() - started < 3.0
+        assert not ps.running
+        assert ps.request("echo")["op"] == "echo" and ps.starts == 2
+    finally:
+        ps.close()
+
+
+def cancel_after(ps, seconds):
+    timer = threading.Timer(seconds, ps.cancel)
+    timer.start()
+    return timer
+
+
+def test_cancel_abandons_request_and_keeps_process():
+    ps = worker()
+    try:
+        cancel_after(ps, 0.1)
+        started = time.perf_counter()
+        with pytest.raises(PowerShellWorkerError, match="abgebrochen"):
+            ps.request("slow", seconds=0.5, value="alt")
+        assert time.perf_counter() - started < 0.4
+        assert ps.running and ps.abandoned == {1}
+
+        # Die verspätete Antwort auf die abgebrochene Anfrage wird anhand ihrer ID verworfen
+        assert ps.request("echo", value="neu")["value"] == "neu"
+        assert ps.abandoned == frozenset()
+        assert ps.starts == 1
+    finally:
+        ps.close()
+
+
+def test_cancel_without_pending_request_does_not_affect_next_one():
+    ps = worker()
+    try:
+        assert ps.request("echo", value=1)["value"] == 1
+        ps.cancel()
+        assert ps.request("echo", value=2)["value"] == 2
+        assert ps.starts == 1
+    finally:
+        ps.close()
+
+
+def test_cancelled_hanging_request_is_replaced_by_next_timeout():
+    ps = worker(timeout=0.5)
+    try:
+        cancel_after(ps, 0.1)
+        with pytest.raises(PowerShellWorkerError, match="abgebrochen"):
+            ps.request("hang")
+        # Der Prozess hängt weiter: die nächste Anfrage läuft in die Zeitgrenze und ersetzt ihn
+        with pytest.raises(PowerShellWorkerError, match="Keine Antwort"):
+            ps.request("echo")
+        assert ps.request("echo", value=3)["value"] == 3 and ps.starts == 2
+    finally:
+        ps.close()
+
+
+def test_backend_cancel_keeps_worker_warm():
+    ps = worker()
+    backend = drive_backends.PowerShellBackend(worker=ps)
+    try:
+        assert ps.request("echo")["op"] == "echo"
+        cancel_after(backend, 0.1)
+        with pytest.raises(PowerShellWorkerError):
+            ps.request("slow", seconds=0.3)
+        assert ps.running
+        assert backend.enumerate() == [] and ps.starts == 1
+    finally:
+        backend.close()
+
+
+def test_labels_with_commas_and_quotes():
+    records = [{"DeviceID": "D:", "VolumeName": "Daten, Archiv, 2024", "VolumeSerialNumber": "0000ABCD",
+                "FileSystem": "NTFS", "DriveType": 3, "Size": "1000", "FreeSpace": "10"},
+               {"DeviceID": "E:", "VolumeName": 'Fotos "Urlaub", Ä/Ö', "VolumeSerialNumber": None,
+                "FileSystem": "exFAT", "DriveType": 2, "Size": None, "FreeSpace": None}]
+    ps = worker("--volumes", json.dumps(records))
+    backend = drive_backends.PowerShellBackend(worker=ps)
+    try:
+        # "mounts" kennt der Ersatzserver nicht: die Buchstaben gelten trotzdem
+        volumes = backend.enumerate()
+    finally:
+        backend.close()
+    assert [(volume.letter, volume.label) for volume in volumes] == [
+        ("D:", "Daten, Archiv, 2024"), ("E:", 'Fotos "Urlaub", Ä/Ö')]
+    assert volumes[0].serial == 0xABCD
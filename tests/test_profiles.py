@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Tests für profiles: Abgleich über Seriennummer und Bezeichnung und die Idempotenz erfüllter Profile."""
+
+import json
+
+import pytest
+
+import diskpart
+import drive_backends
+import drive_cli
+import letter_planner
+import profiles
+from drive_backends import DEFAULT_LABEL, FakeBackend, VolumeInfo
+from profiles import LayoutProfile, ProfileEntry, ProfileError, match_profile
+
+
+VOLUMES = [VolumeInfo("C:", "System", serial=0x11110001), VolumeInfo("D:", "Daten", serial=0x22220002),
+           VolumeInfo("E:", "Backup", serial=0x33330003)]
+
+
+def profile(*entries):
+    return LayoutProfile("Test", list(entries))
+
+
+def plan_for(match, volumes=VOLUMES):
+    return letter_planner.plan_changes(match.mapping, drive_backends.used_targets(volumes))
+
+
+def test_serial_match_ignores_changed_label():
+    match = match_profile(profile(ProfileEntry("X:", 0x22220002, "Alter Name")), VOLUMES)
+
+    assert match.mapping == {"D:": "X:"}
+    assert not (match.missing or match.ambiguous)
+
+
+def test_serial_takes_precedence_over_label():
+    # Die Bezeichnung passt auf E:, die Seriennummer auf D:
+    match = match_profile(profile(ProfileEntry("X:", 0x22220002, "Backup")), VOLUMES)
+
+    assert match.mapping == {"D:": "X:"}
+
+
+def test_unknown_serial_falls_back_to_label():
+    # Profil von einem anderen Rechner: gleiche Bezeichnung, andere Seriennummer
+    match = match_profile(profile(ProfileEntry("B:", 0x99990009, "Backup")), VOLUMES)
+
+    assert match.mapping == {"E:": "B:"}
+
+
+def test_ambiguous_label_is_reported_and_not_mapped():
+    volumes = VOLUMES + [VolumeInfo("F:", "Backup", serial=0x44440004)]
+
+    match = match_profile(profile(ProfileEntry("B:", None, "Backup")), volumes)
+
+    assert match.ambiguous == [ProfileEntry("B:", None, "Backup")]
+    assert match.mapping == {} and match.missing == []
+
+
+def test_label_already_claimed_is_not_ambiguous():
+    volumes = VOLUMES + [VolumeInfo("F:", "Backup", serial=0x44440004)]
+
+    # Der erste Eintrag belegt E: über die Seriennummer, für den zweiten bleibt nur F:
+    match = match_profile(profile(ProfileEntry("E:", 0x33330003, "Backup"), ProfileEntry("G:", None, "Backup")),
+                          volumes)
+
+    assert match.mapping == {"F:": "G:"} and not match.ambiguous
+
+
+def test_missing_entries_are_reported():
+    entries = [ProfileEntry("X:", 0x99990009, "USB-Stick"), ProfileEntry("Y:", 0x88880008)]
+
+    match = match_profile(profile(*entries), VOLUMES)
+
+    assert match.missing == entries
+    assert match.mapping == {} and match.satisfied
+
+
+def test_volume_is_claimed_only_once():
+    entries = [ProfileEntry("D:", 0x22220002), ProfileEntry("X:", 0x22220002)]
+
+    match = match_profile(profile(*entries), VOLUMES)
+
+    assert match.missing == [entries[1]] and match.mapping == {}
+
+
+def test_satisfied_profile_yields_empty_plan():
+    layout = profiles.profile_from_volumes(VOLUMES, "Arbeitsplatz")
+
+    match = match_profile(layout, VOLUMES)
+
+    assert match.satisfied and match.mapping == {}
+    assert plan_for(match).steps == []
+
+
+def test_letter_case_does_not_count_as_change():
+    match = match_profile(profile(ProfileEntry("d:", 0x22220002)), VOLUMES)
+
+    assert match.satisfied
+
+
+@pytest.fixture
+def cli(monkeypatch):
+    """drive_cli mit FakeBackend; diskpart-Aufrufe werden nur aufgezeichnet."""
+    backend = FakeBackend(list(VOLUMES))
+    calls = []
+
+    def apply_operations(operations):
+        calls.append(list(operations))
+        return [diskpart.DiskpartResult(operation, True, verified=True) for operation in operations]
+
+    monkeypatch.setattr(drive_backends, "default_backends", lambda *args, **kwargs: [backend])
+    monkeypatch.setattr(diskpart, "is_admin", lambda: True)
+    monkeypatch.setattr(diskpart, "apply_operations", apply_operations)
+    return backend, calls
+
+
+def test_apply_satisfied_profile_makes_no_diskpart_call(cli, tmp_path, capsys):
+    backend, calls = cli
+    path = tmp_path / "profil.json"
+    profiles.save_profile(profiles.profile_from_volumes(VOLUMES), str(path))
+
+    assert drive_cli.main(["apply-profile", str(path), "--json"]) == drive_cli.EXIT_OK
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["ok"] and not output["applied"] and output["steps"] == []
+    assert calls == []
+
+
+def test_apply_profile_twice_applies_only_once(cli, tmp_path, capsys):
+    backend, calls = cli
+    path = tmp_path / "profil.json"
+    profiles.save_profile(profile(ProfileEntry("X:", 0x22220002)), str(path))
+
+    assert drive_cli.main(["apply-profile", str(path)]) == drive_cli.EXIT_OK
+    assert [[(op.old_letter, op.new_letter) for op in session] for session in calls] == [[("D:", "X:")]]
+
+    # Der Rechner hat das Profil jetzt übernommen; der zweite Lauf ändert nichts
+    backend.volumes = [VOLUMES[0], VolumeInfo("X:", "Daten", serial=0x22220002), VOLUMES[2]]
+    assert drive_cli.main(["apply-profile", str(path)]) == drive_cli.EXIT_OK
+    assert len(calls) == 1
+
+
+def test_profile_from_volumes_skips_unrecognizable_volumes():
+    volumes = VOLUMES + [VolumeInfo("F:", DEFAULT_LABEL), VolumeInfo("G:", "USB-Stick")]
+
+    layout = profiles.profile_from_volumes(volumes)
+
+    assert [entry.letter for entry in layout.entries] == ["C:", "D:", "E:", "G:"]
+    assert layout.entries[-1] == ProfileEntry("G:", None, "USB-Stick")
+
+
+def test_profile_round_trip(tmp_path):
+    layout = profiles.profile_from_volumes(VOLUMES, "Arbeitsplatz")
+    path = tmp_path / "profil.json"
+
+    profiles.save_profile(layout, str(path))
+
+    assert profiles.load_profile(str(path)) == layout
+    assert json.loads(path.read_text(encoding="utf-8"))["volumes"][1]["serial"] == "2222-0002"
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"name": "ohne Liste"},
+    {"version": profiles.PROFILE_VERSION + 1, "volumes": []},
+    {"volumes": [{"letter": "1:", "serial": "2222-0002"}]},
+    {"volumes": [{"letter": "D:", "label": "Daten"}, {"letter": "d", "label": "Backup"}]},
+    {"volumes": [{"letter": "D:"}]},
+    {"volumes": [{"letter": "D:", "serial": "kein-hex"}]},
+])
+def test_invalid_profile_is_rejected(data):
+    with pytest.raises(ProfileError):
+        profiles.profile_from_dict(data)
+
+
+def test_serial_formats():
+    assert profiles.format_serial(0x1A2B3C4D) == "1A2B-3C4D"
+    assert profiles.format_serial(None) is None
+    assert profiles.parse_serial("1A2B-3C4D") == profiles.parse_serial("1a2b3c4d") == 0x1A2B3C4D
+    assert profiles.parse_serial(42) == 42 and profiles.parse_serial("") is None
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Tests für das Startbudget: erstes Zeichnen und gefüllte Tabelle mit FakeBackend.
+
+Verwendet dieselbe Messung wie benchmarks/bench_startup.py (ohne Display über
+benchmarks/fake_tk, siehe Fixture headless) und prüft den langsamsten von drei
+Läufen gegen die dort hinterlegten Budgets.
+"""
+
+import string
+
+from benchmarks import bench_startup
+
+BUDGETS = {"first_paint": 0.3, "table_populated": 1.0}
+DELAY = 0.2
+RUNS = 3
+
+
+def test_startup_within_budget(headless):
+    """Schon der langsamste Lauf mit 24 Laufwerken bleibt in beiden Budgets."""
+    volumes = {f"{letter}:": f"Volume {letter}" for letter in string.ascii_uppercase[2:]}
+    worst = {}
+    for _ in range(RUNS):
+        times = bench_startup.start_once(volumes, DELAY, real_tk=False)
+        for key in BUDGETS:
+            worst[key] = max(worst.get(key, 0.0), times.get(key, float("inf")))
+
+    for key, budget in BUDGETS.items():
+        assert worst[key] <= budget, f"{key}: {worst[key] * 1000:.1f} ms > {budget * 1000:.0f} ms"
+
+
+def test_first_paint_does_not_wait_for_enumeration(headless):
+    """Das erste Zeichnen liegt vor dem Ende der (künstlich verzögerten) Ermittlung."""
+    volumes = {"C:": "System", "D:": "Daten"}
+    times = bench_startup.start_once(volumes, DELAY, real_tk=False)
+    assert times["first_paint"] < DELAY <= times["table_populated"]
+
+
+def test_startup_is_quiet(headless, monkeypatch):
+    """Die Messpunkte stehen in startup_times; auf der Konsole erscheint nichts."""
+    import drive_letter_manager
+
+    printed = []
+    monkeypatch.setattr(drive_letter_manager, "print", lambda *a, **k: printed.append(a), raising=False)
+    times = bench_startup.start_once({"C:": "System"}, 0.0, real_tk=False)
+    assert {"skeleton", "first_paint", "table_populated"} <= set(times)
+    assert printed == []
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Tests für tracing: Null-Span, complete events mit Fehlern und Chrome-Trace-Export."""
+
+import json
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def trace():
+    """Schaltet das Tracing für einen Test ein und hinterlässt es abgeschaltet und leer."""
+    was_enabled = tracing.is_enabled()
+    tracing.clear()
+    tracing.enable()
+    yield
+    if not was_enabled:
+        tracing.disable()
+    tracing.clear()
+
+
+@pytest.fixture
+def untraced():
+    was_enabled = tracing.is_enabled()
+    tracing.disable()
+    tracing.clear()
+    yield
+    if was_enabled:
+        tracing.enable()
+
+
+def test_disabled_span_is_shared_null_span(untraced):
+    first = tracing.span("a", "test", rows=1)
+    second = tracing.span("b")
+    assert first is tracing._NULL_SPAN and second is tracing._NULL_SPAN
+    with first as span:
+        span.set(rows=2)
+    assert tracing.events() == []
+
+
+def test_disabled_traced_calls_function_without_event(untraced):
+    @tracing.traced("work")
+    def work(value):
+        return value * 2
+
+    assert work(21) == 42
+    assert tracing.events() == []
+
+
+def test_span_records_complete_event(trace):
+    with tracing.span("enumerate", "backend", backend="fake") as span:
+        span.set(volumes=3)
+
+    [event] = tracing.events()
+    assert event["name"] == "enumerate" and event["cat"] == "backend" and event["ph"] == "X"
+    assert event["args"] == {"backend": "fake", "volumes": 3}
+    assert event["dur"] >= 0 and event["ts"] >= 0
+    assert {"pid", "tid"} <= set(event)
+
+
+def test_span_records_error_and_reraises(trace):
+    with pytest.raises(ValueError):
+        with tracing.span("apply", "diskpart"):
+            raise ValueError("belegt")
+
+    [event] = tracing.events()
+    assert event["args"]["error"] == "ValueError: belegt"
+
+
+def test_traced_records_calls_and_errors(trace):
+    @tracing.traced(category="ui")
+    def populate(fail=False):
+        if fail:
+            raise RuntimeError("kaputt")
+        return "ok"
+
+    assert populate() == "ok"
+    with pytest.raises(RuntimeError):
+        populate(fail=True)
+
+    ok, failed = tracing.events()
+    assert ok["name"] == failed["name"] == populate.__qualname__
+    assert ok["cat"] == "ui" and ok["ph"] == failed["ph"] == "X"
+    assert "error" not in ok["args"]
+    assert failed["args"]["error"] == "RuntimeError: kaputt"
+
+
+def test_export_chrome_trace_writes_valid_json(trace, tmp_path):
+    with tracing.span("first"):
+        pass
+    with tracing.span("zweiter", "ui", label="Lokaler Datenträger"):
+        pass
+    path = tmp_path / "trace.json"
+
+    tracing.export_chrome_trace(str(path))
+
+    document = json.loads(path.read_text(encoding="utf-8"))
+    assert [event["name"] for event in document["traceEvents"]] == ["first", "zweiter"]
+    assert document["traceEvents"][1]["args"] == {"label": "Lokaler Datenträger"}
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Tests für volume_index.VolumeIndex: stabile Schlüssel bei Buchstabenwechseln."""
+
+import pytest
+
+from drive_backends import VolumeInfo
+from volume_index import VolumeIndex
+
+
+SERIAL = 0x1234ABCD
+
+
+def guid(name):
+    return f"\\\\?\\Volume{{{name}}}\\"
+
+
+def clones():
+    """Zwei geklonte Datenträger mit derselben Seriennummer auf D: und E:."""
+    return [VolumeInfo("D:", "Original", serial=SERIAL), VolumeInfo("E:", "Klon", serial=SERIAL)]
+
+
+def keys_by_letter(index):
+    return {index.get(key).letter: key for key in index}
+
+
+@pytest.fixture
+def index():
+    index = VolumeIndex()
+    index.update([VolumeInfo("C:", "System", guid=guid("c")), VolumeInfo("D:", "Daten", guid=guid("d")),
+                  VolumeInfo("E:", "Backup", guid=guid("e"))])
+    return index
+
+
+def test_update_keeps_keys_of_cloned_serials_in_any_order():
+    index = VolumeIndex()
+    index.update(clones())
+    before = keys_by_letter(index)
+    assert len(set(before.values())) == 2
+
+    update = index.update(list(reversed(clones())))
+
+    assert keys_by_letter(index) == before
+    assert update.empty
+
+
+def test_update_prefers_target_match_when_cloned_serials_swap_letters():
+    index = VolumeIndex()
+    index.update(clones())
+    before = keys_by_letter(index)
+
+    update = index.update([VolumeInfo("E:", "Original", serial=SERIAL), VolumeInfo("D:", "Klon", serial=SERIAL)])
+
+    # Die Seriennummer unterscheidet die beiden nicht: jedes Ziel behält seinen Eintrag, kein "#3"
+    assert keys_by_letter(index) == before
+    assert sorted(update.changed) == sorted(before.values())
+    assert not (update.added or update.removed)
+
+
+def test_update_moves_clone_to_free_letter_under_its_key():
+    index = VolumeIndex()
+    index.update(clones())
+    before = keys_by_letter(index)
+
+    update = index.update([VolumeInfo("F:", "Klon", serial=SERIAL), VolumeInfo("D:", "Original", serial=SERIAL)])
+
+    assert keys_by_letter(index) == {"D:": before["D:"], "F:": before["E:"]}
+    assert update.describe() == "1 verschoben"
+
+
+@pytest.mark.parametrize("probed", [
+    {"D:": None, "F:": VolumeInfo("F:", "Daten", guid=guid("d"))},
+    {"F:": VolumeInfo("F:", "Daten", guid=guid("d")), "D:": None},
+])
+def test_merge_reports_probed_letter_change_as_move(index, probed):
+    key = index.key_for("D:")
+
+    update = index.merge(probed)
+
+    assert update.describe() == "1 verschoben"
+    assert index.key_for("F:") == key and index.key_for("D:") is None
+
+
+def test_merge_reports_probed_swap_as_two_moves(index):
+    keys = keys_by_letter(index)
+
+    update = index.merge({"D:": VolumeInfo("D:", "Backup", guid=guid("e")),
+                          "E:": VolumeInfo("E:", "Daten", guid=guid("d"))})
+
+    assert update.describe() == "2 verschoben"
+    assert (index.key_for("D:"), index.key_for("E:")) == (keys["E:"], keys["D:"])
+
+
+def test_merge_removes_volume_whose_letter_is_released(index):
+    key = index.key_for("E:")
+
+    update = index.merge({"E:": None})
+
+    assert update.removed == [key] and key not in index
+
+
+def test_move_keeps_key_of_volume_without_identity():
+    index = VolumeIndex()
+    index.update([VolumeInfo("D:", "Daten"), VolumeInfo("E:", "Backup")])
+    keys = keys_by_letter(index)
+
+    index.move("D:", "T:")
+    index.move("E:", "D:")
+    index.move("T:", "E:")
+    update = index.merge({"D:": VolumeInfo("D:", "Backup"), "E:": VolumeInfo("E:", "Daten")})
+
+    assert update.empty
+    assert (index.key_for("D:"), index.key_for("E:")) == (keys["E:"], keys["D:"])
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Tests für volume_metadata: TTL des Caches und der begrenzte Thread-Pool des MetadataLoader."""
+
+import threading
+import time
+
+import pytest
+
+from drive_backends import VolumeInfo
+from volume_metadata import MetadataCache, MetadataLoader, VolumeMetadata, cache_key, format_size
+
+
+VOLUMES = [VolumeInfo("C:", "System", serial=1), VolumeInfo("D:", "Netz", serial=2),
+           VolumeInfo("E:", "Backup", serial=3), VolumeInfo("F:", "USB", serial=4)]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class BlockingReader:
+    """Liest sofort, außer für die Buchstaben in ``blocked``: diese warten auf release()."""
+
+    def __init__(self, blocked=()):
+        self.blocked = set(blocked)
+        self.released = threading.Event()
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, letter):
+        with self._lock:
+            self.calls.append(letter)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if letter in self.blocked:
+                self.released.wait(10)
+            else:
+                time.sleep(0.01)
+            return VolumeMetadata(size=1000, free=500, filesystem="NTFS")
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def release(self):
+        self.released.set()
+
+
+def collect(loader, letters, timeout=5.0):
+    """Ruft poll() auf, bis für alle Buchstaben Ergebnisse da sind."""
+    results = {}
+    deadline = time.monotonic() + timeout
+    while not set(letters) <= set(results):
+        assert time.monotonic() < deadline, f"Zeitüberschreitung, bisher {sorted(results)}"
+        results.update(loader.poll())
+        time.sleep(0.005)
+    return results
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_cache_entry_expires_after_ttl(clock):
+    cache = MetadataCache(ttl=300.0, clock=clock)
+    metadata = VolumeMetadata(size=1)
+    cache.put("key", metadata)
+
+    clock.now += 299.9
+    assert cache.get("key") is metadata
+    clock.now += 0.1
+    assert cache.get("key") is None
+    # Abgelaufene Einträge werden entfernt, nicht nur versteckt
+    clock.now -= 1.0
+    assert cache.get("key") is None
+
+
+def test_cache_invalidate_single_key_and_all(clock):
+    cache = MetadataCache(clock=clock)
+    cache.put("a", VolumeMetadata(size=1))
+    cache.put("b", VolumeMetadata(size=2))
+
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("b").size == 2
+    cache.invalidate()
+    assert cache.get("b") is None
+
+
+def test_loader_reads_again_after_ttl(clock):
+    reader = BlockingReader()
+    loader = MetadataLoader(reader, cache=MetadataCache(ttl=60.0, clock=clock))
+    try:
+        assert loader.request(VOLUMES[:1]) == {}
+        collect(loader, ["C:"])
+
+        assert set(loader.request(VOLUMES[:1])) == {"C:"}
+        assert reader.calls == ["C:"]
+
+        clock.now += 60.0
+        assert loader.request(VOLUMES[:1]) == {}
+        collect(loader, ["C:"])
+        assert reader.calls == ["C:", "C:"]
+    finally:
+        loader.close()
+
+
+def test_slow_reader_does_not_delay_other_volumes():
+    reader = BlockingReader(blocked={"D:"})
+    loader = MetadataLoader(reader, workers=2)
+    try:
+        loader.request(VOLUMES)
+
+        results = collect(loader, ["C:", "E:", "F:"])
+        assert "D:" not in results and loader.busy
+
+        reader.release()
+        assert collect(loader, ["D:"])["D:"].filesystem == "NTFS"
+        assert not loader.busy
+    finally:
+        reader.release()
+        loader.close()
+
+
+def test_pool_bounds_concurrent_reads():
+    reader = BlockingReader()
+    volumes = [VolumeInfo(f"{letter}:", serial=number) for number, letter in enumerate("DEFGHIJKLM")]
+    loader = MetadataLoader(reader, workers=3)
+    try:
+        loader.request(volumes)
+        collect(loader, [volume.letter for volume in volumes])
+    finally:
+        loader.close()
+
+    assert sorted(reader.calls) == [volume.letter for volume in volumes]
+    assert reader.peak <= 3
+
+
+def test_same_volume_is_read_once_for_all_its_paths():
+    reader = BlockingReader(blocked={"D:"})
+    loader = MetadataLoader(reader)
+    try:
+        # Bereitstellungsordner desselben Volumes (gleiche Seriennummer) wartet auf dieselbe Abfrage
+        loader.request([VOLUMES[1], VolumeInfo("C:\\Mounts\\Netz\\", "Netz", serial=2)])
+        reader.release()
+        results = collect(loader, ["D:", "C:\\Mounts\\Netz\\"])
+    finally:
+        loader.close()
+
+    assert reader.calls == ["D:"]
+    assert results["D:"] is results["C:\\Mounts\\Netz\\"]
+
+
+def test_failed_read_is_not_cached():
+    calls = []
+
+    def reader(letter):
+        calls.append(letter)
+        if len(calls) == 1:
+            raise OSError("Gerät nicht bereit")
+        return VolumeMetadata(size=1)
+
+    loader = MetadataLoader(reader)
+    try:
+        loader.request(VOLUMES[:1])
+        assert collect(loader, ["C:"])["C:"].error == "Gerät nicht bereit"
+        loader.request(VOLUMES[:1])
+        assert collect(loader, ["C:"])["C:"].size == 1
+    finally:
+        loader.close()
+    assert calls == ["C:", "C:"]
+
+
+def test_loader_without_reader_starts_nothing():
+    loader = MetadataLoader()
+    loader.reader = None  # Auch unter Windows, wo default_reader() einen Leser liefert
+    assert loader.request(VOLUMES) == {} and not loader.enabled and not loader.busy
+    assert loader._executor is None
+
+
+def test_cache_key_prefers_guid_then_serial():
+    assert cache_key(VolumeInfo("D:", serial=2, guid="\\\\?\\volume{abc}\\")) == "\\\\?\\VOLUME{ABC}\\"
+    assert cache_key(VolumeInfo("D:", serial=2)) == 2
+    assert cache_key(VolumeInfo("Z:")) == "Z:"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, ""), (512, "512 B"), (1536, "1.5 KB"), (1000204886016, "932 GB"), (16 * 1024 ** 3, "16.0 GB"),
+])
+def test_format_size(value, expected):
+    assert format_size(value) == expected
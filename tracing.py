@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Span-Tracing für die heißen Pfade
+=================================
+
+Misst Abschnitte wie Backend-Aufrufe, diskpart-Sitzungen, Tabellenabgleich
+und Fenstergrößenanpassung als Spans und exportiert sie im Chrome-Trace-Format
+(laden in chrome://tracing oder https://ui.perfetto.dev).
+
+Abgeschaltet kostet ``span()`` nur eine Abfrage einer globalen Variable und
+liefert ein gemeinsames Null-Objekt. Eingeschaltet wird über ``enable()`` oder
+die Umgebungsvariable ``DLM_TRACE=<datei.json>``; dann wird der Trace beim
+Programmende in diese Datei geschrieben.
+
+    with tracing.span("enumerate", backend="native"):
+        ...
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+# Umgebungsvariable, die das Tracing beim Import einschaltet
+TRACE_ENV = "DLM_TRACE"
+
+_enabled = False
+_events: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+class _NullSpan:
+    """Span bei abgeschaltetem Tracing: tut nichts."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Ein laufender Span; wird beim Verlassen als "complete event" (ph=X) abgelegt."""
+
+    __slots__ = ("name", "category", "args", "started")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        ended = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        event = {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": (self.started - _origin) * 1e6,
+            "dur": (ended - self.started) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": self.args,
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+    def set(self, **args):
+        """Ergänzt Argumente, die erst im Verlauf bekannt werden (z.B. Anzahl der Zeilen)."""
+        self.args.update(args)
+
+
+def span(name: str, category: str = "app", **args):
+    """
+    Liefert einen Kontextmanager, der den umschlossenen Abschnitt misst.
+
+    Args:
+        name (str): Name des Spans
+        category (str): Kategorie für die Filterung im Trace-Viewer
+        **args: Zusätzliche Angaben, die im Trace erscheinen
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args)
+
+
+def traced(name: Optional[str] = None, category: str = "app"):
+    """Dekorator: misst jeden Aufruf der Funktion als Span."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def clear():
+    """Verwirft alle bisher aufgezeichneten Spans."""
+    with _lock:
+        _events.clear()
+
+
+def events() -> List[Dict[str, Any]]:
+    """Liefert eine Kopie der aufgezeichneten Spans."""
+    with _lock:
+        return list(_events)
+
+
+def chrome_trace() -> Dict[str, Any]:
+    """Liefert die Spans als Chrome-Trace-Dokument."""
+    return {"traceEvents": events(), "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path: str):
+    """Schreibt die Spans als Chrome-Trace-JSON-Datei."""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(chrome_trace(), handle, ensure_ascii=False)
+
+
+def _enable_from_environment():
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        enable()
+        atexit.register(export_chrome_trace, path)
+
+
+_enable_from_environment()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Volume-Index mit stabiler Identität
+===================================
+
+Die Backends liefern Laufwerke nach Buchstabe. Wer seinen Zustand ebenfalls
+nach Buchstabe ablegt, sieht in jeder Buchstabenänderung ein entferntes und
+ein neues Laufwerk und verliert dabei Zwischenergebnisse, Auswahl und
+vorgemerkte Änderungen. Der Index führt jedes Volume deshalb unter einem
+stabilen Schlüssel – dem Volume-GUID-Pfad ("\\\\?\\Volume{...}\\"), sonst der
+Seriennummer – und hält Buchstabe und Bereitstellungsordner nur als Attribute,
+mit einer Rückwärtssuche Ziel → Schlüssel.
+
+Volumes ohne GUID und Seriennummer (wmic, Netzlaufwerke, PathProbe) werden über
+ihr bisheriges Ziel wiedererkannt. Damit das auch nach einer Änderung gelingt,
+trägt move() die ausgeführten Schritte ein, bevor die Ergebnisse der Nachprüfung
+mit merge() übernommen werden. Zwei Volumes mit gleicher Bezeichnung (oder
+gleicher Seriennummer, etwa nach dem Klonen) bleiben getrennte Einträge.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from drive_backends import VolumeInfo
+from letter_planner import is_mount_path
+
+
+@dataclass
+class IndexUpdate:
+    """Schlüssel der Einträge, die sich bei update() oder merge() geändert haben."""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    moved: List[str] = field(default_factory=list)  # Buchstabe oder Ordner geändert
+    changed: List[str] = field(default_factory=list)  # Bezeichnung, Größe usw. geändert
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+    def describe(self) -> str:
+        """Kurzfassung für die Konsole, z.B. "1 neu, 2 verschoben"."""
+        parts = [(len(self.added), "neu"), (len(self.removed), "entfernt"),
+                 (len(self.moved), "verschoben"), (len(self.changed), "geändert")]
+        return ", ".join(f"{count} {name}" for count, name in parts if count) or "unverändert"
+
+
+def volume_identity(volume: VolumeInfo) -> Optional[str]:
+    """Volume-GUID-Pfad, sonst die Seriennummer; None, wenn das Backend keins von beiden liefert."""
+    if volume.guid:
+        return volume.guid.upper()
+    if volume.serial is not None:
+        return f"SERIAL:{volume.serial:08X}"
+    return None
+
+
+def volume_targets(volume: VolumeInfo) -> List[str]:
+    """Buchstabe bzw. erster Ordner, danach die weiteren Bereitstellungsordner."""
+    return [volume.letter] + list(volume.mount_points)
+
+
+class VolumeIndex:
+    """
+    Bestand der Volumes nach stabilem Schlüssel.
+
+    Der Schlüssel eines Eintrags ändert sich nie: Er wird beim ersten Auftreten
+    aus der Identität gebildet (bei Volumes ohne Identität aus dem Ziel) und
+    bleibt erhalten, auch wenn das Volume später eine Identität nachreicht oder
+    seinen Buchstaben wechselt.
+    """
+
+    def __init__(self):
+        self._volumes: Dict[str, VolumeInfo] = {}  # Schlüssel → aktueller Zustand
+        self._identities: Dict[str, str] = {}  # Identität → Schlüssel
+        self._targets: Dict[str, str] = {}  # Ziel in Großbuchstaben → Schlüssel
+
+    def __len__(self) -> int:
+        return len(self._volumes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._volumes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._volumes)
+
+    def get(self, key: str) -> Optional[VolumeInfo]:
+        return self._volumes.get(key)
+
+    def key_for(self, target: str) -> Optional[str]:
+        """Schlüssel des Volumes, das derzeit unter dem Buchstaben oder Ordner bereitgestellt ist."""
+        return self._targets.get(target.upper())
+
+    def volume_for(self, target: str) -> Optional[VolumeInfo]:
+        key = self.key_for(target)
+        return self._volumes.get(key) if key is not None else None
+
+    def volumes(self) -> List[VolumeInfo]:
+        return list(self._volumes.values())
+
+    def labels(self) -> Dict[str, str]:
+        """Buchstabe bzw. erster Ordner → Bezeichnung, wie drive_backends.volumes_to_dict."""
+        return {volume.letter: volume.label for volume in self._volumes.values()}
+
+    def update(self, volumes: Iterable[VolumeInfo]) -> IndexUpdate:
+        """
+        Gleicht den Index mit einer vollständigen Ermittlung ab.
+
+        Volumes werden zuerst über ihre Identität, dann über ihr bisheriges Ziel
+        wiedererkannt; nicht mehr gemeldete Einträge werden entfernt.
+
+        Returns:
+            IndexUpdate: Hinzugekommene, entfernte, verschobene und geänderte Einträge
+        """
+        result = IndexUpdate()
+        previous = dict(self._volumes)
+        volumes = list(volumes)
+        seen = set()
+        # Zuerst Volumes, die mit derselben Identität unter ihrem bisherigen Ziel stehen, damit
+        # geklonte Seriennummern unabhängig von der Reihenfolge ihre Einträge behalten
+        keys: List[Optional[str]] = []
+        for volume in volumes:
+            key = self._match_target(volume, seen, same_identity=True)
+            if key is not None:
+                seen.add(key)
+            keys.append(key)
+        for position, volume in enumerate(volumes):
+            if keys[position] is None:
+                keys[position] = self._resolve(volume, seen)
+                seen.add(keys[position])
+
+        self._volumes, self._identities, self._targets = {}, {}, {}
+        for key, volume in zip(keys, volumes):
+            self._store(key, volume, previous.get(key), result)
+        result.removed = [key for key in previous if key not in seen]
+        return result
+
+    def merge(self, probed: Dict[str, Optional[VolumeInfo]]) -> IndexUpdate:
+        """
+        Übernimmt Einzelabfragen (drive_backends.probe_letters) ohne vollständige Ermittlung.
+
+        Jede Abfrage ist für ihr Ziel maßgeblich: None gibt das Ziel frei, ein
+        Volume belegt es. Weitere Ziele eines bekannten Volumes bleiben erhalten,
+        auch wenn die Einzelabfrage sie nicht mitliefert. Alle Volumes werden
+        zugeordnet, bevor Ziele freigegeben werden; ein Volume, das ohne move()
+        den Buchstaben gewechselt hat, gilt so als verschoben statt als entfernt und neu.
+
+        Args:
+            probed (Dict[str, Optional[VolumeInfo]]): Ziel → Volume oder None (nicht belegt)
+
+        Returns:
+            IndexUpdate: Hinzugekommene, entfernte, verschobene und geänderte Einträge
+        """
+        result = IndexUpdate()
+        keys = {target: self._resolve(volume, set()) for target, volume in probed.items() if volume is not None}
+        pending = Counter(keys.values())  # Schlüssel, die noch ein Ziel erhalten
+        for target, volume in probed.items():
+            key = keys.get(target)
+            if key is not None:
+                pending[key] -= 1
+            holder = self.key_for(target)
+            if holder is not None and holder != key:
+                self._release(holder, target, result, keep=pending[holder] > 0)
+            if volume is None:
+                continue
+
+            old = self._volumes.get(key)
+            targets = volume_targets(old if old is not None else volume)
+            if is_mount_path(target):
+                if not any(existing.upper() == target.upper() for existing in targets):
+                    targets.append(target)
+            else:
+                # Ein Volume hat höchstens einen Buchstaben; ein bisheriger Ordner als erstes Ziel rückt nach hinten
+                targets = [target] + [existing for existing in targets if is_mount_path(existing)]
+            self._forget(key)
+            self._store(key, replace(volume, letter=targets[0], mount_points=targets[1:]), old, result)
+        return result
+
+    def move(self, old_target: str, new_target: str) -> Optional[str]:
+        """
+        Trägt einen ausgeführten Schritt ein (Buchstabe oder Ordner old_target → new_target).
+
+        Returns:
+            Optional[str]: Schlüssel des verschobenen Volumes, None wenn old_target unbekannt ist
+        """
+        key = self.key_for(old_target)
+        if key is None:
+            return None
+        volume = self._volumes[key]
+        targets = [new_target if existing.upper() == old_target.upper() else existing
+                   for existing in volume_targets(volume)]
+        # Buchstaben vor Ordnern, wie bei der Ermittlung
+        targets.sort(key=is_mount_path)
+        self._forget(key)
+        self._store(key, replace(volume, letter=targets[0], mount_points=targets[1:]), None, None)
+        return key
+
+    def _resolve(self, volume: VolumeInfo, taken: set) -> str:
+        """
+        Findet den Schlüssel eines gemeldeten Volumes oder vergibt einen neuen.
+
+        Reihenfolge: gleiche Identität unter einem bisherigen Ziel, dann die
+        Identität allein (bei geklonten Seriennummern jeder noch freie Eintrag
+        mit ihr), dann ein bisheriges Ziel ohne widersprechende Identität. Ein
+        neuer Schlüssel mit Zusatz "#n" entsteht nur, wenn nichts davon passt.
+        """
+        key = self._match_target(volume, taken, same_identity=True)
+        if key is not None:
+            return key
+
+        identity = volume_identity(volume)
+        if identity is not None:
+            key = self._identities.get(identity)
+            if key is None or key in taken:
+                key = next((other for other, known in self._volumes.items()
+                            if other not in taken and volume_identity(known) == identity), None)
+            if key is not None:
+                return key
+
+        # Ohne (eindeutige) Identität: das Volume, das bisher unter einem seiner Ziele stand,
+        # sofern dessen Identität nicht widerspricht (anderer Datenträger unter demselben Buchstaben)
+        key = self._match_target(volume, taken, same_identity=False)
+        if key is not None:
+            return key
+
+        base = identity if identity is not None else f"TARGET:{volume.letter.upper()}"
+        key, suffix = base, 1
+        while key in self._volumes or key in taken:
+            suffix += 1
+            key = f"{base}#{suffix}"
+        return key
+
+    def _match_target(self, volume: VolumeInfo, taken: set, same_identity: bool) -> Optional[str]:
+        """
+        Schlüssel des Eintrags, der bisher unter einem der Ziele des Volumes stand.
+
+        Args:
+            same_identity (bool): True verlangt auf beiden Seiten dieselbe Identität,
+                False lässt auch eine fehlende Identität auf einer Seite zu
+        """
+        identity = volume_identity(volume)
+        if same_identity and identity is None:
+            return None
+        for target in volume_targets(volume):
+            key = self.key_for(target)
+            if key is None or key in taken:
+                continue
+            known = volume_identity(self._volumes[key])
+            if known == identity or (not same_identity and (identity is None or known is None)):
+                return key
+        return None
+
+    def _store(self, key: str, volume: VolumeInfo, old: Optional[VolumeInfo],
+               result: Optional[IndexUpdate]):
+        """Legt den Zustand ab, aktualisiert die Rückwärtssuche und vermerkt die Änderung."""
+        self._volumes[key] = volume
+        identity = volume_identity(volume)
+        if identity is not None:
+            self._identities.setdefault(identity, key)
+        for target in volume_targets(volume):
+            self._targets[target.upper()] = key
+
+        if result is None:
+            return
+        if old is None:
+            result.added.append(key)
+        elif [t.upper() for t in volume_targets(old)] != [t.upper() for t in volume_targets(volume)]:
+            result.moved.append(key)
+        elif old != volume:
+            result.changed.append(key)
+
+    def _forget(self, key: str):
+        """Entfernt die Rückwärtsverweise eines Eintrags (der Eintrag selbst bleibt)."""
+        volume = self._volumes.get(key)
+        if volume is None:
+            return
+        for target in volume_targets(volume):
+            if self._targets.get(target.upper()) == key:
+                del self._targets[target.upper()]
+        identity = volume_identity(volume)
+        if identity is not None and self._identities.get(identity) == key:
+            del self._identities[identity]
+
+    def _release(self, key: str, target: str, result: IndexUpdate, keep: bool = False):
+        """
+        Nimmt einem Eintrag ein Ziel weg; ohne verbleibende Ziele wird er entfernt.
+
+        Args:
+            keep (bool): Eintrag auch ohne Ziele behalten, weil er im selben merge() ein neues erhält
+        """
+        volume = self._volumes[key]
+        targets = [existing for existing in volume_targets(volume) if existing.upper() != target.upper()]
+        self._forget(key)
+        if not targets and keep:
+            return
+        if not targets:
+            del self._volumes[key]
+            result.removed.append(key)
+            return
+        self._store(key, replace(volume, letter=targets[0], mount_points=targets[1:]), volume, result)
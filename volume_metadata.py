@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nachgeladene Laufwerksdetails
+=============================
+
+Größe, freier Speicher, Dateisystem, Laufwerkstyp sowie Datenträger- und
+Partitionsnummer werden nicht bei der Ermittlung gelesen, sondern danach
+einzeln pro Laufwerk in einem kleinen Thread-Pool: Eine schlafende Festplatte
+oder eine hängende Netzwerkfreigabe belegt nur einen Worker und hält nur ihre
+eigene Zeile auf, während die übrigen Laufwerke weiter abgefragt werden. Die
+Oberfläche holt die Ergebnisse per ``root.after`` über ``MetadataLoader.poll`` ab.
+
+Die Ergebnisse werden pro Seriennummer (ersatzweise pro Buchstabe) mit einer
+TTL zwischengespeichert; nach einer Buchstabenänderung sind die Details des
+Laufwerks daher sofort wieder da.
+"""
+
+import ctypes
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import tracing
+from drive_backends import INVALID_HANDLE_VALUE, SEM_FAILCRITICALERRORS, VOLUME_NAME_LENGTH, VolumeInfo
+from letter_planner import is_mount_path
+
+
+# Steuercode für DeviceIoControl: Datenträger- und Partitionsnummer eines Volumes
+IOCTL_STORAGE_GET_DEVICE_NUMBER = 0x002D1080
+
+FILE_SHARE_READ = 0x00000001
+FILE_SHARE_WRITE = 0x00000002
+OPEN_EXISTING = 3
+
+# Gleichzeitige Abfragen; wenige genügen, da die meisten Laufwerke sofort antworten
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class VolumeMetadata:
+    """Nachgeladene Details eines Laufwerks; None bedeutet: nicht ermittelbar."""
+
+    size: Optional[int] = None
+    free: Optional[int] = None
+    filesystem: str = ""
+    drive_type: Optional[int] = None
+    disk_number: Optional[int] = None
+    partition_number: Optional[int] = None
+    error: str = ""
+
+
+MetadataReader = Callable[[str], VolumeMetadata]
+
+
+class _StorageDeviceNumber(ctypes.Structure):
+    _fields_ = [("DeviceType", ctypes.c_ulong),
+                ("DeviceNumber", ctypes.c_ulong),
+                ("PartitionNumber", ctypes.c_ulong)]
+
+
+def format_size(value: Optional[int]) -> str:
+    """Formatiert eine Byte-Angabe wie der Explorer (z.B. "931 GB" oder "14.9 GB")."""
+    if value is None:
+        return ""
+    size = float(value)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            break
+        size /= 1024
+    if unit == "B" or size >= 100:
+        return f"{size:.0f} {unit}"
+    return f"{size:.1f} {unit}"
+
+
+def cache_key(volume: VolumeInfo) -> Hashable:
+    """Volume-GUID-Pfad oder Seriennummer; ohne beides (Netzlaufwerk, leeres Laufwerk) der Buchstabe."""
+    if volume.guid:
+        return volume.guid.upper()
+    return volume.serial if volume.serial is not None else volume.letter
+
+
+def read_native_metadata(letter: str) -> VolumeMetadata:
+    """
+    Liest die Details eines Laufwerks ("D:" oder Bereitstellungsordner) über Win32
+    (GetDiskFreeSpaceExW, GetVolumeInformationW, IOCTL_STORAGE_GET_DEVICE_NUMBER).
+
+    Fehlschläge einzelner Abfragen lassen nur die betroffenen Felder leer.
+    """
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateFileW.restype = ctypes.c_void_p
+    root = letter.rstrip("\\") + "\\" if is_mount_path(letter) else f"{letter[0].upper()}:\\"
+
+    # SetThreadErrorMode statt SetErrorMode: mehrere Leser laufen parallel
+    old_mode = ctypes.c_uint32()
+    kernel32.SetThreadErrorMode(SEM_FAILCRITICALERRORS, ctypes.byref(old_mode))
+    try:
+        metadata = VolumeMetadata(drive_type=kernel32.GetDriveTypeW(ctypes.c_wchar_p(root)))
+
+        free, total = ctypes.c_ulonglong(), ctypes.c_ulonglong()
+        if kernel32.GetDiskFreeSpaceExW(ctypes.c_wchar_p(root), ctypes.byref(free),
+                                        ctypes.byref(total), None):
+            metadata.size, metadata.free = total.value, free.value
+
+        fs_buffer = ctypes.create_unicode_buffer(261)
+        if kernel32.GetVolumeInformationW(ctypes.c_wchar_p(root), None, 0, None, None, None,
+                                          fs_buffer, len(fs_buffer)):
+            metadata.filesystem = fs_buffer.value
+
+        # Ordner haben keinen Gerätenamen; das Volume wird über seinen GUID-Pfad geöffnet
+        device = f"\\\\.\\{root[:2]}"
+        if is_mount_path(letter):
+            name = ctypes.create_unicode_buffer(VOLUME_NAME_LENGTH)
+            device = (name.value.rstrip("\\") if kernel32.GetVolumeNameForVolumeMountPointW(
+                ctypes.c_wchar_p(root), name, len(name)) else "")
+
+        # Öffnen ohne Zugriffsrechte genügt für die Abfrage und braucht keine Administratorrechte
+        handle = kernel32.CreateFileW(ctypes.c_wchar_p(device), 0,
+                                      FILE_SHARE_READ | FILE_SHARE_WRITE, None, OPEN_EXISTING, 0, None)
+        if handle not in (None, INVALID_HANDLE_VALUE):
+            try:
+                number = _StorageDeviceNumber()
+                returned = ctypes.c_ulong()
+                if kernel32.DeviceIoControl(ctypes.c_void_p(handle), IOCTL_STORAGE_GET_DEVICE_NUMBER, None, 0,
+                                            ctypes.byref(number), ctypes.sizeof(number),
+                                            ctypes.byref(returned), None):
+                    metadata.disk_number = number.DeviceNumber
+                    metadata.partition_number = number.PartitionNumber
+            finally:
+                kernel32.CloseHandle(ctypes.c_void_p(handle))
+        return metadata
+    finally:
+        kernel32.SetThreadErrorMode(old_mode.value, None)
+
+
+def default_reader() -> Optional[MetadataReader]:
+    """Liefert den Leser für dieses System; None, wenn keiner verfügbar ist (z.B. unter Linux)."""
+    if os.name == "nt" and hasattr(ctypes, "WinDLL"):
+        return read_native_metadata
+    return None
+
+
+class MetadataCache:
+    """Zwischenspeicher für VolumeMetadata mit TTL, geschlüsselt über cache_key."""
+
+    def __init__(self, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl (float): Maximales Alter eines Eintrags in Sekunden
+            clock (Callable[[], float]): Zeitquelle (austauschbar für Tests)
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: Dict[Hashable, Tuple[float, VolumeMetadata]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[VolumeMetadata]:
+        """Liefert den Eintrag, solange er jünger als die TTL ist."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.clock() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: Hashable, metadata: VolumeMetadata):
+        with self._lock:
+            self._entries[key] = (self.clock(), metadata)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Verwirft einen Eintrag oder, ohne Schlüssel, alle."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class MetadataLoader:
+    """Lädt VolumeMetadata für Laufwerke ohne gültigen Cache-Eintrag in einem begrenzten Thread-Pool."""
+
+    def __init__(self, reader: Optional[MetadataReader] = None, ttl: float = 300.0,
+                 cache: Optional[MetadataCache] = None, workers: int = DEFAULT_WORKERS):
+        """
+        Args:
+            reader (Optional[MetadataReader]): Liest die Details zu einem Buchstaben;
+                Standard ist default_reader(), ohne Leser wird nichts nachgeladen
+            ttl (float): Gültigkeit der Cache-Einträge in Sekunden
+            cache (Optional[MetadataCache]): Zu verwendender Cache (z.B. mit eigener Zeitquelle)
+            workers (int): Höchstzahl gleichzeitig abgefragter Laufwerke
+        """
+        self.reader = reader if reader is not None else default_reader()
+        self.cache = cache or MetadataCache(ttl)
+        self.workers = max(1, workers)
+        # Erst bei der ersten Abfrage angelegt; ohne Leser entstehen keine Threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        # Laufende Abfragen: Schlüssel → Buchstaben, die auf das Ergebnis warten
+        self._waiting: Dict[Hashable, Set[str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.reader is not None
+
+    @property
+    def busy(self) -> bool:
+        """True, solange noch Abfragen laufen oder Ergebnisse abzuholen sind."""
+        with self._lock:
+            return bool(self._waiting) or not self._results.empty()
+
+    def request(self, volumes: Iterable[VolumeInfo]) -> Dict[str, VolumeMetadata]:
+        """
+        Fordert die Details der Laufwerke an.
+
+        Returns:
+            Dict[str, VolumeMetadata]: Bereits zwischengespeicherte Details nach Buchstabe;
+            die übrigen folgen über poll()
+        """
+        known = {}
+        if self.reader is None:
+            return known
+
+        for volume in volumes:
+            key = cache_key(volume)
+            cached = self.cache.get(key)
+            if cached is not None:
+                known[volume.letter] = cached
+                continue
+
+            with self._lock:
+                letters = self._waiting.get(key)
+                if letters is not None:
+                    letters.add(volume.letter)
+                    continue
+                self._waiting[key] = {volume.letter}
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="volume-metadata")
+            self._executor.submit(self._run, key, volume.letter)
+        return known
+
+    def poll(self) -> List[Tuple[str, VolumeMetadata]]:
+        """Liefert die seit dem letzten Aufruf eingetroffenen Details als (Buchstabe, Details)."""
+        results = []
+        while True:
+            try:
+                key, metadata = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                letters = self._waiting.pop(key, set())
+            results.extend((letter, metadata) for letter in sorted(letters))
+        return results
+
+    def invalidate(self):
+        """Verwirft alle zwischengespeicherten Details, z.B. für eine vollständige Aktualisierung."""
+        self.cache.invalidate()
+
+    def close(self):
+        """Nimmt keine Abfragen mehr an; laufende Abfragen werden nicht abgewartet."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run(self, key: Hashable, letter: str):
+        with tracing.span("metadata", "backend", letter=letter):
+            try:
+                metadata = self.reader(letter)
+            except Exception as e:
+                metadata = VolumeMetadata(error=str(e))
+        if not metadata.error:
+            # Fehlschläge nicht zwischenspeichern, damit die nächste Aktualisierung es erneut versucht
+            self.cache.put(key, metadata)
+        self._results.put((key, metadata))